@@ -255,6 +255,12 @@ async def metrics_route(request: Request) -> JSONResponse:
                 "pool_min_connections": pool_stats.get("minconn", 0),
                 "pool_max_connections": pool_stats.get("maxconn", 0),
                 "pool_closed": pool_stats.get("closed", True),
+                "pool_in_use": pool_stats.get("in_use", 0),
+                "pool_peak_in_use": pool_stats.get("peak_in_use", 0),
+                "pool_checkouts": pool_stats.get("checkouts", 0),
+                "pool_avg_wait_ms": pool_stats.get("avg_wait_ms", 0.0),
+                "pool_avg_checkout_ms": pool_stats.get("avg_checkout_ms", 0.0),
+                "pool_validations": pool_stats.get("validations", 0),
             }
         except Exception as e:
             logger.warning(f"Failed to collect database metrics: {e}")
@@ -432,6 +432,49 @@ def generate_openapi_schema() -> Dict[str, Any]:
                     }
                 }
             },
+            "/api/rag/query": {
+                "post": {
+                    "summary": "Ask the project RAG system a question",
+                    "description": "Returns the answer as JSON, or as Server-Sent Events while it is generated when stream is true",
+                    "requestBody": {
+                        "required": True,
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "required": ["token", "query"],
+                                    "properties": {
+                                        "token": {"type": "string"},
+                                        "query": {"type": "string"},
+                                        "format": {"type": "string", "enum": ["json", "toon"]},
+                                        "stream": {"type": "boolean"}
+                                    }
+                                }
+                            }
+                        }
+                    },
+                    "responses": {
+                        "200": {
+                            "description": "Answer",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "object",
+                                        "properties": {"answer": {"type": "string"}}
+                                    }
+                                },
+                                "text/event-stream": {
+                                    "schema": {
+                                        "type": "string",
+                                        "description": "data: {\"delta\": ...} events followed by event: done"
+                                    }
+                                }
+                            }
+                        },
+                        "401": {"description": "Invalid agent token"}
+                    }
+                }
+            },
             "/api/security/alerts": {
                 "get": {
                     "summary": "Get recent security alerts",
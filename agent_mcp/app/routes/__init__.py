@@ -25,6 +25,7 @@ from .memory import routes as memory_routes
 from .security import routes as security_routes
 from .tasks import routes as task_routes
 from .mcp import routes as mcp_routes
+from .rag import routes as rag_routes
 from .websocket import routes as websocket_routes
 from .config import routes as config_routes
 
@@ -50,6 +51,7 @@ routes.extend(memory_routes)
 routes.extend(security_routes)
 routes.extend(task_routes)
 routes.extend(mcp_routes)
+routes.extend(rag_routes)
 routes.extend(config_routes)
 
 # Add prompt routes
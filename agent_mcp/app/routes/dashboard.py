@@ -22,6 +22,7 @@ from ...utils.error_handlers import (
 )
 from ...db import db_connection
 from ...db.actions.agent_actions_db import log_agent_action_to_db
+from ...db.actions.task_db import append_task_notes, attach_task_notes
 from ...features.dashboard.api import (
     fetch_graph_data_logic,
     fetch_task_tree_data_logic
@@ -112,7 +113,7 @@ async def node_details_api_route(request: Request) -> JSONResponse:
             elif node_type_from_id == 'task':
                 cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (actual_id_from_node,))
                 row = cursor.fetchone()
-                if row: details['data'] = serialize_datetime(dict(row))
+                if row: details['data'] = serialize_datetime(attach_task_notes(cursor, [dict(row)])[0])
                 cursor.execute("SELECT timestamp, agent_id, action_type, details FROM agent_actions WHERE task_id = %s ORDER BY timestamp DESC LIMIT 10", (actual_id_from_node,))
                 details['actions'] = [serialize_datetime(dict(r)) for r in cursor.fetchall()]
             elif node_type_from_id == 'context':
@@ -174,7 +175,10 @@ async def all_tasks_api_route(request: Request) -> JSONResponse:
         with db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM tasks ORDER BY created_at DESC")
-            tasks_data = [serialize_datetime(dict(row)) for row in cursor.fetchall()]
+            tasks_data = [
+                serialize_datetime(task)
+                for task in attach_task_notes(cursor, [dict(row) for row in cursor.fetchall()], all_tasks=True)
+            ]
             return JSONResponse(tasks_data)
     except Exception as e:
         log_error(e, context={"operation": "fetch_all_tasks"}, request=request)
@@ -191,7 +195,6 @@ async def update_task_details_api_route(request: Request) -> JSONResponse:
             include_traceback=False
         )
     try:
-        import json
         data = await get_sanitized_json_body(request)
         admin_auth_token = data.get('token')
         task_id_to_update = data.get('task_id')
@@ -209,14 +212,14 @@ async def update_task_details_api_route(request: Request) -> JSONResponse:
         requesting_admin_id = auth_get_agent_id(admin_auth_token)
         with db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT notes FROM tasks WHERE task_id = %s", (task_id_to_update,))
+            cursor.execute("SELECT task_id FROM tasks WHERE task_id = %s", (task_id_to_update,))
             task_row = cursor.fetchone()
             if not task_row:
                 return create_error_response(
                     NotFoundError(f"Task '{task_id_to_update}' not found", details={"task_id": task_id_to_update}),
                     include_traceback=False
                 )
-            existing_notes_str = task_row["notes"]
+            new_note_entry = None
             update_fields: List[str] = []
             params: List[Any] = []
             log_details: Dict[str, Any] = {"status_updated_to": new_status}
@@ -237,33 +240,23 @@ async def update_task_details_api_route(request: Request) -> JSONResponse:
                 params.append(data['priority'])
                 log_details["priority_changed"] = True
             if 'notes' in data and data['notes'] and isinstance(data['notes'], str) and data['notes'].strip():
-                try:
-                    current_notes_list = json.loads(existing_notes_str or "[]")
-                except json.JSONDecodeError:
-                    current_notes_list = []
                 new_note_entry = {"timestamp": datetime.datetime.now().isoformat(), "author": requesting_admin_id, "content": data['notes'].strip()}
-                current_notes_list.append(new_note_entry)
-                update_fields.append("notes = %s")
-                params.append(json.dumps(current_notes_list))
                 log_details["notes_added"] = True
             params.append(task_id_to_update)
             if update_fields:
                 placeholders = ', '.join(update_fields)
                 query = f"UPDATE tasks SET {placeholders} WHERE task_id = %s"
                 cursor.execute(query, tuple(params))
+            if new_note_entry:
+                append_task_notes(cursor, [(task_id_to_update, new_note_entry)])
             log_agent_action_to_db(cursor, requesting_admin_id, "updated_task_dashboard", task_id=task_id_to_update, details=log_details)
             conn.commit()
             if task_id_to_update in g.tasks:
                 cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id_to_update,))
                 updated_task_for_cache = cursor.fetchone()
                 if updated_task_for_cache:
-                    g.tasks[task_id_to_update] = dict(updated_task_for_cache)
-                    for field_key in ["child_tasks", "depends_on_tasks", "notes"]:
-                        if isinstance(g.tasks[task_id_to_update].get(field_key), str):
-                            try:
-                                g.tasks[task_id_to_update][field_key] = json.loads(g.tasks[task_id_to_update][field_key] or "[]")
-                            except json.JSONDecodeError:
-                                g.tasks[task_id_to_update][field_key] = []
+                    # JSON list fields are decoded by the task graph
+                    g.tasks[task_id_to_update] = attach_task_notes(cursor, [dict(updated_task_for_cache)])[0]
                 else:
                     del g.tasks[task_id_to_update]
         return JSONResponse({"success": True, "message": "Task updated successfully via dashboard."})
@@ -400,7 +393,10 @@ async def all_data_api_route(request: Request) -> JSONResponse:
             })
             
             cursor.execute("SELECT * FROM tasks ORDER BY created_at DESC")
-            tasks_data = [serialize_datetime(dict(row)) for row in cursor.fetchall()]
+            tasks_data = [
+                serialize_datetime(task)
+                for task in attach_task_notes(cursor, [dict(row) for row in cursor.fetchall()], all_tasks=True)
+            ]
             
             cursor.execute("SELECT * FROM project_context ORDER BY last_updated DESC")
             context_data = [serialize_datetime(dict(row)) for row in cursor.fetchall()]
@@ -0,0 +1,83 @@
+"""RAG query API endpoints (JSON or Server-Sent Events)."""
+import json
+from typing import AsyncIterator
+
+from starlette.routing import Route
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+
+from ...core.config import logger
+from ...core.auth import get_agent_id
+from ...utils.audit_utils import log_audit
+from ...utils.json_utils import get_sanitized_json_body
+from ...features.rag.query import query_rag_system, stream_rag_answer
+from .base import handle_options
+
+
+def _sse_event(data: dict, event: str = None) -> str:
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _answer_events(query_text: str, agent_id: str, format_type: str) -> AsyncIterator[str]:
+    """SSE stream: one `data: {"delta": ...}` event per piece, then `event: done`."""
+    async for delta in stream_rag_answer(query_text, agent_id=agent_id, format_type=format_type):
+        yield _sse_event({"delta": delta})
+    yield _sse_event({}, event="done")
+
+
+async def rag_query_api_route(request: Request):
+    """
+    Ask the project RAG system a question.
+
+    Body: {"token", "query", "format": "json"|"toon", "stream": bool}. With
+    "stream": true (or an Accept: text/event-stream header) the answer is sent
+    as Server-Sent Events while the model generates it; otherwise the full
+    answer is returned as JSON.
+    """
+    if request.method == 'OPTIONS':
+        return await handle_options(request)
+
+    try:
+        data = await get_sanitized_json_body(request)
+    except Exception as e:
+        return JSONResponse({"error": f"Invalid JSON body: {str(e)}"}, status_code=400)
+
+    agent_id = get_agent_id(data.get('token'))
+    if not agent_id:
+        return JSONResponse({"error": "Unauthorized: Valid agent token required"}, status_code=401)
+
+    query_text = data.get('query')
+    if not query_text or not isinstance(query_text, str):
+        return JSONResponse({"error": "query text is required and must be a string"}, status_code=400)
+
+    format_type = data.get('format', 'json')
+    if format_type not in ['json', 'toon']:
+        format_type = 'json'
+    stream = data.get('stream')
+    if stream is None:
+        stream = 'text/event-stream' in request.headers.get('accept', '')
+
+    log_audit(agent_id, "rag_query_api", {"query": query_text, "format": format_type, "stream": bool(stream)})
+
+    if stream:
+        return StreamingResponse(
+            _answer_events(query_text, agent_id, format_type),
+            media_type="text/event-stream",
+            # Keep proxies from buffering the stream
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    try:
+        answer = await query_rag_system(query_text, agent_id=agent_id, format_type=format_type)
+        return JSONResponse({"answer": answer})
+    except Exception as e:
+        logger.error(f"Error in rag_query_api_route: {e}", exc_info=True)
+        return JSONResponse({"error": f"Failed to run RAG query: {str(e)}"}, status_code=500)
+
+
+# Route definitions
+routes = [
+    Route('/api/rag/query', endpoint=rag_query_api_route, name="rag_query_api", methods=['POST', 'OPTIONS']),
+]
@@ -23,7 +23,7 @@ from ...api.models import (
     BulkOperation,
     TaskReorder,
 )
-from ...db import db_connection
+from ...db import async_db_connection
 from .base import handle_options
 
 
@@ -37,8 +37,8 @@ async def get_task_api_route(request: Request) -> JSONResponse:
         return JSONResponse({"error": "task_id is required"}, status_code=400)
     
     try:
-        from ...db.actions.task_db import get_task_by_id
-        task = get_task_by_id(task_id)
+        from ...db.actions.task_db import get_task_by_id_async
+        task = await get_task_by_id_async(task_id)
         if not task:
             return JSONResponse({"error": "Task not found"}, status_code=404)
         return JSONResponse(task)
@@ -67,7 +67,7 @@ async def update_task_api_route(request: Request) -> JSONResponse:
     
     try:
         data = await get_sanitized_json_body(request)
-        from ...db.actions.task_db import update_task_fields_in_db, get_task_by_id
+        from ...db.actions.task_db import update_task_fields_in_db_async, get_task_by_id_async
         
         try:
             task_update = TaskUpdate(**data)
@@ -85,14 +85,14 @@ async def update_task_api_route(request: Request) -> JSONResponse:
                 include_traceback=False
             )
         
-        success = update_task_fields_in_db(task_id, update_dict)
+        success = await update_task_fields_in_db_async(task_id, update_dict)
         if not success:
             return create_error_response(
                 NotFoundError(f"Task '{task_id}' not found or update failed", details={"task_id": task_id}),
                 include_traceback=False
             )
         
-        updated_task = get_task_by_id(task_id)
+        updated_task = await get_task_by_id_async(task_id)
         return JSONResponse(updated_task)
     except ValidationError as e:
         return create_error_response(e, include_traceback=False)
@@ -114,10 +114,10 @@ async def delete_task_api_route(request: Request) -> JSONResponse:
         return JSONResponse({"error": "task_id is required"}, status_code=400)
     
     try:
-        from ...db.actions.task_db import get_task_by_id
+        from ...db.actions.task_db import get_task_by_id_async
         from ...tools.task_tools import delete_task_tool_impl
         
-        task = get_task_by_id(task_id)
+        task = await get_task_by_id_async(task_id)
         if not task:
             return JSONResponse({"error": "Task not found"}, status_code=404)
         
@@ -166,16 +166,16 @@ async def assign_task_api_route(request: Request) -> JSONResponse:
                 include_traceback=False
             )
         
-        from ...db.actions.task_db import update_task_fields_in_db, get_task_by_id
+        from ...db.actions.task_db import update_task_fields_in_db_async, get_task_by_id_async
         
-        success = update_task_fields_in_db(task_id, {'assigned_to': assign_request.agent_id})
+        success = await update_task_fields_in_db_async(task_id, {'assigned_to': assign_request.agent_id})
         if not success:
             return create_error_response(
                 NotFoundError(f"Task '{task_id}' not found or update failed", details={"task_id": task_id}),
                 include_traceback=False
             )
         
-        updated_task = get_task_by_id(task_id)
+        updated_task = await get_task_by_id_async(task_id)
         return JSONResponse(updated_task)
     except ValidationError as e:
         return create_error_response(e, include_traceback=False)
@@ -213,16 +213,16 @@ async def update_task_status_api_route(request: Request) -> JSONResponse:
                 include_traceback=False
             )
         
-        from ...db.actions.task_db import update_task_fields_in_db, get_task_by_id
+        from ...db.actions.task_db import update_task_fields_in_db_async, get_task_by_id_async
         
-        success = update_task_fields_in_db(task_id, {'status': status_update.status})
+        success = await update_task_fields_in_db_async(task_id, {'status': status_update.status})
         if not success:
             return create_error_response(
                 NotFoundError(f"Task '{task_id}' not found or update failed", details={"task_id": task_id}),
                 include_traceback=False
             )
         
-        updated_task = get_task_by_id(task_id)
+        updated_task = await get_task_by_id_async(task_id)
         return JSONResponse(updated_task)
     except ValidationError as e:
         return create_error_response(e, include_traceback=False)
@@ -260,16 +260,16 @@ async def update_task_priority_api_route(request: Request) -> JSONResponse:
                 include_traceback=False
             )
         
-        from ...db.actions.task_db import update_task_fields_in_db, get_task_by_id
+        from ...db.actions.task_db import update_task_fields_in_db_async, get_task_by_id_async
         
-        success = update_task_fields_in_db(task_id, {'priority': priority_update.priority})
+        success = await update_task_fields_in_db_async(task_id, {'priority': priority_update.priority})
         if not success:
             return create_error_response(
                 NotFoundError(f"Task '{task_id}' not found or update failed", details={"task_id": task_id}),
                 include_traceback=False
             )
         
-        updated_task = get_task_by_id(task_id)
+        updated_task = await get_task_by_id_async(task_id)
         return JSONResponse(updated_task)
     except ValidationError as e:
         return create_error_response(e, include_traceback=False)
@@ -300,9 +300,9 @@ async def reorder_tasks_api_route(request: Request) -> JSONResponse:
                 include_traceback=False
             )
         
-        from ...db.actions.task_db import reorder_tasks
+        from ...db.actions.task_db import reorder_tasks_async
         
-        success = reorder_tasks(reorder_data.task_ids)
+        success = await reorder_tasks_async(reorder_data.task_ids)
         if not success:
             return create_error_response(
                 DatabaseError("Failed to reorder tasks"),
@@ -334,7 +334,7 @@ async def bulk_update_tasks_api_route(request: Request) -> JSONResponse:
     
     try:
         data = await get_sanitized_json_body(request)
-        from ...db.actions.task_db import update_task_fields_in_db, get_task_by_id
+        from ...db.actions.task_db import update_task_fields_in_db_async, get_task_by_id_async
         
         try:
             bulk_op = BulkOperation(**data)
@@ -348,19 +348,19 @@ async def bulk_update_tasks_api_route(request: Request) -> JSONResponse:
         for task_id in bulk_op.task_ids:
             try:
                 if bulk_op.operation == 'update_status':
-                    success = update_task_fields_in_db(task_id, {'status': bulk_op.value})
+                    success = await update_task_fields_in_db_async(task_id, {'status': bulk_op.value})
                 elif bulk_op.operation == 'update_priority':
-                    success = update_task_fields_in_db(task_id, {'priority': bulk_op.value})
+                    success = await update_task_fields_in_db_async(task_id, {'priority': bulk_op.value})
                 elif bulk_op.operation == 'assign':
-                    success = update_task_fields_in_db(task_id, {'assigned_to': bulk_op.value})
+                    success = await update_task_fields_in_db_async(task_id, {'assigned_to': bulk_op.value})
                 elif bulk_op.operation == 'add_tags':
-                    task = get_task_by_id(task_id)
+                    task = await get_task_by_id_async(task_id)
                     if task:
                         current_tags = task.get('tags', [])
                         if isinstance(current_tags, str):
                             current_tags = json.loads(current_tags) if current_tags else []
                         new_tags = list(set(current_tags + bulk_op.value))
-                        success = update_task_fields_in_db(task_id, {'tags': json.dumps(new_tags)})
+                        success = await update_task_fields_in_db_async(task_id, {'tags': json.dumps(new_tags)})
                     else:
                         success = False
                 elif bulk_op.operation == 'delete':
@@ -405,10 +405,9 @@ async def get_task_history_api_route(request: Request) -> JSONResponse:
         return JSONResponse({"error": "task_id is required"}, status_code=400)
     
     try:
-        from ...db import db_connection
-        with db_connection() as conn:
+        async with async_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
+            await cursor.execute(
                 "SELECT timestamp, agent_id, action_type, details FROM agent_actions WHERE task_id = %s ORDER BY timestamp DESC LIMIT 100",
                 (task_id,)
             )
@@ -14,10 +14,13 @@ from ..core import globals as g
 from ..core.auth import generate_token  # For admin token generation
 from ..utils.project_utils import init_agent_directory
 from ..db.postgres_schema import init_database as initialize_database_schema
-from ..db import get_db_connection, is_vss_loadable, check_vss_loadability
+from ..db import get_db_connection, is_vss_loadable, check_vss_loadability, run_db
 from ..db.postgres_connection import return_connection
-from ..external.openai_service import initialize_openai_client
+from ..db.actions.task_db import attach_task_notes
+from ..external.openai_service import initialize_openai_client, close_async_openai_client
 from ..features.rag.indexing import run_rag_indexing_periodically
+from ..features.rag.task_index_queue import get_task_index_queue
+from ..features.rag.memory_tracker import get_memory_tracker
 
 from ..features.claude_session_monitor import run_claude_session_monitoring
 from ..utils.signal_utils import register_signal_handlers  # For graceful shutdown
@@ -357,19 +360,10 @@ async def application_startup(
         # Load All Tasks into g.tasks
         task_count = 0
         cursor.execute("SELECT * FROM tasks")  # Load all tasks
-        for row_dict in (dict(row) for row in cursor.fetchall()):
-            task_id_val = row_dict["task_id"]
-            # Ensure complex fields are Python lists/dicts in memory
-            for field_key in ["child_tasks", "depends_on_tasks", "notes"]:
-                if isinstance(row_dict.get(field_key), str):
-                    try:
-                        row_dict[field_key] = json.loads(row_dict[field_key] or "[]")
-                    except json.JSONDecodeError:
-                        logger.warning(
-                            f"Failed to parse JSON for field '{field_key}' in task '{task_id_val}'. Defaulting to empty list."
-                        )
-                        row_dict[field_key] = []
-            g.tasks[task_id_val] = row_dict
+        task_rows = attach_task_notes(cursor, [dict(row) for row in cursor.fetchall()], all_tasks=True)
+        for row_dict in task_rows:
+            # The task graph decodes the JSON list fields (child_tasks, depends_on_tasks)
+            g.tasks[row_dict["task_id"]] = row_dict
             task_count += 1
         logger.info(f"Loaded {task_count} tasks into memory cache.")
 
@@ -481,11 +475,25 @@ async def application_shutdown():
         g.claude_session_task_scope.cancel()
         # Note: Actual waiting for task completion is usually handled by the AnyIO TaskGroup context manager.
 
+    # Write task updates still waiting in the RAG task index queue
+    try:
+        await get_task_index_queue().flush()
+    except Exception as e:
+        logger.warning(f"Could not flush the RAG task index queue: {e}")
+
+    # Write pending RAG document-access history (no-op unless persisted)
+    memory_tracker = get_memory_tracker()
+    if memory_tracker.persist:
+        await run_db(memory_tracker.flush)
+
     # Stop database write queue
     write_queue = get_write_queue()
     await write_queue.stop()
     logger.info("Database write queue stopped.")
 
+    # Close the shared async OpenAI client and its pooled connections
+    await close_async_openai_client()
+
     # Add any other cleanup (e.g., closing persistent connections if not managed by context)
     # For PostgreSQL, connections are managed by the connection pool.
 
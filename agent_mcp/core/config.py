@@ -223,6 +223,42 @@ AGENT_COLORS: List[str] = (
 # Use settings for all OpenAI configuration
 ADVANCED_EMBEDDINGS: bool = _settings.advanced_embeddings
 DISABLE_AUTO_INDEXING: bool = _settings.disable_auto_indexing
+RAG_FILE_WATCHER: bool = _settings.rag_file_watcher
+RAG_FULL_SCAN_INTERVAL_CYCLES: int = _settings.rag_full_scan_interval_cycles
+RAG_DISCOVERY_WORKERS: int = _settings.rag_discovery_workers
+RAG_RESPECT_GITIGNORE: bool = _settings.rag_respect_gitignore
+RAG_CHUNKING_WORKERS: int = _settings.rag_chunking_workers
+RAG_MAX_FILE_BYTES: int = _settings.rag_max_file_bytes
+RAG_OVERSIZE_FILE_POLICY: str = _settings.rag_oversize_file_policy
+RAG_STREAM_FILE_BYTES: int = _settings.rag_stream_file_bytes
+RAG_TREE_SITTER: bool = _settings.rag_tree_sitter
+RAG_ENTITY_CACHE_SIZE: int = _settings.rag_entity_cache_size
+RAG_EMBEDDING_CACHE: bool = _settings.rag_embedding_cache
+RAG_EMBEDDING_CACHE_TTL_DAYS: int = _settings.rag_embedding_cache_ttl_days
+RAG_QUERY_EMBEDDING_CACHE_SIZE: int = _settings.rag_query_embedding_cache_size
+RAG_QUERY_EMBEDDING_CACHE_TTL_SECONDS: float = _settings.rag_query_embedding_cache_ttl_seconds
+RAG_SEMANTIC_ANSWER_CACHE: bool = _settings.rag_semantic_answer_cache
+RAG_SEMANTIC_ANSWER_THRESHOLD: float = _settings.rag_semantic_answer_threshold
+RAG_SEMANTIC_ANSWER_TTL_SECONDS: float = _settings.rag_semantic_answer_ttl_seconds
+RAG_SEMANTIC_ANSWER_CACHE_SIZE: int = _settings.rag_semantic_answer_cache_size
+RAG_HYBRID_SEARCH: bool = _settings.rag_hybrid_search
+RAG_HYBRID_CANDIDATES: int = _settings.rag_hybrid_candidates
+RAG_RRF_K: int = _settings.rag_rrf_k
+RAG_RERANKER: str = _settings.rag_reranker
+RAG_RERANK_OVERFETCH: int = _settings.rag_rerank_overfetch
+RAG_RERANK_TOP_K: int = _settings.rag_rerank_top_k
+RAG_MMR_LAMBDA: float = _settings.rag_mmr_lambda
+RAG_CROSS_ENCODER_MODEL: str = _settings.rag_cross_encoder_model
+RAG_RERANK_CACHE_SIZE: int = _settings.rag_rerank_cache_size
+RAG_VECTOR_INDEX_AUTO_MAINTAIN: bool = _settings.rag_vector_index_auto_maintain
+RAG_TASK_INDEX_DEBOUNCE_SECONDS: float = _settings.rag_task_index_debounce_seconds
+RAG_TASK_INDEX_MAX_DELAY_SECONDS: float = _settings.rag_task_index_max_delay_seconds
+RAG_TASK_INDEX_BATCH_SIZE: int = _settings.rag_task_index_batch_size
+RAG_MEMORY_TRACKER_TTL_HOURS: float = _settings.rag_memory_tracker_ttl_hours
+RAG_MEMORY_TRACKER_MAX_DOCS_PER_AGENT: int = _settings.rag_memory_tracker_max_docs_per_agent
+RAG_MEMORY_TRACKER_MAX_AGENTS: int = _settings.rag_memory_tracker_max_agents
+RAG_MEMORY_TRACKER_PERSIST: bool = _settings.rag_memory_tracker_persist
+RAG_MEMORY_TRACKER_FLUSH_SECONDS: float = _settings.rag_memory_tracker_flush_seconds
 
 # Backward compatibility exports (using settings)
 SIMPLE_EMBEDDING_MODEL: str = _settings.embedding_model
@@ -239,6 +275,7 @@ TASK_ANALYSIS_MODEL: str = _settings.task_analysis_model
 MAX_EMBEDDING_BATCH_SIZE: int = _settings.max_embedding_batch_size
 MAX_CONTEXT_TOKENS: int = _settings.max_context_tokens
 TASK_ANALYSIS_MAX_TOKENS: int = _settings.task_analysis_max_tokens
+TASK_NOTES_LEGACY_MIRROR: bool = _settings.task_notes_legacy_mirror
 
 # --- Project Directory Helpers ---
 # These rely on an environment variable "MCP_PROJECT_DIR" being set,
@@ -8,6 +8,8 @@ g.admin_token = "new_token"
 import anyio  # For rag_index_task type hint
 from typing import Dict, List, Optional, Any
 
+from .task_graph import TaskGraph
+
 # --- Core Server State ---
 # From main.py:147
 # Client ID -> Connection data (Note: original usage of 'connections' might be simplified
@@ -23,7 +25,8 @@ active_agents: Dict[str, Dict[str, Any]] = {}  # Agent Token -> Agent data
 admin_token: Optional[str] = None
 
 # From main.py:150
-tasks: Dict[str, Dict[str, Any]] = {}  # Task ID -> Task data (in-memory cache of tasks)
+# Task ID -> Task data (in-memory cache of tasks), with dependency/status/assignee indexes
+tasks: TaskGraph = TaskGraph()
 
 # --- File and Directory State ---
 # From main.py:153
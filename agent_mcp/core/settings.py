@@ -34,6 +34,13 @@ class AgentMCPSettings(BaseSettings):
     db_pool_min: int = Field(default=1, ge=1, le=50, description="Database connection pool minimum")
     db_pool_max: int = Field(default=10, ge=1, le=50, description="Database connection pool maximum")
     db_max_overflow: int = Field(default=20, ge=0, description="Database max overflow connections")
+    db_pool_validation: Literal["lazy", "always"] = Field(
+        default="lazy",
+        description="Connection validation mode: 'lazy' validates only after idling or on error, 'always' on every checkout"
+    )
+    db_pool_idle_validation_seconds: float = Field(
+        default=30.0, ge=0.0, description="Idle time after which a pooled connection is re-validated in lazy mode"
+    )
     
     # OpenAI
     openai_api_key: Optional[SecretStr] = Field(default=None, description="OpenAI API key (optional when using Ollama)")
@@ -42,6 +49,12 @@ class AgentMCPSettings(BaseSettings):
     embedding_dimension: int = Field(default=1536, description="Embedding dimension")
     max_context_tokens: int = Field(default=1000000, ge=1000, le=2000000, description="Max context tokens")
     max_embedding_batch_size: int = Field(default=100, ge=1, le=1000, description="Max embedding batch size")
+    openai_http_max_connections: int = Field(default=100, ge=1, le=1000, description="Max pooled HTTP connections for the shared async OpenAI client")
+    openai_http_max_keepalive_connections: int = Field(default=25, ge=0, le=1000, description="Idle keep-alive connections kept by the shared async OpenAI client")
+    openai_http_keepalive_seconds: float = Field(default=60.0, ge=0.0, description="Keep-alive expiry for idle OpenAI connections (seconds)")
+    openai_http2: bool = Field(default=False, description="Use HTTP/2 for the shared async OpenAI client (requires h2)")
+    openai_request_timeout: float = Field(default=60.0, gt=0.0, description="OpenAI request timeout (seconds)")
+    openai_max_retries: int = Field(default=2, ge=0, le=10, description="Retries for failed OpenAI requests")
     
     # Advanced Embedding Mode
     advanced_embeddings: bool = Field(default=False, description="Use advanced embedding mode")
@@ -51,6 +64,10 @@ class AgentMCPSettings(BaseSettings):
     # Task Analysis
     task_analysis_model: str = Field(default="gpt-4.1-2025-04-14", description="Task analysis model")
     task_analysis_max_tokens: int = Field(default=1000000, ge=1000, le=2000000, description="Task analysis max tokens")
+    task_notes_legacy_mirror: bool = Field(
+        default=False,
+        description="Also append new task notes to the legacy tasks.notes column (only needed to roll back to a server that reads it)",
+    )
     
     # Task Placement (System 8)
     enable_task_placement_rag: bool = Field(default=True, description="Enable task placement RAG")
@@ -73,7 +90,126 @@ class AgentMCPSettings(BaseSettings):
     rag_enabled: bool = Field(default=True, description="Enable RAG system")
     rag_max_results: int = Field(default=13, ge=1, le=50, description="Max RAG results")
     disable_auto_indexing: bool = Field(default=False, description="Disable automatic indexing")
-    
+    rag_file_watcher: bool = Field(
+        default=False, description="Use filesystem change events (watchdog) to drive incremental indexing"
+    )
+    rag_full_scan_interval_cycles: int = Field(
+        default=12, ge=1, description="With the file watcher active, run a full manifest scan every N indexing cycles"
+    )
+    rag_discovery_workers: int = Field(
+        default=4, ge=1, le=32, description="Threads used to walk the project tree during RAG source discovery (1 = sequential)"
+    )
+    rag_respect_gitignore: bool = Field(
+        default=True, description="Skip files matched by .gitignore rules during RAG source discovery"
+    )
+    rag_chunking_workers: int = Field(
+        default=0, ge=0, le=64, description="Processes for RAG chunking and entity extraction (0 = CPU count - 1, 1 = inline)"
+    )
+    rag_max_file_bytes: int = Field(
+        default=10 * 1024 * 1024, ge=0, description="Largest source file indexed for RAG, in bytes (0 = no limit)"
+    )
+    rag_oversize_file_policy: Literal["skip", "truncate"] = Field(
+        default="skip", description="Files over rag_max_file_bytes: skip them, or index only their first rag_max_file_bytes characters"
+    )
+    rag_stream_file_bytes: int = Field(
+        default=1024 * 1024, ge=1, description="Files at least this large are hashed and chunked from buffered reads instead of loaded whole"
+    )
+    rag_tree_sitter: bool = Field(
+        default=True, description="Extract code entities with tree-sitter grammars when installed (regex fallback otherwise)"
+    )
+    rag_entity_cache_size: int = Field(
+        default=2048, ge=0, description="Extracted code entity lists cached per content hash (per process); 0 disables"
+    )
+    rag_embedding_cache: bool = Field(
+        default=True, description="Reuse vectors of unchanged chunks from the content-addressed embedding cache"
+    )
+    rag_embedding_cache_ttl_days: int = Field(
+        default=30, ge=0, description="Prune embedding cache entries unused for this many days (0 = never)"
+    )
+    rag_query_embedding_cache_size: int = Field(
+        default=512, ge=0, description="Query embeddings kept in the in-process LRU cache (0 = disabled)"
+    )
+    rag_query_embedding_cache_ttl_seconds: float = Field(
+        default=3600.0, gt=0.0, description="Lifetime of a cached query embedding (seconds)"
+    )
+    rag_semantic_answer_cache: bool = Field(
+        default=False, description="Return a recent answer when a new query is semantically near-identical"
+    )
+    rag_semantic_answer_threshold: float = Field(
+        default=0.97, ge=0.0, le=1.0, description="Minimum cosine similarity for a semantic answer cache hit"
+    )
+    rag_semantic_answer_ttl_seconds: float = Field(
+        default=600.0, gt=0.0, description="Lifetime of a cached RAG answer (seconds)"
+    )
+    rag_semantic_answer_cache_size: int = Field(
+        default=256, ge=0, description="Answers kept in the semantic answer cache"
+    )
+    rag_hybrid_search: bool = Field(
+        default=True, description="Fuse full-text and vector rankings (reciprocal rank fusion) for RAG retrieval"
+    )
+    rag_hybrid_candidates: int = Field(
+        default=50, ge=1, le=1000, description="Candidates taken from each ranking before fusion"
+    )
+    rag_rrf_k: int = Field(
+        default=60, ge=1, description="Reciprocal rank fusion constant (higher flattens rank differences)"
+    )
+    rag_reranker: Literal["none", "mmr", "cross_encoder"] = Field(
+        default="mmr", description="Rerank stage between retrieval and context assembly"
+    )
+    rag_rerank_overfetch: int = Field(
+        default=3, ge=1, le=20, description="Retrieve this many times the needed chunks for the reranker"
+    )
+    rag_rerank_top_k: int = Field(
+        default=8, ge=1, le=100, description="Chunks kept after reranking"
+    )
+    rag_mmr_lambda: float = Field(
+        default=0.7, ge=0.0, le=1.0, description="MMR trade-off between relevance (1.0) and diversity (0.0)"
+    )
+    rag_cross_encoder_model: str = Field(
+        default="cross-encoder/ms-marco-MiniLM-L-6-v2",
+        description="sentence-transformers cross-encoder used when rag_reranker is cross_encoder",
+    )
+    rag_rerank_cache_size: int = Field(
+        default=4096, ge=0, description="(query, chunk) rerank scores kept in the LRU score cache (0 = disabled)"
+    )
+    rag_vector_index_type: Literal["hnsw", "ivfflat"] = Field(
+        default="hnsw", description="Access method for the rag_embeddings vector index"
+    )
+    rag_hnsw_m: int = Field(default=16, ge=2, le=100, description="HNSW graph degree (m)")
+    rag_hnsw_ef_construction: int = Field(
+        default=64, ge=4, le=1000, description="HNSW build candidate list size (ef_construction)"
+    )
+    rag_vector_search_mode: Literal["fast", "balanced", "accurate"] = Field(
+        default="balanced", description="Vector search latency/recall trade-off (sets hnsw.ef_search / ivfflat.probes)"
+    )
+    rag_vector_index_auto_maintain: bool = Field(
+        default=True, description="Rebuild the vector index concurrently when its type, parameters or size no longer fit"
+    )
+    rag_task_index_debounce_seconds: float = Field(
+        default=2.0, ge=0.0, description="Quiet period before queued task re-indexing runs (repeated updates coalesce)"
+    )
+    rag_task_index_max_delay_seconds: float = Field(
+        default=10.0, ge=0.0, description="Longest a queued task waits for re-indexing under continuous updates"
+    )
+    rag_task_index_batch_size: int = Field(
+        default=100, ge=1, le=2000, description="Tasks embedded and written per task re-indexing transaction"
+    )
+    rag_memory_tracker_ttl_hours: float = Field(
+        default=24.0, gt=0.0, description="How long a document counts as already seen by an agent"
+    )
+    rag_memory_tracker_max_docs_per_agent: int = Field(
+        default=2000, ge=1, description="Most recently accessed documents remembered per agent"
+    )
+    rag_memory_tracker_max_agents: int = Field(
+        default=1000, ge=1, description="Agents whose document access is kept in memory"
+    )
+    rag_memory_tracker_persist: bool = Field(
+        default=False, description="Write document access through to Postgres so it survives restarts and is shared across processes"
+    )
+    rag_memory_tracker_flush_seconds: float = Field(
+        default=5.0, gt=0.0, description="Write-behind interval for persisted document access"
+    )
+
     # Logging
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = Field(
         default="INFO", description="Logging level"
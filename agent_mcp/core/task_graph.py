@@ -0,0 +1,370 @@
+# Agent-MCP/agent_mcp/core/task_graph.py
+"""
+In-memory task store (g.tasks) with dependency and lookup indexes.
+
+TaskGraph is a mapping of task_id -> TaskRecord, so existing code can keep
+using it like the plain dict it replaces (`g.tasks[task_id] = data`,
+`g.tasks[task_id]["status"] = ...`, `task_id in g.tasks`). Alongside the
+records it maintains, on every write:
+
+- forward and reverse dependency adjacency (depends_on_tasks)
+- a parent -> children index (parent_task)
+- secondary indexes by status, assigned_to and priority
+- the set of blocked tasks (same rules as analyze_dependencies)
+- an inverted index of title, description and notes for search_tasks
+
+so filters, blocked-task detection and dependency analysis cost time in the
+size of their result instead of a scan (and JSON decoding) of every task.
+
+Like the dict it replaces, it is only mutated from the server's event loop.
+"""
+import json
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from .config import logger
+from .task_search import SEARCH_FIELDS, TaskSearchIndex
+
+# Task fields holding lists (stored as JSON text in the tasks table)
+LIST_FIELDS = ("child_tasks", "depends_on_tasks", "notes")
+
+# Fields with a secondary index
+INDEXED_FIELDS = ("status", "assigned_to", "priority")
+
+# Fields whose change requires index maintenance
+_TRACKED_FIELDS = frozenset(INDEXED_FIELDS + ("parent_task", "depends_on_tasks") + SEARCH_FIELDS)
+
+
+def _as_list(value: Any, field: str = "", task_id: Any = None) -> List[Any]:
+    """List value of a list field, decoding JSON text from the database."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value or "[]")
+        except json.JSONDecodeError:
+            logger.warning(
+                f"Failed to parse JSON for field '{field}' in task '{task_id}'. Defaulting to empty list."
+            )
+            return []
+    # Own copy, so later in-place changes to the caller's list cannot bypass the indexes
+    return list(value or [])
+
+
+class TaskRecord(dict):
+    """
+    A task's fields, as held by a TaskGraph.
+
+    child_tasks, depends_on_tasks and notes are always lists. Writes to
+    indexed fields update the owning graph's indexes; append notes with
+    add_note so they are indexed for search too.
+    """
+
+    __slots__ = ("_graph", "_task_id")
+
+    def __init__(self, data: Any = (), **kwargs: Any):
+        super().__init__(data, **kwargs)
+        self._graph: Optional["TaskGraph"] = None
+        self._task_id: Optional[str] = None
+        for field in LIST_FIELDS:
+            if field in self:
+                dict.__setitem__(self, field, _as_list(self[field], field, self.get("task_id")))
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in LIST_FIELDS:
+            value = _as_list(value, key, self.get("task_id"))
+        if self._graph is None or key not in _TRACKED_FIELDS:
+            dict.__setitem__(self, key, value)
+            return
+        old_value = self.get(key)
+        dict.__setitem__(self, key, value)
+        self._graph._field_changed(self._task_id, key, old_value, value)
+
+    def __delitem__(self, key: str) -> None:
+        old_value = self[key]
+        dict.__delitem__(self, key)
+        if self._graph is not None and key in _TRACKED_FIELDS:
+            self._graph._field_changed(self._task_id, key, old_value, None)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self) -> Any:
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def clear(self) -> None:
+        for key in list(self):
+            del self[key]
+
+    def add_note(self, note: Dict[str, Any]) -> None:
+        """Append a note to the task's notes list."""
+        dict.setdefault(self, "notes", []).append(note)
+        if self._graph is not None:
+            self._graph._note_added(self._task_id, note)
+
+    def copy(self) -> Dict[str, Any]:
+        """Plain dict copy (not attached to any graph)."""
+        return dict(self)
+
+    def __reduce__(self) -> Any:
+        # Pickled and copy.copy/deepcopy'd records are detached from the graph
+        return (TaskRecord, (dict(self),))
+
+
+def _add(index: Dict[Any, Set[str]], key: Any, task_id: str) -> None:
+    index.setdefault(key, set()).add(task_id)
+
+
+def _discard(index: Dict[Any, Set[str]], key: Any, task_id: str) -> None:
+    members = index.get(key)
+    if members is not None:
+        members.discard(task_id)
+        if not members:
+            del index[key]
+
+
+class TaskGraph(MutableMapping):
+    """Mapping of task_id -> TaskRecord with incrementally maintained indexes."""
+
+    def __init__(self, tasks: Optional[Dict[str, Dict[str, Any]]] = None):
+        self._tasks: Dict[str, TaskRecord] = {}
+        # Insertion order, so indexed lookups list tasks like a scan would
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        # depends_on id -> ids of tasks depending on it (the dependency may not exist)
+        self._dependents: Dict[str, Set[str]] = {}
+        self._children: Dict[str, Set[str]] = {}
+        self._indexes: Dict[str, Dict[Any, Set[str]]] = {field: {} for field in INDEXED_FIELDS}
+        self._blocked: Set[str] = set()
+        self.search_index = TaskSearchIndex()
+        if tasks:
+            self.update(tasks)
+
+    # --- Mapping interface ---
+
+    def __getitem__(self, task_id: str) -> TaskRecord:
+        return self._tasks[task_id]
+
+    def __setitem__(self, task_id: str, data: Dict[str, Any]) -> None:
+        if task_id in self._tasks:
+            self._unindex(task_id)
+            self._tasks[task_id]._graph = None
+        else:
+            self._order[task_id] = self._next_order
+            self._next_order += 1
+        record = TaskRecord(data)
+        record._graph = self
+        record._task_id = task_id
+        self._tasks[task_id] = record
+        self._index(task_id)
+
+    def __delitem__(self, task_id: str) -> None:
+        self._unindex(task_id)
+        record = self._tasks.pop(task_id)
+        record._graph = None
+        del self._order[task_id]
+        # Dependents now see this task as missing
+        self._refresh_dependents(task_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    def clear(self) -> None:
+        for record in self._tasks.values():
+            record._graph = None
+        self._tasks.clear()
+        self._order.clear()
+        self._dependents.clear()
+        self._children.clear()
+        for index in self._indexes.values():
+            index.clear()
+        self._blocked.clear()
+        self.search_index.clear()
+
+    # --- Index maintenance ---
+
+    def _index(self, task_id: str) -> None:
+        record = self._tasks[task_id]
+        for field in INDEXED_FIELDS:
+            _add(self._indexes[field], record.get(field), task_id)
+        if record.get("parent_task"):
+            _add(self._children, record["parent_task"], task_id)
+        for dependency_id in record.get("depends_on_tasks") or []:
+            _add(self._dependents, dependency_id, task_id)
+        self.search_index.add(task_id, record)
+        self._refresh_blocked(task_id)
+        # Dependents that saw this task as missing
+        self._refresh_dependents(task_id)
+
+    def _unindex(self, task_id: str) -> None:
+        record = self._tasks[task_id]
+        for field in INDEXED_FIELDS:
+            _discard(self._indexes[field], record.get(field), task_id)
+        if record.get("parent_task"):
+            _discard(self._children, record["parent_task"], task_id)
+        for dependency_id in record.get("depends_on_tasks") or []:
+            _discard(self._dependents, dependency_id, task_id)
+        self.search_index.remove(task_id)
+        self._blocked.discard(task_id)
+
+    def _field_changed(self, task_id: str, field: str, old_value: Any, new_value: Any) -> None:
+        """Called by a TaskRecord after one of its tracked fields was written."""
+        if field in SEARCH_FIELDS:
+            self.search_index.update_field(task_id, field, new_value)
+            return
+        if field in self._indexes:
+            _discard(self._indexes[field], old_value, task_id)
+            _add(self._indexes[field], new_value, task_id)
+        elif field == "parent_task":
+            if old_value:
+                _discard(self._children, old_value, task_id)
+            if new_value:
+                _add(self._children, new_value, task_id)
+        elif field == "depends_on_tasks":
+            for dependency_id in old_value or []:
+                _discard(self._dependents, dependency_id, task_id)
+            for dependency_id in new_value or []:
+                _add(self._dependents, dependency_id, task_id)
+
+        if field in ("status", "depends_on_tasks"):
+            self._refresh_blocked(task_id)
+        if field == "status":
+            self._refresh_dependents(task_id)
+
+    def _note_added(self, task_id: str, note: Dict[str, Any]) -> None:
+        """Called by a TaskRecord after a note was appended to it."""
+        self.search_index.add_note(task_id, note)
+
+    def _refresh_dependents(self, task_id: str) -> None:
+        for dependent_id in self._dependents.get(task_id, ()):
+            if dependent_id in self._tasks:
+                self._refresh_blocked(dependent_id)
+
+    def _refresh_blocked(self, task_id: str) -> None:
+        analysis = self._dependency_status(self._tasks[task_id])
+        if analysis["is_blocked"] or not analysis["can_start"]:
+            self._blocked.add(task_id)
+        else:
+            self._blocked.discard(task_id)
+
+    # --- Queries ---
+
+    def _ordered(self, task_ids: Iterable[str]) -> List[str]:
+        return sorted(task_ids, key=self._order.__getitem__)
+
+    def dependencies(self, task_id: str) -> List[str]:
+        """IDs the task depends on (existing or not)."""
+        return list(self._tasks[task_id].get("depends_on_tasks") or [])
+
+    def dependents(self, task_id: str) -> List[str]:
+        """IDs of existing tasks that depend on the task."""
+        return self._ordered(
+            dependent_id for dependent_id in self._dependents.get(task_id, ()) if dependent_id in self._tasks
+        )
+
+    def children(self, task_id: str) -> List[str]:
+        """IDs of tasks whose parent_task is the task."""
+        return self._ordered(self._children.get(task_id, ()))
+
+    def blocked(self) -> List[str]:
+        """IDs of tasks that are blocked or cannot start yet."""
+        return self._ordered(self._blocked)
+
+    def is_blocked(self, task_id: str) -> bool:
+        return task_id in self._blocked
+
+    def select(
+        self,
+        status: Optional[str] = None,
+        assigned_to: Optional[str] = None,
+        priority: Optional[str] = None,
+        parent_task: Optional[str] = None,
+        blocked_only: bool = False,
+    ) -> List[TaskRecord]:
+        """
+        Tasks matching every given filter (None = any), in insertion order.
+
+        Starts from the smallest matching index, so the cost follows the
+        number of candidates rather than the number of tasks.
+        """
+        candidate_sets: List[Set[str]] = []
+        for field, value in (("status", status), ("assigned_to", assigned_to), ("priority", priority)):
+            if value:
+                candidate_sets.append(self._indexes[field].get(value, set()))
+        if parent_task:
+            candidate_sets.append(self._children.get(parent_task, set()))
+        if blocked_only:
+            candidate_sets.append(self._blocked)
+
+        if not candidate_sets:
+            return list(self._tasks.values())
+        candidate_sets.sort(key=len)
+        matching = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+        return [self._tasks[task_id] for task_id in self._ordered(matching)]
+
+    def _dependency_status(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        status = task.get("status")
+        analysis = {
+            "is_blocked": False,
+            "blocking_dependencies": [],
+            "completed_dependencies": [],
+            "missing_dependencies": [],
+            "can_start": True,
+        }
+        for dependency_id in _as_list(task.get("depends_on_tasks")):
+            dependency = self._tasks.get(dependency_id)
+            if dependency is None:
+                analysis["missing_dependencies"].append(dependency_id)
+                analysis["is_blocked"] = True
+                analysis["can_start"] = False
+                continue
+            dependency_status = dependency.get("status")
+            if dependency_status == "completed":
+                analysis["completed_dependencies"].append(dependency_id)
+            elif dependency_status in ["failed", "cancelled"]:
+                analysis["blocking_dependencies"].append(dependency_id)
+                analysis["is_blocked"] = True
+                analysis["can_start"] = False
+            elif dependency_status in ["pending", "in_progress"]:
+                analysis["blocking_dependencies"].append(dependency_id)
+                if status == "pending":
+                    analysis["can_start"] = False
+        return analysis
+
+    def analyze_dependencies(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Dependency and blocking analysis of a task (its own dependencies plus the tasks it blocks)."""
+        status = task.get("status")
+        analysis = self._dependency_status(task)
+        analysis["blocks_tasks"] = self.dependents(task.get("task_id"))
+        analysis["dependency_health"] = "healthy"
+
+        if analysis["missing_dependencies"]:
+            analysis["dependency_health"] = "critical"
+        elif analysis["is_blocked"] and status == "in_progress":
+            analysis["dependency_health"] = "warning"
+        elif not analysis["can_start"] and status == "pending":
+            analysis["dependency_health"] = "waiting"
+
+        return analysis
@@ -0,0 +1,226 @@
+# Agent-MCP/agent_mcp/core/task_search.py
+"""
+Inverted index over task text for search_tasks.
+
+TaskSearchIndex keeps, per searchable field (title, description, notes),
+postings of term -> {task_id: term frequency} plus document lengths. The
+owning TaskGraph updates it on every write to those fields, and a new note
+is indexed on its own (TaskRecord.add_note), so nothing is re-tokenized on
+search.
+
+Queries are scored with BM25 per field, using one document frequency per
+term across the searched fields, and combined with field weights.
+Query terms also match indexed terms they are a prefix of, found by binary
+search in a sorted vocabulary that writes keep up to date. The top results
+are picked with a heap. The work done follows the postings of the query
+terms, not the number of tasks.
+"""
+import bisect
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# Indexed task fields and their weight in the combined score
+SEARCH_FIELDS = ("title", "description", "notes")
+FIELD_WEIGHTS = {"title": 3.0, "description": 2.0, "notes": 1.0}
+
+# Shorter terms are neither indexed nor searched
+MIN_TERM_LENGTH = 3
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Score factor for an indexed term that only starts with the query term
+PREFIX_MATCH_WEIGHT = 0.5
+# Indexed terms a query term may expand to by prefix (bounds query cost)
+MAX_PREFIX_EXPANSIONS = 50
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# (task_id, score, {field: number of query terms matched in it})
+SearchHit = Tuple[str, float, Dict[str, int]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of text that are long enough to index."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if len(token) >= MIN_TERM_LENGTH]
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct search terms of a query, in order."""
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def _field_text(field: str, value: Any) -> str:
+    if field == "notes":
+        return " ".join(
+            str(note.get("content") or "") for note in value or [] if isinstance(note, dict)
+        )
+    return str(value or "")
+
+
+class TaskSearchIndex:
+    """Per-field inverted index with BM25 scoring and prefix matching."""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, Dict[str, int]]] = {field: {} for field in SEARCH_FIELDS}
+        self._doc_terms: Dict[str, Dict[str, Counter]] = {field: {} for field in SEARCH_FIELDS}
+        self._doc_length: Dict[str, Dict[str, int]] = {field: {} for field in SEARCH_FIELDS}
+        self._total_length: Dict[str, int] = {field: 0 for field in SEARCH_FIELDS}
+        self._documents: Set[str] = set()
+        # term -> number of fields with postings for it
+        self._term_fields: Dict[str, int] = {}
+        # Sorted vocabulary for prefix lookups, kept in step with _term_fields
+        self._vocabulary: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    # --- Updates ---
+
+    def add(self, task_id: str, task: Dict[str, Any]) -> None:
+        """Index (or re-index) every searchable field of a task."""
+        self._documents.add(task_id)
+        for field in SEARCH_FIELDS:
+            self.update_field(task_id, field, task.get(field))
+
+    def remove(self, task_id: str) -> None:
+        self._documents.discard(task_id)
+        for field in SEARCH_FIELDS:
+            self._remove_field(task_id, field)
+
+    def update_field(self, task_id: str, field: str, value: Any) -> None:
+        """Replace the indexed text of one field of a task."""
+        self._remove_field(task_id, field)
+        self._add_terms(task_id, field, Counter(tokenize(_field_text(field, value))))
+
+    def add_note(self, task_id: str, note: Dict[str, Any]) -> None:
+        """Index one appended note without re-reading the task's other notes."""
+        self._add_terms(task_id, "notes", Counter(tokenize(_field_text("notes", [note]))))
+
+    def clear(self) -> None:
+        for field in SEARCH_FIELDS:
+            self._postings[field].clear()
+            self._doc_terms[field].clear()
+            self._doc_length[field].clear()
+            self._total_length[field] = 0
+        self._documents.clear()
+        self._term_fields.clear()
+        self._vocabulary.clear()
+
+    def _add_terms(self, task_id: str, field: str, counts: Counter) -> None:
+        if not counts:
+            return
+        postings = self._postings[field]
+        for term, frequency in counts.items():
+            term_postings = postings.get(term)
+            if term_postings is None:
+                term_postings = postings[term] = {}
+                self._term_fields[term] = self._term_fields.get(term, 0) + 1
+                if self._term_fields[term] == 1:
+                    bisect.insort(self._vocabulary, term)
+            term_postings[task_id] = term_postings.get(task_id, 0) + frequency
+        self._doc_terms[field].setdefault(task_id, Counter()).update(counts)
+        length = sum(counts.values())
+        self._doc_length[field][task_id] = self._doc_length[field].get(task_id, 0) + length
+        self._total_length[field] += length
+
+    def _remove_field(self, task_id: str, field: str) -> None:
+        counts = self._doc_terms[field].pop(task_id, None)
+        if not counts:
+            return
+        self._total_length[field] -= self._doc_length[field].pop(task_id)
+        postings = self._postings[field]
+        for term in counts:
+            term_postings = postings[term]
+            del term_postings[task_id]
+            if not term_postings:
+                del postings[term]
+                self._term_fields[term] -= 1
+                if not self._term_fields[term]:
+                    del self._term_fields[term]
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+    # --- Queries ---
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Indexed terms matching a query term (itself, then by prefix) and their weight."""
+        vocabulary = self._vocabulary
+        matches: List[Tuple[str, float]] = []
+        i = bisect.bisect_left(vocabulary, term)
+        while (
+            i < len(vocabulary)
+            and vocabulary[i].startswith(term)
+            and len(matches) < MAX_PREFIX_EXPANSIONS
+        ):
+            matches.append((vocabulary[i], 1.0 if vocabulary[i] == term else PREFIX_MATCH_WEIGHT))
+            i += 1
+        return matches
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        fields: Sequence[str] = SEARCH_FIELDS,
+        accept: Optional[Callable[[str], bool]] = None,
+        tiebreak: Optional[Callable[[str], Any]] = None,
+    ) -> List[SearchHit]:
+        """
+        Top `limit` tasks for a query, best first.
+
+        accept filters candidate task IDs (e.g. permissions, status), and
+        tiebreak orders tasks with equal scores (higher first).
+        """
+        document_count = len(self._documents)
+        if not document_count or limit <= 0:
+            return []
+
+        scores: Dict[str, float] = {}
+        matched: Dict[str, Dict[str, int]] = {}
+        accepted: Dict[str, bool] = {}
+        average_lengths = {
+            field: self._total_length[field] / document_count or 1.0 for field in fields
+        }
+        for term in query_terms(query):
+            # Best-matching expansion per task and field, so variants of one term do not add up
+            best: Dict[str, Dict[str, float]] = {field: {} for field in fields}
+            for indexed_term, weight in self._expand(term):
+                field_postings = [
+                    (field, self._postings[field].get(indexed_term)) for field in fields
+                ]
+                field_postings = [(field, postings) for field, postings in field_postings if postings]
+                if not field_postings:
+                    continue
+                # Document frequency over the searched fields, so a term that is
+                # common in titles does not look rare when it shows up elsewhere
+                df = len(set().union(*(postings for _, postings in field_postings)))
+                idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+                for field, postings in field_postings:
+                    doc_lengths = self._doc_length[field]
+                    scale = BM25_K1 * BM25_B / average_lengths[field]
+                    field_best = best[field]
+                    for task_id, frequency in postings.items():
+                        if accept is not None:
+                            if task_id not in accepted:
+                                accepted[task_id] = accept(task_id)
+                            if not accepted[task_id]:
+                                continue
+                        score = weight * idf * frequency * (BM25_K1 + 1) / (
+                            frequency + BM25_K1 * (1 - BM25_B) + scale * doc_lengths[task_id]
+                        )
+                        if score > field_best.get(task_id, 0.0):
+                            field_best[task_id] = score
+            for field, field_best in best.items():
+                for task_id, score in field_best.items():
+                    scores[task_id] = scores.get(task_id, 0.0) + FIELD_WEIGHTS[field] * score
+                    fields_matched = matched.setdefault(task_id, {})
+                    fields_matched[field] = fields_matched.get(field, 0) + 1
+
+        if tiebreak is None:
+            top = heapq.nlargest(limit, scores, key=lambda task_id: (scores[task_id], task_id))
+        else:
+            top = heapq.nlargest(limit, scores, key=lambda task_id: (scores[task_id], tiebreak(task_id)))
+        return [(task_id, scores[task_id], matched[task_id]) for task_id in top]
@@ -10,6 +10,10 @@ from .connection_factory import (
     get_pool_stats,
     check_pool_health,
     close_pg_pool,
+    async_db_connection,
+    get_async_db_connection,
+    return_async_connection,
+    run_db,
 )
 
 # Compatibility: PostgreSQL always supports vector operations if pgvector is installed
@@ -39,6 +43,10 @@ __all__ = [
     'get_pool_stats',
     'check_pool_health',
     'close_pg_pool',
+    'async_db_connection',  # Async context manager (non-blocking)
+    'get_async_db_connection',
+    'return_async_connection',
+    'run_db',
     'is_vss_loadable',
     'check_vss_loadability',
     'execute_db_write',
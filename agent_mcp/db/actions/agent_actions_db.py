@@ -51,3 +51,22 @@ def log_agent_action_to_db(
 
 # No other functions were solely dedicated to agent_actions table in the original main.py.
 # If other specific queries/updates for agent_actions arise, they can be added here.
+
+
+async def log_agent_action_to_db_async(
+    cursor,
+    agent_id: str,
+    action_type: str,
+    task_id: str = None,
+    details: dict = None
+) -> None:
+    """
+    Async counterpart of log_agent_action_to_db for callers holding an
+    AsyncCursor (see db.async_connection). The insert runs on the database
+    executor so the event loop is never blocked.
+    """
+    from ..async_connection import run_db
+
+    await run_db(
+        log_agent_action_to_db, cursor.raw, agent_id, action_type, task_id, details
+    )
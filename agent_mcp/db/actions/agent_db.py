@@ -7,6 +7,7 @@ import datetime # Added because it's used in update_agent_db_field
 from ...core.config import logger
 from ..connection_factory import get_db_connection, db_connection
 from ..postgres_connection import return_connection
+from ..async_connection import run_db
 
 # This module provides reusable database operations specifically for the 'agents' table.
 
@@ -150,3 +151,22 @@ def update_agent_db_field(agent_id: str, field_name: str, new_value: Any) -> boo
     except Exception as e:
         logger.error(f"Unexpected error updating agent '{agent_id}' field '{field_name}': {e}", exc_info=True)
         return False
+
+
+# --- Async variants (run on the database executor) ---
+
+async def get_agent_by_id_async(agent_id: str) -> Optional[Dict[str, Any]]:
+    """Async variant of get_agent_by_id."""
+    return await run_db(get_agent_by_id, agent_id)
+
+async def get_agent_by_token_async(token: str) -> Optional[Dict[str, Any]]:
+    """Async variant of get_agent_by_token."""
+    return await run_db(get_agent_by_token, token)
+
+async def get_all_active_agents_from_db_async() -> List[Dict[str, Any]]:
+    """Async variant of get_all_active_agents_from_db."""
+    return await run_db(get_all_active_agents_from_db)
+
+async def update_agent_db_field_async(agent_id: str, field_name: str, new_value: Any) -> bool:
+    """Async variant of update_agent_db_field."""
+    return await run_db(update_agent_db_field, agent_id, field_name, new_value)
@@ -10,6 +10,7 @@ from typing import Dict, Optional, List, Any
 from ...core.config import logger
 from ..connection_factory import get_db_connection, db_connection
 from ..postgres_connection import return_connection
+from ..async_connection import run_db
 
 def get_context() -> Optional[Dict[str, Any]]:
     """Get the current project context from the database."""
@@ -79,3 +80,20 @@ def update_context(context_data: Dict[str, Any]) -> bool:
     except Exception as e:
         logger.error(f"Unexpected error updating context: {e}", exc_info=True)
         return False
+
+
+# --- Async variants (run on the database executor) ---
+
+async def get_context_async() -> Optional[Dict[str, Any]]:
+    """Async variant of get_context."""
+    return await run_db(get_context)
+
+
+async def get_context_by_key_async(context_key: str) -> Optional[Dict[str, Any]]:
+    """Async variant of get_context_by_key."""
+    return await run_db(get_context_by_key, context_key)
+
+
+async def update_context_async(context_data: Dict[str, Any]) -> bool:
+    """Async variant of update_context."""
+    return await run_db(update_context, context_data)
@@ -2,11 +2,12 @@
 import psycopg2
 import json
 import datetime
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, Iterable, List, Any, Tuple
 
-from ...core.config import logger
+from ...core.config import logger, TASK_NOTES_LEGACY_MIRROR
 from ..connection_factory import get_db_connection, db_connection
 from ..postgres_connection import return_connection
+from ..async_connection import run_db
 
 # Import WebSocket manager for real-time updates
 try:
@@ -64,7 +65,8 @@ def _parse_task_json_fields(task_data: Dict[str, Any]) -> Dict[str, Any]:
 def get_task_by_id(task_id: str) -> Optional[Dict[str, Any]]:
     """
     Fetches a single task's details from the database by task_id.
-    Parses JSON fields (child_tasks, depends_on_tasks, notes) into Python lists.
+    Parses JSON fields (child_tasks, depends_on_tasks) into Python lists and
+    reads notes from task_notes.
     Returns None if the task is not found.
     """
     try:
@@ -73,7 +75,7 @@ def get_task_by_id(task_id: str) -> Optional[Dict[str, Any]]:
             cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id,))
             row = cursor.fetchone()
             if row:
-                return _parse_task_json_fields(dict(row))
+                return attach_task_notes(cursor, [_parse_task_json_fields(dict(row))])[0]
             return None
     except psycopg2.Error as e:
         logger.error(f"Database error fetching task by ID '{task_id}': {e}", exc_info=True)
@@ -85,7 +87,7 @@ def get_task_by_id(task_id: str) -> Optional[Dict[str, Any]]:
 def get_all_tasks_from_db() -> List[Dict[str, Any]]:
     """
     Fetches all tasks from the database.
-    Parses JSON fields for each task.
+    Parses JSON fields for each task and reads notes from task_notes.
     This is used for populating g.tasks at startup and for dashboard views.
     """
     tasks_list: List[Dict[str, Any]] = []
@@ -96,7 +98,7 @@ def get_all_tasks_from_db() -> List[Dict[str, Any]]:
             cursor.execute("SELECT * FROM tasks ORDER BY display_order ASC, created_at DESC") # Order for consistency
             for row in cursor.fetchall():
                 tasks_list.append(_parse_task_json_fields(dict(row)))
-            return tasks_list
+            return attach_task_notes(cursor, tasks_list, all_tasks=True)
     except psycopg2.Error as e:
         logger.error(f"Database error fetching all tasks: {e}", exc_info=True)
         return [] # Return empty list on error
@@ -138,7 +140,7 @@ def reorder_tasks(task_ids: List[str]) -> bool:
 def get_tasks_by_agent_id(agent_id: str, status_filter: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Fetches tasks assigned to a specific agent, optionally filtered by status.
-    Parses JSON fields for each task.
+    Parses JSON fields for each task and reads notes from task_notes.
     """
     tasks_list: List[Dict[str, Any]] = []
     try:
@@ -157,7 +159,7 @@ def get_tasks_by_agent_id(agent_id: str, status_filter: Optional[str] = None) ->
             cursor.execute(query, tuple(params))
             for row in cursor.fetchall():
                 tasks_list.append(_parse_task_json_fields(dict(row)))
-            return tasks_list
+            return attach_task_notes(cursor, tasks_list)
     except psycopg2.Error as e:
         logger.error(f"Database error fetching tasks for agent '{agent_id}': {e}", exc_info=True)
         return []
@@ -172,6 +174,14 @@ def update_task_fields_in_db(task_id: str, fields_to_update: Dict[str, Any]) ->
     Handles JSON serialization for complex fields like 'notes', 'child_tasks', 'depends_on_tasks'.
     Returns True on success, False on failure.
     """
+    success = _write_task_fields(task_id, fields_to_update)
+    if success:
+        # Broadcast WebSocket update (non-blocking)
+        _broadcast_task_update(task_id, fields_to_update)
+    return success
+
+def _write_task_fields(task_id: str, fields_to_update: Dict[str, Any]) -> bool:
+    """Performs the UPDATE for update_task_fields_in_db without broadcasting."""
     if not task_id or not fields_to_update:
         logger.warning("update_task_fields_in_db called with no task_id or no fields to update.")
         return False
@@ -182,6 +192,7 @@ def update_task_fields_in_db(task_id: str, fields_to_update: Dict[str, Any]) ->
 
             update_clauses: List[str] = []
             update_values: List[Any] = []
+            notes_replaced = False
 
             for field, value in fields_to_update.items():
                 # Basic validation against known task fields from postgres_schema.py
@@ -208,13 +219,21 @@ def update_task_fields_in_db(task_id: str, fields_to_update: Dict[str, Any]) ->
                     "display_order": "display_order"
                 }
                 safe_field = safe_field_mapping[field]  # This will raise KeyError if invalid
+                if field == "notes":
+                    # Notes live in task_notes, rewritten after this UPDATE
+                    notes_replaced = True
+                    if TASK_NOTES_LEGACY_MIRROR:
+                        # Clearing the legacy column lets append_task_notes refill it to match
+                        update_clauses.append(f"{safe_field} = %s")
+                        update_values.append(json.dumps([]))
+                    continue
                 update_clauses.append(f"{safe_field} = %s")
-                if field in ["child_tasks", "depends_on_tasks", "notes"]:
+                if field in ["child_tasks", "depends_on_tasks"]:
                     update_values.append(json.dumps(value or [])) # Ensure JSON list for these
                 else:
                     update_values.append(value)
-            
-            if not update_clauses:
+
+            if not update_clauses and not notes_replaced:
                 logger.info(f"No valid fields to update for task {task_id}.")
                 return False # Or True, as no actual update was needed/performed
 
@@ -227,12 +246,17 @@ def update_task_fields_in_db(task_id: str, fields_to_update: Dict[str, Any]) ->
             sql = f"UPDATE tasks SET {', '.join(update_clauses)} WHERE task_id = %s"
             
             cursor.execute(sql, tuple(update_values))
+            updated = cursor.rowcount > 0
+            if updated and "depends_on_tasks" in fields_to_update:
+                set_task_dependencies(cursor, task_id, fields_to_update["depends_on_tasks"] or [])
+            if updated and "notes" in fields_to_update:
+                # A full notes list replaces the task's notes
+                cursor.execute("DELETE FROM task_notes WHERE task_id = %s", (task_id,))
+                append_task_notes(cursor, [(task_id, note) for note in fields_to_update["notes"] or []])
             conn.commit()
 
-            if cursor.rowcount > 0:
+            if updated:
                 logger.info(f"Task '{task_id}' updated in DB with fields: {list(fields_to_update.keys())}.")
-                # Broadcast WebSocket update (non-blocking)
-                _broadcast_task_update(task_id, fields_to_update)
                 return True
             else:
                 logger.warning(f"Task '{task_id}' not found or update had no effect in DB.")
@@ -315,7 +339,7 @@ def create_task_in_db(
                 "parent_task": parent_task,
                 "child_tasks": json.dumps([]),
                 "depends_on_tasks": json.dumps(depends_on_tasks or []),
-                "notes": json.dumps([]),
+                "notes": json.dumps([]),  # Legacy column; notes go to task_notes
             }
             
             # Check which columns exist in the database
@@ -353,6 +377,7 @@ def create_task_in_db(
                 """,
                 values
             )
+            set_task_dependencies(cursor, task_id, depends_on_tasks or [], replace=False)
             
             # Update parent task's child_tasks if parent exists
             if parent_task and parent_task.strip() and '\x00' not in parent_task:
@@ -383,3 +408,202 @@ def create_task_in_db(
     except Exception as e:
         logger.error(f"Unexpected error creating task: {e}", exc_info=True)
         return None
+
+
+# --- Task relations ---
+# Dependencies live in task_dependencies and notes in the append-only
+# task_notes table (see db/migrations/normalize_task_relations.py). Adding a
+# note is one INSERT instead of a client-side rewrite of the task's notes blob.
+# These helpers take the caller's cursor so they join its transaction;
+# the *_async variants take an AsyncCursor.
+
+# Notes for task IDs that do not exist are dropped rather than failing the
+# transaction.
+_INSERT_TASK_NOTES_SQL = """
+    INSERT INTO task_notes (task_id, timestamp, author, content)
+    SELECT task_id, timestamp, author, content
+    FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[])
+        WITH ORDINALITY AS v(task_id, timestamp, author, content, ord)
+    WHERE EXISTS (SELECT 1 FROM tasks t WHERE t.task_id = v.task_id)
+    ORDER BY ord
+"""
+
+# With TASK_NOTES_LEGACY_MIRROR on, notes are also appended server-side to the
+# legacy tasks.notes column, so a server rolled back to reading that column
+# still sees them. This rewrites the whole blob, so it is off by default, and
+# it runs under a savepoint: a malformed legacy value only skips the mirror.
+_MIRROR_LEGACY_NOTES_SQL = """
+    UPDATE tasks t
+    SET notes = (
+        COALESCE(NULLIF(NULLIF(t.notes, ''), 'null')::jsonb, '[]'::jsonb) || added.notes
+    )::text
+    FROM (
+        SELECT task_id, jsonb_agg(
+            jsonb_build_object('timestamp', timestamp, 'author', author, 'content', content)
+            ORDER BY ord
+        ) AS notes
+        FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[])
+            WITH ORDINALITY AS v(task_id, timestamp, author, content, ord)
+        GROUP BY task_id
+    ) added
+    WHERE t.task_id = added.task_id
+"""
+
+_INSERT_TASK_DEPENDENCIES_SQL = """
+    INSERT INTO task_dependencies (task_id, depends_on)
+    SELECT %s, depends_on FROM unnest(%s::text[]) AS depends_on
+    ON CONFLICT DO NOTHING
+"""
+
+def _task_notes_params(entries: Iterable[Tuple[str, Dict[str, Any]]]) -> Tuple[List[Any], ...]:
+    columns: Tuple[List[Any], ...] = ([], [], [], [])
+    for task_id, note in entries:
+        for column, value in zip(
+            columns, (task_id, note.get("timestamp"), note.get("author"), note.get("content"))
+        ):
+            column.append(value)
+    return columns
+
+def append_task_notes(cursor: psycopg2.extensions.cursor, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+    """
+    Appends notes to tasks with one INSERT into task_notes (plus the legacy
+    notes column when TASK_NOTES_LEGACY_MIRROR is on).
+
+    Args:
+        cursor: An active psycopg2 cursor object.
+        entries: (task_id, note) pairs; a note is {"timestamp", "author", "content"}.
+    """
+    params = _task_notes_params(entries)
+    if not params[0]:
+        return
+    cursor.execute(_INSERT_TASK_NOTES_SQL, params)
+    if TASK_NOTES_LEGACY_MIRROR:
+        cursor.execute("SAVEPOINT legacy_notes")
+        try:
+            cursor.execute(_MIRROR_LEGACY_NOTES_SQL, params)
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT legacy_notes")
+            logger.warning(f"Skipped mirroring notes to the legacy notes column: {e}")
+        cursor.execute("RELEASE SAVEPOINT legacy_notes")
+
+async def append_task_notes_async(cursor, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+    """Async counterpart of append_task_notes for an AsyncCursor."""
+    params = _task_notes_params(entries)
+    if not params[0]:
+        return
+    await cursor.execute(_INSERT_TASK_NOTES_SQL, params)
+    if TASK_NOTES_LEGACY_MIRROR:
+        await cursor.execute("SAVEPOINT legacy_notes")
+        try:
+            await cursor.execute(_MIRROR_LEGACY_NOTES_SQL, params)
+        except psycopg2.Error as e:
+            await cursor.execute("ROLLBACK TO SAVEPOINT legacy_notes")
+            logger.warning(f"Skipped mirroring notes to the legacy notes column: {e}")
+        await cursor.execute("RELEASE SAVEPOINT legacy_notes")
+
+def set_task_dependencies(
+    cursor: psycopg2.extensions.cursor, task_id: str, depends_on: List[str], replace: bool = True
+) -> None:
+    """
+    Writes a task's dependency rows to task_dependencies.
+    With replace=False (new tasks) the existing rows are not cleared first.
+    """
+    if replace:
+        cursor.execute("DELETE FROM task_dependencies WHERE task_id = %s", (task_id,))
+    if depends_on:
+        cursor.execute(_INSERT_TASK_DEPENDENCIES_SQL, (task_id, list(depends_on)))
+
+async def set_task_dependencies_async(cursor, task_id: str, depends_on: List[str], replace: bool = True) -> None:
+    """Async counterpart of set_task_dependencies for an AsyncCursor."""
+    if replace:
+        await cursor.execute("DELETE FROM task_dependencies WHERE task_id = %s", (task_id,))
+    if depends_on:
+        await cursor.execute(_INSERT_TASK_DEPENDENCIES_SQL, (task_id, list(depends_on)))
+
+def _task_notes_query(task_ids: Optional[List[str]]) -> Tuple[str, Tuple[Any, ...]]:
+    query = "SELECT task_id, timestamp, author, content FROM task_notes"
+    params: Tuple[Any, ...] = ()
+    if task_ids is not None:
+        query += " WHERE task_id = ANY(%s)"
+        params = (list(task_ids),)
+    return query + " ORDER BY task_id, note_id", params
+
+def _group_task_notes(rows: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    notes_by_task: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        notes_by_task.setdefault(row["task_id"], []).append(
+            {"timestamp": row["timestamp"], "author": row["author"], "content": row["content"]}
+        )
+    return notes_by_task
+
+def get_task_notes(
+    cursor: psycopg2.extensions.cursor, task_ids: Optional[List[str]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetches notes from task_notes, oldest first, grouped by task_id.
+    Fetches the notes of every task when task_ids is None.
+    """
+    if task_ids is not None and not task_ids:
+        return {}
+    cursor.execute(*_task_notes_query(task_ids))
+    return _group_task_notes(cursor.fetchall())
+
+def attach_task_notes(
+    cursor: psycopg2.extensions.cursor, tasks: List[Dict[str, Any]], all_tasks: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Sets each task's 'notes' to its rows in task_notes (one query for all tasks),
+    replacing the legacy notes column. Pass all_tasks=True when tasks is the
+    whole table, to skip the task_id filter.
+    """
+    if not tasks:
+        return tasks
+    notes_by_task = get_task_notes(cursor, None if all_tasks else [task["task_id"] for task in tasks])
+    for task in tasks:
+        task["notes"] = notes_by_task.get(task["task_id"], [])
+    return tasks
+
+async def attach_task_notes_async(cursor, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Async counterpart of attach_task_notes for an AsyncCursor."""
+    if not tasks:
+        return tasks
+    await cursor.execute(*_task_notes_query([task["task_id"] for task in tasks]))
+    notes_by_task = _group_task_notes(cursor.fetchall())
+    for task in tasks:
+        task["notes"] = notes_by_task.get(task["task_id"], [])
+    return tasks
+
+
+# --- Async variants ---
+# Non-blocking wrappers for async handlers: the query runs on the database
+# executor while the event loop keeps serving other agents.
+
+async def get_task_by_id_async(task_id: str) -> Optional[Dict[str, Any]]:
+    """Async variant of get_task_by_id."""
+    return await run_db(get_task_by_id, task_id)
+
+async def get_all_tasks_from_db_async() -> List[Dict[str, Any]]:
+    """Async variant of get_all_tasks_from_db."""
+    return await run_db(get_all_tasks_from_db)
+
+async def get_tasks_by_agent_id_async(agent_id: str, status_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Async variant of get_tasks_by_agent_id."""
+    return await run_db(get_tasks_by_agent_id, agent_id, status_filter)
+
+async def update_task_fields_in_db_async(task_id: str, fields_to_update: Dict[str, Any]) -> bool:
+    """
+    Async variant of update_task_fields_in_db.
+    The WebSocket broadcast is scheduled on the calling event loop, not the worker thread.
+    """
+    success = await run_db(_write_task_fields, task_id, fields_to_update)
+    if success:
+        _broadcast_task_update(task_id, fields_to_update)
+    return success
+
+async def reorder_tasks_async(task_ids: List[str]) -> bool:
+    """Async variant of reorder_tasks."""
+    return await run_db(reorder_tasks, task_ids)
+
+async def create_task_in_db_async(title: str, **kwargs) -> Optional[str]:
+    """Async variant of create_task_in_db (accepts the same keyword arguments)."""
+    return await run_db(create_task_in_db, title, **kwargs)
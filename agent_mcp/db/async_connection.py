@@ -0,0 +1,188 @@
+"""
+Async PostgreSQL access layer.
+
+Wraps the psycopg2 connection pool from ``postgres_connection`` so async tool
+handlers can talk to the database without blocking the event loop. Every
+network round trip (checkout, ``execute``, ``commit``, ``rollback``, return to
+pool) runs on a dedicated thread pool sized to the connection pool, so
+concurrent agent calls overlap their I/O instead of serializing on the loop.
+
+psycopg2 cursors are client-side: ``execute`` transfers the whole result set,
+so ``fetchone``/``fetchall``/``rowcount`` are plain in-memory reads and stay
+synchronous on the async cursor.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Callable, Optional, Sequence
+
+import psycopg2
+
+from ..core.config import logger
+from ..core.settings import get_settings
+from .postgres_connection import (
+    _get_connection_with_retry,
+    _connection_pools,
+    _discard_connection,
+    _record_checkin,
+    return_connection,
+)
+
+# Thread pool dedicated to database I/O (one worker per pooled connection)
+_db_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    """Get or create the executor used for blocking database calls."""
+    global _db_executor
+    if _db_executor is None:
+        settings = get_settings()
+        max_workers = settings.db_pool_max or int(os.environ.get("DB_POOL_MAX", "10"))
+        _db_executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="agent-mcp-db"
+        )
+    return _db_executor
+
+
+async def run_db(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking database callable on the database executor.
+
+    Usage:
+        task = await run_db(get_task_by_id, task_id)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_db_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+class AsyncCursor:
+    """Awaitable facade over a psycopg2 ``RealDictCursor``."""
+
+    def __init__(self, cursor: psycopg2.extensions.cursor):
+        self._cursor = cursor
+
+    @property
+    def raw(self) -> psycopg2.extensions.cursor:
+        """The underlying psycopg2 cursor (for sync helpers run via ``run_db``)."""
+        return self._cursor
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    async def execute(self, query: str, params: Optional[Sequence[Any]] = None) -> None:
+        await run_db(self._cursor.execute, query, params)
+
+    async def executemany(self, query: str, params_seq: Sequence[Sequence[Any]]) -> None:
+        await run_db(self._cursor.executemany, query, params_seq)
+
+    def fetchone(self) -> Optional[dict]:
+        return self._cursor.fetchone()
+
+    def fetchall(self) -> list:
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: Optional[int] = None) -> list:
+        if size is None:
+            return self._cursor.fetchmany()
+        return self._cursor.fetchmany(size)
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class AsyncConnection:
+    """Awaitable facade over a pooled psycopg2 connection."""
+
+    def __init__(self, conn: psycopg2.extensions.connection):
+        self._conn = conn
+
+    @property
+    def raw(self) -> psycopg2.extensions.connection:
+        """The underlying psycopg2 connection."""
+        return self._conn
+
+    def cursor(self) -> AsyncCursor:
+        return AsyncCursor(self._conn.cursor())
+
+    async def commit(self) -> None:
+        await run_db(self._conn.commit)
+
+    async def rollback(self) -> None:
+        await run_db(self._conn.rollback)
+
+
+async def get_async_db_connection() -> AsyncConnection:
+    """
+    Check out a pooled connection without blocking the event loop.
+
+    Note: Caller is responsible for returning it with ``return_async_connection()``.
+    For automatic management, use the ``async_db_connection()`` context manager.
+    """
+    conn = await run_db(_get_connection_with_retry)
+    return AsyncConnection(conn)
+
+
+async def return_async_connection(conn: AsyncConnection) -> None:
+    """Return an async connection to the pool."""
+    await run_db(return_connection, conn.raw)
+
+
+async def _discard_async_connection(conn: AsyncConnection) -> None:
+    """Roll back and close a connection that raised, instead of reusing it."""
+
+    def _discard(raw_conn):
+        pool = _connection_pools.pop(id(raw_conn), None)
+        try:
+            raw_conn.rollback()
+        except Exception:
+            pass
+        if pool is not None:
+            _record_checkin(raw_conn)
+            _discard_connection(pool, raw_conn)
+        else:
+            try:
+                raw_conn.close()
+            except Exception:
+                pass
+
+    await run_db(_discard, conn.raw)
+
+
+@asynccontextmanager
+async def async_db_connection() -> AsyncGenerator[AsyncConnection, None]:
+    """
+    Async context manager for database connections.
+    Automatically returns connection to pool on exit.
+
+    Usage:
+        async with async_db_connection() as conn:
+            cursor = conn.cursor()
+            await cursor.execute("SELECT * FROM tasks")
+            results = cursor.fetchall()
+    """
+    conn = await get_async_db_connection()
+    try:
+        yield conn
+    except BaseException:
+        await _discard_async_connection(conn)
+        raise
+    else:
+        await return_async_connection(conn)
+
+
+def shutdown_db_executor() -> None:
+    """Shut down the database executor (called when the pool is closed)."""
+    global _db_executor
+    if _db_executor is not None:
+        _db_executor.shutdown(wait=False)
+        _db_executor = None
+        logger.info("Async database executor shut down")
@@ -10,6 +10,12 @@ from .postgres_connection import (
     check_pool_health,
     close_pg_pool,
 )
+from .async_connection import (
+    async_db_connection,
+    get_async_db_connection,
+    return_async_connection,
+    run_db,
+)
 
 def get_db_connection():
     """
@@ -33,4 +39,8 @@ __all__ = [
     'get_pool_stats',
     'check_pool_health',
     'close_pg_pool',
+    'async_db_connection',  # Async context manager (non-blocking)
+    'get_async_db_connection',
+    'return_async_connection',
+    'run_db',
 ]
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Migration script to normalize task relations into join tables.
+
+This script:
+1. Creates task_dependencies(task_id, depends_on) and the append-only
+   task_notes table, with their indexes
+2. Copies every task's depends_on_tasks JSON list into task_dependencies
+3. Copies every task's notes JSON list into task_notes (tasks that already
+   have rows in task_notes are skipped, so re-running is safe)
+4. Sets parent_task on children listed in a parent's child_tasks but
+   missing the back-reference, so children can be found by parent_task
+
+The child_tasks, depends_on_tasks and notes columns are left in place. New
+notes go to task_notes only, unless AGENT_MCP_TASK_NOTES_LEGACY_MIRROR is
+set: then they are appended to the notes column too, so a rollback to an
+older server keeps seeing them. Notes written by such an older server go
+only to the notes column; they are not copied again for tasks that already
+have task_notes rows.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import psycopg2
+
+# Add parent directories to path to import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from agent_mcp.db import get_db_connection, return_connection
+from agent_mcp.core.config import logger
+
+TASK_RELATIONS_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS task_dependencies (
+        task_id VARCHAR(255) NOT NULL REFERENCES tasks (task_id) ON DELETE CASCADE,
+        depends_on VARCHAR(255) NOT NULL,   -- Task ID; may not exist (yet)
+        PRIMARY KEY (task_id, depends_on)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_task_dependencies_depends_on ON task_dependencies (depends_on)",
+    """
+    CREATE TABLE IF NOT EXISTS task_notes (
+        note_id BIGSERIAL PRIMARY KEY,
+        task_id VARCHAR(255) NOT NULL REFERENCES tasks (task_id) ON DELETE CASCADE,
+        timestamp VARCHAR(64),
+        author VARCHAR(255),
+        content TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_task_notes_task_id ON task_notes (task_id, note_id)",
+)
+
+
+def ensure_task_relation_tables(cursor) -> bool:
+    """
+    Create the task relation tables and indexes if missing.
+
+    Returns True when task_notes did not exist before, i.e. the legacy JSON
+    columns still need to be copied over (see backfill_task_relations).
+    """
+    cursor.execute("SELECT to_regclass('task_notes') IS NULL AS missing")
+    row = cursor.fetchone()
+    missing = bool(row["missing"] if isinstance(row, dict) else row[0])
+    for statement in TASK_RELATIONS_DDL:
+        cursor.execute(statement)
+    return missing
+
+
+def _json_list(value: Any, task_id: str, field: str) -> List[Any]:
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value) if isinstance(value, str) else value
+    except json.JSONDecodeError:
+        logger.warning(f"Skipping unparsable {field} of task '{task_id}' during migration.")
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def backfill_task_relations(cursor) -> Dict[str, int]:
+    """
+    Copy the JSON list columns of the tasks table into the relation tables.
+
+    Idempotent: dependencies are inserted with ON CONFLICT DO NOTHING, notes
+    only for tasks without task_notes rows, and parent_task only where unset.
+    Returns the number of rows written per relation.
+    """
+    counts = {"dependencies": 0, "notes": 0, "parents": 0}
+
+    cursor.execute(
+        "SELECT task_id, depends_on_tasks FROM tasks "
+        "WHERE depends_on_tasks IS NOT NULL AND depends_on_tasks NOT IN ('', '[]')"
+    )
+    task_ids: List[str] = []
+    depends_on: List[str] = []
+    for row in cursor.fetchall():
+        for dependency_id in _json_list(row["depends_on_tasks"], row["task_id"], "depends_on_tasks"):
+            task_ids.append(row["task_id"])
+            depends_on.append(str(dependency_id))
+    if task_ids:
+        cursor.execute(
+            "INSERT INTO task_dependencies (task_id, depends_on) "
+            "SELECT * FROM unnest(%s::text[], %s::text[]) ON CONFLICT DO NOTHING",
+            (task_ids, depends_on),
+        )
+        counts["dependencies"] = cursor.rowcount
+
+    cursor.execute(
+        "SELECT t.task_id, t.notes FROM tasks t "
+        "WHERE t.notes IS NOT NULL AND t.notes NOT IN ('', '[]') "
+        "AND NOT EXISTS (SELECT 1 FROM task_notes n WHERE n.task_id = t.task_id)"
+    )
+    note_columns: List[List[Any]] = [[], [], [], []]
+    for row in cursor.fetchall():
+        for note in _json_list(row["notes"], row["task_id"], "notes"):
+            if not isinstance(note, dict):
+                note = {"content": str(note)}
+            for column, value in zip(
+                note_columns,
+                (row["task_id"], note.get("timestamp"), note.get("author"), note.get("content")),
+            ):
+                column.append(value)
+    if note_columns[0]:
+        # unnest keeps list order, so note_id follows the original note order
+        cursor.execute(
+            "INSERT INTO task_notes (task_id, timestamp, author, content) "
+            "SELECT * FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[])",
+            tuple(note_columns),
+        )
+        counts["notes"] = cursor.rowcount
+
+    cursor.execute(
+        "SELECT task_id, child_tasks FROM tasks "
+        "WHERE child_tasks IS NOT NULL AND child_tasks NOT IN ('', '[]')"
+    )
+    child_ids: List[str] = []
+    parent_ids: List[str] = []
+    for row in cursor.fetchall():
+        for child_id in _json_list(row["child_tasks"], row["task_id"], "child_tasks"):
+            child_ids.append(str(child_id))
+            parent_ids.append(row["task_id"])
+    if child_ids:
+        cursor.execute(
+            """
+            UPDATE tasks AS t SET parent_task = v.parent_task
+            FROM unnest(%s::text[], %s::text[]) AS v(task_id, parent_task)
+            WHERE t.task_id = v.task_id AND t.parent_task IS NULL
+            """,
+            (child_ids, parent_ids),
+        )
+        counts["parents"] = cursor.rowcount
+
+    return counts
+
+
+def migrate_database():
+    """Run the migration to normalize task relations."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        ensure_task_relation_tables(cursor)
+        logger.info("task_dependencies and task_notes tables ensured.")
+
+        counts = backfill_task_relations(cursor)
+        logger.info(
+            f"Copied {counts['dependencies']} dependencies and {counts['notes']} notes; "
+            f"set parent_task on {counts['parents']} child tasks."
+        )
+
+        # Commit all changes
+        conn.commit()
+        logger.info("Migration completed successfully!")
+
+    except psycopg2.Error as e:
+        logger.error(f"Database error during migration: {e}")
+        if conn:
+            conn.rollback()
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during migration: {e}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            return_connection(conn)
+
+
+if __name__ == "__main__":
+    print("Agent-MCP Task Relations Migration")
+    print("==================================")
+    print("This will move task dependencies and notes into join tables.")
+    print()
+
+    response = input("Do you want to proceed? (y/N): ")
+    if response.lower() == 'y':
+        migrate_database()
+    else:
+        print("Migration cancelled.")
@@ -2,8 +2,9 @@
 PostgreSQL database connection module with connection pooling and context managers.
 """
 import os
+import threading
 import time
-from typing import Optional, Generator
+from typing import Dict, Optional, Generator
 from contextlib import contextmanager
 import psycopg2
 from psycopg2.extras import RealDictCursor
@@ -12,6 +13,13 @@ from psycopg2 import OperationalError, InterfaceError
 
 from ..core.config import logger
 from ..core.settings import get_settings
+from ..utils.metrics import record_db_connection_acquire, record_db_pool_error
+
+# pgvector adapters are optional; without them vectors travel as text literals
+try:
+    from pgvector.psycopg2 import register_vector as _register_vector
+except ImportError:
+    _register_vector = None
 
 # Connection pool for PostgreSQL
 _pg_pool: Optional[ThreadedConnectionPool] = None
@@ -19,6 +27,29 @@ _pg_pool: Optional[ThreadedConnectionPool] = None
 # Store pool references for connections (since psycopg2 connections don't allow arbitrary attributes)
 _connection_pools: dict = {}
 
+# Per-physical-connection bookkeeping keyed by id(conn): last_used / checked_out_at
+_connection_state: Dict[int, dict] = {}
+
+# Whether CREATE EXTENSION vector has already succeeded in this process
+_vector_extension_ready = False
+
+# Pool usage statistics (exposed via get_pool_stats)
+_stats_lock = threading.Lock()
+_pool_stats: Dict[str, float] = {
+    "checkouts": 0,
+    "returns": 0,
+    "in_use": 0,
+    "peak_in_use": 0,
+    "connections_initialized": 0,
+    "validations": 0,
+    "validation_failures": 0,
+    "total_wait_ms": 0.0,
+    "max_wait_ms": 0.0,
+    "total_acquire_ms": 0.0,
+    "total_checkout_ms": 0.0,
+    "max_checkout_ms": 0.0,
+}
+
 # Connection retry configuration
 MAX_RETRIES = 3
 RETRY_DELAY = 1.0  # seconds
@@ -87,22 +118,93 @@ def _check_connection_health(conn) -> bool:
     except Exception:
         return False
 
+def _initialize_connection(conn) -> None:
+    """
+    One-time setup for a new physical connection: make sure the pgvector
+    extension exists and register its type adapters on this connection.
+    """
+    global _vector_extension_ready
+
+    if not _vector_extension_ready:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            conn.commit()
+            _vector_extension_ready = True
+            logger.debug("pgvector extension enabled")
+        except Exception as e:
+            logger.warning(f"Could not enable pgvector extension: {e}")
+            conn.rollback()
+
+    if _register_vector is not None and _vector_extension_ready:
+        try:
+            # Must run before cursor_factory is switched to RealDictCursor
+            _register_vector(conn)
+        except Exception as e:
+            logger.warning(f"Could not register pgvector adapters: {e}")
+            conn.rollback()
+
+    # Set connection to return dict-like rows (similar to sqlite3.Row)
+    conn.cursor_factory = RealDictCursor
+    with _stats_lock:
+        _pool_stats["connections_initialized"] += 1
+
+def _needs_validation(conn_state: Optional[dict]) -> bool:
+    """Decide whether a checked-out connection should be validated with a round trip."""
+    settings = get_settings()
+    if settings.db_pool_validation == "always":
+        return True
+    if conn_state is None:
+        # Fresh physical connection, just opened by the pool
+        return False
+    idle_seconds = time.monotonic() - conn_state["last_used"]
+    return idle_seconds >= settings.db_pool_idle_validation_seconds
+
+def _discard_connection(pool: ThreadedConnectionPool, conn) -> None:
+    """Close a connection and drop it from the pool and our bookkeeping."""
+    _connection_state.pop(id(conn), None)
+    try:
+        conn.close()
+    except Exception:
+        pass
+    try:
+        pool.putconn(conn, close=True)
+    except Exception:
+        pass
+
 def _get_connection_with_retry() -> psycopg2.extensions.connection:
-    """Get a connection from the pool with retry logic."""
+    """
+    Get a connection from the pool with retry logic.
+
+    Physical connections are initialized once. In 'lazy' validation mode a
+    connection is only probed with SELECT 1 after it has been idle longer than
+    db_pool_idle_validation_seconds; errors surfaced by real queries discard
+    the connection instead (see db_connection()).
+    """
     pool = _get_pg_pool()
     
     for attempt in range(MAX_RETRIES):
         try:
+            wait_start = time.monotonic()
             conn = pool.getconn()
-            
-            # Check connection health
-            if not _check_connection_health(conn):
+            wait_ms = (time.monotonic() - wait_start) * 1000
+
+            conn_state = _connection_state.get(id(conn))
+            if conn.closed:
+                healthy = False
+            elif _needs_validation(conn_state):
+                healthy = _check_connection_health(conn)
+                with _stats_lock:
+                    _pool_stats["validations"] += 1
+                    if not healthy:
+                        _pool_stats["validation_failures"] += 1
+            else:
+                healthy = True
+
+            if not healthy:
                 # Connection is dead, close it and try again
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-                pool.putconn(conn, close=True)
+                _discard_connection(pool, conn)
+                record_db_pool_error()
                 
                 if attempt < MAX_RETRIES - 1:
                     time.sleep(RETRY_DELAY)
@@ -110,21 +212,24 @@ def _get_connection_with_retry() -> psycopg2.extensions.connection:
                 else:
                     raise RuntimeError("Failed to get healthy connection after retries")
             
-            # Enable pgvector extension if available (only once per connection)
-            try:
-                with conn.cursor() as cur:
-                    cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
-                    conn.commit()
-                    logger.debug("pgvector extension enabled")
-            except Exception as e:
-                logger.warning(f"Could not enable pgvector extension: {e}")
-                conn.rollback()
-            
-            # Set connection to return dict-like rows (similar to sqlite3.Row)
-            conn.cursor_factory = RealDictCursor
+            if conn_state is None:
+                _initialize_connection(conn)
+                conn_state = {"last_used": time.monotonic()}
+                _connection_state[id(conn)] = conn_state
+            conn_state["checked_out_at"] = time.monotonic()
             
             # Store pool reference in external dict
             _connection_pools[id(conn)] = pool
+
+            acquire_ms = (conn_state["checked_out_at"] - wait_start) * 1000
+            with _stats_lock:
+                _pool_stats["checkouts"] += 1
+                _pool_stats["in_use"] += 1
+                _pool_stats["peak_in_use"] = max(_pool_stats["peak_in_use"], _pool_stats["in_use"])
+                _pool_stats["total_wait_ms"] += wait_ms
+                _pool_stats["max_wait_ms"] = max(_pool_stats["max_wait_ms"], wait_ms)
+                _pool_stats["total_acquire_ms"] += acquire_ms
+            record_db_connection_acquire(acquire_ms)
             
             return conn
             
@@ -134,10 +239,26 @@ def _get_connection_with_retry() -> psycopg2.extensions.connection:
                 time.sleep(RETRY_DELAY)
             else:
                 logger.error(f"Failed to get connection after {MAX_RETRIES} attempts: {e}")
+                record_db_pool_error()
                 raise
     
     raise RuntimeError("Failed to get connection after retries")
 
+def _record_checkin(conn) -> None:
+    """Update per-checkout latency and in-use counters when a connection comes back."""
+    conn_state = _connection_state.get(id(conn))
+    now = time.monotonic()
+    with _stats_lock:
+        _pool_stats["in_use"] = max(0, _pool_stats["in_use"] - 1)
+        if conn_state and conn_state.get("checked_out_at") is not None:
+            held_ms = (now - conn_state["checked_out_at"]) * 1000
+            _pool_stats["total_checkout_ms"] += held_ms
+            _pool_stats["max_checkout_ms"] = max(_pool_stats["max_checkout_ms"], held_ms)
+            _pool_stats["returns"] += 1
+    if conn_state:
+        conn_state["checked_out_at"] = None
+        conn_state["last_used"] = now
+
 def get_postgres_connection():
     """
     Get a PostgreSQL connection from the pool.
@@ -170,11 +291,12 @@ def db_connection() -> Generator[psycopg2.extensions.connection, None, None]:
             conn_id = id(conn)
             if conn_id in _connection_pools:
                 pool = _connection_pools.pop(conn_id)
+                _record_checkin(conn)
                 try:
                     conn.rollback()
                 except Exception:
                     pass
-                pool.putconn(conn, close=True)
+                _discard_connection(pool, conn)
         raise
     finally:
         if conn:
@@ -185,24 +307,26 @@ def return_connection(conn):
     conn_id = id(conn)
     if conn_id in _connection_pools:
         pool = _connection_pools.pop(conn_id)
+        _record_checkin(conn)
         try:
-            # Check if connection is still healthy before returning
-            if _check_connection_health(conn):
+            if get_settings().db_pool_validation == "always":
+                healthy = _check_connection_health(conn)
+            else:
+                # Lazy mode: no round trip, just check the client-side state.
+                # putconn() itself rolls back any open transaction.
+                healthy = not conn.closed
+            if healthy:
                 pool.putconn(conn)
+                if conn.closed:
+                    # The pool dropped it (e.g. above minconn); forget its state
+                    _connection_state.pop(conn_id, None)
             else:
                 # Connection is dead, close it
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-                pool.putconn(conn, close=True)
+                _discard_connection(pool, conn)
                 logger.warning("Returned dead connection to pool, it was closed")
         except Exception as e:
             logger.error(f"Error returning connection to pool: {e}")
-            try:
-                conn.close()
-            except Exception:
-                pass
+            _discard_connection(pool, conn)
     else:
         # Connection not from our pool, just close it
         try:
@@ -211,12 +335,30 @@ def return_connection(conn):
             pass
 
 def get_pool_stats() -> dict:
-    """Get connection pool statistics."""
+    """Get connection pool statistics, including checkout latency and in-use counts."""
     pool = _get_pg_pool()
+    settings = get_settings()
+    with _stats_lock:
+        stats = dict(_pool_stats)
+    checkouts = stats["checkouts"]
+    returns = stats["returns"]
     return {
         "minconn": pool.minconn,
         "maxconn": pool.maxconn,
         "closed": pool.closed,
+        "validation_mode": settings.db_pool_validation,
+        "idle_validation_seconds": settings.db_pool_idle_validation_seconds,
+        "in_use": stats["in_use"],
+        "peak_in_use": stats["peak_in_use"],
+        "checkouts": checkouts,
+        "connections_initialized": stats["connections_initialized"],
+        "validations": stats["validations"],
+        "validation_failures": stats["validation_failures"],
+        "avg_wait_ms": round(stats["total_wait_ms"] / checkouts, 3) if checkouts else 0.0,
+        "max_wait_ms": round(stats["max_wait_ms"], 3),
+        "avg_acquire_ms": round(stats["total_acquire_ms"] / checkouts, 3) if checkouts else 0.0,
+        "avg_checkout_ms": round(stats["total_checkout_ms"] / returns, 3) if returns else 0.0,
+        "max_checkout_ms": round(stats["max_checkout_ms"], 3),
     }
 
 def check_pool_health() -> bool:
@@ -252,4 +394,7 @@ def close_pg_pool():
         _pg_pool.closeall()
         _pg_pool = None
         _connection_pools.clear()
+        _connection_state.clear()
         logger.info("PostgreSQL connection pool closed")
+    from .async_connection import shutdown_db_executor
+    shutdown_db_executor()
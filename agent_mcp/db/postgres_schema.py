@@ -9,6 +9,7 @@ from psycopg2.extras import RealDictCursor
 
 from ..core.config import logger
 from .postgres_connection import get_postgres_connection, return_connection
+from .vector_index import initial_index_sql
 
 
 def init_database() -> None:
@@ -139,6 +140,22 @@ def init_database() -> None:
             conn.rollback()
         logger.debug("Tasks table and indexes ensured.")
 
+        # Task relation tables (task_dependencies, append-only task_notes)
+        from .migrations.normalize_task_relations import (
+            backfill_task_relations,
+            ensure_task_relation_tables,
+        )
+
+        if ensure_task_relation_tables(cursor):
+            # First start after upgrading: copy the legacy JSON columns over
+            counts = backfill_task_relations(cursor)
+            logger.info(
+                f"Migrated {counts['dependencies']} task dependencies and {counts['notes']} task notes "
+                "into relation tables."
+            )
+        conn.commit()
+        logger.debug("Task relation tables and indexes ensured.")
+
         # Agent Actions Table
         cursor.execute(
             """
@@ -224,6 +241,37 @@ def init_database() -> None:
         )
         logger.debug("RAG_chunks table and indexes ensured.")
 
+        # Full-text search for hybrid RAG retrieval and keyword task lookup.
+        # tasks gets an expression index (no extra column, so SELECT * rows are
+        # unchanged); rag_chunks gets a generated tsvector column (PostgreSQL 12+)
+        # so ranking reads it instead of re-parsing chunk text. The expressions
+        # must match the queries in features/rag/hybrid_search.py.
+        conn.commit()
+        try:
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_tasks_search_tsv ON tasks USING GIN (
+                    to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))
+                )
+            """
+            )
+            conn.commit()
+            cursor.execute(
+                """
+                ALTER TABLE rag_chunks ADD COLUMN IF NOT EXISTS chunk_tsv tsvector
+                GENERATED ALWAYS AS (to_tsvector('english', chunk_text)) STORED
+            """
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_rag_chunks_tsv ON rag_chunks USING GIN (chunk_tsv)"
+            )
+            conn.commit()
+            logger.debug("Full-text search columns and indexes ensured.")
+        except psycopg2.Error as e:
+            # Retrieval falls back to vector-only search
+            logger.warning(f"Could not create full-text search columns: {e}")
+            conn.rollback()
+
         # RAG Embeddings Table (using pgvector)
         try:
             # Get embedding dimension from environment or use default
@@ -240,15 +288,39 @@ def init_database() -> None:
             """
             )
             
-            # Create index for vector similarity search
+            conn.commit()
+            logger.debug("RAG_embeddings table with pgvector ensured.")
+
+            # Index for vector similarity search. HNSW is created here; ivfflat
+            # needs data to cluster, so vector_index.maintain_vector_index builds
+            # (and later resizes) it after the first indexing cycle.
+            index_sql = initial_index_sql()
+            if index_sql:
+                try:
+                    cursor.execute(index_sql)
+                    conn.commit()
+                except psycopg2.Error as e:
+                    logger.warning(f"Could not create vector index: {e}")
+                    conn.rollback()
+
+            # Content-addressed embedding cache: sha256(model|dimension|chunk_text) -> vector.
+            # Untyped vector column so entries for other models/dimensions can coexist.
             cursor.execute(
                 """
-                CREATE INDEX IF NOT EXISTS idx_rag_embeddings_vector 
-                ON rag_embeddings USING ivfflat (embedding vector_cosine_ops)
-                WITH (lists = 100)
+                CREATE TABLE IF NOT EXISTS rag_embedding_cache (
+                    cache_key VARCHAR(64) PRIMARY KEY,
+                    model_name VARCHAR(255) NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    embedding vector NOT NULL,
+                    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    last_used_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
             """
             )
-            logger.debug("RAG_embeddings table with pgvector ensured.")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_rag_embedding_cache_last_used ON rag_embedding_cache (last_used_at)"
+            )
+            logger.debug("RAG_embedding_cache table ensured.")
         except Exception as e:
             logger.warning(f"Could not create RAG embeddings table: {e}")
             conn.rollback()
@@ -264,6 +336,37 @@ def init_database() -> None:
         )
         logger.debug("RAG_meta table ensured.")
 
+        # RAG File Manifest Table (stat + hash of every indexed file for incremental scans)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rag_file_manifest (
+                source_path TEXT PRIMARY KEY,
+                source_type VARCHAR(50) NOT NULL,
+                mtime DOUBLE PRECISION NOT NULL,
+                size BIGINT NOT NULL,
+                content_hash VARCHAR(64) NOT NULL,
+                indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        logger.debug("RAG_file_manifest table ensured.")
+
+        # RAG Agent Doc Access Table (write-behind store of the RAG memory tracker)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rag_agent_doc_access (
+                agent_id VARCHAR(255) NOT NULL,
+                doc_key TEXT NOT NULL,
+                accessed_at TIMESTAMPTZ NOT NULL,
+                PRIMARY KEY (agent_id, doc_key)
+            )
+        """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_rag_agent_doc_access_accessed_at ON rag_agent_doc_access (accessed_at)"
+        )
+        logger.debug("RAG_agent_doc_access table ensured.")
+
         # Agent Messages Table
         cursor.execute(
             """
@@ -0,0 +1,206 @@
+"""
+Vector index management for rag_embeddings.
+
+Builds idx_rag_embeddings_vector as HNSW (m / ef_construction) or as an
+ivfflat index whose list count is sized from the current row count, and
+rebuilds it with CREATE INDEX CONCURRENTLY + rename when the configuration or
+the table size no longer match, so searches keep an index throughout.
+
+Query-time accuracy comes from AGENT_MCP_RAG_VECTOR_SEARCH_MODE
+(fast / balanced / accurate), applied per transaction with SET LOCAL
+hnsw.ef_search / ivfflat.probes.
+"""
+import math
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from ..core.config import logger
+from ..core.settings import get_settings
+
+INDEX_NAME = "idx_rag_embeddings_vector"
+_BUILD_NAME = f"{INDEX_NAME}_new"
+
+# Rebuild an ivfflat index once the ideal list count drifts by this factor
+IVFFLAT_RESIZE_FACTOR = 2.0
+
+# hnsw.ef_search and the multiple of sqrt(lists) used for ivfflat.probes
+_SEARCH_MODES = {
+    "fast": (40, 0.5),
+    "balanced": (100, 1.0),
+    "accurate": (200, 2.0),
+}
+
+_maintenance_lock = threading.Lock()
+# Description of the live index, cached for per-query settings
+_current_index: Optional["VectorIndexSpec"] = None
+_current_index_loaded = False
+
+
+@dataclass(frozen=True)
+class VectorIndexSpec:
+    """Access method and build parameters of a vector index."""
+
+    method: str  # "hnsw" or "ivfflat"
+    m: Optional[int] = None
+    ef_construction: Optional[int] = None
+    lists: Optional[int] = None
+
+    def with_clause(self) -> str:
+        if self.method == "hnsw":
+            return f"m = {int(self.m)}, ef_construction = {int(self.ef_construction)}"
+        return f"lists = {int(self.lists)}"
+
+
+def ivfflat_lists_for_rows(row_count: int) -> int:
+    """pgvector's sizing guidance: rows / 1000 up to 1M rows, sqrt(rows) above."""
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def desired_index_spec(row_count: int) -> VectorIndexSpec:
+    """Index the current settings call for at the given table size."""
+    settings = get_settings()
+    if settings.rag_vector_index_type == "hnsw":
+        return VectorIndexSpec(
+            "hnsw", m=settings.rag_hnsw_m, ef_construction=settings.rag_hnsw_ef_construction
+        )
+    return VectorIndexSpec("ivfflat", lists=ivfflat_lists_for_rows(row_count))
+
+
+def build_index_sql(spec: VectorIndexSpec, name: str = INDEX_NAME, concurrently: bool = False) -> str:
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+        f"ON rag_embeddings USING {spec.method} (embedding vector_cosine_ops) "
+        f"WITH ({spec.with_clause()})"
+    )
+
+
+def parse_index_definition(indexdef: str) -> Optional[VectorIndexSpec]:
+    """VectorIndexSpec from a pg_indexes.indexdef string (None if not a vector index)."""
+    method_match = re.search(r"USING (hnsw|ivfflat)", indexdef)
+    if not method_match:
+        return None
+    params = {
+        key: int(value)
+        for key, value in re.findall(r"(\w+)='?(\d+)'?", indexdef.split("WITH", 1)[-1])
+    }
+    if method_match.group(1) == "hnsw":
+        # pgvector defaults when the index was built without options
+        return VectorIndexSpec(
+            "hnsw", m=params.get("m", 16), ef_construction=params.get("ef_construction", 64)
+        )
+    return VectorIndexSpec("ivfflat", lists=params.get("lists", 100))
+
+
+def describe_vector_index(cursor) -> Optional[VectorIndexSpec]:
+    """Spec of the live idx_rag_embeddings_vector, or None if it does not exist."""
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = 'rag_embeddings' AND indexname = %s",
+        (INDEX_NAME,),
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return parse_index_definition(row["indexdef"] if isinstance(row, dict) else row[0])
+
+
+def _estimated_row_count(cursor) -> int:
+    """Planner row estimate for rag_embeddings, falling back to COUNT(*) if never analyzed."""
+    cursor.execute("SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = 'rag_embeddings'::regclass")
+    row = cursor.fetchone()
+    estimate = (row["estimate"] if isinstance(row, dict) else row[0]) if row else -1
+    if estimate is None or estimate < 0:
+        cursor.execute("SELECT COUNT(*) AS count FROM rag_embeddings")
+        row = cursor.fetchone()
+        estimate = row["count"] if isinstance(row, dict) else row[0]
+    return int(estimate)
+
+
+def needs_rebuild(current: Optional[VectorIndexSpec], desired: VectorIndexSpec) -> bool:
+    if current is None or current.method != desired.method:
+        return True
+    if desired.method == "hnsw":
+        return current != desired
+    ratio = desired.lists / max(1, current.lists)
+    return ratio >= IVFFLAT_RESIZE_FACTOR or ratio <= 1 / IVFFLAT_RESIZE_FACTOR
+
+
+def initial_index_sql() -> Optional[str]:
+    """
+    Index to create with the schema, or None.
+
+    HNSW can be built on an empty table and grows incrementally; ivfflat
+    clusters the rows present at build time, so it is left to the manager
+    until the first load.
+    """
+    spec = desired_index_spec(0)
+    return build_index_sql(spec) if spec.method == "hnsw" else None
+
+
+def load_current_index(cursor) -> Optional[VectorIndexSpec]:
+    """Describe the live index once per process (used to size ivfflat.probes)."""
+    global _current_index, _current_index_loaded
+    if not _current_index_loaded:
+        _current_index = describe_vector_index(cursor)
+        _current_index_loaded = True
+    return _current_index
+
+
+def search_settings_sql(k: int) -> str:
+    """
+    SET LOCAL statements for the configured search mode (prepend to the search).
+
+    ef_search is at least k, since HNSW cannot return more rows than that.
+    """
+    ef_search, probe_factor = _SEARCH_MODES[get_settings().rag_vector_search_mode]
+    statements = [f"SET LOCAL hnsw.ef_search = {max(ef_search, int(k))};"]
+    lists = _current_index.lists if _current_index and _current_index.lists else 100
+    probes = max(1, min(lists, round(math.sqrt(lists) * probe_factor)))
+    statements.append(f"SET LOCAL ivfflat.probes = {probes};")
+    return " ".join(statements) + "\n"
+
+
+def maintain_vector_index(conn) -> bool:
+    """
+    Build or rebuild idx_rag_embeddings_vector if it does not match the settings.
+
+    Runs CREATE INDEX CONCURRENTLY under a temporary name, then swaps it in,
+    so vector searches keep using the old index until the new one is ready.
+    Blocking; call from a worker thread. Returns True if an index was built.
+    """
+    global _current_index, _current_index_loaded
+    if not _maintenance_lock.acquire(blocking=False):
+        return False  # Another maintenance run is in progress
+    previous_autocommit = conn.autocommit
+    try:
+        conn.commit()
+        # CONCURRENTLY cannot run inside a transaction block
+        conn.autocommit = True
+        cursor = conn.cursor()
+        current = describe_vector_index(cursor)
+        row_count = _estimated_row_count(cursor)
+        desired = desired_index_spec(row_count)
+        _current_index, _current_index_loaded = current, True
+        if not needs_rebuild(current, desired):
+            return False
+        if desired.method == "ivfflat" and row_count == 0:
+            return False  # Nothing to cluster yet
+
+        logger.info(
+            f"Building vector index ({desired.method}, {desired.with_clause()}) "
+            f"for ~{row_count} embeddings; replacing {current.method if current else 'none'}."
+        )
+        # A failed concurrent build leaves an INVALID index behind
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_BUILD_NAME}")
+        cursor.execute(build_index_sql(desired, _BUILD_NAME, concurrently=True))
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+        cursor.execute(f"ALTER INDEX {_BUILD_NAME} RENAME TO {INDEX_NAME}")
+        _current_index = desired
+        logger.info("Vector index rebuilt.")
+        return True
+    finally:
+        conn.autocommit = previous_autocommit
+        _maintenance_lock.release()
@@ -1,8 +1,11 @@
 # Agent-MCP/mcp_template/mcp_server_src/external/openai_service.py
+import asyncio
 import os
 import sys # For sys.exit in case of critical failure during initialization (optional)
 from typing import Optional # Added import for Optional
 
+import httpx
+
 # Import OpenAI library.
 # It's good practice to handle potential ImportError if it's an optional dependency,
 # though for this project, it seems to be a core requirement.
@@ -102,6 +105,94 @@ def get_openai_client() -> Optional[openai.OpenAI]:
 
     return g.openai_client_instance
 
+# --- Shared async client ---
+# One long-lived AsyncOpenAI client for embeddings and chat from async code
+# (RAG indexer, task indexing, RAG queries). Reusing it keeps TLS sessions and
+# pooled keep-alive connections warm instead of paying a handshake per batch.
+_async_openai_client: Optional["openai.AsyncOpenAI"] = None
+_async_openai_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 in httpx needs the optional 'h2' package."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_async_http_client():
+    """Create the pooled httpx client used by the shared AsyncOpenAI client."""
+    settings = get_settings()
+    use_http2 = settings.openai_http2
+    if use_http2 and not _http2_available():
+        logger.warning("OpenAI HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1.")
+        use_http2 = False
+
+    limits = httpx.Limits(
+        max_connections=settings.openai_http_max_connections,
+        max_keepalive_connections=settings.openai_http_max_keepalive_connections,
+        keepalive_expiry=settings.openai_http_keepalive_seconds,
+    )
+    timeout = httpx.Timeout(settings.openai_request_timeout, connect=10.0)
+    return openai.DefaultAsyncHttpxClient(limits=limits, timeout=timeout, http2=use_http2)
+
+
+def get_async_openai_client() -> Optional["openai.AsyncOpenAI"]:
+    """
+    Returns the shared AsyncOpenAI client, creating it on first use.
+
+    The client (and its connection pool) is bound to the running event loop;
+    if called from a different loop a fresh client is created for it.
+    Returns None if the library or API key is unavailable.
+    """
+    global _async_openai_client, _async_openai_client_loop
+
+    if openai is None:
+        logger.error("OpenAI library failed to import. Cannot create async client.")
+        return None
+
+    try:
+        current_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        current_loop = None
+
+    if _async_openai_client is not None and _async_openai_client_loop is current_loop:
+        return _async_openai_client
+
+    settings = get_settings()
+    api_key = (
+        settings.openai_api_key.get_secret_value()
+        if settings.openai_api_key is not None
+        else OPENAI_API_KEY_ENV
+    )
+    if not api_key:
+        logger.warning("OPENAI_API_KEY not found. Async OpenAI client is not available.")
+        return None
+
+    _async_openai_client = openai.AsyncOpenAI(
+        api_key=api_key,
+        http_client=_build_async_http_client(),
+        max_retries=settings.openai_max_retries,
+    )
+    _async_openai_client_loop = current_loop
+    logger.info("Shared async OpenAI client created.")
+    return _async_openai_client
+
+
+async def close_async_openai_client() -> None:
+    """Close the shared async client and its connection pool (called at shutdown)."""
+    global _async_openai_client, _async_openai_client_loop
+    client, _async_openai_client = _async_openai_client, None
+    _async_openai_client_loop = None
+    if client is not None:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Error closing async OpenAI client: {e}")
+
+
 # Any other OpenAI specific helper functions that don't belong in RAG or tools
 # could go here. For example, if you had a generic text generation or embedding
 # function used by multiple parts of the system outside of the RAG context.
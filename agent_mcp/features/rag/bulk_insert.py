@@ -0,0 +1,128 @@
+# Agent-MCP/agent_mcp/features/rag/bulk_insert.py
+"""
+Bulk write stage for RAG chunks and embeddings.
+
+Chunk ids are taken from the rag_chunks sequence up front (one nextval
+query for the whole call) and the chunks are written with explicit ids in
+multi-row INSERTs (psycopg2.extras.execute_values); RETURNING would not say
+which generated id belongs to which row, since Postgres does not promise to
+return rows in VALUES order. Embeddings are then streamed into rag_embeddings
+with COPY ... FROM STDIN in pgvector's text format, so a cycle costs a handful
+of statements instead of two per chunk.
+"""
+import io
+import time
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence, Tuple
+
+from psycopg2.extras import execute_values
+
+# Rows per INSERT statement; bounds statement size for very large cycles
+INSERT_PAGE_SIZE = 1000
+
+# (source_type, source_ref, chunk_text, chunk_index, metadata_json)
+ChunkRow = Tuple[str, str, str, int, Optional[str]]
+
+
+@dataclass
+class BulkInsertResult:
+    """Outcome of one bulk write."""
+
+    chunk_ids: List[int] = field(default_factory=list)
+    duration_seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return len(self.chunk_ids)
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.duration_seconds <= 0:
+            return 0.0
+        return self.rows / self.duration_seconds
+
+
+def _copy_text_value(value: str) -> str:
+    """Escape a value for COPY text format."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def format_vector_literal(embedding: Any) -> str:
+    """Render an embedding (list or numpy array) as a pgvector text literal."""
+    return "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+
+
+def _row_id(row: Any) -> int:
+    return row["chunk_id"] if isinstance(row, dict) else row[0]
+
+
+def allocate_chunk_ids(cursor, count: int) -> List[int]:
+    """Reserve count ids from the rag_chunks.chunk_id sequence."""
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence('rag_chunks', 'chunk_id')) AS chunk_id "
+        "FROM generate_series(1, %s)",
+        (count,),
+    )
+    return [_row_id(row) for row in cursor.fetchall()]
+
+
+def insert_chunks_with_embeddings(
+    cursor,
+    chunk_rows: Sequence[ChunkRow],
+    embeddings: Sequence[Any],
+    model: str,
+    page_size: int = INSERT_PAGE_SIZE,
+) -> BulkInsertResult:
+    """
+    Insert chunks and their embeddings in bulk.
+
+    Args:
+        cursor: Open cursor; the caller owns the transaction
+        chunk_rows: Rows for rag_chunks, in the same order as embeddings
+        embeddings: One vector per chunk row
+        model: Embedding model name stored with each vector
+        page_size: Rows per INSERT statement
+
+    Returns:
+        BulkInsertResult with chunk_ids aligned to chunk_rows
+
+    Raises:
+        ValueError: If chunk_rows and embeddings differ in length
+        psycopg2.Error: On any database error (nothing is partially committed
+            by this function; the caller decides whether to roll back)
+    """
+    if len(chunk_rows) != len(embeddings):
+        raise ValueError(
+            f"Got {len(chunk_rows)} chunk rows but {len(embeddings)} embeddings"
+        )
+    result = BulkInsertResult()
+    if not chunk_rows:
+        return result
+
+    start = time.perf_counter()
+    # Ids are assigned here rather than read back, so each one is tied to its row
+    result.chunk_ids = allocate_chunk_ids(cursor, len(chunk_rows))
+    execute_values(
+        cursor,
+        "INSERT INTO rag_chunks (chunk_id, source_type, source_ref, chunk_text, chunk_index, metadata) "
+        "VALUES %s",
+        [(chunk_id, *row) for chunk_id, row in zip(result.chunk_ids, chunk_rows)],
+        page_size=page_size,
+    )
+
+    model_value = _copy_text_value(model)
+    buffer = io.StringIO()
+    for chunk_id, embedding in zip(result.chunk_ids, embeddings):
+        buffer.write(f"{chunk_id}\t{format_vector_literal(embedding)}\t{model_value}\n")
+    buffer.seek(0)
+    cursor.copy_expert(
+        "COPY rag_embeddings (chunk_id, embedding, model_name) FROM STDIN", buffer
+    )
+
+    result.duration_seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,342 @@
+# Agent-MCP/agent_mcp/features/rag/chunk_pipeline.py
+"""
+Chunking stage of the RAG indexing pipeline.
+
+Chunking and entity extraction (markdown_aware_chunker, extract_code_entities,
+create_file_summary, chunk_code_aware) are pure CPU work. For large cycles they
+run in a ProcessPoolExecutor and results are yielded in completion order, so
+the indexer can start embedding batches while other files are still being
+chunked and the event loop is never blocked by ast parsing.
+
+Sources without content (files at or above RAG_STREAM_FILE_BYTES) are not
+chunked up front: they are yielded as StreamedChunks, which reads the file in
+blocks through the generator chunkers (hashing it on the way) as the indexer
+pulls chunks batch by batch, so neither the file nor its chunk list is ever
+held in memory whole. Code-aware parsing needs the whole file, so streamed
+code files use the line-based chunker and get no summary chunk.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import anyio
+
+from ...core.config import logger
+from .chunking import (
+    iter_lines,
+    iter_markdown_chunks,
+    iter_simple_chunks,
+    markdown_aware_chunker,
+    simple_chunker,
+)
+from .code_chunking import (
+    chunk_code_aware,
+    create_file_summary,
+    detect_language_family,
+    extract_code_entities,
+    iter_generic_code_chunks,
+)
+from .file_stream import HashingTextReader
+
+# (source_type, source_ref, content, content_hash); content None = stream from
+# disk, and content_hash is then None too (known once StreamedChunks is read)
+Source = Tuple[str, str, Optional[str], Optional[str]]
+ChunkList = List[Tuple[str, Dict[str, Any]]]
+
+# Below this many sources a cycle is chunked inline; process start-up and
+# pickling would cost more than they save.
+MIN_SOURCES_FOR_PROCESS_POOL = 8
+
+_chunk_pool: Optional[ProcessPoolExecutor] = None
+_chunk_pool_workers = 0
+
+
+def resolve_chunking_workers(configured: int) -> int:
+    """Map the configured worker count to an actual one (0 = CPU count - 1)."""
+    if configured > 0:
+        return configured
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+# Longest line kept whole when streaming code (matches the code chunker's max_size)
+STREAMED_CODE_MAX_LINE = 3000
+
+
+def chunk_source(
+    source_type: str,
+    source_ref: str,
+    content: str,
+    project_dir: str,
+    advanced: bool,
+    content_hash: Optional[str] = None,
+) -> ChunkList:
+    """
+    Split one in-memory source into (chunk_text, metadata) pairs.
+
+    Module-level and free of shared state so it can run in a worker process.
+    content_hash keys the worker's code entity cache, so an unchanged file
+    is not parsed again. Sources without content go through StreamedChunks.
+    """
+    if not advanced:
+        # Original/Simple mode: Basic chunking for all types, minimal metadata
+        return [(chunk, {"source_type": source_type}) for chunk in simple_chunker(content)]
+
+    if source_type == "markdown":
+        # Markdown-aware chunking
+        return [
+            (chunk, {"source_type": "markdown"})
+            for chunk in markdown_aware_chunker(content)
+        ]
+
+    if source_type == "code":
+        # Code-aware chunking: a file summary first, then the code chunks
+        file_path = Path(project_dir) / source_ref
+        entities = extract_code_entities(content, file_path, content_hash)
+        file_summary = create_file_summary(content, file_path, entities)
+        summary_text = f"File: {source_ref}\n{json.dumps(file_summary, indent=2)}"
+        chunks: ChunkList = [
+            (summary_text, {"source_type": "code_summary", **file_summary})
+        ]
+        chunks.extend(chunk_code_aware(content, file_path, entities=entities))
+        return chunks
+
+    # Simple chunking for other types
+    return [(chunk, {"source_type": source_type}) for chunk in simple_chunker(content)]
+
+
+def iter_streamed_source_chunks(
+    source_type: str, blocks: HashingTextReader, advanced: bool
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(chunk_text, metadata) pairs of a file read in blocks, never loaded whole."""
+    if not advanced:
+        for chunk in iter_simple_chunks(blocks):
+            yield chunk, {"source_type": source_type}
+    elif source_type == "markdown":
+        for chunk in iter_markdown_chunks(iter_lines(blocks)):
+            yield chunk, {"source_type": "markdown"}
+    elif source_type == "code":
+        lines = iter_lines(blocks, max_line_length=STREAMED_CODE_MAX_LINE)
+        for chunk, metadata in iter_generic_code_chunks(
+            lines, language=detect_language_family(blocks.path)
+        ):
+            yield chunk, {**metadata, "streamed": True}
+    else:
+        for chunk in iter_simple_chunks(blocks):
+            yield chunk, {"source_type": source_type}
+
+
+class StreamedChunks:
+    """
+    (chunk_text, metadata) pairs of a file chunked straight from disk.
+
+    Iterate it once. The file is read in blocks (at most max_chars
+    characters) and hashed as it is chunked; content_hash is the hash of
+    what was read, available once iteration has finished.
+    """
+
+    def __init__(
+        self,
+        source_type: str,
+        file_path: Union[str, Path],
+        advanced: bool,
+        max_chars: Optional[int] = None,
+    ):
+        self.source_type = source_type
+        self.advanced = advanced
+        self.reader = HashingTextReader(file_path, max_chars=max_chars)
+        self.finished = False
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        yield from iter_streamed_source_chunks(self.source_type, self.reader, self.advanced)
+        self.finished = True
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        """Hash of the file's (possibly truncated) text, or None before the end."""
+        return self.reader.hexdigest() if self.finished else None
+
+
+class ChunkingFailed:
+    """
+    Stands in for the chunks of a source that could not be chunked.
+
+    Not an empty chunk list: the source is not empty, its old chunks and
+    manifest row must stay so it is retried.
+    """
+
+    def __init__(self, error: str):
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"ChunkingFailed({self.error!r})"
+
+
+# What iter_chunked_sources yields per source
+Chunks = Union[ChunkList, StreamedChunks, ChunkingFailed]
+
+
+async def iter_chunk_batches(
+    chunks: Chunks, batch_size: int
+) -> AsyncIterator[List[Tuple[str, Dict[str, Any]]]]:
+    """
+    Lists of at most batch_size chunks of a source.
+
+    Streamed sources are read and chunked one batch at a time in a worker
+    thread, so a large file neither blocks the event loop nor is held whole.
+    """
+    if isinstance(chunks, list):
+        for start in range(0, len(chunks), batch_size):
+            yield chunks[start : start + batch_size]
+        return
+    iterator = iter(chunks)
+    while True:
+        batch = await anyio.to_thread.run_sync(lambda: list(islice(iterator, batch_size)))
+        if not batch:
+            return
+        yield batch
+
+
+def _chunk_source_safe(
+    source_type: str,
+    source_ref: str,
+    content: str,
+    project_dir: str,
+    advanced: bool,
+    content_hash: Optional[str] = None,
+) -> Tuple[ChunkList, Optional[str]]:
+    """Worker entry point: never raises, so one bad file cannot fail the batch."""
+    try:
+        chunks = chunk_source(
+            source_type, source_ref, content, project_dir, advanced, content_hash
+        )
+        return chunks, None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def _get_chunk_pool(workers: int) -> ProcessPoolExecutor:
+    """Get or create the chunking process pool."""
+    global _chunk_pool, _chunk_pool_workers
+    if _chunk_pool is None or _chunk_pool_workers != workers:
+        shutdown_chunk_pool()
+        # spawn: the server process runs DB, watcher and event-loop threads
+        # that must not be forked mid-operation
+        _chunk_pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        _chunk_pool_workers = workers
+        logger.info(f"RAG chunking process pool started with {workers} workers")
+    return _chunk_pool
+
+
+def shutdown_chunk_pool() -> None:
+    """Shut down the chunking process pool (called when the indexer stops)."""
+    global _chunk_pool, _chunk_pool_workers
+    if _chunk_pool is not None:
+        _chunk_pool.shutdown(wait=False, cancel_futures=True)
+        _chunk_pool = None
+        _chunk_pool_workers = 0
+
+
+async def iter_chunked_sources(
+    sources: Sequence[Source],
+    project_dir: Path,
+    advanced: bool,
+    workers: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> AsyncIterator[Tuple[Source, Chunks]]:
+    """
+    Chunk sources and yield (source, chunks) as each one finishes.
+
+    Args:
+        sources: (source_type, source_ref, content, content_hash) tuples
+        project_dir: Project root, used to resolve code file paths
+        advanced: Use markdown/code-aware chunking (ADVANCED_EMBEDDINGS)
+        workers: Process count; defaults to AGENT_MCP_RAG_CHUNKING_WORKERS
+        max_chars: Characters read from streamed sources (truncate policy)
+
+    Sources with content are yielded with their chunk list. Sources without
+    content are yielded first, as StreamedChunks to be read lazily.
+    Sources that fail to chunk (including every source pending when a worker
+    process dies) are logged and yielded with a ChunkingFailed.
+    """
+    if workers is None:
+        from ...core.config import RAG_CHUNKING_WORKERS
+
+        workers = RAG_CHUNKING_WORKERS
+    workers = resolve_chunking_workers(workers)
+    project_dir_str = str(project_dir)
+
+    in_memory_sources = []
+    for source in sources:
+        source_type, source_ref, content, _ = source
+        if content is None:
+            yield source, StreamedChunks(
+                source_type, Path(project_dir) / source_ref, advanced, max_chars
+            )
+        else:
+            in_memory_sources.append(source)
+    sources = in_memory_sources
+
+    if workers <= 1 or len(sources) < MIN_SOURCES_FOR_PROCESS_POOL:
+        for source in sources:
+            source_type, source_ref, content, content_hash = source
+            chunks, error = _chunk_source_safe(
+                source_type, source_ref, content, project_dir_str, advanced, content_hash
+            )
+            if error:
+                logger.error(f"Failed to chunk {source_type}: {source_ref}: {error}")
+                yield source, ChunkingFailed(error)
+            else:
+                yield source, chunks
+            await anyio.sleep(0)  # Let other tasks run between files
+        return
+
+    pool = _get_chunk_pool(workers)
+    pending = {}
+    for source in sources:
+        source_type, source_ref, content, content_hash = source
+        future = asyncio.wrap_future(
+            pool.submit(
+                _chunk_source_safe,
+                source_type,
+                source_ref,
+                content,
+                project_dir_str,
+                advanced,
+                content_hash,
+            )
+        )
+        pending[future] = source
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending.keys(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    chunks, error = future.result()
+                except BrokenProcessPool as e:
+                    # A worker died; recreate the pool on the next cycle
+                    shutdown_chunk_pool()
+                    chunks, error = [], f"{type(e).__name__}: {e}"
+                except Exception as e:
+                    chunks, error = [], f"{type(e).__name__}: {e}"
+                if error:
+                    logger.error(
+                        f"Failed to chunk {source[0]}: {source[1]}: {error}"
+                    )
+                    yield source, ChunkingFailed(error)
+                else:
+                    yield source, chunks
+    finally:
+        for future in pending:
+            future.cancel()
@@ -1,6 +1,6 @@
 # Agent-MCP/mcp_template/mcp_server_src/features/rag/chunking.py
 import re # For markdown_aware_chunker, though not used in the provided snippet for it.
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 
 # No external library imports beyond standard Python for these functions.
 # No direct need for logger here unless we add more verbose debugging later.
@@ -29,23 +29,67 @@ def simple_chunker(text: str, chunk_size: int = 500, overlap: int = 50) -> List[
         # This would lead to empty or re-processed chunks, or infinite loop if step is 0 or less.
         raise ValueError("overlap must be less than chunk_size.")
 
-    chunks: List[str] = []
-    start_index: int = 0
-    text_len: int = len(text)
-
-    while start_index < text_len:
-        end_index = start_index + chunk_size
-        chunks.append(text[start_index:end_index])
-        
-        # Move start_index for the next chunk
-        step = chunk_size - overlap
-        if step <= 0: # Should be caught by overlap >= chunk_size, but as a safeguard
-            # This prevents an infinite loop if step is not positive.
-            # Effectively, if step is not positive, we take one full chunk and stop.
-            break
+    return list(iter_simple_chunks([text], chunk_size, overlap))
+
+
+def iter_simple_chunks(
+    pieces: Iterable[str], chunk_size: int = 500, overlap: int = 50
+) -> Iterator[str]:
+    """
+    Streaming form of simple_chunker over text arriving in pieces (e.g. buffered
+    file reads). Yields the same chunks as simple_chunker on the joined text
+    while holding at most one chunk plus one piece in memory.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer.")
+    if overlap < 0:
+        raise ValueError("overlap cannot be negative.")
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be less than chunk_size.")
+
+    step = chunk_size - overlap
+    buffer = ""
+    start_index = 0
+    for piece in pieces:
+        buffer = buffer[start_index:] + piece
+        start_index = 0
+        # Only chunks that cannot grow any further are emitted mid-stream
+        while len(buffer) - start_index >= chunk_size:
+            yield buffer[start_index:start_index + chunk_size]
+            start_index += step
+    while start_index < len(buffer):
+        yield buffer[start_index:start_index + chunk_size]
         start_index += step
-        
-    return chunks
+
+
+def iter_lines(pieces: Iterable[str], max_line_length: Optional[int] = None) -> Iterator[str]:
+    """
+    Split text arriving in pieces into lines, like str.split('\n') on the
+    joined text. max_line_length breaks longer lines (minified bundles, logs
+    without newlines) so a single line never has to be held whole.
+    """
+    partial: List[str] = []  # Pieces of the line still being read
+    partial_length = 0
+    for piece in pieces:
+        parts = piece.split('\n')
+        for part in parts[:-1]:
+            partial.append(part)
+            yield from _split_long_line("".join(partial), max_line_length)
+            partial, partial_length = [], 0
+        partial.append(parts[-1])
+        partial_length += len(parts[-1])
+        if max_line_length and partial_length > max_line_length:
+            *full_lines, rest = _split_long_line("".join(partial), max_line_length)
+            yield from full_lines
+            partial, partial_length = [rest], len(rest)
+    yield "".join(partial)
+
+
+def _split_long_line(line: str, max_line_length: Optional[int]) -> List[str]:
+    if not max_line_length or len(line) <= max_line_length:
+        return [line]
+    return [line[i:i + max_line_length] for i in range(0, len(line), max_line_length)]
+
 
 # Original location: main.py lines 403-445 (markdown_aware_chunker function)
 def markdown_aware_chunker(
@@ -72,30 +116,55 @@ def markdown_aware_chunker(
     """
     if not text:
         return []
+    _check_markdown_chunk_sizes(target_chunk_size, min_chunk_size, overlap_lines)
+    return list(
+        iter_markdown_chunks(
+            text.split('\n'), target_chunk_size, min_chunk_size, overlap_lines
+        )
+    )
+
+
+def _check_markdown_chunk_sizes(target_chunk_size: int, min_chunk_size: int, overlap_lines: int) -> None:
     if target_chunk_size <= 0 or min_chunk_size <= 0 or overlap_lines < 0:
         raise ValueError("target_chunk_size, min_chunk_size must be positive, and overlap_lines non-negative.")
     if min_chunk_size > target_chunk_size:
         raise ValueError("min_chunk_size cannot be greater than target_chunk_size.")
 
-    chunks: List[str] = []
+
+def iter_markdown_chunks(
+    lines: Iterable[str],
+    target_chunk_size: int = 1000,
+    min_chunk_size: int = 200,
+    overlap_lines: int = 2
+) -> Iterator[str]:
+    """
+    Streaming form of markdown_aware_chunker over an iterable of lines (see
+    iter_lines). Each chunk is yielded as soon as it is complete, so only the
+    chunk being built is held in memory.
+    """
+    _check_markdown_chunk_sizes(target_chunk_size, min_chunk_size, overlap_lines)
+
     current_chunk_lines: List[str] = []
     current_chunk_char_count: int = 0
     
-    lines: List[str] = text.split('\n')
     line_buffer_for_overlap: List[str] = []
+    previous_line: Optional[str] = None
 
-    for i, line_content in enumerate(lines):
+    for line_content in lines:
         # Determine if the current line represents a structural break
         is_heading = line_content.strip().startswith('#')
         # A new paragraph is often indicated by an empty line followed by a non-empty line.
-        is_new_paragraph = (i > 0 and not lines[i-1].strip() and line_content.strip() != "")
+        is_new_paragraph = (previous_line is not None and not previous_line.strip() and line_content.strip() != "")
+        previous_line = line_content
 
         # Condition to finalize the current chunk and start a new one:
         # 1. If we encounter a heading or a new paragraph,
         # 2. AND the current chunk has reached a reasonable minimum size.
         if (is_heading or is_new_paragraph) and current_chunk_char_count >= min_chunk_size:
             if current_chunk_lines:
-                chunks.append("\n".join(current_chunk_lines).strip())
+                finished_chunk = "\n".join(current_chunk_lines).strip()
+                if finished_chunk:
+                    yield finished_chunk
             
             # Start new chunk: Prepend overlap from the buffer.
             current_chunk_lines = line_buffer_for_overlap[:] # Make a copy
@@ -149,7 +218,9 @@ def markdown_aware_chunker(
                 char_count_before_current = sum(len(l) + 1 for l in lines_before_current) -1
                 
                 if char_count_before_current >= min_chunk_size: # If what we had *before* this line was substantial
-                    chunks.append("\n".join(lines_before_current).strip())
+                    finished_chunk = "\n".join(lines_before_current).strip()
+                    if finished_chunk:
+                        yield finished_chunk
                     current_chunk_lines = line_buffer_for_overlap[:] # Start new with overlap
                     current_chunk_lines.append(line_content) # Add current line to new chunk
                     current_chunk_char_count = sum(len(l) + 1 for l in current_chunk_lines) -1
@@ -180,7 +251,4 @@ def markdown_aware_chunker(
     if current_chunk_lines:
         final_chunk_text = "\n".join(current_chunk_lines).strip()
         if final_chunk_text: # Ensure not adding empty strings
-             chunks.append(final_chunk_text)
-
-    # Final filter for any empty chunks that might have slipped through (main.py:448)
-    return [chunk for chunk in chunks if chunk]
\ No newline at end of file
+             yield final_chunk_text
\ No newline at end of file
@@ -2,11 +2,16 @@
 # Ported from swarm_mcp with enhancements for agent_mcp architecture
 
 import re
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional
+from typing import Iterable, Iterator, List, Tuple, Dict, Any, Optional
 import ast
 
 from ...core.config import logger
+from .tree_sitter_entities import extract_tree_sitter_entities
 
 # Language-specific file extensions mapping
 LANGUAGE_FAMILIES = {
@@ -55,23 +60,71 @@ def detect_language_family(file_path: Path) -> str:
     return 'generic'
 
 
-def extract_code_entities(content: str, file_path: Path) -> List[Dict[str, Any]]:
+# Extracted entities by (content hash, extension), per process
+_entity_cache: "OrderedDict[Tuple[str, str], List[Dict[str, Any]]]" = OrderedDict()
+_entity_cache_lock = threading.Lock()
+
+
+def extract_code_entities(
+    content: str,
+    file_path: Path,
+    content_hash: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """
     Extract code entities (functions, classes, methods) with line numbers.
     
+    Python is parsed with ast. Other languages use tree-sitter grammars when
+    installed (see tree_sitter_entities) and regexes otherwise. Results are
+    cached by content hash, so an unchanged file is not parsed again.
+    
     Args:
         content: File content
         file_path: Path to the file
+        content_hash: SHA-256 of the content, if already known
         
     Returns:
         List of entities with metadata
     """
+    from ...core.config import RAG_ENTITY_CACHE_SIZE
+    
+    key = None
+    if RAG_ENTITY_CACHE_SIZE > 0:
+        key = (
+            content_hash or hashlib.sha256(content.encode('utf-8')).hexdigest(),
+            file_path.suffix.lower()
+        )
+        with _entity_cache_lock:
+            cached = _entity_cache.get(key)
+            if cached is not None:
+                _entity_cache.move_to_end(key)
+                return copy.deepcopy(cached)
+    
+    entities = _parse_code_entities(content, file_path)
+    
+    if key is not None:
+        with _entity_cache_lock:
+            _entity_cache[key] = copy.deepcopy(entities)
+            while len(_entity_cache) > RAG_ENTITY_CACHE_SIZE:
+                _entity_cache.popitem(last=False)
+    return entities
+
+
+def _parse_code_entities(content: str, file_path: Path) -> List[Dict[str, Any]]:
+    """Entities of a file, from the best available parser for its language."""
+    from ...core.config import RAG_TREE_SITTER
+    
     language_family = detect_language_family(file_path)
     entities = []
     
     if language_family == 'python':
-        entities = _extract_python_entities(content)
-    elif language_family == 'javascript':
+        return _extract_python_entities(content)
+    
+    if RAG_TREE_SITTER:
+        parsed = extract_tree_sitter_entities(content, file_path)
+        if parsed is not None:
+            return parsed
+    
+    if language_family == 'javascript':
         entities = _extract_javascript_entities(content)
     elif language_family in ['c_family', 'rust', 'go', 'java']:
         entities = _extract_generic_code_entities(content, language_family)
@@ -79,6 +132,12 @@ def extract_code_entities(content: str, file_path: Path) -> List[Dict[str, Any]]
     return entities
 
 
+def clear_entity_cache() -> None:
+    """Drop all cached entity lists."""
+    with _entity_cache_lock:
+        _entity_cache.clear()
+
+
 def _extract_python_entities(content: str) -> List[Dict[str, Any]]:
     """Extract Python functions, classes, and methods."""
     entities = []
@@ -229,7 +288,8 @@ def chunk_code_aware(
     file_path: Path,
     target_size: int = 1500,
     max_size: int = 3000,
-    min_size: int = 300
+    min_size: int = 300,
+    entities: Optional[List[Dict[str, Any]]] = None
 ) -> List[Tuple[str, Dict[str, Any]]]:
     """
     Perform code-aware chunking that preserves code structure.
@@ -240,18 +300,25 @@ def chunk_code_aware(
         target_size: Target chunk size in characters
         max_size: Maximum chunk size before forcing split
         min_size: Minimum chunk size to avoid tiny chunks
+        entities: Entities from extract_code_entities, to avoid parsing again;
+            for C-family, Rust, Go and Java, chunks then also split at
+            top-level entity starts
         
     Returns:
         List of (chunk_text, metadata) tuples
     """
     language_family = detect_language_family(file_path)
+    # Nested entities (methods) stay inside their parent's chunk where possible
+    top_level = [e for e in entities if 'parent_class' not in e] if entities is not None else None
     
     if language_family == 'python':
-        return _chunk_python_code(content, target_size, max_size, min_size)
+        return _chunk_python_code(content, target_size, max_size, min_size, entities)
     elif language_family == 'javascript':
-        return _chunk_javascript_code(content, target_size, max_size, min_size)
+        return _chunk_javascript_code(content, target_size, max_size, min_size, top_level)
     elif language_family in ['c_family', 'rust', 'go', 'java']:
-        return _chunk_generic_code(content, target_size, max_size, min_size, language_family)
+        return _chunk_generic_code(
+            content, target_size, max_size, min_size, language_family, top_level
+        )
     else:
         # Fallback to generic code chunking
         return _chunk_generic_code(content, target_size, max_size, min_size, 'generic')
@@ -261,17 +328,19 @@ def _chunk_python_code(
     content: str, 
     target_size: int,
     max_size: int,
-    min_size: int
+    min_size: int,
+    entities: Optional[List[Dict[str, Any]]] = None
 ) -> List[Tuple[str, Dict[str, Any]]]:
     """Chunk Python code preserving class and function boundaries."""
     chunks = []
     lines = content.split('\n')
     
     # Extract entities first
-    entities = _extract_python_entities(content)
+    if entities is None:
+        entities = _extract_python_entities(content)
     
     # Sort entities by start line
-    entities.sort(key=lambda x: x['start_line'])
+    entities = sorted(entities, key=lambda x: x['start_line'])
     
     # Track current chunk
     current_chunk_lines = []
@@ -364,15 +433,17 @@ def _chunk_javascript_code(
     content: str,
     target_size: int,
     max_size: int, 
-    min_size: int
+    min_size: int,
+    entities: Optional[List[Dict[str, Any]]] = None
 ) -> List[Tuple[str, Dict[str, Any]]]:
     """Chunk JavaScript/TypeScript code preserving function and component boundaries."""
     chunks = []
     lines = content.split('\n')
     
     # Extract entities
-    entities = _extract_javascript_entities(content)
-    entities.sort(key=lambda x: x['start_line'])
+    if entities is None:
+        entities = _extract_javascript_entities(content)
+    entities = sorted(entities, key=lambda x: x['start_line'])
     
     current_chunk_lines = []
     current_chunk_size = 0
@@ -432,8 +503,12 @@ def _chunk_javascript_code(
                 if entity not in chunk_metadata['entities']:
                     chunk_metadata['entities'].append(entity)
                     chunk_metadata['section_type'] = entity['type']
+                if entity['end_line'] > entity['start_line']:
+                    # Parsed entities know where they end
+                    if line_num + 1 >= entity['end_line']:
+                        entity_idx += 1
                 # Simple heuristic for entity end
-                if brace_depth == 0 and line_num > entity['start_line']:
+                elif brace_depth == 0 and line_num > entity['start_line']:
                     entity_idx += 1
         
         line_num += 1
@@ -450,19 +525,50 @@ def _chunk_generic_code(
     target_size: int,
     max_size: int,
     min_size: int,
-    language: str
+    language: str,
+    entities: Optional[List[Dict[str, Any]]] = None
 ) -> List[Tuple[str, Dict[str, Any]]]:
     """Generic code chunking for various languages."""
-    chunks = []
-    lines = content.split('\n')
+    return list(
+        iter_generic_code_chunks(
+            content.split('\n'), target_size, max_size, min_size, language, entities
+        )
+    )
+
+
+def iter_generic_code_chunks(
+    lines: Iterable[str],
+    target_size: int = 1500,
+    max_size: int = 3000,
+    min_size: int = 300,
+    language: str = 'generic',
+    entities: Optional[List[Dict[str, Any]]] = None
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming form of the generic code chunker over an iterable of lines, for
+    files too large to load whole. Each chunk is yielded once complete.
     
+    With entities (e.g. from tree-sitter), a chunk over min_size is also split
+    where an entity starts, and each chunk lists the entities starting in it.
+    """
+    line_count = 0
     current_chunk_lines = []
     current_chunk_size = 0
-    chunk_metadata = {
-        'language': language,
-        'section_type': 'code',
-        'line_range': None
-    }
+    entity_starts = {}
+    for entity in entities or []:
+        entity_starts.setdefault(entity['start_line'], entity)
+    
+    def new_metadata():
+        metadata = {
+            'language': language,
+            'section_type': 'code',
+            'line_range': None
+        }
+        if entities is not None:
+            metadata['entities'] = []
+        return metadata
+    
+    chunk_metadata = new_metadata()
     
     # Track various depth indicators
     brace_depth = 0
@@ -472,6 +578,7 @@ def _chunk_generic_code(
     start_line = 1
     
     for line_num, line in enumerate(lines):
+        line_count = line_num + 1
         line_size = len(line) + 1
         
         # Update depth tracking
@@ -487,8 +594,11 @@ def _chunk_generic_code(
         
         # Check if we should split
         should_split = False
+        entity = entity_starts.get(line_count)
         
-        if current_chunk_size + line_size > max_size:
+        if entity and current_chunk_size > min_size:
+            should_split = True
+        elif current_chunk_size + line_size > max_size:
             should_split = True
         elif current_chunk_size > target_size:
             # Look for good split points
@@ -501,26 +611,25 @@ def _chunk_generic_code(
         if should_split and current_chunk_lines:
             chunk_text = '\n'.join(current_chunk_lines)
             chunk_metadata['line_range'] = (start_line, line_num)
-            chunks.append((chunk_text, chunk_metadata.copy()))
+            yield chunk_text, chunk_metadata.copy()
             
             current_chunk_lines = []
             current_chunk_size = 0
             start_line = line_num + 1
-            chunk_metadata = {
-                'language': language,
-                'section_type': 'code',
-                'line_range': None
-            }
+            chunk_metadata = new_metadata()
         
         current_chunk_lines.append(line)
         current_chunk_size += line_size
+        
+        if entity:
+            if not chunk_metadata['entities']:
+                chunk_metadata['section_type'] = entity['type']
+            chunk_metadata['entities'].append(entity)
     
     if current_chunk_lines:
         chunk_text = '\n'.join(current_chunk_lines)
-        chunk_metadata['line_range'] = (start_line, len(lines))
-        chunks.append((chunk_text, chunk_metadata))
-    
-    return chunks
+        chunk_metadata['line_range'] = (start_line, line_count)
+        yield chunk_text, chunk_metadata
 
 
 def create_file_summary(content: str, file_path: Path, entities: List[Dict[str, Any]]) -> Dict[str, Any]:
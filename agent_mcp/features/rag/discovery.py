@@ -0,0 +1,228 @@
+# Agent-MCP/agent_mcp/features/rag/discovery.py
+"""
+Single-pass source discovery for the RAG indexer.
+
+Walks the project tree once with os.scandir, pruning ignored directories
+(IGNORE_DIRS_FOR_INDEXING, dot-directories and .gitignore matches) before
+descending and classifying files by extension as they are listed. Subtrees can
+be scanned concurrently on a small thread pool, which helps on slow or network
+filesystems where each directory listing is a blocking syscall.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ...core.config import logger
+from .code_chunking import CODE_EXTENSIONS
+
+# Attempt to import pathspec for .gitignore matching (optional dependency)
+try:
+    import pathspec
+except ImportError:
+    pathspec = None
+
+# Define patterns to ignore for file scanning, as in the original
+# Original main.py: 548-552
+IGNORE_DIRS_FOR_INDEXING = [
+    "node_modules",
+    "__pycache__",
+    "venv",
+    "env",
+    ".venv",
+    ".env",
+    "dist",
+    "build",
+    "site-packages",
+    ".git",
+    ".idea",
+    ".vscode",
+    "bin",
+    "obj",
+    "target",
+    ".pytest_cache",
+    ".ipynb_checkpoints",
+    ".mcp-maestro",  # Also ignore the .mcp-maestro directory itself
+]
+
+_IGNORED_NAMES = frozenset(IGNORE_DIRS_FOR_INDEXING)
+
+
+def is_ignored_name(name: str) -> bool:
+    """True for ignored directory names and hidden (dot-prefixed) entries."""
+    return name in _IGNORED_NAMES or (name.startswith(".") and name not in (".", ".."))
+
+
+def classify_source_file(
+    name: str, include_markdown: bool, include_code: bool
+) -> Optional[str]:
+    """Return 'markdown' or 'code' based on the file extension, None otherwise."""
+    suffix = os.path.splitext(name)[1]
+    if include_markdown and suffix == ".md":
+        return "markdown"
+    if include_code and suffix in CODE_EXTENSIONS:
+        return "code"
+    return None
+
+
+class GitignoreRules:
+    """
+    Lazily loaded .gitignore rules for a project tree.
+
+    Each directory's .gitignore applies to paths below it. Negations work within
+    a single file; a '!' rule cannot re-include a path ignored by a parent
+    directory's .gitignore. Without pathspec installed nothing is ignored.
+    """
+
+    def __init__(self, project_dir: Path, enabled: bool = True):
+        self.project_dir = Path(project_dir)
+        self.enabled = enabled and pathspec is not None
+        self._specs: Dict[str, Optional["pathspec.PathSpec"]] = {}
+
+    def _spec_for(self, rel_dir: str):
+        """PathSpec for the .gitignore in rel_dir ('' for the root), cached."""
+        if rel_dir in self._specs:
+            return self._specs[rel_dir]
+        spec = None
+        gitignore_path = self.project_dir / rel_dir / ".gitignore"
+        try:
+            with open(gitignore_path, encoding="utf-8") as f:
+                spec = pathspec.PathSpec.from_lines("gitwildmatch", f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to parse {gitignore_path}: {e}")
+        self._specs[rel_dir] = spec
+        return spec
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Check a project-relative POSIX path against every applicable .gitignore."""
+        if not self.enabled:
+            return False
+        parts = rel_path.split("/")
+        for depth in range(len(parts)):
+            base = "/".join(parts[:depth])
+            spec = self._spec_for(base)
+            if spec is None:
+                continue
+            local_path = "/".join(parts[depth:]) + ("/" if is_dir else "")
+            if spec.match_file(local_path):
+                return True
+        return False
+
+
+def _scan_directory(
+    abs_dir: str,
+    rel_dir: str,
+    include_markdown: bool,
+    include_code: bool,
+    gitignore: GitignoreRules,
+) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str]]]:
+    """
+    List one directory.
+
+    Returns:
+        (files as (rel_path, abs_path, source_type), subdirectories as (abs_path, rel_path))
+    """
+    files: List[Tuple[str, str, str]] = []
+    subdirs: List[Tuple[str, str]] = []
+    try:
+        with os.scandir(abs_dir) as entries:
+            for entry in entries:
+                if is_ignored_name(entry.name):
+                    continue
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    # Symlinked directories are not followed (avoids cycles)
+                    if entry.is_dir(follow_symlinks=False):
+                        if not gitignore.is_ignored(rel_path, is_dir=True):
+                            subdirs.append((entry.path, rel_path))
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                source_type = classify_source_file(
+                    entry.name, include_markdown, include_code
+                )
+                if source_type and not gitignore.is_ignored(rel_path):
+                    files.append((rel_path, entry.path, source_type))
+    except OSError as e:
+        logger.warning(f"Failed to scan directory {abs_dir}: {e}")
+    return files, subdirs
+
+
+def walk_indexable_files(
+    project_dir: Path,
+    include_markdown: bool,
+    include_code: bool,
+    *,
+    max_workers: int = 1,
+    gitignore: Optional[GitignoreRules] = None,
+) -> Dict[str, Tuple[Path, str]]:
+    """
+    Discover indexable files in one pass over the project tree.
+
+    Args:
+        project_dir: Root of the tree to walk
+        include_markdown: Collect '.md' files
+        include_code: Collect files with an extension in CODE_EXTENSIONS
+        max_workers: Threads used to scan subtrees concurrently (1 = sequential)
+        gitignore: .gitignore rules to honour (defaults to a fresh GitignoreRules)
+
+    Returns:
+        relative POSIX path -> (absolute path, source_type)
+    """
+    project_dir = Path(project_dir)
+    if not include_markdown and not include_code:
+        return {}
+    if gitignore is None:
+        gitignore = GitignoreRules(project_dir)
+
+    candidates: Dict[str, Tuple[Path, str]] = {}
+
+    def _collect(files: List[Tuple[str, str, str]]) -> None:
+        for rel_path, abs_path, source_type in files:
+            candidates[rel_path] = (Path(abs_path), source_type)
+
+    if max_workers <= 1:
+        pending_dirs = [(str(project_dir), "")]
+        while pending_dirs:
+            abs_dir, rel_dir = pending_dirs.pop()
+            files, subdirs = _scan_directory(
+                abs_dir, rel_dir, include_markdown, include_code, gitignore
+            )
+            _collect(files)
+            pending_dirs.extend(subdirs)
+        return candidates
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="agent-mcp-rag-scan"
+    ) as executor:
+        in_flight = {
+            executor.submit(
+                _scan_directory,
+                str(project_dir),
+                "",
+                include_markdown,
+                include_code,
+                gitignore,
+            )
+        }
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                _collect(files)
+                for abs_dir, rel_dir in subdirs:
+                    in_flight.add(
+                        executor.submit(
+                            _scan_directory,
+                            abs_dir,
+                            rel_dir,
+                            include_markdown,
+                            include_code,
+                            gitignore,
+                        )
+                    )
+    return candidates
@@ -0,0 +1,106 @@
+# Agent-MCP/agent_mcp/features/rag/embedding_cache.py
+"""
+Content-addressed embedding cache.
+
+Vectors are stored in rag_embedding_cache keyed by
+sha256("<model>|<dimension>|<chunk_text>"). Before a source's chunks are
+deleted for re-indexing their vectors are copied into the cache, so when the
+new chunking produces the same text again the vector is reused and only new or
+edited chunks are sent to the embedding API.
+"""
+import hashlib
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+from ...core.config import logger
+
+# Keys are looked up in batches to keep each statement's parameter list small
+LOOKUP_BATCH_SIZE = 1000
+
+# SQL expression computing the same key as embedding_cache_key() for a
+# rag_chunks row (c) joined to its rag_embeddings row (e)
+_SQL_CACHE_KEY = (
+    "encode(sha256(convert_to(e.model_name || '|' || vector_dims(e.embedding)::text"
+    " || '|' || c.chunk_text, 'UTF8')), 'hex')"
+)
+
+
+def embedding_cache_key(chunk_text: str, model: str, dimension: int) -> str:
+    """Cache key for a chunk embedded with a given model and dimension."""
+    return hashlib.sha256(f"{model}|{dimension}|{chunk_text}".encode("utf-8")).hexdigest()
+
+
+def cache_source_embeddings(
+    cursor,
+    source_type: str,
+    source_ref: Union[str, Sequence[str]],
+    model: str,
+    dimension: int,
+) -> None:
+    """
+    Copy the current vectors of a source into the cache (call before deleting it).
+
+    source_ref may also be a list of references of the same type.
+    """
+    source_refs = [source_ref] if isinstance(source_ref, str) else list(source_ref)
+    cursor.execute(
+        f"""
+        INSERT INTO rag_embedding_cache (cache_key, model_name, dimension, embedding)
+        SELECT {_SQL_CACHE_KEY}, e.model_name, vector_dims(e.embedding), e.embedding
+        FROM rag_chunks c
+        JOIN rag_embeddings e ON e.chunk_id = c.chunk_id
+        WHERE c.source_type = %s AND c.source_ref = ANY(%s)
+          AND e.model_name = %s AND vector_dims(e.embedding) = %s
+        ON CONFLICT (cache_key) DO UPDATE SET last_used_at = CURRENT_TIMESTAMP
+        """,
+        (source_type, source_refs, model, dimension),
+    )
+
+
+def _as_float_list(embedding: Any) -> List[float]:
+    """A stored vector as a list of floats, whatever the driver returned."""
+    if isinstance(embedding, str):
+        # No pgvector adapter on this connection: the text form '[x,y,...]'
+        values = embedding.strip().strip("[]")
+        return [float(value) for value in values.split(",")] if values else []
+    if hasattr(embedding, "tolist"):
+        # pgvector's adapter returns numpy arrays
+        return embedding.tolist()
+    return [float(value) for value in embedding]
+
+
+def lookup_cached_embeddings(cursor, cache_keys: Iterable[str]) -> Dict[str, List[float]]:
+    """
+    Fetch cached vectors for the given keys and mark them as used.
+
+    Returns:
+        cache_key -> embedding as a list of floats
+    """
+    unique_keys: List[str] = list(dict.fromkeys(cache_keys))
+    found: Dict[str, Any] = {}
+    for start in range(0, len(unique_keys), LOOKUP_BATCH_SIZE):
+        batch = unique_keys[start : start + LOOKUP_BATCH_SIZE]
+        cursor.execute(
+            """
+            UPDATE rag_embedding_cache SET last_used_at = CURRENT_TIMESTAMP
+            WHERE cache_key = ANY(%s)
+            RETURNING cache_key, embedding
+            """,
+            (batch,),
+        )
+        for row in cursor.fetchall():
+            found[row["cache_key"]] = _as_float_list(row["embedding"])
+    return found
+
+
+def prune_embedding_cache(cursor, ttl_days: int) -> int:
+    """Delete cache entries unused for ttl_days. Returns the number removed."""
+    if ttl_days <= 0:
+        return 0
+    cursor.execute(
+        "DELETE FROM rag_embedding_cache WHERE last_used_at < CURRENT_TIMESTAMP - make_interval(days => %s)",
+        (ttl_days,),
+    )
+    removed = cursor.rowcount or 0
+    if removed:
+        logger.info(f"Pruned {removed} unused entries from the embedding cache.")
+    return removed
@@ -0,0 +1,71 @@
+# Agent-MCP/agent_mcp/features/rag/file_stream.py
+"""
+Buffered, hashing reads of large source files for RAG indexing.
+
+Files at or above RAG_STREAM_FILE_BYTES are never loaded whole. Change
+detection only stats them; when the stat moved they are read once, block by
+block, by the streaming chunkers (iter_simple_chunks, iter_markdown_chunks,
+iter_generic_code_chunks), and the HashingTextReader feeding the chunkers
+yields the content hash recorded in the manifest. Memory per file is then
+bounded by the block size and one chunk, not by the file size.
+
+Text is read in text mode (UTF-8, universal newlines) exactly like
+Path.read_text, and the hash is SHA-256 over the UTF-8 encoding of what was
+read, so it equals manifest.hash_content() of the whole file.
+"""
+import hashlib
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+# Characters per read; large enough to amortize syscalls, small next to a chunk batch
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class HashingTextReader:
+    """
+    Iterate a UTF-8 text file in blocks, hashing the text as it is read.
+
+    max_chars stops reading after that many characters (the truncate policy
+    for oversize files); the hash then covers only what was read.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        block_size: int = READ_BLOCK_SIZE,
+        max_chars: Optional[int] = None,
+    ):
+        self.path = Path(path)
+        self.block_size = block_size
+        self.max_chars = max_chars
+        self.chars_read = 0
+        self.truncated = False
+        self._hash = hashlib.sha256()
+
+    def __iter__(self) -> Iterator[str]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            while True:
+                size = self.block_size
+                if self.max_chars is not None:
+                    size = min(size, self.max_chars - self.chars_read)
+                    if size <= 0:
+                        self.truncated = bool(f.read(1))
+                        return
+                block = f.read(size)
+                if not block:
+                    return
+                self.chars_read += len(block)
+                self._hash.update(block.encode("utf-8"))
+                yield block
+
+    def hexdigest(self) -> str:
+        """Hash of the text read so far (the whole file once iteration ends)."""
+        return self._hash.hexdigest()
+
+
+def hash_file(path: Union[str, Path], max_chars: Optional[int] = None) -> str:
+    """Content hash of a text file read in blocks, for callers that do not chunk it."""
+    reader = HashingTextReader(path, max_chars=max_chars)
+    for _ in reader:
+        pass
+    return reader.hexdigest()
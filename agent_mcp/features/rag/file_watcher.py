@@ -0,0 +1,100 @@
+# Agent-MCP/agent_mcp/features/rag/file_watcher.py
+"""
+Filesystem change queue for the RAG indexer.
+
+When watchdog is installed and AGENT_MCP_RAG_FILE_WATCHER is enabled, file
+events under the project directory are collected into a thread-safe set of
+dirty paths. The indexer drains that set each cycle instead of walking the
+whole tree; it still runs a periodic full manifest scan to catch anything the
+observer missed.
+"""
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Set
+
+from ...core.config import logger
+
+# Attempt to import watchdog (optional dependency)
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+class _DirtyPathHandler(FileSystemEventHandler):
+    """Forward every relevant path touched by an event to the watcher queue."""
+
+    def __init__(self, watcher: "RagFileWatcher"):
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        if getattr(event, "is_directory", False):
+            return
+        self._watcher.mark_dirty(event.src_path)
+        dest_path = getattr(event, "dest_path", None)
+        if dest_path:
+            self._watcher.mark_dirty(dest_path)
+
+
+class RagFileWatcher:
+    """Collects changed file paths under a project directory."""
+
+    def __init__(
+        self, project_dir: Path, path_filter: Optional[Callable[[Path], bool]] = None
+    ):
+        self.project_dir = Path(project_dir)
+        self._path_filter = path_filter
+        self._dirty: Set[Path] = set()
+        self._lock = threading.Lock()
+        self._observer = None
+
+    @property
+    def running(self) -> bool:
+        return self._observer is not None and self._observer.is_alive()
+
+    def start(self) -> bool:
+        """Start observing. Returns False if watchdog is unavailable or fails."""
+        if Observer is None:
+            logger.warning(
+                "watchdog is not installed; RAG file watcher disabled (install the 'watch' extra)."
+            )
+            return False
+        try:
+            observer = Observer()
+            observer.schedule(
+                _DirtyPathHandler(self), str(self.project_dir), recursive=True
+            )
+            observer.daemon = True
+            observer.start()
+        except Exception as e:
+            logger.warning(f"Failed to start RAG file watcher: {e}")
+            return False
+        self._observer = observer
+        logger.info(f"RAG file watcher observing {self.project_dir}")
+        return True
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+
+    def mark_dirty(self, path) -> None:
+        path_obj = Path(path)
+        if self._path_filter is not None and not self._path_filter(path_obj):
+            return
+        with self._lock:
+            self._dirty.add(path_obj)
+
+    def drain(self) -> Set[Path]:
+        """Return and clear the set of paths changed since the last drain."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._dirty)
@@ -0,0 +1,196 @@
+# Agent-MCP/agent_mcp/features/rag/hybrid_search.py
+"""
+Hybrid lexical + vector retrieval.
+
+rag_chunks.chunk_tsv is a generated tsvector column and tasks has a GIN
+expression index over title and description (see postgres_schema.py). Chunk
+retrieval takes the top candidates from the pgvector index and from full-text
+search (ts_rank_cd) and fuses the two rankings with reciprocal rank fusion, all
+in one statement:
+
+    rrf_score = 1 / (rrf_k + vector_rank) + 1 / (rrf_k + text_rank)
+
+Databases without chunk_tsv (PostgreSQL < 12) fall back to vector-only search.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from psycopg2 import errors as pg_errors
+
+from ...core.config import logger
+from ...db.vector_index import search_settings_sql
+
+# Words shorter than this are ignored, as in the original keyword search
+MIN_KEYWORD_LENGTH = 3
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# The 'english' text search configuration must match the generated tsvector columns
+HYBRID_SEARCH_SQL = """
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', %(text_query)s) AS tsq
+    ),
+    vector_hits AS (
+        SELECT chunk_id, ROW_NUMBER() OVER (ORDER BY vector_distance) AS rank_pos
+        FROM (
+            SELECT r.chunk_id, r.embedding <=> %(embedding)s::vector AS vector_distance
+            FROM rag_embeddings r
+            ORDER BY r.embedding <=> %(embedding)s::vector
+            LIMIT %(candidates)s
+        ) nearest
+    ),
+    text_hits AS (
+        SELECT chunk_id, ROW_NUMBER() OVER (ORDER BY text_rank DESC) AS rank_pos
+        FROM (
+            SELECT c.chunk_id, ts_rank_cd(c.chunk_tsv, q.tsq, 32) AS text_rank
+            FROM rag_chunks c, q
+            WHERE c.chunk_tsv @@ q.tsq
+            ORDER BY text_rank DESC
+            LIMIT %(candidates)s
+        ) matching
+    ),
+    fused AS (
+        SELECT COALESCE(v.chunk_id, t.chunk_id) AS chunk_id,
+               COALESCE(1.0 / (%(rrf_k)s + v.rank_pos), 0)
+                 + COALESCE(1.0 / (%(rrf_k)s + t.rank_pos), 0) AS rrf_score
+        FROM vector_hits v
+        FULL OUTER JOIN text_hits t ON t.chunk_id = v.chunk_id
+        ORDER BY rrf_score DESC
+        LIMIT %(k)s
+    )
+    SELECT c.chunk_id, c.chunk_text, c.source_type, c.source_ref, c.metadata,
+           1 - (e.embedding <=> %(embedding)s::vector) AS distance,
+           f.rrf_score
+    FROM fused f
+    JOIN rag_chunks c ON c.chunk_id = f.chunk_id
+    JOIN rag_embeddings e ON e.chunk_id = f.chunk_id
+    ORDER BY f.rrf_score DESC
+"""
+
+VECTOR_SEARCH_SQL = """
+    SELECT c.chunk_id, c.chunk_text, c.source_type, c.source_ref, c.metadata,
+           1 - (r.embedding <=> %s::vector) as distance
+    FROM rag_embeddings r
+    JOIN rag_chunks c ON r.chunk_id = c.chunk_id
+    ORDER BY r.embedding <=> %s::vector
+    LIMIT %s
+"""
+
+
+def query_keywords(query_text: str) -> List[str]:
+    """Distinct lowercase words of the query that are long enough to search for."""
+    words = (w.lower() for w in _WORD_RE.findall(query_text))
+    return list(dict.fromkeys(w for w in words if len(w) >= MIN_KEYWORD_LENGTH))
+
+
+def build_text_query(query_text: str) -> Optional[str]:
+    """
+    websearch_to_tsquery input matching any query keyword, or None if there are none.
+
+    Only \\w+ tokens are kept, so the result never contains search operators
+    from the user's text.
+    """
+    keywords = query_keywords(query_text)
+    return " or ".join(keywords) if keywords else None
+
+
+def _rows_with_metadata(rows) -> List[Dict[str, Any]]:
+    results = []
+    for row in rows:
+        result = dict(row)
+        # Parse metadata JSON if present
+        if result.get("metadata"):
+            try:
+                result["metadata"] = json.loads(result["metadata"])
+            except json.JSONDecodeError:
+                result["metadata"] = None
+        results.append(result)
+    return results
+
+
+def vector_search(cursor, query_embedding: List[float], k: int) -> List[Dict[str, Any]]:
+    """Nearest chunks to the query embedding."""
+    cursor.execute(
+        search_settings_sql(k) + VECTOR_SEARCH_SQL, (query_embedding, query_embedding, k)
+    )
+    return _rows_with_metadata(cursor.fetchall())
+
+
+def fetch_chunk_embeddings(cursor, chunk_ids: List[int]) -> Dict[int, Any]:
+    """Stored embeddings of the given chunks, keyed by chunk_id (one round trip)."""
+    if not chunk_ids:
+        return {}
+    cursor.execute(
+        "SELECT chunk_id, embedding FROM rag_embeddings WHERE chunk_id = ANY(%s)",
+        (list(chunk_ids),),
+    )
+    return {
+        (row["chunk_id"] if isinstance(row, dict) else row[0]): (
+            row["embedding"] if isinstance(row, dict) else row[1]
+        )
+        for row in cursor.fetchall()
+    }
+
+
+def hybrid_search(
+    cursor,
+    query_text: str,
+    query_embedding: List[float],
+    k: int,
+    candidates: int = 50,
+    rrf_k: int = 60,
+) -> List[Dict[str, Any]]:
+    """
+    Top-k chunks by reciprocal rank fusion of vector and full-text rankings.
+
+    Each result has chunk_text, source_type, source_ref, parsed metadata,
+    distance (cosine similarity, as in the plain vector search) and rrf_score.
+    """
+    text_query = build_text_query(query_text)
+    if text_query is None:
+        return vector_search(cursor, query_embedding, k)
+    candidates = max(candidates, k)
+    try:
+        # SET LOCAL ef_search/probes travel in the same round trip as the search
+        cursor.execute(
+            search_settings_sql(candidates) + HYBRID_SEARCH_SQL,
+            {
+                "text_query": text_query,
+                "embedding": query_embedding,
+                "candidates": candidates,
+                "rrf_k": rrf_k,
+                "k": k,
+            },
+        )
+    except pg_errors.UndefinedColumn:
+        logger.warning(
+            "RAG Query: rag_chunks.chunk_tsv is missing; using vector-only search."
+        )
+        cursor.connection.rollback()
+        return vector_search(cursor, query_embedding, k)
+    return _rows_with_metadata(cursor.fetchall())
+
+
+def keyword_task_search(cursor, query_text: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Recently updated tasks whose title or description matches any query keyword.
+
+    The WHERE expression matches idx_tasks_search_tsv, so it is an index lookup
+    rather than a LIKE scan over every task.
+    """
+    text_query = build_text_query(query_text)
+    if text_query is None:
+        return []
+    cursor.execute(
+        """
+        SELECT task_id, title, status, description, updated_at
+        FROM tasks
+        WHERE to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))
+              @@ websearch_to_tsquery('english', %s)
+        ORDER BY updated_at DESC
+        LIMIT %s
+    """,
+        (text_query, limit),
+    )
+    return [dict(row) for row in cursor.fetchall()]
@@ -1,14 +1,15 @@
 # Agent-MCP/mcp_template/mcp_server_src/features/rag/indexing.py
 import anyio
+import asyncio
 import time
 import datetime
 import json
 import hashlib
-import glob
 import os
 import psycopg2
 from pathlib import Path
-from typing import List, Dict, Tuple, Any, Optional, NoReturn
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Sequence, Set, Tuple
 
 # Attempt to import the OpenAI library
 try:
@@ -27,50 +28,52 @@ from ...core.config import (
     ADVANCED_EMBEDDINGS,  # Import advanced mode flag at module level
 )
 from ...core import globals as g  # For server_running flag
-from ...db import get_db_connection, is_vss_loadable, return_connection
+from ...db import get_db_connection, is_vss_loadable, return_connection, run_db
+from ...db.vector_index import maintain_vector_index
+from ...utils.metrics import record_rag_index_insert
 
-# We need the actual OpenAI client, not just the service module, for batching logic.
-# The client instance is stored in g.openai_client_instance by openai_service.initialize_openai_client()
+# Embedding calls go through the long-lived AsyncOpenAI client owned by openai_service,
+# so batches reuse pooled keep-alive connections instead of opening new ones.
 from ...external.openai_service import (
-    get_openai_client,
-)  # To get the initialized client
+    get_async_openai_client,
+)  # Shared async client for embedding batches
 
 # Import chunking functions from this RAG feature package
-from .chunking import simple_chunker, markdown_aware_chunker
-from .code_chunking import (
-    chunk_code_aware,
-    detect_language_family,
-    extract_code_entities,
-    create_file_summary,
-    CODE_EXTENSIONS,
-    DOCUMENT_EXTENSIONS,
+from .chunking import simple_chunker
+from .bulk_insert import BulkInsertResult, insert_chunks_with_embeddings
+from .chunk_pipeline import (
+    ChunkingFailed,
+    StreamedChunks,
+    iter_chunk_batches,
+    iter_chunked_sources,
+    shutdown_chunk_pool,
 )
+from .discovery import (
+    GitignoreRules,
+    classify_source_file,
+    is_ignored_name,
+    walk_indexable_files,
+)
+from .embedding_cache import (
+    cache_source_embeddings,
+    embedding_cache_key,
+    lookup_cached_embeddings,
+    prune_embedding_cache,
+)
+from .file_watcher import RagFileWatcher
+from .manifest import (
+    ManifestEntry,
+    detect_file_changes,
+    drop_oversize_candidates,
+    find_deleted_entries,
+    load_manifest,
+    remove_deleted_sources,
+    upsert_manifest_entries,
+)
+from .query_cache import bump_index_generation
 
 # Original location: main.py lines 512 - 826 (run_rag_indexing_periodically function and its logic)
 
-# Define patterns to ignore for file scanning, as in the original
-# Original main.py: 548-552
-IGNORE_DIRS_FOR_INDEXING = [
-    "node_modules",
-    "__pycache__",
-    "venv",
-    "env",
-    ".venv",
-    ".env",
-    "dist",
-    "build",
-    "site-packages",
-    ".git",
-    ".idea",
-    ".vscode",
-    "bin",
-    "obj",
-    "target",
-    ".pytest_cache",
-    ".ipynb_checkpoints",
-    ".mcp-maestro",  # Also ignore the .mcp-maestro directory itself
-]
-
 # Increased concurrency for Tier 3 pricing (5000 RPM)
 # Original main.py: 654
 MAX_CONCURRENT_EMBEDDING_REQUESTS = 25
@@ -81,12 +84,11 @@ PARALLEL_EMBEDDING_BATCH_SIZE = 50
 
 async def _get_embeddings_batch_openai(
     batch_chunks: List[str],
-    batch_index_start: int,
+    batch_positions: List[int],
     results_list: List[Optional[List[float]]],
-    openai_api_key: str,  # Pass API key directly for true async client
 ) -> bool:
     """
-    Processes a single batch of embeddings asynchronously using a new AsyncOpenAI client.
+    Processes a single batch of embeddings asynchronously using the shared AsyncOpenAI client.
     This is a helper for run_rag_indexing_periodically.
     Based on original main.py: lines 656-675.
     """
@@ -94,9 +96,8 @@ async def _get_embeddings_batch_openai(
     # or ensure it's available. It's imported at module level with try-except.
     if openai is None:  # Check if openai library was imported successfully
         logger.error("OpenAI library not available for embedding batch.")
-        for i in range(len(batch_chunks)):
-            if batch_index_start + i < len(results_list):
-                results_list[batch_index_start + i] = None  # Mark as failed
+        for pos in batch_positions:
+            results_list[pos] = None  # Mark as failed
         return False
 
     try:
@@ -113,32 +114,204 @@ async def _get_embeddings_batch_openai(
                     " "
                 )  # Use single space as fallback to maintain batch size
 
-        # Create a separate async client for each batch for true concurrency
-        # Using async client directly with HTTPX to ensure truly parallel requests
-        async_client = openai.AsyncOpenAI(api_key=openai_api_key)
+        # Shared client: concurrent batches multiplex over its pooled connections
+        async_client = get_async_openai_client()
+        if async_client is None:
+            raise RuntimeError("Async OpenAI client not available")
         response = await async_client.embeddings.create(
             input=validated_chunks,
             model=EMBEDDING_MODEL,
             dimensions=EMBEDDING_DIMENSION,  # Ensure API returns vector size matching DB schema
         )
         # Store results directly in the provided results list
-        for j, item_embedding in enumerate(response.data):
-            pos = batch_index_start + j
-            if pos < len(results_list):
-                results_list[pos] = item_embedding.embedding
-        # logger.info(f"Completed embedding batch starting at index {batch_index_start}") # Original: main.py:672
+        for pos, item_embedding in zip(batch_positions, response.data):
+            results_list[pos] = item_embedding.embedding
         return True
     except Exception as e:
         logger.error(
-            f"OpenAI embedding API error in batch starting at {batch_index_start}: {e}"
+            f"OpenAI embedding API error in batch starting at chunk {batch_positions[0]}: {e}"
         )
         # Mark all embeddings in this batch as failed (None)
-        for i in range(len(batch_chunks)):
-            if batch_index_start + i < len(results_list):
-                results_list[batch_index_start + i] = None
+        for pos in batch_positions:
+            results_list[pos] = None
         return False
 
 
+def _source_type_for_path(
+    path: Path,
+    project_dir: Path,
+    include_markdown: bool,
+    include_code: bool,
+    gitignore: Optional[GitignoreRules] = None,
+) -> Optional[str]:
+    """Return 'markdown' or 'code' for an indexable file, None if it is ignored."""
+    try:
+        relative = path.relative_to(project_dir)
+    except ValueError:
+        return None
+    if any(is_ignored_name(part) for part in relative.parts):
+        return None
+    source_type = classify_source_file(path.name, include_markdown, include_code)
+    if source_type and gitignore is not None and gitignore.is_ignored(relative.as_posix()):
+        return None
+    return source_type
+
+
+def _collect_indexable_files(
+    project_dir: Path,
+    include_markdown: bool,
+    include_code: bool,
+    gitignore: Optional[GitignoreRules] = None,
+) -> Dict[str, Tuple[Path, str]]:
+    """Full scan: relative path -> (absolute path, source_type) for every indexable file."""
+    from ...core.config import RAG_DISCOVERY_WORKERS
+
+    return walk_indexable_files(
+        project_dir,
+        include_markdown,
+        include_code,
+        max_workers=RAG_DISCOVERY_WORKERS,
+        gitignore=gitignore,
+    )
+
+
+def _candidates_from_paths(
+    paths: Set[Path],
+    project_dir: Path,
+    include_markdown: bool,
+    include_code: bool,
+    gitignore: Optional[GitignoreRules] = None,
+) -> Tuple[Dict[str, Tuple[Path, str]], List[str]]:
+    """Incremental scan: split watcher paths into existing candidates and removed files."""
+    candidates: Dict[str, Tuple[Path, str]] = {}
+    missing: List[str] = []
+    for path_obj in paths:
+        source_type = _source_type_for_path(
+            path_obj, project_dir, include_markdown, include_code, gitignore
+        )
+        if not source_type:
+            continue
+        rel_path = path_obj.relative_to(project_dir).as_posix()
+        if path_obj.is_file():
+            candidates[rel_path] = (path_obj, source_type)
+        else:
+            missing.append(rel_path)
+    return candidates, missing
+
+
+def _in_transaction(func: Callable, *args) -> Any:
+    """
+    Run func(cursor, *args) in one short transaction on its own connection.
+
+    Blocking; call it through run_db so the event loop is never held up by
+    (or waits on row locks for) the statements.
+    """
+    conn = get_db_connection()
+    try:
+        result = func(conn.cursor(), *args)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        return_connection(conn)
+
+
+def _cache_and_lookup_embeddings(
+    cursor, source_type: str, source_refs: Sequence[str], cache_keys: Sequence[str]
+) -> Dict[str, List[float]]:
+    """Copy the sources' current vectors into the cache, then look up cache_keys."""
+    cache_source_embeddings(
+        cursor, source_type, source_refs, EMBEDDING_MODEL, EMBEDDING_DIMENSION
+    )
+    return lookup_cached_embeddings(cursor, cache_keys)
+
+
+def _replace_source_chunks(
+    cursor,
+    source_type: str,
+    source_refs: Sequence[str],
+    chunk_rows: Sequence[Tuple[str, str, str, int, Optional[str]]],
+    vectors: Sequence[List[float]],
+) -> BulkInsertResult:
+    """Delete the chunks and embeddings of the sources and insert the new rows."""
+    cursor.execute(
+        "DELETE FROM rag_embeddings WHERE chunk_id IN (SELECT chunk_id FROM rag_chunks WHERE source_type = %s AND source_ref = ANY(%s))",
+        (source_type, list(source_refs)),
+    )
+    cursor.execute(
+        "DELETE FROM rag_chunks WHERE source_type = %s AND source_ref = ANY(%s)",
+        (source_type, list(source_refs)),
+    )
+    return insert_chunks_with_embeddings(cursor, chunk_rows, vectors, EMBEDDING_MODEL)
+
+
+@dataclass
+class _SourceWrite:
+    """A source being re-indexed by the periodic cycle, until it is written."""
+
+    source_type: str
+    source_ref: str
+    content_hash: Optional[str] = None
+    # Streamed (large) files insert their chunks per batch instead of holding them
+    streamed: bool = False
+    chunk_rows: List[Tuple[str, str, str, int, Optional[str]]] = field(
+        default_factory=list
+    )
+    vectors: List[List[float]] = field(default_factory=list)
+    # Chunks queued or being embedded; written once chunked and this is zero
+    pending_chunks: int = 0
+    chunked: bool = False
+    failed: bool = False
+    finishing: bool = False
+
+    @property
+    def meta_key(self) -> str:
+        return f"hash_{self.source_type}_{self.source_ref}"
+
+    def ready(self) -> bool:
+        """Every chunk is embedded and no writer has been started yet."""
+        return self.chunked and self.pending_chunks == 0 and not self.finishing
+
+
+def _write_indexed_source(
+    cursor, source: _SourceWrite, manifest_entry: Optional[ManifestEntry]
+) -> BulkInsertResult:
+    """Replace a source's chunks and record its hash and manifest row."""
+    if source.streamed:
+        # Its old chunks were deleted up front and the new ones inserted per batch
+        insert_result = BulkInsertResult()
+    else:
+        insert_result = _replace_source_chunks(
+            cursor,
+            source.source_type,
+            [source.source_ref],
+            source.chunk_rows,
+            source.vectors,
+        )
+    cursor.execute(
+        "INSERT INTO rag_meta (meta_key, meta_value) VALUES (%s, %s) ON CONFLICT (meta_key) DO UPDATE SET meta_value = EXCLUDED.meta_value",
+        (source.meta_key, source.content_hash),
+    )
+    if manifest_entry is not None:
+        upsert_manifest_entries(cursor, [manifest_entry])
+    return insert_result
+
+
+def _run_vector_index_maintenance() -> None:
+    """Build or resize the vector index on a dedicated connection (worker thread)."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        maintain_vector_index(conn)
+    except psycopg2.Error as e:
+        logger.error(f"Vector index maintenance failed: {e}")
+    finally:
+        if conn:
+            return_connection(conn)
+
+
 async def run_rag_indexing_periodically(
     interval_seconds: int = 300, *, task_status=anyio.TASK_STATUS_IGNORED
 ) -> NoReturn:
@@ -167,6 +340,44 @@ async def run_rag_indexing_periodically(
         logger.error("OpenAI Python library not loaded. RAG indexer cannot run.")
         return
 
+    # Optional filesystem change queue; a full manifest scan still runs
+    # every RAG_FULL_SCAN_INTERVAL_CYCLES cycles (and whenever it is missing)
+    from ...core.config import (
+        RAG_EMBEDDING_CACHE,
+        RAG_EMBEDDING_CACHE_TTL_DAYS,
+        RAG_FILE_WATCHER,
+        RAG_FULL_SCAN_INTERVAL_CYCLES,
+        RAG_MAX_FILE_BYTES,
+        RAG_OVERSIZE_FILE_POLICY,
+        RAG_RESPECT_GITIGNORE,
+        RAG_STREAM_FILE_BYTES,
+        RAG_VECTOR_INDEX_AUTO_MAINTAIN,
+    )
+
+    # Oversize files are either left out (and dropped from the index, like
+    # deleted files) or read only up to RAG_MAX_FILE_BYTES characters
+    skip_oversize = RAG_MAX_FILE_BYTES > 0 and RAG_OVERSIZE_FILE_POLICY == "skip"
+    truncate_chars = (
+        RAG_MAX_FILE_BYTES
+        if RAG_MAX_FILE_BYTES > 0 and RAG_OVERSIZE_FILE_POLICY == "truncate"
+        else None
+    )
+
+    file_watcher: Optional[RagFileWatcher] = None
+    if RAG_FILE_WATCHER:
+        watched_dir = get_project_dir()
+        file_watcher = RagFileWatcher(
+            watched_dir,
+            path_filter=lambda p: _source_type_for_path(p, watched_dir, True, True)
+            is not None,
+        )
+        if not file_watcher.start():
+            file_watcher = None
+    cycles_since_full_scan: Optional[int] = None
+    vector_index_checked = False
+    # Reloaded on every full scan so edits to .gitignore files are picked up
+    gitignore_rules: Optional[GitignoreRules] = None
+
     while g.server_running:  # Uses global flag (main.py:521)
         cycle_start_time = time.time()
 
@@ -181,6 +392,9 @@ async def run_rag_indexing_periodically(
             )
 
         conn = None  # Initialize conn here for broader scope in try-finally
+        cycle_completed = False
+        sources_failed = False
+        full_scan = True
 
         try:
             conn = get_db_connection()
@@ -209,6 +423,16 @@ async def run_rag_indexing_periodically(
                 await anyio.sleep(interval_seconds * 2)
                 continue
 
+            embedding_cache_enabled = False
+            if RAG_EMBEDDING_CACHE:
+                cursor.execute(
+                    "SELECT to_regclass('rag_embedding_cache') IS NOT NULL as exists"
+                )
+                result = cursor.fetchone()
+                embedding_cache_enabled = bool(
+                    result["exists"] if isinstance(result, dict) else result[0]
+                )
+
             # Get last indexed timestamps and stored hashes
             # Original main.py:534-535 (last_indexed) and main.py:597-598 (stored_hashes)
             cursor.execute("SELECT meta_key, meta_value FROM rag_meta")
@@ -244,102 +468,120 @@ async def run_rag_indexing_periodically(
             max_md_mod_timestamp = last_md_timestamp
             max_code_mod_timestamp = last_code_timestamp
 
-            # Find all markdown files (only if auto-indexing is enabled)
-            all_md_files_found = []
             # Check config at runtime after CLI has set it
             from ...core.config import DISABLE_AUTO_INDEXING
 
-            if not DISABLE_AUTO_INDEXING:
-                for md_file_path_str in glob.glob(
-                    str(current_project_dir / "**/*.md"), recursive=True
-                ):
-                    md_path_obj = Path(md_file_path_str)
-                    should_ignore = False
-                    # Path component check from main.py:560-565
-                    for part in md_path_obj.parts:
-                        if part in IGNORE_DIRS_FOR_INDEXING or (
-                            part.startswith(".") and part not in [".", ".."]
-                        ):
-                            should_ignore = True
-                            break
-                    if not should_ignore:
-                        all_md_files_found.append(md_path_obj)
-
-                logger.info(
-                    f"Found {len(all_md_files_found)} markdown files to consider for indexing (after filtering ignored dirs)."
-                )
-            else:
+            include_markdown = not DISABLE_AUTO_INDEXING
+            include_code = ADVANCED_EMBEDDINGS
+            if not include_markdown:
                 logger.info(
                     "Automatic markdown indexing disabled. Skipping markdown file scanning."
                 )
 
-            # Find all code files (only in advanced mode)
-            all_code_files_found = []
-            if ADVANCED_EMBEDDINGS:
-                for extension in CODE_EXTENSIONS:
-                    for code_file_path_str in glob.glob(
-                        str(current_project_dir / f"**/*{extension}"), recursive=True
-                    ):
-                        code_path_obj = Path(code_file_path_str)
-                        should_ignore = False
-                        for part in code_path_obj.parts:
-                            if part in IGNORE_DIRS_FOR_INDEXING or (
-                                part.startswith(".") and part not in [".", ".."]
-                            ):
-                                should_ignore = True
-                                break
-                        if not should_ignore:
-                            all_code_files_found.append(code_path_obj)
-
-                logger.info(
-                    f"Found {len(all_code_files_found)} code files to consider for indexing (after filtering ignored dirs)."
+            # Stat every candidate against the manifest; only files whose
+            # mtime/size moved are read and hashed. With the file watcher
+            # running, only queued paths are checked between full scans.
+            full_scan = (
+                file_watcher is None
+                or not file_watcher.running
+                or cycles_since_full_scan is None
+                or cycles_since_full_scan >= RAG_FULL_SCAN_INTERVAL_CYCLES
+            )
+            file_manifest = load_manifest(cursor)
+            if full_scan:
+                if file_watcher is not None:
+                    file_watcher.drain()  # The full scan covers everything queued so far
+                gitignore_rules = GitignoreRules(
+                    current_project_dir, enabled=RAG_RESPECT_GITIGNORE
+                )
+                file_candidates = _collect_indexable_files(
+                    current_project_dir, include_markdown, include_code, gitignore_rules
+                )
+                if skip_oversize:
+                    file_candidates, _ = drop_oversize_candidates(
+                        file_candidates, RAG_MAX_FILE_BYTES
+                    )
+                enabled_types = set()
+                if include_markdown:
+                    enabled_types.add("markdown")
+                if include_code:
+                    enabled_types.add("code")
+                deleted_entries = [
+                    entry
+                    for entry in find_deleted_entries(file_candidates, file_manifest)
+                    if entry.source_type in enabled_types
+                ]
+            else:
+                file_candidates, missing_paths = _candidates_from_paths(
+                    file_watcher.drain(),
+                    current_project_dir,
+                    include_markdown,
+                    include_code,
+                    gitignore_rules,
                 )
+                if skip_oversize:
+                    file_candidates, oversize_paths = drop_oversize_candidates(
+                        file_candidates, RAG_MAX_FILE_BYTES
+                    )
+                    missing_paths.extend(oversize_paths)
+                deleted_entries = [
+                    file_manifest[rel_path]
+                    for rel_path in missing_paths
+                    if rel_path in file_manifest
+                ]
+            logger.info(
+                f"Found {len(file_candidates)} files to consider for indexing "
+                f"({'full scan' if full_scan else 'watched changes'}, after filtering ignored dirs)."
+            )
 
-            # Process markdown files (only if auto-indexing is enabled)
-            if not DISABLE_AUTO_INDEXING:
-                for md_path_obj in all_md_files_found:
-                    try:
-                        mod_time = md_path_obj.stat().st_mtime
-                        content = md_path_obj.read_text(encoding="utf-8")
-                        normalized_path = str(
-                            md_path_obj.relative_to(current_project_dir).as_posix()
-                        )
-                        current_hash = hashlib.sha256(
-                            content.encode("utf-8")
-                        ).hexdigest()
-                        sources_to_check.append(
-                            (
-                                "markdown",
-                                normalized_path,
-                                content,
-                                mod_time,
-                                current_hash,
-                            )
-                        )
-                        if mod_time > max_md_mod_timestamp:
-                            max_md_mod_timestamp = mod_time
-                    except Exception as e:
-                        logger.warning(
-                            f"Failed to read or process markdown file {md_path_obj}: {e}"
+            changed_files, touched_entries = detect_file_changes(
+                file_candidates,
+                file_manifest,
+                stored_hashes,
+                stream_threshold=RAG_STREAM_FILE_BYTES,
+                max_chars=truncate_chars,
+            )
+            if touched_entries:
+                # Metadata changed but content did not: refresh stat, skip re-embedding
+                upsert_manifest_entries(cursor, touched_entries)
+            if deleted_entries:
+                if embedding_cache_enabled:
+                    # Renamed/moved files can then reuse their vectors
+                    for deleted_entry in deleted_entries:
+                        cache_source_embeddings(
+                            cursor,
+                            deleted_entry.source_type,
+                            deleted_entry.path,
+                            EMBEDDING_MODEL,
+                            EMBEDDING_DIMENSION,
                         )
+                removed_count = remove_deleted_sources(cursor, deleted_entries)
+                logger.info(
+                    f"Removed RAG index entries for {removed_count} deleted files."
+                )
 
-            # Process code files
-            for code_path_obj in all_code_files_found:
-                try:
-                    mod_time = code_path_obj.stat().st_mtime
-                    content = code_path_obj.read_text(encoding="utf-8")
-                    normalized_path = str(
-                        code_path_obj.relative_to(current_project_dir).as_posix()
+            # Manifest rows are written only once their source is safely indexed
+            pending_manifest_entries: Dict[str, ManifestEntry] = {}
+            for changed_file in changed_files:
+                sources_to_check.append(
+                    (
+                        changed_file.source_type,
+                        changed_file.path,
+                        changed_file.content,
+                        changed_file.mtime,
+                        changed_file.entry.content_hash,
                     )
-                    current_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
-                    sources_to_check.append(
-                        ("code", normalized_path, content, mod_time, current_hash)
+                )
+                pending_manifest_entries[
+                    f"hash_{changed_file.source_type}_{changed_file.path}"
+                ] = changed_file.entry
+                if changed_file.source_type == "markdown":
+                    max_md_mod_timestamp = max(
+                        max_md_mod_timestamp, changed_file.mtime
                     )
-                    if mod_time > max_code_mod_timestamp:
-                        max_code_mod_timestamp = mod_time
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to read or process code file {code_path_obj}: {e}"
+                else:
+                    max_code_mod_timestamp = max(
+                        max_code_mod_timestamp, changed_file.mtime
                     )
 
             # 2. Scan Project Context (Original main.py:585-603)
@@ -418,19 +660,25 @@ async def run_rag_indexing_periodically(
                         max_task_mod_time_iso = last_mod_iso
 
             # Filter sources based on hash comparison (Original main.py:608-615)
-            sources_to_process_for_embedding: List[Tuple[str, str, str, str]] = (
-                []
-            )  # type, ref, content, current_hash
+            sources_to_process_for_embedding: List[
+                Tuple[str, str, Optional[str], Optional[str]]
+            ] = []  # type, ref, content, current_hash (None for streamed files)
             for source_type, source_ref, content, _, current_hash in sources_to_check:
                 meta_key_for_hash = f"hash_{source_type}_{source_ref}"
                 stored_source_hash = stored_hashes.get(meta_key_for_hash)
-                if current_hash != stored_source_hash:
+                # Streamed files have no hash yet; it is computed while they are chunked
+                if current_hash is None or current_hash != stored_source_hash:
                     logger.info(
                         f"Change detected for {source_type}: {source_ref} (Hash mismatch or new). Queued for re-indexing."
                     )
                     sources_to_process_for_embedding.append(
                         (source_type, source_ref, content, current_hash)
                     )
+                elif meta_key_for_hash in pending_manifest_entries:
+                    # Already indexed with this content; just record its stat
+                    upsert_manifest_entries(
+                        cursor, [pending_manifest_entries.pop(meta_key_for_hash)]
+                    )
                 # else: logger.debug(f"No change for {source_type}:{source_ref} (hash match)")
 
             if not sources_to_process_for_embedding:
@@ -442,325 +690,291 @@ async def run_rag_indexing_periodically(
                     f"Processing {len(sources_to_process_for_embedding)} updated/new sources for RAG index."
                 )
 
-                processed_hashes_to_update_in_meta: Dict[str, str] = {}
-
-                # Delete existing chunks for sources needing update (Original main.py:619-628)
-                logger.info(
-                    "Deleting existing chunks and embeddings for sources needing update..."
-                )
-                delete_count = 0
-                for source_type, source_ref, _, _ in sources_to_process_for_embedding:
-                    # Delete from embeddings first (using chunk_id from chunks)
-                    # Ensure rag_embeddings table exists before attempting delete
-                    cursor.execute(
-                        "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'rag_embeddings') as exists"
-                    )
-                    result = cursor.fetchone()
-                    if (result['exists'] if isinstance(result, dict) else result[0]):
-                        res_emb = cursor.execute(
-                            "DELETE FROM rag_embeddings WHERE chunk_id IN (SELECT chunk_id FROM rag_chunks WHERE source_type = %s AND source_ref = %s)",
-                            (source_type, source_ref),
+                # The old vectors go into the cache first, so unchanged chunks
+                # are not re-embedded. Everything the scan wrote is committed
+                # here: from now on every source is written in its own short
+                # transaction, off the event loop, once its embeddings are
+                # ready, and no transaction stays open while the API is awaited.
+                if embedding_cache_enabled:
+                    refs_by_type: Dict[str, List[str]] = {}
+                    for source_type, source_ref, _, _ in sources_to_process_for_embedding:
+                        refs_by_type.setdefault(source_type, []).append(source_ref)
+                    for source_type, source_refs in refs_by_type.items():
+                        cache_source_embeddings(
+                            cursor,
+                            source_type,
+                            source_refs,
+                            EMBEDDING_MODEL,
+                            EMBEDDING_DIMENSION,
                         )
-                    # Delete from chunks
-                    res_chk = cursor.execute(
-                        "DELETE FROM rag_chunks WHERE source_type = %s AND source_ref = %s",
-                        (source_type, source_ref),
-                    )
-                    if res_chk.rowcount > 0:
-                        delete_count += res_chk.rowcount
-                if delete_count > 0:
-                    logger.info(
-                        f"Deleted {delete_count} old chunks and their embeddings."
+                conn.commit()
+
+                # Chunk sources (in worker processes for large cycles, large files
+                # straight from disk) and embed them one batch at a time: memory
+                # holds the batches in flight and the sources they belong to,
+                # not the whole cycle's chunks
+                embeddings_api_successful = (
+                    True  # Flag to track overall success of API calls
+                )
+                # Bounds the batches being embedded or written at once
+                batch_slots = anyio.Semaphore(MAX_CONCURRENT_EMBEDDING_REQUESTS)
+                # source, chunk_index, chunk_text, metadata for each pending chunk
+                current_batch: List[Tuple[_SourceWrite, int, str, Dict[str, Any]]] = []
+                # Meta keys of sources that failed to chunk, embed or write
+                failed_source_keys: Set[str] = set()
+                cycle_counts = {"chunks": 0, "cache_hits": 0, "failed": 0, "inserted": 0}
+
+                def _record_insert(insert_result: BulkInsertResult) -> None:
+                    cycle_counts["inserted"] += insert_result.rows
+                    record_rag_index_insert(
+                        insert_result.rows, insert_result.duration_seconds
                     )
-                    conn.commit()  # Commit deletions
-
-                # Generate chunks and prepare for embedding (Original main.py:631-647)
-                all_chunks_texts_to_embed: List[str] = []
-                chunk_source_metadata_map: List[
-                    Tuple[str, str, str, Dict[str, Any]]
-                ] = []  # type, ref, current_hash, metadata for each chunk
-
-                # ADVANCED_EMBEDDINGS is already imported at module level
-
-                for (
-                    source_type,
-                    source_ref,
-                    content,
-                    current_hash_of_source,
-                ) in sources_to_process_for_embedding:
-                    chunks_with_metadata: List[Tuple[str, Dict[str, Any]]] = []
-
-                    if ADVANCED_EMBEDDINGS:
-                        # Advanced mode: Use sophisticated chunking
-                        if source_type == "markdown":
-                            # Markdown-aware chunking
-                            text_chunks = markdown_aware_chunker(content)
-                            chunks_with_metadata = [
-                                (chunk, {"source_type": "markdown"})
-                                for chunk in text_chunks
-                            ]
-                        elif source_type == "code":
-                            # Code-aware chunking for code files
-                            file_path = current_project_dir / source_ref
-
-                            # First, create a file summary
-                            entities = extract_code_entities(content, file_path)
-                            file_summary = create_file_summary(
-                                content, file_path, entities
-                            )
-                            summary_text = f"File: {source_ref}\n{json.dumps(file_summary, indent=2)}"
-                            chunks_with_metadata.append(
-                                (
-                                    summary_text,
-                                    {"source_type": "code_summary", **file_summary},
-                                )
-                            )
 
-                            # Then chunk the code
-                            code_chunks = chunk_code_aware(content, file_path)
-                            chunks_with_metadata.extend(code_chunks)
-                        else:
-                            # Simple chunking for other types
-                            text_chunks = simple_chunker(content)
-                            chunks_with_metadata = [
-                                (chunk, {"source_type": source_type})
-                                for chunk in text_chunks
-                            ]
-                    else:
-                        # Original/Simple mode: Basic chunking for all types
-                        text_chunks = simple_chunker(content)
-                        # Store minimal metadata
-                        chunks_with_metadata = [
-                            (chunk, {"source_type": source_type})
-                            for chunk in text_chunks
-                        ]
-
-                    if not chunks_with_metadata:
-                        file_size = len(content) if content else 0
-                        logger.warning(
-                            f"No chunks generated for {source_type}: {source_ref} (file size: {file_size} bytes, likely empty or only whitespace). Skipping."
+                async def _finish_source(source: _SourceWrite) -> None:
+                    """Write a source's chunks, hash and manifest row in one transaction."""
+                    if source.failed:
+                        # Keeps its old hash and manifest row, so it is redone next cycle
+                        failed_source_keys.add(source.meta_key)
+                        return
+                    try:
+                        insert_result = await run_db(
+                            _in_transaction,
+                            _write_indexed_source,
+                            source,
+                            pending_manifest_entries.get(source.meta_key),
+                        )
+                    except psycopg2.Error as db_err:
+                        logger.error(
+                            f"DB Error writing chunks/embeddings for {source.source_type}: {source.source_ref}: {db_err}"
                         )
-                        continue
-
-                    for chunk_text, metadata in chunks_with_metadata:
-                        # Validate chunk before adding - skip empty or whitespace-only chunks
-                        if chunk_text and chunk_text.strip():
-                            all_chunks_texts_to_embed.append(chunk_text.strip())
-                            # Store metadata along with source info
-                            chunk_source_metadata_map.append(
-                                (
-                                    source_type,
-                                    source_ref,
-                                    current_hash_of_source,
-                                    metadata,
+                        failed_source_keys.add(source.meta_key)
+                        return
+                    if insert_result.rows:
+                        _record_insert(insert_result)
+
+                def _release_chunks(tg, batch) -> None:
+                    """Finish the sources whose last chunk has been embedded."""
+                    for source, _, _, _ in batch:
+                        source.pending_chunks -= 1
+                        if source.ready():
+                            source.finishing = True
+                            tg.start_soon(_finish_source, source)
+
+                async def _embed_batch(tg, batch) -> None:
+                    """Resolve a batch from the cache or the API and hand the vectors on."""
+                    try:
+                        vectors: List[Optional[List[float]]] = [None] * len(batch)
+                        positions_to_embed = list(range(len(batch)))
+                        if embedding_cache_enabled:
+                            keys = [
+                                embedding_cache_key(
+                                    chunk_text, EMBEDDING_MODEL, EMBEDDING_DIMENSION
                                 )
+                                for _, _, chunk_text, _ in batch
+                            ]
+                            cached = await run_db(
+                                _in_transaction, lookup_cached_embeddings, keys
                             )
-                        else:
-                            logger.warning(
-                                f"Skipping empty chunk from {source_type}: {source_ref}"
+                            positions_to_embed = []
+                            for pos, key in enumerate(keys):
+                                if key in cached:
+                                    vectors[pos] = cached[key]
+                                    cycle_counts["cache_hits"] += 1
+                                else:
+                                    positions_to_embed.append(pos)
+                        if positions_to_embed:
+                            await _get_embeddings_batch_openai(
+                                [batch[pos][2] for pos in positions_to_embed],
+                                positions_to_embed,
+                                vectors,
                             )
 
-                if all_chunks_texts_to_embed:
-                    logger.info(
-                        f"Generated {len(all_chunks_texts_to_embed)} new chunks for embedding."
-                    )
-
-                    all_embeddings_vectors: List[Optional[List[float]]] = [None] * len(
-                        all_chunks_texts_to_embed
-                    )
-                    embeddings_api_successful = (
-                        True  # Flag to track overall success of API calls
-                    )
-
-                    # Parallel embedding processing (Original main.py:662-690)
-                    embedding_api_call_start_time = time.time()
-                    # Process batches in groups with controlled concurrency
-                    for group_start_idx in range(
-                        0,
-                        len(all_chunks_texts_to_embed),
-                        MAX_CONCURRENT_EMBEDDING_REQUESTS
-                        * PARALLEL_EMBEDDING_BATCH_SIZE,
-                    ):
-                        # Determine how many batches to run in this parallel group
-                        num_batches_in_group = 0
-                        temp_idx = group_start_idx
-                        while (
-                            num_batches_in_group < MAX_CONCURRENT_EMBEDDING_REQUESTS
-                            and temp_idx < len(all_chunks_texts_to_embed)
-                        ):
-                            num_batches_in_group += 1
-                            temp_idx += PARALLEL_EMBEDDING_BATCH_SIZE
-
-                        logger.info(
-                            f"Processing up to {num_batches_in_group} embedding batches in parallel (group starting at chunk {group_start_idx})..."
-                        )
-
-                        try:
-                            async with anyio.create_task_group() as tg_embed:
-                                for i in range(num_batches_in_group):
-                                    batch_actual_start_index = (
-                                        group_start_idx
-                                        + i * PARALLEL_EMBEDDING_BATCH_SIZE
-                                    )
-                                    if batch_actual_start_index >= len(
-                                        all_chunks_texts_to_embed
-                                    ):
-                                        break  # No more chunks
-
-                                    batch_end_index = min(
-                                        batch_actual_start_index
-                                        + PARALLEL_EMBEDDING_BATCH_SIZE,
-                                        len(all_chunks_texts_to_embed),
-                                    )
-                                    current_batch_chunks = all_chunks_texts_to_embed[
-                                        batch_actual_start_index:batch_end_index
-                                    ]
-
-                                    if not current_batch_chunks:
-                                        continue
-
-                                    tg_embed.start_soon(
-                                        _get_embeddings_batch_openai,
-                                        current_batch_chunks,
-                                        batch_actual_start_index,
-                                        all_embeddings_vectors,
-                                        openai_api_key_for_batches,  # Pass the API key
-                                    )
-                        except (
-                            Exception
-                        ) as e_tg:  # Catch errors from the task group itself
-                            logger.error(
-                                f"Error in parallel embedding batch processing task group: {e_tg}"
-                            )
-                            embeddings_api_successful = (
-                                False  # Mark failure if task group fails
+                        # Streamed sources are written batch by batch
+                        streamed_rows: Dict[int, Tuple[_SourceWrite, list, list]] = {}
+                        for (
+                            source,
+                            chunk_index,
+                            chunk_text,
+                            chunk_metadata,
+                        ), embedding_vector in zip(batch, vectors):
+                            if embedding_vector is None:
+                                source.failed = True
+                                cycle_counts["failed"] += 1
+                                continue
+                            # Store chunk with optional metadata
+                            metadata_json = (
+                                json.dumps(chunk_metadata) if chunk_metadata else None
                             )
-
-                        if not embeddings_api_successful:
-                            break  # Stop if a task group failed
-
-                        # Minimal delay between batch groups (Original main.py:689)
-                        if (
-                            group_start_idx
-                            + MAX_CONCURRENT_EMBEDDING_REQUESTS
-                            * PARALLEL_EMBEDDING_BATCH_SIZE
-                            < len(all_chunks_texts_to_embed)
-                        ):
-                            await anyio.sleep(0.1)  # Reduced from 0.2
-
-                    embedding_api_duration = time.time() - embedding_api_call_start_time
-                    logger.info(
-                        f"Completed all embedding API calls in {embedding_api_duration:.2f} seconds."
-                    )
-
-                    # Check for failed embeddings (None values)
-                    failed_embedding_count = sum(
-                        1 for emb_vec in all_embeddings_vectors if emb_vec is None
-                    )
-                    if failed_embedding_count > 0:
-                        logger.warning(
-                            f"{failed_embedding_count} out of {len(all_embeddings_vectors)} embeddings failed to generate."
-                        )
-                        # If a significant portion failed, mark the overall API call as unsuccessful
-                        if (
-                            failed_embedding_count > len(all_embeddings_vectors) // 2
-                        ):  # More than half failed
-                            embeddings_api_successful = False
-                            logger.error(
-                                "More than half of the embeddings failed. Marking RAG indexing cycle for these sources as unsuccessful."
+                            chunk_row = (
+                                source.source_type,
+                                source.source_ref,
+                                chunk_text,
+                                chunk_index,
+                                metadata_json,
                             )
-
-                    # Insert new chunks and embeddings into DB (Original main.py:697-722)
-                    if embeddings_api_successful:
-                        logger.info(
-                            "Inserting new chunks and embeddings into the database..."
-                        )
-                        inserted_count = 0
-                        created_at_iso = datetime.datetime.now().isoformat()
-                        for i, chunk_text_to_insert in enumerate(
-                            all_chunks_texts_to_embed
-                        ):
-                            embedding_vector = all_embeddings_vectors[i]
-                            if embedding_vector is None:
-                                logger.warning(
-                                    f"Skipping chunk {i} for DB insertion due to missing embedding."
+                            if source.streamed:
+                                _, rows, row_vectors = streamed_rows.setdefault(
+                                    id(source), (source, [], [])
                                 )
-                                continue
+                            else:
+                                rows, row_vectors = source.chunk_rows, source.vectors
+                            rows.append(chunk_row)
+                            row_vectors.append(embedding_vector)
 
-                            (
-                                source_type,
-                                source_ref,
-                                current_hash_of_source,
-                                chunk_metadata,
-                            ) = chunk_source_metadata_map[i]
+                        for source, rows, row_vectors in streamed_rows.values():
+                            if source.failed:
+                                continue
                             try:
-                                # Store chunk with optional metadata
-                                metadata_json = (
-                                    json.dumps(chunk_metadata)
-                                    if chunk_metadata
-                                    else None
-                                )
-                                cursor.execute(
-                                    "INSERT INTO rag_chunks (source_type, source_ref, chunk_text, chunk_index, metadata) VALUES (%s, %s, %s, %s, %s) RETURNING chunk_id",
-                                    (
-                                        source_type,
-                                        source_ref,
-                                        chunk_text_to_insert,
-                                        i,  # chunk_index
-                                        metadata_json,
-                                    ),
-                                )
-                                result = cursor.fetchone()
-                                chunk_chunk_id = result['chunk_id'] if isinstance(result, dict) else result[0]  # This is the chunk_id
-
-                                # Convert embedding list to pgvector format
-                                embedding_array = embedding_vector
-                                cursor.execute(
-                                    "INSERT INTO rag_embeddings (chunk_id, embedding, model_name) VALUES (%s, %s::vector, %s)",
-                                    (chunk_chunk_id, embedding_array, EMBEDDING_MODEL),
+                                insert_result = await run_db(
+                                    _in_transaction,
+                                    insert_chunks_with_embeddings,
+                                    rows,
+                                    row_vectors,
+                                    EMBEDDING_MODEL,
                                 )
-                                inserted_count += 1
-                                # Mark this source's hash to be updated in rag_meta
-                                meta_key_for_hash_update = (
-                                    f"hash_{source_type}_{source_ref}"
-                                )
-                                processed_hashes_to_update_in_meta[
-                                    meta_key_for_hash_update
-                                ] = current_hash_of_source
                             except psycopg2.Error as db_err:
                                 logger.error(
-                                    f"DB Error inserting chunk/embedding for {source_type}:{source_ref} (Chunk index {i}): {db_err}"
+                                    f"DB Error inserting chunks/embeddings for {source.source_type}: {source.source_ref}: {db_err}"
                                 )
-                                # If one insert fails, we might lose its hash update.
-                                # Consider if transaction should be per source or all-or-nothing for the cycle.
-                                # Original code continued, so we do too.
-                            except Exception as e_ins:
+                                source.failed = True
+                                continue
+                            _record_insert(insert_result)
+                    finally:
+                        batch_slots.release()
+                        _release_chunks(tg, batch)
+
+                async def _submit_batch(tg) -> None:
+                    """Hand the pending chunks to a batch task (waits for a free slot)."""
+                    batch = current_batch[:]
+                    current_batch.clear()
+                    await batch_slots.acquire()
+                    tg.start_soon(_embed_batch, tg, batch)
+
+                embedding_api_call_start_time = time.time()
+                try:
+                    async with anyio.create_task_group() as tg_embed:
+                        async for (
+                            (source_type, source_ref, content, current_hash_of_source),
+                            chunks_with_metadata,
+                        ) in iter_chunked_sources(
+                            sources_to_process_for_embedding,
+                            current_project_dir,
+                            ADVANCED_EMBEDDINGS,
+                            max_chars=truncate_chars,
+                        ):
+                            source = _SourceWrite(
+                                source_type,
+                                source_ref,
+                                content_hash=current_hash_of_source,
+                                streamed=isinstance(chunks_with_metadata, StreamedChunks),
+                            )
+                            if isinstance(chunks_with_metadata, ChunkingFailed):
+                                # Not empty, just unreadable: its old chunks, hash
+                                # and manifest row stay, so it is retried
+                                failed_source_keys.add(source.meta_key)
+                                continue
+                            if source.streamed:
+                                # Too large to hold until the end: the old chunks
+                                # go now and the new ones are inserted per batch.
+                                # A failure leaves the old hash, so it is redone.
+                                try:
+                                    await run_db(
+                                        _in_transaction,
+                                        _replace_source_chunks,
+                                        source_type,
+                                        [source_ref],
+                                        [],
+                                        [],
+                                    )
+                                except psycopg2.Error as db_err:
+                                    logger.error(
+                                        f"DB Error deleting old chunks of {source_type}: {source_ref}: {db_err}"
+                                    )
+                                    failed_source_keys.add(source.meta_key)
+                                    continue
+                            chunk_index = 0
+                            try:
+                                async for chunk_batch in iter_chunk_batches(
+                                    chunks_with_metadata, PARALLEL_EMBEDDING_BATCH_SIZE
+                                ):
+                                    for chunk_text, metadata in chunk_batch:
+                                        # Validate chunk before adding - skip empty or whitespace-only chunks
+                                        if not (chunk_text and chunk_text.strip()):
+                                            logger.warning(
+                                                f"Skipping empty chunk from {source_type}: {source_ref}"
+                                            )
+                                            continue
+                                        current_batch.append(
+                                            (source, chunk_index, chunk_text.strip(), metadata)
+                                        )
+                                        source.pending_chunks += 1
+                                        chunk_index += 1
+                                        if len(current_batch) >= PARALLEL_EMBEDDING_BATCH_SIZE:
+                                            await _submit_batch(tg_embed)
+                            except Exception as e_read:
+                                # Only streamed sources are chunked here; in-memory
+                                # ones were chunked (and errors logged) already
                                 logger.error(
-                                    f"Unexpected error inserting chunk/embedding: {e_ins}",
-                                    exc_info=True,
+                                    f"Failed to chunk streamed {source_type}: {source_ref}: {e_read}"
+                                )
+                                source.failed = True
+                            cycle_counts["chunks"] += chunk_index
+
+                            if source.streamed and not source.failed:
+                                # Hashed while it was chunked
+                                source.content_hash = chunks_with_metadata.content_hash
+                                if source.meta_key in pending_manifest_entries:
+                                    pending_manifest_entries[
+                                        source.meta_key
+                                    ].content_hash = source.content_hash
+
+                            if chunk_index == 0 and not source.failed:
+                                logger.warning(
+                                    f"No chunks generated for {source_type}: {source_ref} (file size: {len(content)} bytes, likely empty or only whitespace). Skipping."
+                                    if content is not None
+                                    else f"No chunks generated for streamed {source_type}: {source_ref}. Skipping."
                                 )
+                            # Written once its last batch is embedded (old chunks
+                            # dropped, hash and stat recorded so it is not re-read)
+                            source.chunked = True
+                            if source.ready():
+                                source.finishing = True
+                                tg_embed.start_soon(_finish_source, source)
+
+                        # Flush the final partial batch
+                        if current_batch:
+                            await _submit_batch(tg_embed)
+                except Exception as e_tg:  # Catch errors from the task group itself
+                    # Sources finished so far are committed; the rest keep
+                    # their old hashes and are retried next cycle
+                    logger.error(
+                        f"Error in parallel chunking/embedding pipeline: {e_tg}"
+                    )
+                    raise
 
+                if cycle_counts["chunks"]:
+                    logger.info(
+                        f"Generated {cycle_counts['chunks']} new chunks for embedding."
+                    )
+                    if embedding_cache_enabled:
                         logger.info(
-                            f"Successfully inserted {inserted_count} new chunks/embeddings."
-                        )
-
-                        # Update rag_meta with the new hashes for successfully processed sources
-                        # Original main.py:725-728
-                        if processed_hashes_to_update_in_meta:
-                            logger.info(
-                                f"Updating {len(processed_hashes_to_update_in_meta)} source hashes in rag_meta..."
-                            )
-                            meta_update_tuples = list(
-                                processed_hashes_to_update_in_meta.items()
-                            )
-                            cursor.executemany(
-                                "INSERT INTO rag_meta (meta_key, meta_value) VALUES (%s, %s) ON CONFLICT (meta_key) DO UPDATE SET meta_value = EXCLUDED.meta_value",
-                                meta_update_tuples,
-                            )
-                    else:
-                        logger.warning(
-                            "Skipping DB insertion and hash updates for this RAG cycle due to embedding API errors."
+                            f"Embedding cache: reused {cycle_counts['cache_hits']} vectors, "
+                            f"sent {cycle_counts['chunks'] - cycle_counts['cache_hits']} chunks to the API."
                         )
+                    embedding_api_duration = time.time() - embedding_api_call_start_time
+                    logger.info(
+                        f"Embedded and inserted {cycle_counts['inserted']} chunks/embeddings "
+                        f"in {embedding_api_duration:.2f} seconds."
+                    )
+                if failed_source_keys:
+                    # Timestamps stay put too, so changed context/tasks are re-read
+                    logger.warning(
+                        f"{len(failed_source_keys)} sources failed to index "
+                        f"({cycle_counts['failed']} out of {cycle_counts['chunks']} embeddings failed to generate); "
+                        f"they will be re-indexed next cycle."
+                    )
+                    embeddings_api_successful = False
+                    sources_failed = True
 
             # Update last indexed *timestamps* in rag_meta (Original main.py:731-737)
             # Only update if the embedding part (if attempted) was successful or no embeddings were needed.
@@ -807,7 +1021,22 @@ async def run_rag_indexing_periodically(
                     "Skipping rag_meta timestamp updates due to errors in the embedding/indexing cycle."
                 )
 
-            conn.commit()  # Commit all DB changes for this cycle
+            if embedding_cache_enabled and full_scan:
+                prune_embedding_cache(cursor, RAG_EMBEDDING_CACHE_TTL_DAYS)
+
+            conn.commit()  # Commit the timestamps; sources committed as they finished
+            cycle_completed = True
+            index_changed = bool(deleted_entries or sources_to_process_for_embedding)
+            if index_changed:
+                # Cached RAG answers may describe the old index
+                bump_index_generation()
+            if RAG_VECTOR_INDEX_AUTO_MAINTAIN and (
+                index_changed or not vector_index_checked
+            ):
+                # Build/resize the vector index after bulk loads; the concurrent
+                # build runs on its own connection in a worker thread
+                await anyio.to_thread.run_sync(_run_vector_index_maintenance)
+                vector_index_checked = True
 
             # Diagnostic query (Original main.py:740-747)
             try:
@@ -846,6 +1075,12 @@ async def run_rag_indexing_periodically(
             if conn:
                 return_connection(conn)
 
+        if cycle_completed and not sources_failed:
+            cycles_since_full_scan = 1 if full_scan else cycles_since_full_scan + 1
+        else:
+            # Paths drained from the watcher may not have been indexed
+            cycles_since_full_scan = None
+
         elapsed_cycle_time = time.time() - cycle_start_time
         logger.info(
             f"RAG index update cycle finished in {elapsed_cycle_time:.2f} seconds."
@@ -860,6 +1095,9 @@ async def run_rag_indexing_periodically(
         logger.debug(f"RAG indexer sleeping for {sleep_duration} seconds.")
         await anyio.sleep(sleep_duration)
 
+    if file_watcher is not None:
+        file_watcher.stop()
+    shutdown_chunk_pool()
     logger.info("Background RAG indexer process stopped.")
 
 
@@ -868,88 +1106,125 @@ async def run_rag_indexing_periodically(
 
 
 # Task indexing functions for System 8
-async def index_task_data(task_id: str, task_data: Dict[str, Any]) -> None:
+async def index_tasks_batch(tasks: Sequence[Tuple[str, Dict[str, Any]]]) -> bool:
     """
-    Index a single task into the RAG system.
+    Re-index a batch of tasks.
+
+    The new task texts are embedded first, in shared API batches (unchanged
+    texts reuse cached vectors, looked up in their own short transaction).
+    Only then are the old chunks of every task removed with set-based
+    statements and all new rows bulk inserted, in one short transaction run
+    off the event loop, so no row lock is held while the API is awaited.
 
     Args:
-        task_id: Task ID to index
-        task_data: Complete task data dictionary
+        tasks: (task_id, task_data) pairs; later duplicates of a task_id win
+
+    Returns:
+        True if the batch was written.
     """
+    if not tasks:
+        return True
     if not is_vss_loadable():
-        logger.warning("Cannot index task - VSS not available")
-        return
+        logger.warning("Cannot index tasks - VSS not available")
+        return False
 
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+    # Coalesce duplicate task ids, keeping the latest data
+    latest: Dict[str, Dict[str, Any]] = {}
+    for task_id, task_data in tasks:
+        latest.pop(task_id, None)
+        latest[task_id] = task_data
+    task_ids = list(latest)
 
-        # Format task for embedding
+    # Tasks are usually small, so one chunk each is the common case
+    chunk_rows: List[Tuple[str, str, str, int, Optional[str]]] = []
+    for task_id, task_data in latest.items():
         content = format_task_for_embedding(task_data)
+        for chunk_text in simple_chunker(content, chunk_size=2000):
+            chunk_rows.append(("task", task_id, chunk_text, 0, None))
+    chunks = [row[2] for row in chunk_rows]
 
-        # Generate chunks (tasks are usually small, so one chunk is fine)
-        chunks = simple_chunker(content, chunk_size=2000)
+    from ...core.config import RAG_EMBEDDING_CACHE
 
-        # Delete existing chunks for this task
-        cursor.execute(
-            "DELETE FROM rag_embeddings WHERE chunk_id IN (SELECT chunk_id FROM rag_chunks WHERE source_type = %s AND source_ref = %s)",
-            ("task", task_id),
+    try:
+        chunk_vectors: List[Optional[List[float]]] = [None] * len(chunks)
+        if RAG_EMBEDDING_CACHE:
+            # Keep the old vectors so unchanged task texts are not re-embedded
+            chunk_keys = [
+                embedding_cache_key(chunk, EMBEDDING_MODEL, EMBEDDING_DIMENSION)
+                for chunk in chunks
+            ]
+            cached = await run_db(
+                _in_transaction,
+                _cache_and_lookup_embeddings,
+                "task",
+                task_ids,
+                chunk_keys,
+            )
+            chunk_vectors = [cached.get(key) for key in chunk_keys]
+
+        # Embed the remaining chunks of all tasks in shared API batches; no
+        # transaction is open while the API is awaited
+        missing_positions = [i for i, vec in enumerate(chunk_vectors) if vec is None]
+        batch_results = await asyncio.gather(
+            *[
+                _get_embeddings_batch_openai(
+                    [chunks[i] for i in batch_positions],
+                    batch_positions,
+                    chunk_vectors,
+                )
+                for batch_positions in (
+                    missing_positions[start : start + PARALLEL_EMBEDDING_BATCH_SIZE]
+                    for start in range(
+                        0, len(missing_positions), PARALLEL_EMBEDDING_BATCH_SIZE
+                    )
+                )
+            ]
         )
-        cursor.execute(
-            "DELETE FROM rag_chunks WHERE source_type = %s AND source_ref = %s",
-            ("task", task_id),
+        if not all(batch_results):
+            logger.error(
+                f"Embedding failed while indexing {len(task_ids)} tasks; old chunks kept."
+            )
+            return False
+
+        insert_result = await run_db(
+            _in_transaction,
+            _replace_source_chunks,
+            "task",
+            task_ids,
+            chunk_rows,
+            chunk_vectors,
         )
+        record_rag_index_insert(insert_result.rows, insert_result.duration_seconds)
 
-        # Get OpenAI client for embeddings
-        client = get_openai_client()
-        if not client:
-            logger.error("OpenAI client not available for task indexing")
-            return
-
-        # Generate embeddings for each chunk
-        for chunk_text in chunks:
-            try:
-                # Generate embedding
-                embedding_response = client.embeddings.create(
-                    model=EMBEDDING_MODEL,
-                    input=chunk_text,
-                    dimensions=EMBEDDING_DIMENSION,
-                )
-                embedding_vector = embedding_response.data[0].embedding
+        bump_index_generation()
+        logger.info(
+            f"Indexed {len(task_ids)} tasks ({insert_result.rows} chunks) for RAG"
+        )
+        return True
 
-                # Insert chunk
-                cursor.execute(
-                    "INSERT INTO rag_chunks (source_type, source_ref, chunk_text, chunk_index) "
-                    "VALUES (%s, %s, %s, %s) RETURNING chunk_id",
-                    ("task", task_id, chunk_text, 0),  # chunk_index for tasks is usually 0
-                )
-                result = cursor.fetchone()
-                chunk_id = result['chunk_id'] if isinstance(result, dict) else result[0]
+    except Exception as e:
+        logger.error(f"Error indexing {len(task_ids)} tasks: {e}", exc_info=True)
+        return False
 
-                # Insert embedding using pgvector
-                cursor.execute(
-                    "INSERT INTO rag_embeddings (chunk_id, embedding, model_name) VALUES (%s, %s::vector, %s)",
-                    (chunk_id, embedding_vector, EMBEDDING_MODEL),
-                )
 
-            except Exception as e:
-                logger.error(f"Error generating embedding for task {task_id}: {e}")
+async def index_task_data(task_id: str, task_data: Dict[str, Any]) -> None:
+    """
+    Index a single task into the RAG system immediately.
 
-        conn.commit()
-        logger.info(f"Successfully indexed task {task_id}")
+    Tools should enqueue updates on the task index queue instead
+    (task_index_queue.get_task_index_queue), which debounces and batches them.
 
-    except Exception as e:
-        logger.error(f"Error indexing task {task_id}: {e}", exc_info=True)
-        if conn:
-            conn.rollback()
-    finally:
-        if conn:
-            return_connection(conn)
+    Args:
+        task_id: Task ID to index
+        task_data: Complete task data dictionary
+    """
+    await index_tasks_batch([(task_id, task_data)])
 
 
 async def index_all_tasks() -> None:
-    """Index all tasks from the database."""
+    """Index all tasks from the database, one transaction per batch of tasks."""
+    from ...core.config import RAG_TASK_INDEX_BATCH_SIZE
+
     conn = None
     try:
         conn = get_db_connection()
@@ -963,8 +1238,11 @@ async def index_all_tasks() -> None:
         )
 
         tasks = cursor.fetchall()
+        conn.commit()  # Not idle in a transaction while the batches are embedded
         logger.info(f"Indexing {len(tasks)} tasks for RAG")
 
+        task_batch: List[Tuple[str, Dict[str, Any]]] = []
+        all_indexed = True
         for task_row in tasks:
             task_data = dict(task_row)
             # Parse JSON fields
@@ -976,14 +1254,20 @@ async def index_all_tasks() -> None:
                 except json.JSONDecodeError:
                     task_data["depends_on_tasks"] = []
 
-            await index_task_data(task_data["task_id"], task_data)
+            task_batch.append((task_data["task_id"], task_data))
+            if len(task_batch) >= RAG_TASK_INDEX_BATCH_SIZE:
+                all_indexed = await index_tasks_batch(task_batch) and all_indexed
+                task_batch = []
+        all_indexed = await index_tasks_batch(task_batch) and all_indexed
 
-        # Update last indexed time
-        cursor.execute(
-            "INSERT INTO rag_meta (meta_key, meta_value) VALUES (%s, %s) ON CONFLICT (meta_key) DO UPDATE SET meta_value = EXCLUDED.meta_value",
-            ("last_indexed_tasks"),
-        )
-        conn.commit()
+        # Update last indexed time (same watermark as the periodic cycle:
+        # the newest updated_at that has been indexed)
+        if tasks and all_indexed:
+            cursor.execute(
+                "INSERT INTO rag_meta (meta_key, meta_value) VALUES (%s, %s) ON CONFLICT (meta_key) DO UPDATE SET meta_value = EXCLUDED.meta_value",
+                ("last_indexed_tasks", max(str(row["updated_at"]) for row in tasks)),
+            )
+            conn.commit()
 
     except Exception as e:
         logger.error(f"Error indexing all tasks: {e}", exc_info=True)
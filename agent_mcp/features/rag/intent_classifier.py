@@ -1,6 +1,9 @@
 # Agent-MCP RAG Intent Classifier
 """
 Classify query intent for context-aware RAG responses.
+
+All intent patterns are compiled once at import into a single regex, so a
+query is classified in one scan instead of one re.search per pattern.
 """
 
 import re
@@ -62,19 +65,9 @@ class QueryIntentClassifier:
         Returns:
             Intent string: 'implementation', 'debugging', 'architecture', 'security', 'planning', or 'general'
         """
-        query_lower = query.lower()
-        
-        # Check patterns in order of specificity
-        if self._matches_patterns(query_lower, self.SECURITY_PATTERNS):
-            return 'security'
-        elif self._matches_patterns(query_lower, self.DEBUGGING_PATTERNS):
-            return 'debugging'
-        elif self._matches_patterns(query_lower, self.IMPLEMENTATION_PATTERNS):
-            return 'implementation'
-        elif self._matches_patterns(query_lower, self.ARCHITECTURE_PATTERNS):
-            return 'architecture'
-        elif self._matches_patterns(query_lower, self.PLANNING_PATTERNS):
-            return 'planning'
+        intent = self._match_intent(query.lower())
+        if intent:
+            return intent
         
         # Use agent context as hint
         if agent_context:
@@ -87,10 +80,43 @@ class QueryIntentClassifier:
         
         return 'general'
     
-    def _matches_patterns(self, text: str, patterns: list) -> bool:
-        """Check if text matches any of the patterns."""
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
+    def _match_intent(self, text: str) -> Optional[str]:
+        """Most specific intent whose patterns match anywhere in text."""
+        best = None
+        for match in _INTENT_REGEX.finditer(text):
+            intent = match.lastgroup
+            if best is None or _INTENT_RANK[intent] < _INTENT_RANK[best]:
+                best = intent
+                if _INTENT_RANK[best] == 0:
+                    break
+        return best
+
+
+# Checked in order of specificity: the first intent listed wins
+INTENT_ORDER = ('security', 'debugging', 'implementation', 'architecture', 'planning')
+_INTENT_RANK = {intent: rank for rank, intent in enumerate(INTENT_ORDER)}
+
+
+def _compile_intent_regex() -> "re.Pattern[str]":
+    # One named group per intent inside a lookahead: the match is zero-width,
+    # so every start position is tried and, at each position, the alternation
+    # reports the most specific intent matching there. Overlapping matches of
+    # different intents are therefore never hidden from each other.
+    groups = []
+    for intent in INTENT_ORDER:
+        patterns = getattr(QueryIntentClassifier, f"{intent.upper()}_PATTERNS")
+        groups.append(f"(?P<{intent}>" + "|".join(f"(?:{p})" for p in patterns) + ")")
+    return re.compile("(?=" + "|".join(groups) + ")", re.IGNORECASE)
+
+
+_INTENT_REGEX = _compile_intent_regex()
+
+_intent_classifier: Optional[QueryIntentClassifier] = None
+
 
+def get_intent_classifier() -> QueryIntentClassifier:
+    """Get or create the shared (stateless) intent classifier."""
+    global _intent_classifier
+    if _intent_classifier is None:
+        _intent_classifier = QueryIntentClassifier()
+    return _intent_classifier
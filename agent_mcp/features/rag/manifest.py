@@ -0,0 +1,231 @@
+# Agent-MCP/agent_mcp/features/rag/manifest.py
+"""
+Persistent file manifest for incremental RAG indexing.
+
+The manifest records (path, mtime, size, content hash) for every indexed file
+in the rag_file_manifest table. An indexing cycle stats each candidate file and
+only reads and hashes the ones whose mtime or size moved, so scan cost scales
+with churn rather than with repository size. Large files are not read here at
+all: they are hashed while the indexer streams them through the chunkers (see
+file_stream.py), so a changed large file is read once. The trade-off is that
+a large file whose stat moved but whose text did not is re-chunked (its
+vectors then come from the embedding cache).
+"""
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ...core.config import logger
+
+
+@dataclass
+class ManifestEntry:
+    """Last indexed state of a single file."""
+
+    path: str  # Project-relative POSIX path (same as rag_chunks.source_ref)
+    source_type: str  # 'markdown' or 'code'
+    mtime: float
+    size: int
+    content_hash: Optional[str]  # None until a streamed file has been chunked
+
+
+@dataclass
+class ChangedFile:
+    """A file whose content differs from the manifest and must be re-indexed."""
+
+    source_type: str
+    path: str
+    # None: too large to hold; chunked by streaming from disk, which also
+    # fills in entry.content_hash
+    content: Optional[str]
+    mtime: float
+    entry: ManifestEntry
+
+
+def load_manifest(cursor) -> Dict[str, ManifestEntry]:
+    """Load the whole manifest keyed by relative path."""
+    cursor.execute(
+        "SELECT source_path, source_type, mtime, size, content_hash FROM rag_file_manifest"
+    )
+    return {
+        row["source_path"]: ManifestEntry(
+            path=row["source_path"],
+            source_type=row["source_type"],
+            mtime=row["mtime"],
+            size=row["size"],
+            content_hash=row["content_hash"],
+        )
+        for row in cursor.fetchall()
+    }
+
+
+def hash_content(content: str) -> str:
+    """SHA-256 of the text content, matching the hashes stored in rag_meta."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def detect_file_changes(
+    candidates: Dict[str, Tuple[Path, str]],
+    manifest: Dict[str, ManifestEntry],
+    legacy_hashes: Optional[Dict[str, str]] = None,
+    stream_threshold: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> Tuple[List[ChangedFile], List[ManifestEntry]]:
+    """
+    Compare candidate files against the manifest.
+
+    Args:
+        candidates: relative path -> (absolute path, source_type)
+        manifest: current manifest entries
+        legacy_hashes: rag_meta 'hash_<type>_<path>' values, used to avoid
+            re-embedding files indexed before the manifest existed
+        stream_threshold: files of at least this many bytes are not read;
+            once their stat moves they are returned without content or hash
+            (chunked and hashed from disk later)
+        max_chars: files larger than this are streamed too; only their first
+            max_chars characters are indexed (truncate policy)
+
+    Returns:
+        (changed files to re-index, entries whose stat changed but content did not)
+    """
+    legacy_hashes = legacy_hashes or {}
+    changed: List[ChangedFile] = []
+    touched: List[ManifestEntry] = []
+
+    for rel_path, (abs_path, source_type) in candidates.items():
+        try:
+            stat_result = abs_path.stat()
+        except OSError as e:
+            logger.warning(f"Failed to stat {abs_path}: {e}")
+            continue
+
+        known = manifest.get(rel_path)
+        if (
+            known is not None
+            and known.source_type == source_type
+            and known.mtime == stat_result.st_mtime
+            and known.size == stat_result.st_size
+        ):
+            continue  # Unchanged: no read, no hash
+
+        stream = (stream_threshold is not None and stat_result.st_size >= stream_threshold) or (
+            max_chars is not None and stat_result.st_size > max_chars
+        )
+        content: Optional[str] = None
+        current_hash: Optional[str] = None
+        if not stream:
+            try:
+                content = abs_path.read_text(encoding="utf-8")
+            except Exception as e:
+                logger.warning(f"Failed to read {source_type} file {abs_path}: {e}")
+                continue
+            current_hash = hash_content(content)
+
+        entry = ManifestEntry(
+            path=rel_path,
+            source_type=source_type,
+            mtime=stat_result.st_mtime,
+            size=stat_result.st_size,
+            content_hash=current_hash,
+        )
+        previous_hash = (
+            known.content_hash
+            if known is not None
+            else legacy_hashes.get(f"hash_{source_type}_{rel_path}")
+        )
+        if current_hash is not None and previous_hash == current_hash:
+            touched.append(entry)
+        else:
+            changed.append(
+                ChangedFile(
+                    source_type=source_type,
+                    path=rel_path,
+                    content=content,
+                    mtime=stat_result.st_mtime,
+                    entry=entry,
+                )
+            )
+
+    return changed, touched
+
+
+def drop_oversize_candidates(
+    candidates: Dict[str, Tuple[Path, str]], max_bytes: int
+) -> Tuple[Dict[str, Tuple[Path, str]], List[str]]:
+    """
+    Split off candidate files larger than max_bytes (the skip policy).
+
+    Returns:
+        (candidates to index, relative paths skipped for size)
+    """
+    kept: Dict[str, Tuple[Path, str]] = {}
+    skipped: List[str] = []
+    for rel_path, candidate in candidates.items():
+        try:
+            size = candidate[0].stat().st_size
+        except OSError:
+            size = 0  # detect_file_changes reports stat failures
+        if size > max_bytes:
+            skipped.append(rel_path)
+        else:
+            kept[rel_path] = candidate
+    if skipped:
+        logger.info(
+            f"Skipping {len(skipped)} files larger than {max_bytes} bytes "
+            f"(e.g. {skipped[0]}); raise AGENT_MCP_RAG_MAX_FILE_BYTES to index them."
+        )
+    return kept, skipped
+
+
+def find_deleted_entries(
+    candidate_paths: Iterable[str], manifest: Dict[str, ManifestEntry]
+) -> List[ManifestEntry]:
+    """Entries in the manifest that no longer appear among the scanned candidates."""
+    present = set(candidate_paths)
+    return [entry for path, entry in manifest.items() if path not in present]
+
+
+def upsert_manifest_entries(cursor, entries: Iterable[ManifestEntry]) -> None:
+    """Insert or refresh manifest rows."""
+    rows = [
+        (e.path, e.source_type, e.mtime, e.size, e.content_hash) for e in entries
+    ]
+    if not rows:
+        return
+    cursor.executemany(
+        """
+        INSERT INTO rag_file_manifest (source_path, source_type, mtime, size, content_hash, indexed_at)
+        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (source_path) DO UPDATE SET
+            source_type = EXCLUDED.source_type,
+            mtime = EXCLUDED.mtime,
+            size = EXCLUDED.size,
+            content_hash = EXCLUDED.content_hash,
+            indexed_at = EXCLUDED.indexed_at
+        """,
+        rows,
+    )
+
+
+def remove_deleted_sources(cursor, entries: Iterable[ManifestEntry]) -> int:
+    """Drop chunks, embeddings, stored hashes and manifest rows for deleted files."""
+    removed = 0
+    for entry in entries:
+        cursor.execute(
+            "DELETE FROM rag_embeddings WHERE chunk_id IN (SELECT chunk_id FROM rag_chunks WHERE source_type = %s AND source_ref = %s)",
+            (entry.source_type, entry.path),
+        )
+        cursor.execute(
+            "DELETE FROM rag_chunks WHERE source_type = %s AND source_ref = %s",
+            (entry.source_type, entry.path),
+        )
+        cursor.execute(
+            "DELETE FROM rag_meta WHERE meta_key = %s",
+            (f"hash_{entry.source_type}_{entry.path}",),
+        )
+        cursor.execute(
+            "DELETE FROM rag_file_manifest WHERE source_path = %s", (entry.path,)
+        )
+        removed += 1
+    return removed
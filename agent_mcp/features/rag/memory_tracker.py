@@ -2,24 +2,87 @@
 """
 Track which documentation agents have accessed to avoid repetition
 and provide complementary information.
+
+Each agent's accesses are kept in an OrderedDict ordered by access time, so
+the entry at the front is always the oldest: expiry pops from the front until
+it reaches a fresh entry, and the per-agent cap evicts least recently used
+documents the same way. Agents themselves are kept in LRU order with a cap.
+
+With persistence enabled, accesses are also written behind to the
+rag_agent_doc_access table in batches, and an agent's recent accesses are
+loaded back from it, so deduplication survives restarts and is shared by
+every server process using the same database.
 """
-from typing import Set, List, Dict, Optional
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, MutableMapping, Optional, Set, Tuple
 from datetime import datetime, timedelta
+
+from psycopg2.extras import execute_values
+
+from ...db import run_db
 from ...db.connection_factory import db_connection
 from ...core.config import logger
 
+# Pending writes that trigger an early flush
+FLUSH_BATCH_SIZE = 500
+
+
+def _doc_key(doc_source: str, doc_id: str) -> str:
+    return f"{doc_source}:{doc_id}"
+
 
 class RAGMemoryTracker:
     """Track which docs agents have accessed."""
-    
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, datetime]] = {}  # agent_id -> {doc_id: timestamp}
-        self._cache_ttl = timedelta(hours=24)  # Cache for 24 hours
-    
+
+    def __init__(
+        self,
+        ttl: timedelta = timedelta(hours=24),
+        max_docs_per_agent: int = 2000,
+        max_agents: int = 1000,
+        persist: bool = False,
+        flush_interval_seconds: float = 5.0,
+    ):
+        # agent_id -> {source:doc_id: last access}, both in least recently used order
+        self._cache: "OrderedDict[str, MutableMapping[str, datetime]]" = OrderedDict()
+        self._cache_ttl = ttl
+        self._max_docs_per_agent = max_docs_per_agent
+        self._max_agents = max_agents
+        self._lock = threading.RLock()
+
+        self.persist = persist
+        self._flush_interval = timedelta(seconds=flush_interval_seconds)
+        self._pending: Dict[Tuple[str, str], datetime] = {}
+        self._last_flush = datetime.now()
+        self._flush_scheduled = False
+        self._loaded_at: Dict[str, datetime] = {}
+
+    def _agent_cache(self, agent_id: str, create: bool = False) -> Optional[MutableMapping[str, datetime]]:
+        """The agent's entries with expired ones dropped (caller holds the lock)."""
+        agent_cache = self._cache.get(agent_id)
+        if agent_cache is None:
+            if not create:
+                return None
+            agent_cache = self._cache[agent_id] = OrderedDict()
+            while len(self._cache) > self._max_agents:
+                evicted_agent, _ = self._cache.popitem(last=False)
+                self._loaded_at.pop(evicted_agent, None)
+        self._cache.move_to_end(agent_id)
+
+        # Oldest entries are at the front; stop at the first fresh one
+        cutoff = datetime.now() - self._cache_ttl
+        while agent_cache:
+            oldest_key = next(iter(agent_cache))
+            if agent_cache[oldest_key] >= cutoff:
+                break
+            del agent_cache[oldest_key]
+        return agent_cache
+
     def record_access(self, agent_id: str, doc_source: str, doc_id: str):
         """
         Record that an agent accessed a specific document.
-        
+
         Args:
             agent_id: ID of the agent
             doc_source: Source of the document (e.g., 'vector_search', 'live_context')
@@ -27,62 +90,58 @@ class RAGMemoryTracker:
         """
         if not agent_id:
             return
-        
+
         try:
-            # Store in memory cache
-            if agent_id not in self._cache:
-                self._cache[agent_id] = {}
-            
             # Use composite key: source:doc_id
-            cache_key = f"{doc_source}:{doc_id}"
-            self._cache[agent_id][cache_key] = datetime.now()
-            
-            # Optionally store in database for persistence
-            # For now, just use in-memory cache
+            cache_key = _doc_key(doc_source, doc_id)
+            now = datetime.now()
+            with self._lock:
+                agent_cache = self._agent_cache(agent_id, create=True)
+                agent_cache.pop(cache_key, None)
+                agent_cache[cache_key] = now
+                while len(agent_cache) > self._max_docs_per_agent:
+                    del agent_cache[next(iter(agent_cache))]
+
+                if self.persist:
+                    self._pending[(agent_id, cache_key)] = now
+                    self._schedule_flush(now)
         except Exception as e:
             logger.warning(f"Failed to record RAG access: {e}")
-    
+
     def get_accessed_docs(self, agent_id: str) -> Set[str]:
         """
         Get set of document IDs the agent has recently accessed.
-        
+
         Args:
             agent_id: ID of the agent
-            
+
         Returns:
             Set of document identifiers (format: "source:doc_id")
         """
-        if not agent_id or agent_id not in self._cache:
+        if not agent_id:
             return set()
-        
-        # Clean up old entries
-        now = datetime.now()
-        agent_cache = self._cache[agent_id]
-        expired_keys = [
-            key for key, timestamp in agent_cache.items()
-            if now - timestamp > self._cache_ttl
-        ]
-        for key in expired_keys:
-            del agent_cache[key]
-        
-        return set(agent_cache.keys())
-    
+        with self._lock:
+            agent_cache = self._agent_cache(agent_id)
+            return set(agent_cache) if agent_cache else set()
+
     def has_accessed(self, agent_id: str, doc_source: str, doc_id: str) -> bool:
         """
         Check if agent has recently accessed a specific document.
-        
+
         Args:
             agent_id: ID of the agent
             doc_source: Source of the document
             doc_id: Document identifier
-            
+
         Returns:
             True if agent has accessed this document recently
         """
-        cache_key = f"{doc_source}:{doc_id}"
-        accessed = self.get_accessed_docs(agent_id)
-        return cache_key in accessed
-    
+        if not agent_id:
+            return False
+        with self._lock:
+            agent_cache = self._agent_cache(agent_id)
+            return bool(agent_cache) and _doc_key(doc_source, doc_id) in agent_cache
+
     def get_new_docs(
         self,
         agent_id: str,
@@ -90,26 +149,146 @@ class RAGMemoryTracker:
     ) -> List[Dict[str, str]]:
         """
         Filter out documents the agent has already accessed.
-        
+
         Args:
             agent_id: ID of the agent
             candidate_docs: List of candidate documents with 'source' and 'id' keys
-            
+
         Returns:
             List of documents the agent hasn't accessed yet
         """
-        accessed = self.get_accessed_docs(agent_id)
-        new_docs = []
-        
-        for doc in candidate_docs:
-            doc_source = doc.get('source', 'unknown')
-            doc_id = doc.get('id', doc.get('chunk_id', ''))
-            cache_key = f"{doc_source}:{doc_id}"
-            
-            if cache_key not in accessed:
-                new_docs.append(doc)
-        
-        return new_docs
+        with self._lock:
+            agent_cache = self._agent_cache(agent_id) if agent_id else None
+            if not agent_cache:
+                return list(candidate_docs)
+            return [
+                doc
+                for doc in candidate_docs
+                if _doc_key(doc.get('source', 'unknown'), doc.get('id', doc.get('chunk_id', '')))
+                not in agent_cache
+            ]
+
+    # --- Write-behind persistence ---
+
+    def _schedule_flush(self, now: datetime) -> None:
+        """Start a background flush, due after the flush interval or a full batch (lock held)."""
+        if self._flush_scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop (scripts/tests); flush() can be called directly
+        if len(self._pending) >= FLUSH_BATCH_SIZE:
+            delay = 0.0
+        else:
+            delay = max(0.0, (self._flush_interval - (now - self._last_flush)).total_seconds())
+        self._flush_scheduled = True
+        loop.create_task(self._flush_after(delay))
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await run_db(self.flush)
+
+    def flush(self) -> int:
+        """
+        Write pending accesses to Postgres and prune expired rows (blocking).
+
+        Returns:
+            Number of accesses written.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = datetime.now()
+            self._flush_scheduled = False
+        if not pending:
+            return 0
+        try:
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO rag_agent_doc_access (agent_id, doc_key, accessed_at)
+                    VALUES %s
+                    ON CONFLICT (agent_id, doc_key) DO UPDATE
+                    SET accessed_at = GREATEST(rag_agent_doc_access.accessed_at, EXCLUDED.accessed_at)
+                    """,
+                    # Local naive timestamps become timezone-aware for TIMESTAMPTZ
+                    [
+                        (agent_id, doc_key, accessed_at.astimezone())
+                        for (agent_id, doc_key), accessed_at in pending.items()
+                    ],
+                    page_size=FLUSH_BATCH_SIZE,
+                )
+                cursor.execute(
+                    "DELETE FROM rag_agent_doc_access WHERE accessed_at < %s",
+                    ((datetime.now() - self._cache_ttl).astimezone(),),
+                )
+                conn.commit()
+            return len(pending)
+        except Exception as e:
+            logger.warning(f"Failed to persist RAG access history ({len(pending)} entries): {e}")
+            with self._lock:
+                # Keep newer in-memory values; retry on the next flush
+                for key, accessed_at in pending.items():
+                    if key not in self._pending:
+                        self._pending[key] = accessed_at
+            return 0
+
+    def _load_agent(self, agent_id: str) -> int:
+        """Merge the agent's persisted recent accesses into memory (blocking)."""
+        cutoff = datetime.now() - self._cache_ttl
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT doc_key, accessed_at FROM rag_agent_doc_access
+                WHERE agent_id = %s AND accessed_at >= %s
+                ORDER BY accessed_at DESC
+                LIMIT %s
+                """,
+                (agent_id, cutoff.astimezone(), self._max_docs_per_agent),
+            )
+            rows = cursor.fetchall()
+        entries = [
+            (
+                row['doc_key'] if isinstance(row, dict) else row[0],
+                (row['accessed_at'] if isinstance(row, dict) else row[1]).astimezone().replace(tzinfo=None),
+            )
+            for row in rows
+        ]
+        with self._lock:
+            self._merge(agent_id, entries)
+            self._loaded_at[agent_id] = datetime.now()
+        return len(entries)
+
+    def _merge(self, agent_id: str, entries: Iterable[Tuple[str, datetime]]) -> None:
+        """Combine entries into the agent's cache, keeping time order and the cap (lock held)."""
+        agent_cache = self._agent_cache(agent_id, create=True)
+        latest = dict(agent_cache)
+        for doc_key, accessed_at in entries:
+            if doc_key not in latest or latest[doc_key] < accessed_at:
+                latest[doc_key] = accessed_at
+        ordered = sorted(latest.items(), key=lambda item: item[1])[-self._max_docs_per_agent:]
+        agent_cache.clear()
+        agent_cache.update(ordered)
+
+    async def refresh_agent(self, agent_id: str) -> None:
+        """
+        Pick up accesses recorded by other processes (or before a restart).
+
+        Loads at most once per flush interval per agent; no-op unless
+        persistence is enabled.
+        """
+        if not self.persist or not agent_id:
+            return
+        loaded_at = self._loaded_at.get(agent_id)
+        if loaded_at and datetime.now() - loaded_at < self._flush_interval:
+            return
+        try:
+            await run_db(self._load_agent, agent_id)
+        except Exception as e:
+            logger.warning(f"Failed to load RAG access history for {agent_id}: {e}")
 
 
 # Global instance
@@ -120,6 +299,19 @@ def get_memory_tracker() -> RAGMemoryTracker:
     """Get or create global memory tracker instance."""
     global _memory_tracker
     if _memory_tracker is None:
-        _memory_tracker = RAGMemoryTracker()
-    return _memory_tracker
+        from ...core.config import (
+            RAG_MEMORY_TRACKER_FLUSH_SECONDS,
+            RAG_MEMORY_TRACKER_MAX_AGENTS,
+            RAG_MEMORY_TRACKER_MAX_DOCS_PER_AGENT,
+            RAG_MEMORY_TRACKER_PERSIST,
+            RAG_MEMORY_TRACKER_TTL_HOURS,
+        )
 
+        _memory_tracker = RAGMemoryTracker(
+            ttl=timedelta(hours=RAG_MEMORY_TRACKER_TTL_HOURS),
+            max_docs_per_agent=RAG_MEMORY_TRACKER_MAX_DOCS_PER_AGENT,
+            max_agents=RAG_MEMORY_TRACKER_MAX_AGENTS,
+            persist=RAG_MEMORY_TRACKER_PERSIST,
+            flush_interval_seconds=RAG_MEMORY_TRACKER_FLUSH_SECONDS,
+        )
+    return _memory_tracker
@@ -3,11 +3,56 @@
 Personalize RAG responses based on agent context.
 """
 
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Optional, Sequence, Set
 from .context import AgentQueryContext
 from ...core.config import logger
 
 
+class _KeywordMatcher:
+    """
+    Find which of a fixed set of keywords occur as substrings, in one scan.
+
+    The keywords are compiled into a single alternation (longest first)
+    inside a zero-width lookahead, so every start position is tried. A
+    keyword that is a prefix of a longer one matching at the same position
+    is credited through the longer keyword's prefix list, so the distinct
+    keywords found are exactly those a per-keyword `in` check would find.
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        ordered = sorted(set(keywords), key=len, reverse=True)
+        self._regex = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+        self._implied = {
+            keyword: {other for other in ordered if keyword.startswith(other)}
+            for keyword in ordered
+        }
+
+    def matches(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        for match in self._regex.finditer(text):
+            keyword = match.group(1)
+            if keyword not in found:
+                found |= self._implied[keyword]
+        return found
+
+    def count(self, text: str) -> int:
+        return len(self.matches(text))
+
+
+# Compiled once per (role, keyword list); keyed on the tuple so subclasses
+# overriding ROLE_KEYWORDS get their own matcher
+_role_matchers: Dict[tuple, _KeywordMatcher] = {}
+
+
+def _role_matcher(agent_role: str, keywords: Sequence[str]) -> _KeywordMatcher:
+    key = (agent_role, tuple(keywords))
+    matcher = _role_matchers.get(key)
+    if matcher is None:
+        matcher = _role_matchers[key] = _KeywordMatcher(keywords)
+    return matcher
+
+
 class ResponsePersonalizer:
     """Personalize RAG responses for specific agent contexts."""
     
@@ -58,17 +103,14 @@ class ResponsePersonalizer:
         if agent_role not in self.ROLE_KEYWORDS:
             return results
         
-        keywords = self.ROLE_KEYWORDS[agent_role]
+        matcher = _role_matcher(agent_role, self.ROLE_KEYWORDS[agent_role])
         scored_results = []
         
         for result in results:
-            score = 0
             content = str(result.get('content', '') + ' ' + result.get('title', '')).lower()
             
-            # Score based on keyword matches
-            for keyword in keywords:
-                if keyword in content:
-                    score += 1
+            # Score based on distinct keyword matches, found in one scan
+            score = matcher.count(content)
             
             if score > 0 or agent_role == 'worker':  # Workers get all results
                 scored_results.append({
@@ -165,3 +207,17 @@ class ResponsePersonalizer:
         
         return response_text
 
+
+# Built at import so the first query does not pay for compiling them
+for _role, _keywords in ResponsePersonalizer.ROLE_KEYWORDS.items():
+    _role_matcher(_role, _keywords)
+
+_response_personalizer: Optional[ResponsePersonalizer] = None
+
+
+def get_response_personalizer() -> ResponsePersonalizer:
+    """Get or create the shared (stateless) response personalizer."""
+    global _response_personalizer
+    if _response_personalizer is None:
+        _response_personalizer = ResponsePersonalizer()
+    return _response_personalizer
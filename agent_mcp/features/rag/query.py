@@ -1,7 +1,9 @@
 # Agent-MCP/mcp_template/mcp_server_src/features/rag/query.py
-import json
+import asyncio
+import time
 import psycopg2  # For type hinting and error handling
-from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional, Tuple
 
 # Imports from our project
 from ...core.config import (
@@ -11,14 +13,590 @@ from ...core.config import (
     CHAT_MODEL,
     MAX_CONTEXT_TOKENS,  # From main.py:182
 )
-from ...db import get_db_connection, db_connection, is_vss_loadable, return_connection
-from ...external.openai_service import get_openai_client
+from ...db import db_connection, is_vss_loadable, run_db
+from ...db.vector_index import load_current_index
+from ...external.openai_service import get_async_openai_client
+from ...utils.metrics import record_rag_first_token
+from ...utils.tokenizer import TokenBudget, get_token_counter
+from .hybrid_search import fetch_chunk_embeddings, hybrid_search, keyword_task_search, vector_search
+from .query_cache import get_query_embedding_cache, get_semantic_answer_cache
+from .rerank import get_reranker
 
 # For OpenAI exceptions
 import openai
 
 # Original location: main.py lines 1432 - 1566 (ask_project_rag_tool function body)
 
+# Number of chunks returned by the vector search
+VECTOR_SEARCH_K = 13  # Optimized based on recent RAG research
+
+
+def _with_cursor(func: Callable, *args) -> Any:
+    """Run func(cursor, *args) on its own pooled connection (called via run_db)."""
+    with db_connection() as conn:
+        return func(conn.cursor(), *args)
+
+
+async def _run_with_cursor(func: Callable, *args) -> Any:
+    """Run a cursor function on the DB executor without blocking the event loop."""
+    return await run_db(_with_cursor, func, *args)
+
+
+def _fetch_recent_live_context(cursor) -> List[Dict[str, Any]]:
+    """Project context updated since it was last indexed (main.py:1445-1457)."""
+    try:
+        cursor.execute(
+            "SELECT meta_value FROM rag_meta WHERE meta_key = %s",
+            ("last_indexed_context",),
+        )
+        last_indexed_context_row = cursor.fetchone()
+        last_indexed_context_time = (
+            last_indexed_context_row["meta_value"]
+            if last_indexed_context_row
+            else "1970-01-01T00:00:00Z"
+        )
+
+        cursor.execute(
+            """
+            SELECT context_key, value, description, last_updated
+            FROM project_context
+            WHERE last_updated > %s
+            ORDER BY last_updated DESC
+            LIMIT 5
+        """,
+            (last_indexed_context_time,),
+        )
+        # Convert rows to dicts for easier processing
+        return [dict(row) for row in cursor.fetchall()]
+    except psycopg2.Error as e_live_ctx:
+        logger.warning(f"RAG Query: Failed to fetch live project context: {e_live_ctx}")
+    except Exception as e_live_ctx_other:  # Catch any other unexpected error
+        logger.warning(
+            f"RAG Query: Unexpected error fetching live project context: {e_live_ctx_other}",
+            exc_info=True,
+        )
+    return []
+
+
+def _fetch_keyword_tasks(cursor, query_text: str) -> List[Dict[str, Any]]:
+    """Tasks whose title or description matches a query keyword (main.py:1459-1477)."""
+    try:
+        # Full-text match served by the GIN index on tasks.search_tsv
+        return keyword_task_search(cursor, query_text, limit=5)
+    except psycopg2.Error as e_live_task:
+        logger.warning(
+            f"RAG Query: Failed to fetch live tasks based on query keywords: {e_live_task}"
+        )
+    except Exception as e_live_task_other:
+        logger.warning(
+            f"RAG Query: Unexpected error fetching live tasks: {e_live_task_other}",
+            exc_info=True,
+        )
+    return []
+
+
+def _fetch_all_live_context(cursor) -> List[Dict[str, Any]]:
+    cursor.execute(
+        "SELECT context_key, value, description, last_updated FROM project_context ORDER BY last_updated DESC"
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def _fetch_open_tasks(cursor) -> List[Dict[str, Any]]:
+    cursor.execute(
+        """
+        SELECT task_id, title, description, status, created_by, assigned_to, 
+               priority, parent_task, depends_on_tasks, created_at, updated_at 
+        FROM tasks 
+        WHERE status IN ('pending', 'in_progress') 
+        ORDER BY updated_at DESC
+    """
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def _rag_embeddings_table_exists(cursor) -> bool:
+    cursor.execute(
+        "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'rag_embeddings') as exists"
+    )
+    result = cursor.fetchone()
+    return bool(result["exists"] if isinstance(result, dict) else result[0])
+
+
+def _search_vectors(
+    cursor,
+    query_text: str,
+    query_embedding: List[float],
+    k_results: int,
+    with_embeddings: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Indexed chunks for the query: hybrid RRF retrieval, or vector-only if disabled.
+
+    with_embeddings attaches each chunk's stored embedding (for the MMR
+    reranker), fetched on the same connection.
+    """
+    from ...core.config import RAG_HYBRID_CANDIDATES, RAG_HYBRID_SEARCH, RAG_RRF_K
+
+    load_current_index(cursor)  # Sizes ivfflat.probes; one lookup per process
+    if RAG_HYBRID_SEARCH:
+        results = hybrid_search(
+            cursor,
+            query_text,
+            query_embedding,
+            k_results,
+            candidates=RAG_HYBRID_CANDIDATES,
+            rrf_k=RAG_RRF_K,
+        )
+    else:
+        results = vector_search(cursor, query_embedding, k_results)
+    if with_embeddings and results:
+        embeddings = fetch_chunk_embeddings(
+            cursor, [r["chunk_id"] for r in results if r.get("chunk_id") is not None]
+        )
+        for result in results:
+            result["embedding"] = embeddings.get(result.get("chunk_id"))
+    return results
+
+
+async def _embed_query(openai_client, query_text: str) -> List[float]:
+    """Query embedding, served from the in-process cache when possible."""
+    embedding_cache = get_query_embedding_cache()
+    cached_embedding = embedding_cache.get(query_text)
+    if cached_embedding is not None:
+        return cached_embedding
+    response = await openai_client.embeddings.create(
+        input=[query_text],
+        model=EMBEDDING_MODEL,
+        dimensions=EMBEDDING_DIMENSION,
+    )
+    query_embedding = response.data[0].embedding
+    embedding_cache.set(query_text, query_embedding)
+    return query_embedding
+
+
+async def _return_value(value: Any) -> Any:
+    return value
+
+
+def _format_chunk_entry(position: int, item: Dict[str, Any]) -> str:
+    """Context entry for a retrieved chunk, with code metadata when present."""
+    source_type = item["source_type"]
+    metadata = item.get("metadata", {})
+    distance = item.get("distance", "N/A")
+
+    # Enhanced source info with metadata
+    source_info = f"Source Type: {source_type}, Reference: {item['source_ref']}"
+
+    # Add code-specific metadata if available
+    if metadata and source_type in ["code", "code_summary"]:
+        if metadata.get("language"):
+            source_info += f", Language: {metadata['language']}"
+        if metadata.get("section_type"):
+            source_info += f", Section: {metadata['section_type']}"
+        if metadata.get("entities"):
+            entity_names = [e.get("name", "") for e in metadata["entities"]]
+            if entity_names:
+                source_info += f", Contains: {', '.join(entity_names[:3])}"
+                if len(entity_names) > 3:
+                    source_info += f" (+{len(entity_names)-3} more)"
+
+    return f"Retrieved Chunk {position} (Similarity/Distance: {distance}):\n{source_info}\nContent:\n{item['chunk_text']}\n"
+
+
+def _pack_section(
+    budget: TokenBudget,
+    header: str,
+    entries: List[str],
+    footer: Optional[str] = None,
+    truncated_note: Optional[str] = None,
+) -> Tuple[List[str], int]:
+    """
+    Header, as many entries as fit in the budget, then the truncation note (if
+    entries were dropped) and the footer.
+
+    Room for the closing lines is reserved up front, so the joined context
+    stays within the limit. Returns the parts and how many entries were
+    included; the section is omitted when not even its first entry fits.
+    """
+    if not entries:
+        return [], 0
+    counter = budget.counter
+    reserve = sum(
+        counter.count(text) + budget.separator_tokens
+        for text in (truncated_note, footer)
+        if text
+    )
+    entry_tokens = counter.count_batch(entries)
+    opening = budget.cost(header) + budget.separator_tokens + entry_tokens[0]
+    if budget.used + opening + reserve > budget.limit:
+        return [], 0
+
+    budget.add(header)
+    parts = [header]
+    for text, tokens in zip(entries, entry_tokens):
+        if budget.used + budget.cost(text, tokens) + reserve > budget.limit:
+            break
+        budget.add(text, tokens)
+        parts.append(text)
+    included = len(parts) - 1
+    if included < len(entries) and truncated_note:
+        budget.add(truncated_note)
+        parts.append(truncated_note)
+    if footer:
+        budget.add(footer)
+        parts.append(footer)
+    return parts, included
+
+
+async def _vector_search(
+    openai_client,
+    query_text: str,
+    k_results: int = VECTOR_SEARCH_K,
+    query_embedding: Optional[List[float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Embed the query and search indexed knowledge (main.py:1479-1506).
+
+    The table check and the embedding request run concurrently; pass
+    query_embedding when it is already known. With a reranker configured,
+    k_results x RAG_RERANK_OVERFETCH candidates are retrieved and the best
+    RAG_RERANK_TOP_K (at most k_results) are kept. Errors are logged and
+    produce an empty result so the live sections can still answer.
+    """
+    if not is_vss_loadable():  # Check global VSS status
+        logger.warning(
+            "RAG Query: Vector search (pgvector) is not available. Skipping vector search."
+        )
+        return []
+    try:
+        table_exists, query_embedding = await asyncio.gather(
+            _run_with_cursor(_rag_embeddings_table_exists),
+            _embed_query(openai_client, query_text)
+            if query_embedding is None
+            else _return_value(query_embedding),
+        )
+        if not table_exists:
+            logger.warning(
+                "RAG Query: 'rag_embeddings' table not found. Skipping vector search."
+            )
+            return []
+        reranker = get_reranker()
+        if reranker is None:
+            return await _run_with_cursor(
+                _search_vectors, query_text, query_embedding, k_results
+            )
+
+        from ...core.config import RAG_RERANK_OVERFETCH, RAG_RERANK_TOP_K
+
+        candidates = await _run_with_cursor(
+            _search_vectors,
+            query_text,
+            query_embedding,
+            k_results * RAG_RERANK_OVERFETCH,
+            reranker.needs_embeddings,
+        )
+        # Scoring is CPU-bound (NumPy or a local model); keep it off the event loop
+        return await asyncio.to_thread(
+            reranker.rerank,
+            query_text,
+            query_embedding,
+            candidates,
+            min(k_results, RAG_RERANK_TOP_K),
+        )
+    except psycopg2.Error as e_vec_sql:
+        logger.error(f"RAG Query: Database error during vector search: {e_vec_sql}")
+    except openai.APIError as e_openai_emb:  # Catch OpenAI errors during embedding
+        logger.error(
+            f"RAG Query: OpenAI API error during query embedding: {e_openai_emb}"
+        )
+    except Exception as e_vec_other:
+        logger.error(
+            f"RAG Query: Unexpected error during vector search part: {e_vec_other}",
+            exc_info=True,
+        )
+    return []
+
+
+@dataclass
+class _RagPrompt:
+    """Chat request for a RAG query, or the final answer when no LLM call is needed."""
+
+    answer: Optional[str] = None
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    agent_context: Optional[Any] = None
+    personalizer: Optional[Any] = None
+    answer_cache: Optional[Any] = None
+    answer_cache_scope: Optional[Tuple] = None
+    query_embedding: Optional[List[float]] = None
+
+    def answer_suffix(self) -> str:
+        """Task-specific note the personalizer appends to the model's answer."""
+        if not self.agent_context:
+            return ""
+        return self.personalizer.format_response("", self.agent_context)
+
+    def remember(self, answer: str) -> None:
+        """Store a completed answer in the semantic answer cache."""
+        if self.answer_cache is not None and self.query_embedding is not None and answer:
+            self.answer_cache.set(self.query_embedding, self.answer_cache_scope, answer)
+
+
+async def _prepare_rag_prompt(
+    openai_client,
+    query_text: str,
+    agent_id: Optional[str],
+    agent_context: Optional[Any],
+    format_type: str,
+) -> _RagPrompt:
+    """
+    Retrieval half of a RAG query: answer cache, live data and vector search,
+    personalization and context packing. Errors propagate to the caller.
+    """
+    from .context import get_agent_context, AgentQueryContext
+    from .intent_classifier import get_intent_classifier
+    from .personalizer import get_response_personalizer
+    from .memory_tracker import get_memory_tracker
+
+    # Get agent context if agent_id provided
+    if agent_id and not agent_context:
+        agent_context = get_agent_context(agent_id)
+
+    # Classify query intent
+    query_intent = get_intent_classifier().classify(query_text, agent_context)
+
+    # Update agent context with intent
+    if agent_context:
+        agent_context.query_intent = query_intent
+
+    # Get memory tracker for this agent
+    memory_tracker = get_memory_tracker() if agent_id else None
+    if memory_tracker:
+        # Pick up accesses persisted by other processes or before a restart
+        await memory_tracker.refresh_agent(agent_id)
+
+    # --- 0. Semantic answer cache ---
+    # Answers are personalized, so they are only reused for the same agent
+    # and format, and only while the index generation is unchanged.
+    answer_cache = get_semantic_answer_cache()
+    answer_cache_scope = (agent_id, format_type)
+    query_embedding: Optional[List[float]] = None
+    if answer_cache is not None:
+        try:
+            query_embedding = await _embed_query(openai_client, query_text)
+        except Exception as e_cache_emb:
+            logger.warning(
+                f"RAG Query: Could not embed query for the answer cache: {e_cache_emb}"
+            )
+        if query_embedding is not None:
+            cached_answer = answer_cache.get(query_embedding, answer_cache_scope)
+            if cached_answer is not None:
+                logger.info("RAG Query: Answer served from the semantic answer cache.")
+                return _RagPrompt(answer=cached_answer)
+
+    # --- 1-3. Live context, keyword tasks and vector search ---
+    # Each part uses its own pooled connection on the DB executor and the
+    # query embedding is awaited on the shared async client, so the round
+    # trips overlap instead of running back to back.
+    live_context_results: List[Dict[str, Any]]
+    live_task_results: List[Dict[str, Any]]
+    vector_search_results: List[Dict[str, Any]]
+    (
+        live_context_results,
+        live_task_results,
+        vector_search_results,
+    ) = await asyncio.gather(
+        _run_with_cursor(_fetch_recent_live_context),
+        _run_with_cursor(_fetch_keyword_tasks, query_text),
+        _vector_search(openai_client, query_text, query_embedding=query_embedding),
+    )
+
+    # --- 4. Personalize results based on agent context (BEFORE building context) ---
+    personalizer = get_response_personalizer()
+    if agent_context:
+        # Convert vector search results to format expected by personalizer
+        vector_results_for_personalization = [
+            {
+                **item,
+                'content': item.get('chunk_text', ''),
+                'title': item.get('source_ref', '')
+            }
+            for item in vector_search_results
+        ]
+        vector_search_results = personalizer.personalize_response(
+            vector_results_for_personalization,
+            agent_context
+        )
+        # Remove personalization metadata fields for context building
+        for item in vector_search_results:
+            item.pop('_role_score', None)
+            item.pop('_task_boost', None)
+
+        # Also personalize live context results and live task results
+        # Convert to format expected by personalizer (add 'content' field)
+        live_context_for_personalization = [
+            {
+                **item,
+                'content': f"{item.get('value', '')} {item.get('description', '')}",
+                'title': item.get('context_key', '')
+            }
+            for item in live_context_results
+        ]
+        live_context_results = personalizer.personalize_response(
+            live_context_for_personalization,
+            agent_context
+        )
+        # Remove personalization metadata fields for context building
+        for item in live_context_results:
+            item.pop('_role_score', None)
+            item.pop('_task_boost', None)
+
+        live_tasks_for_personalization = [
+            {
+                **task,
+                'content': f"{task.get('title', '')} {task.get('description', '')}",
+                'title': task.get('title', '')
+            }
+            for task in live_task_results
+        ]
+        live_task_results = personalizer.personalize_response(
+            live_tasks_for_personalization,
+            agent_context
+        )
+        # Remove personalization metadata fields
+        for task in live_task_results:
+            task.pop('_role_score', None)
+            task.pop('_task_boost', None)
+
+    # --- 5. Combine Contexts for LLM ---
+    # Original main.py: lines 1509 - 1548
+    # Sections are packed against real token counts for the chat model
+    context_budget = TokenBudget(MAX_CONTEXT_TOKENS, get_token_counter(CHAT_MODEL))
+    context_parts: List[str] = []
+
+    # Add Live Context
+    section_parts, included = _pack_section(
+        context_budget,
+        "--- Recently Updated Project Context (Live) ---",
+        [
+            f"Key: {item['context_key']}\nValue: {item['value']}\nDescription: {item.get('description', 'N/A')}\n(Updated: {item['last_updated']})\n"
+            for item in live_context_results
+        ],
+        footer="---------------------------------------------",
+    )
+    context_parts.extend(section_parts)
+    # Record context access in memory tracker
+    if memory_tracker and agent_id:
+        for item in live_context_results[:included]:
+            memory_tracker.record_access(
+                agent_id, "live_context", item.get('context_key', '')
+            )
+
+    # Add Live Tasks
+    section_parts, included = _pack_section(
+        context_budget,
+        "--- Potentially Relevant Tasks (Live) ---",
+        [
+            f"Task ID: {task['task_id']}\nTitle: {task['title']}\nStatus: {task['status']}\nDescription: {task.get('description', 'N/A')}\n(Updated: {task['updated_at']})\n"
+            for task in live_task_results
+        ],
+        footer="---------------------------------------",
+    )
+    context_parts.extend(section_parts)
+    # Record task access in memory tracker
+    if memory_tracker and agent_id:
+        for task in live_task_results[:included]:
+            memory_tracker.record_access(
+                agent_id, "live_tasks", task.get('task_id', '')
+            )
+
+    # Add Indexed Knowledge (Vector Search Results) - now personalized
+    section_parts, included = _pack_section(
+        context_budget,
+        "--- Indexed Project Knowledge (Vector Search Results) ---",
+        [
+            _format_chunk_entry(i + 1, item)
+            for i, item in enumerate(vector_search_results)
+        ],
+        footer="-------------------------------------------------------",
+        truncated_note="--- [Indexed knowledge truncated due to token limit] ---",
+    )
+    context_parts.extend(section_parts)
+    # Record document access in memory tracker
+    if memory_tracker and agent_id:
+        for i, item in enumerate(vector_search_results[:included]):
+            chunk_id = item.get("chunk_id", item.get("id", f"{item['source_ref']}_{i}"))
+            memory_tracker.record_access(agent_id, "vector_search", chunk_id)
+
+    if not context_parts:
+        logger.info(
+            f"RAG Query: No relevant information found for query: '{query_text}'"
+        )
+        return _RagPrompt(
+            answer="No relevant information found in the project knowledge base or live data for your query."
+        )
+
+    combined_context_str = "\n\n".join(context_parts)
+
+    # --- 6. Build the chat request ---
+    # Original main.py: lines 1550 - 1562
+    # Build role-specific system prompt
+    base_system_prompt = """You are an AI assistant answering questions about a software project. 
+Use the provided context, which may include recently updated live data (like project context keys or tasks) and information retrieved from an indexed knowledge base (like documentation or code summaries), to answer the user's query. 
+Prioritize information from the 'Live' sections if available and relevant for time-sensitive data. 
+Answer using *only* the information given in the context. If the context doesn't contain the answer, state that clearly.
+
+Be VERBOSE and comprehensive in your responses. It's better to give too much context than too little. 
+When answering, please also suggest additional context entries and queries that might be helpful for understanding this topic better.
+For example, suggest related files to examine, related project context keys to check, or follow-up questions that could provide more insight.
+            Always err on the side of providing more detailed explanations and comprehensive information rather than brief responses."""
+
+    # Add role-specific guidance
+    if agent_context:
+        system_prompt_for_llm = personalizer.add_role_guidance(
+            base_system_prompt,
+            agent_context
+        )
+    else:
+        system_prompt_for_llm = base_system_prompt
+
+    user_message_for_llm = f"CONTEXT:\n{combined_context_str}\n\nQUERY:\n{query_text}\n\nBased *only* on the CONTEXT provided above, please answer the QUERY."
+
+    logger.debug(
+        f"RAG Query: Combined context for LLM (tokens: {context_budget.used}):\n{combined_context_str[:500]}..."
+    )  # Log excerpt
+    logger.debug(
+        f"RAG Query: Agent context - role={agent_context.agent_role if agent_context else 'none'}, intent={query_intent}"
+    )
+    logger.debug(
+        f"RAG Query: User message for LLM:\n{user_message_for_llm[:500]}..."
+    )
+
+    return _RagPrompt(
+        messages=[
+            {"role": "system", "content": system_prompt_for_llm},
+            {"role": "user", "content": user_message_for_llm},
+        ],
+        agent_context=agent_context,
+        personalizer=personalizer,
+        answer_cache=answer_cache,
+        answer_cache_scope=answer_cache_scope,
+        query_embedding=query_embedding,
+    )
+
+
+def _rag_error_message(error: Exception) -> str:
+    """Log a RAG query failure and return the message shown to the caller."""
+    if isinstance(error, openai.APIError):  # main.py:1563
+        logger.error(f"RAG Query: OpenAI API error: {error}", exc_info=True)
+        return f"Error communicating with OpenAI: {error}"
+    if isinstance(error, psycopg2.Error):  # main.py:1566
+        logger.error(f"RAG Query: Database error: {error}", exc_info=True)
+        return f"Error querying RAG database: {error}"
+    # main.py:1569
+    logger.error(f"RAG Query: Unexpected error: {error}", exc_info=True)
+    return f"An unexpected error occurred during the RAG query: {str(error)}"
+
 
 async def query_rag_system(
     query_text: str,
@@ -41,415 +619,89 @@ async def query_rag_system(
         A string containing the answer or an error message.
     """
     # Get OpenAI client (main.py:1438)
-    openai_client = get_openai_client()
+    openai_client = get_async_openai_client()
     if not openai_client:
         logger.error("RAG Query: OpenAI client is not available. Cannot process query.")
         return "RAG Error: OpenAI client not available. Please check server configuration and OpenAI API key."
 
-    answer = (
-        "An unexpected error occurred during the RAG query."  # Default error message
-    )
-
     try:
-        # Get agent context if agent_id provided
-        from .context import get_agent_context, AgentQueryContext
-        from .intent_classifier import QueryIntentClassifier
-        from .personalizer import ResponsePersonalizer
-        from .memory_tracker import get_memory_tracker
-        
-        if agent_id and not agent_context:
-            agent_context = get_agent_context(agent_id)
-        
-        # Classify query intent
-        intent_classifier = QueryIntentClassifier()
-        query_intent = intent_classifier.classify(query_text, agent_context)
-        
-        # Update agent context with intent
-        if agent_context:
-            agent_context.query_intent = query_intent
-        
-        # Get memory tracker for this agent
-        memory_tracker = get_memory_tracker() if agent_id else None
-        
-        with db_connection() as conn:
-            cursor = conn.cursor()
-
-            live_context_results: List[Dict[str, Any]] = []
-            live_task_results: List[Dict[str, Any]] = []
-            vector_search_results: List[Dict[str, Any]] = (
-                []
-            )  # Store as dicts for easier access
-
-            # --- 1. Fetch Live Context (Recently Updated) ---
-            # Original main.py: lines 1445 - 1457
-            try:
-                cursor.execute(
-                    "SELECT meta_value FROM rag_meta WHERE meta_key = %s",
-                    ("last_indexed_context",),
-                )
-                last_indexed_context_row = cursor.fetchone()
-                last_indexed_context_time = (
-                    last_indexed_context_row["meta_value"]
-                    if last_indexed_context_row
-                    else "1970-01-01T00:00:00Z"
-                )
-
-                cursor.execute(
-                    """
-                    SELECT context_key, value, description, last_updated
-                    FROM project_context
-                    WHERE last_updated > %s
-                    ORDER BY last_updated DESC
-                    LIMIT 5
-                """,
-                    (last_indexed_context_time,),
-                )
-                # Convert rows to dicts for easier processing
-                live_context_results = [dict(row) for row in cursor.fetchall()]
-            except psycopg2.Error as e_live_ctx:
-                logger.warning(
-                    f"RAG Query: Failed to fetch live project context: {e_live_ctx}"
-                )
-            except Exception as e_live_ctx_other:  # Catch any other unexpected error
-                logger.warning(
-                    f"RAG Query: Unexpected error fetching live project context: {e_live_ctx_other}",
-                    exc_info=True,
-                )
-
-            # --- 2. Fetch Live Tasks (Keyword Search) ---
-            # Original main.py: lines 1459 - 1477
-            try:
-                query_keywords = [
-                    f"%{word.strip().lower()}%"
-                    for word in query_text.split()
-                    if len(word.strip()) > 2
-                ]
-                if query_keywords:
-                    # Build LIKE clauses for title and description
-                    # Ensure each keyword is used for both title and description search
-                    conditions = []
-                    sql_params_tasks: List[str] = []
-                    for kw in query_keywords:
-                        conditions.append("LOWER(title) LIKE %s")
-                        sql_params_tasks.append(kw)
-                        conditions.append("LOWER(description) LIKE %s")
-                        sql_params_tasks.append(kw)
-
-                    if conditions:
-                        # Validate that all conditions are safe (only LIKE patterns)
-                        safe_conditions = []
-                        for condition in conditions:
-                            if condition not in [
-                                "LOWER(title) LIKE %s",
-                                "LOWER(description) LIKE %s",
-                            ]:
-                                logger.warning(
-                                    f"RAG Query: Skipping unsafe condition: {condition}"
-                                )
-                                continue
-                            safe_conditions.append(condition)
-
-                        if safe_conditions:
-                            where_clause = " OR ".join(safe_conditions)
-                            task_query_sql = f"""
-                                SELECT task_id, title, status, description, updated_at
-                                FROM tasks
-                                WHERE {where_clause}
-                                ORDER BY updated_at DESC
-                                LIMIT 5
-                            """
-                            cursor.execute(task_query_sql, sql_params_tasks)
-                            live_task_results = [dict(row) for row in cursor.fetchall()]
-            except psycopg2.Error as e_live_task:
-                logger.warning(
-                    f"RAG Query: Failed to fetch live tasks based on query keywords: {e_live_task}"
-                )
-            except Exception as e_live_task_other:
-                logger.warning(
-                    f"RAG Query: Unexpected error fetching live tasks: {e_live_task_other}",
-                    exc_info=True,
-                )
-
-            # --- 3. Perform Vector Search (Indexed Knowledge) ---
-            # Original main.py: lines 1479 - 1506
-            if is_vss_loadable():  # Check global VSS status
-                try:
-                    # Check if rag_embeddings table exists (PostgreSQL)
-                    cursor.execute(
-                        "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'rag_embeddings') as exists"
-                    )
-                    result = cursor.fetchone()
-                    if (result['exists'] if isinstance(result, dict) else result[0]):
-                        # Embed the query (main.py:1487-1492)
-                        response = openai_client.embeddings.create(
-                            input=[query_text],
-                            model=EMBEDDING_MODEL,
-                            dimensions=EMBEDDING_DIMENSION,
-                        )
-                        query_embedding = response.data[0].embedding
-
-                        # Search Vector Table with metadata using pgvector
-                        k_results = 13  # Optimized based on recent RAG research
-                        sql_vector_search = """
-                            SELECT c.chunk_text, c.source_type, c.source_ref, c.metadata, 
-                                   1 - (r.embedding <=> %s::vector) as distance
-                            FROM rag_embeddings r
-                            JOIN rag_chunks c ON r.chunk_id = c.chunk_id
-                            ORDER BY r.embedding <=> %s::vector
-                            LIMIT %s
-                        """
-                        cursor.execute(sql_vector_search, (query_embedding, query_embedding, k_results))
-                        raw_results = cursor.fetchall()
-
-                        # Process results to parse metadata
-                        for row in raw_results:
-                            result = dict(row)
-                            # Parse metadata JSON if present
-                            if result.get("metadata"):
-                                try:
-                                    result["metadata"] = json.loads(result["metadata"])
-                                except json.JSONDecodeError:
-                                    result["metadata"] = None
-                            vector_search_results.append(result)
-                    else:
-                        logger.warning(
-                            "RAG Query: 'rag_embeddings' table not found. Skipping vector search."
-                        )
-                except psycopg2.Error as e_vec_sql:
-                    logger.error(
-                        f"RAG Query: Database error during vector search: {e_vec_sql}"
-                    )
-                except (
-                    openai.APIError
-                ) as e_openai_emb:  # Catch OpenAI errors during embedding
-                    logger.error(
-                        f"RAG Query: OpenAI API error during query embedding: {e_openai_emb}"
-                    )
-                except Exception as e_vec_other:
-                    logger.error(
-                        f"RAG Query: Unexpected error during vector search part: {e_vec_other}",
-                        exc_info=True,
-                    )
-            else:
-                logger.warning(
-                    "RAG Query: Vector search (pgvector) is not available. Skipping vector search."
-                )
-
-        # --- 4. Personalize results based on agent context (BEFORE building context) ---
-        # This happens outside the database connection since it doesn't need DB access
-        personalizer = ResponsePersonalizer()
-        if agent_context:
-            # Convert vector search results to format expected by personalizer
-            vector_results_for_personalization = [
-                {
-                    **item,
-                    'content': item.get('chunk_text', ''),
-                    'title': item.get('source_ref', '')
-                }
-                for item in vector_search_results
-            ]
-            vector_search_results = personalizer.personalize_response(
-                vector_results_for_personalization,
-                agent_context
-            )
-            # Remove personalization metadata fields for context building
-            for item in vector_search_results:
-                item.pop('_role_score', None)
-                item.pop('_task_boost', None)
-            
-            # Also personalize live context results and live task results
-            # Convert to format expected by personalizer (add 'content' field)
-            live_context_for_personalization = [
-                {
-                    **item,
-                    'content': f"{item.get('value', '')} {item.get('description', '')}",
-                    'title': item.get('context_key', '')
-                }
-                for item in live_context_results
-            ]
-            live_context_results = personalizer.personalize_response(
-                live_context_for_personalization,
-                agent_context
-            )
-            # Remove personalization metadata fields for context building
-            for item in live_context_results:
-                item.pop('_role_score', None)
-                item.pop('_task_boost', None)
-            
-            live_tasks_for_personalization = [
-                {
-                    **task,
-                    'content': f"{task.get('title', '')} {task.get('description', '')}",
-                    'title': task.get('title', '')
-                }
-                for task in live_task_results
-            ]
-            live_task_results = personalizer.personalize_response(
-                live_tasks_for_personalization,
-                agent_context
-            )
-            # Remove personalization metadata fields
-            for task in live_task_results:
-                task.pop('_role_score', None)
-                task.pop('_task_boost', None)
+        prompt = await _prepare_rag_prompt(
+            openai_client, query_text, agent_id, agent_context, format_type
+        )
+        if prompt.answer is not None:
+            return prompt.answer
 
-        # --- 5. Combine Contexts for LLM ---
-        # Original main.py: lines 1509 - 1548
-        context_parts: List[str] = []
-        current_token_count: int = 0  # Approximate token count
-
-        # Add Live Context
-        if live_context_results:
-            context_parts.append("--- Recently Updated Project Context (Live) ---")
-            for item in live_context_results:
-                entry_text = f"Key: {item['context_key']}\nValue: {item['value']}\nDescription: {item.get('description', 'N/A')}\n(Updated: {item['last_updated']})\n"
-                entry_tokens = len(entry_text.split())  # Approximation
-                if current_token_count + entry_tokens < MAX_CONTEXT_TOKENS:
-                    context_parts.append(entry_text)
-                    current_token_count += entry_tokens
-                    
-                    # Record context access in memory tracker
-                    if memory_tracker and agent_id:
-                        context_key = item.get('context_key', '')
-                        memory_tracker.record_access(agent_id, "live_context", context_key)
-                else:
-                    break
-            context_parts.append("---------------------------------------------")
-
-        # Add Live Tasks
-        if live_task_results:
-            context_parts.append("--- Potentially Relevant Tasks (Live) ---")
-            for task in live_task_results:
-                entry_text = f"Task ID: {task['task_id']}\nTitle: {task['title']}\nStatus: {task['status']}\nDescription: {task.get('description', 'N/A')}\n(Updated: {task['updated_at']})\n"
-                entry_tokens = len(entry_text.split())
-                if current_token_count + entry_tokens < MAX_CONTEXT_TOKENS:
-                    context_parts.append(entry_text)
-                    current_token_count += entry_tokens
-                    
-                    # Record task access in memory tracker
-                    if memory_tracker and agent_id:
-                        task_id = task.get('task_id', '')
-                        memory_tracker.record_access(agent_id, "live_tasks", task_id)
-                else:
-                    break
-            context_parts.append("---------------------------------------")
-
-        # Add Indexed Knowledge (Vector Search Results) - now personalized
-        if vector_search_results:
-            context_parts.append(
-                "--- Indexed Project Knowledge (Vector Search Results) ---"
-            )
-            for i, item in enumerate(vector_search_results):
-                chunk_text = item["chunk_text"]
-                source_type = item["source_type"]
-                source_ref = item["source_ref"]
-                metadata = item.get("metadata", {})
-                distance = item.get("distance", "N/A")
-                
-                # Record document access in memory tracker
-                if memory_tracker and agent_id:
-                    chunk_id = item.get("chunk_id", item.get("id", f"{source_ref}_{i}"))
-                    memory_tracker.record_access(agent_id, "vector_search", chunk_id)
-
-                # Enhanced source info with metadata
-                source_info = f"Source Type: {source_type}, Reference: {source_ref}"
-
-                # Add code-specific metadata if available
-                if metadata and source_type in ["code", "code_summary"]:
-                    if metadata.get("language"):
-                        source_info += f", Language: {metadata['language']}"
-                    if metadata.get("section_type"):
-                        source_info += f", Section: {metadata['section_type']}"
-                    if metadata.get("entities"):
-                        entity_names = [e.get("name", "") for e in metadata["entities"]]
-                        if entity_names:
-                            source_info += f", Contains: {', '.join(entity_names[:3])}"
-                            if len(entity_names) > 3:
-                                source_info += f" (+{len(entity_names)-3} more)"
-
-                entry_text = f"Retrieved Chunk {i+1} (Similarity/Distance: {distance}):\n{source_info}\nContent:\n{chunk_text}\n"
-                chunk_tokens = len(entry_text.split())
-                if current_token_count + chunk_tokens < MAX_CONTEXT_TOKENS:
-                    context_parts.append(entry_text)
-                    current_token_count += chunk_tokens
-                else:
-                    context_parts.append(
-                        "--- [Indexed knowledge truncated due to token limit] ---"
-                    )
-                    break
-            context_parts.append(
-                "-------------------------------------------------------"
-            )
+        chat_response = await openai_client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=prompt.messages,
+            temperature=0.4,  # Increased for more diverse context discovery while maintaining accuracy
+        )
+        # Format response with task-specific context if available
+        answer = (chat_response.choices[0].message.content or "") + prompt.answer_suffix()
+        prompt.remember(answer)
+        return answer
+    except Exception as e:
+        return _rag_error_message(e)
 
-        if not context_parts:
-            logger.info(
-                f"RAG Query: No relevant information found for query: '{query_text}'"
-            )
-            answer = "No relevant information found in the project knowledge base or live data for your query."
-        else:
-            combined_context_str = "\n\n".join(context_parts)
 
-            # --- 6. Call Chat Completion API ---
-            # Original main.py: lines 1550 - 1562
-            # Build role-specific system prompt
-            base_system_prompt = """You are an AI assistant answering questions about a software project. 
-Use the provided context, which may include recently updated live data (like project context keys or tasks) and information retrieved from an indexed knowledge base (like documentation or code summaries), to answer the user's query. 
-Prioritize information from the 'Live' sections if available and relevant for time-sensitive data. 
-Answer using *only* the information given in the context. If the context doesn't contain the answer, state that clearly.
+async def stream_rag_answer(
+    query_text: str,
+    agent_id: Optional[str] = None,
+    agent_context: Optional[Any] = None,
+    format_type: str = "json"
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of query_rag_system.
 
-Be VERBOSE and comprehensive in your responses. It's better to give too much context than too little. 
-When answering, please also suggest additional context entries and queries that might be helpful for understanding this topic better.
-For example, suggest related files to examine, related project context keys to check, or follow-up questions that could provide more insight.
-            Always err on the side of providing more detailed explanations and comprehensive information rather than brief responses."""
-            
-            # Add role-specific guidance
-            if agent_context:
-                system_prompt_for_llm = personalizer.add_role_guidance(
-                    base_system_prompt,
-                    agent_context
-                )
-            else:
-                system_prompt_for_llm = base_system_prompt
-
-            user_message_for_llm = f"CONTEXT:\n{combined_context_str}\n\nQUERY:\n{query_text}\n\nBased *only* on the CONTEXT provided above, please answer the QUERY."
-
-            logger.debug(
-                f"RAG Query: Combined context for LLM (approx tokens: {current_token_count}):\n{combined_context_str[:500]}..."
-            )  # Log excerpt
-            logger.debug(
-                f"RAG Query: Agent context - role={agent_context.agent_role if agent_context else 'none'}, intent={query_intent}"
-            )
-            logger.debug(
-                f"RAG Query: User message for LLM:\n{user_message_for_llm[:500]}..."
-            )
+    Retrieval runs as usual, then the chat completion is requested with
+    stream=True and its text deltas are yielded as they arrive, so the first
+    piece follows the retrieval latency instead of the whole answer. Cached
+    answers, "no information" replies and errors arrive as a single piece;
+    the joined output equals what query_rag_system returns.
+    """
+    openai_client = get_async_openai_client()
+    if not openai_client:
+        logger.error("RAG Query: OpenAI client is not available. Cannot process query.")
+        yield "RAG Error: OpenAI client not available. Please check server configuration and OpenAI API key."
+        return
 
-            chat_response = openai_client.chat.completions.create(
-                model=CHAT_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt_for_llm},
-                    {"role": "user", "content": user_message_for_llm},
-                ],
-                temperature=0.4,  # Increased for more diverse context discovery while maintaining accuracy
-            )
-            answer = chat_response.choices[0].message.content
-            
-            # Format response with task-specific context if available
-            if agent_context:
-                answer = personalizer.format_response(answer, agent_context)
-
-    except openai.APIError as e_openai:  # main.py:1563
-        logger.error(f"RAG Query: OpenAI API error: {e_openai}", exc_info=True)
-        answer = f"Error communicating with OpenAI: {e_openai}"
-    except psycopg2.Error as e_sql:  # main.py:1566
-        logger.error(f"RAG Query: Database error: {e_sql}", exc_info=True)
-        answer = f"Error querying RAG database: {e_sql}"
-    except Exception as e_unexpected:  # main.py:1569
-        logger.error(f"RAG Query: Unexpected error: {e_unexpected}", exc_info=True)
-        answer = (
-            f"An unexpected error occurred during the RAG query: {str(e_unexpected)}"
+    started = time.perf_counter()
+    try:
+        prompt = await _prepare_rag_prompt(
+            openai_client, query_text, agent_id, agent_context, format_type
         )
-
-    return answer
+        if prompt.answer is not None:
+            yield prompt.answer
+            return
+
+        stream = await openai_client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=prompt.messages,
+            temperature=0.4,
+            stream=True,
+        )
+        pieces: List[str] = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if not pieces:
+                    record_rag_first_token((time.perf_counter() - started) * 1000)
+                pieces.append(delta)
+                yield delta
+        finally:
+            # Release the HTTP response if the consumer stops early
+            await stream.close()
+
+        suffix = prompt.answer_suffix()
+        if suffix:
+            yield suffix
+        prompt.remember("".join(pieces) + suffix)
+    except Exception as e:
+        yield _rag_error_message(e)
 
 
 async def query_rag_system_with_model(
@@ -469,7 +721,7 @@ async def query_rag_system_with_model(
         A string containing the answer or an error message.
     """
     # Get OpenAI client
-    openai_client = get_openai_client()
+    openai_client = get_async_openai_client()
     if not openai_client:
         logger.error("RAG Query: OpenAI client is not available. Cannot process query.")
         return "RAG Error: OpenAI client not available. Please check server configuration and OpenAI API key."
@@ -480,164 +732,66 @@ async def query_rag_system_with_model(
     answer = "An unexpected error occurred during the RAG query."
 
     try:
-        with db_connection() as conn:
-            cursor = conn.cursor()
-
-            live_context_results: List[Dict[str, Any]] = []
-            live_task_results: List[Dict[str, Any]] = []
-            vector_search_results: List[Dict[str, Any]] = []
-
-            # Get live context (same as regular RAG)
-            cursor.execute(
-            "SELECT context_key, value, description, last_updated FROM project_context ORDER BY last_updated DESC"
+        # Live context, open tasks and vector search run concurrently
+        live_context_results: List[Dict[str, Any]]
+        live_task_results: List[Dict[str, Any]]
+        vector_search_results: List[Dict[str, Any]]
+        (
+            live_context_results,
+            live_task_results,
+            vector_search_results,
+        ) = await asyncio.gather(
+            _run_with_cursor(_fetch_all_live_context),
+            _run_with_cursor(_fetch_open_tasks),
+            _vector_search(openai_client, query_text),
         )
-        live_context_results = [dict(row) for row in cursor.fetchall()]
 
-        # Get live tasks (same as regular RAG)
-        cursor.execute(
-            """
-            SELECT task_id, title, description, status, created_by, assigned_to, 
-                   priority, parent_task, depends_on_tasks, created_at, updated_at 
-            FROM tasks 
-            WHERE status IN ('pending', 'in_progress') 
-            ORDER BY updated_at DESC
-        """
-        )
-        live_task_results = [dict(row) for row in cursor.fetchall()]
-
-        # Get vector search results if VSS is available
-        if is_vss_loadable():
-            try:
-                # Check if rag_embeddings table exists
-                cursor.execute(
-                    "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'rag_embeddings') as exists"
-                )
-                result = cursor.fetchone()
-                if (result['exists'] if isinstance(result, dict) else result[0]):
-                    # Embed the query
-                    query_embedding_response = openai_client.embeddings.create(
-                        input=[query_text],
-                        model=EMBEDDING_MODEL,
-                        dimensions=EMBEDDING_DIMENSION,
-                    )
-                    query_embedding = query_embedding_response.data[0].embedding
-
-                    # Perform vector search using pgvector
-                    k_results = 13  # Optimized based on recent RAG research
-                    vector_search_sql = """
-                        SELECT c.chunk_text, c.source_type, c.source_ref, c.metadata, 
-                               1 - (r.embedding <=> %s::vector) as distance
-                        FROM rag_embeddings r
-                        JOIN rag_chunks c ON r.chunk_id = c.chunk_id
-                        ORDER BY r.embedding <=> %s::vector
-                        LIMIT %s
-                    """
-                    cursor.execute(vector_search_sql, (query_embedding, query_embedding, k_results))
-                    raw_results = cursor.fetchall()
-
-                    # Process results to parse metadata
-                    for row in raw_results:
-                        result = dict(row)
-                        # Parse metadata JSON if present
-                        if result.get("metadata"):
-                            try:
-                                result["metadata"] = json.loads(result["metadata"])
-                            except json.JSONDecodeError:
-                                result["metadata"] = None
-                        vector_search_results.append(result)
-                else:
-                    logger.warning(
-                        "RAG Query: 'rag_embeddings' table not found. Skipping vector search."
-                    )
-            except psycopg2.Error as e_vec_sql:
-                logger.error(
-                    f"RAG Query: Database error during vector search: {e_vec_sql}"
-                )
-            except openai.APIError as e_openai_emb:
-                logger.error(
-                    f"RAG Query: OpenAI API error during query embedding: {e_openai_emb}"
-                )
-            except Exception as e_vec_other:
-                logger.error(
-                    f"RAG Query: Unexpected error during vector search: {e_vec_other}",
-                    exc_info=True,
-                )
-
-        # Build context (same structure as regular RAG)
-        context_parts = []
-        current_token_count = 0
+        # Build context (same structure as regular RAG), packed against the
+        # token counts of the requested model
+        context_budget = TokenBudget(context_limit, get_token_counter(model_name))
+        context_parts: List[str] = []
 
         # Include live context
-        if live_context_results:
-            context_parts.append("=== Live Project Context ===")
-            for item in live_context_results:
-                entry_text = f"Key: {item['context_key']}\nDescription: {item['description']}\nValue: {item['value']}\nLast Updated: {item['last_updated']}\n"
-                chunk_tokens = len(entry_text.split())
-                if current_token_count + chunk_tokens < context_limit:
-                    context_parts.append(entry_text)
-                    current_token_count += chunk_tokens
-                else:
-                    context_parts.append(
-                        "--- [Live context truncated due to token limit] ---"
-                    )
-                    break
+        section_parts, _ = _pack_section(
+            context_budget,
+            "=== Live Project Context ===",
+            [
+                f"Key: {item['context_key']}\nDescription: {item['description']}\nValue: {item['value']}\nLast Updated: {item['last_updated']}\n"
+                for item in live_context_results
+            ],
+            truncated_note="--- [Live context truncated due to token limit] ---",
+        )
+        context_parts.extend(section_parts)
 
         # Include live tasks
-        if live_task_results:
-            context_parts.append("\n=== Live Task Information ===")
-            for item in live_task_results:
-                entry_text = f"Task ID: {item['task_id']}\nTitle: {item['title']}\nDescription: {item['description']}\nStatus: {item['status']}\n"
-                entry_text += f"Priority: {item['priority']}\nAssigned To: {item['assigned_to']}\nCreated By: {item['created_by']}\n"
-                entry_text += f"Parent Task: {item['parent_task']}\nDependencies: {item['depends_on_tasks']}\n"
-                entry_text += (
-                    f"Created: {item['created_at']}\nUpdated: {item['updated_at']}\n"
-                )
-                chunk_tokens = len(entry_text.split())
-                if current_token_count + chunk_tokens < context_limit:
-                    context_parts.append(entry_text)
-                    current_token_count += chunk_tokens
-                else:
-                    context_parts.append(
-                        "--- [Live tasks truncated due to token limit] ---"
-                    )
-                    break
+        task_entries = []
+        for item in live_task_results:
+            entry_text = f"Task ID: {item['task_id']}\nTitle: {item['title']}\nDescription: {item['description']}\nStatus: {item['status']}\n"
+            entry_text += f"Priority: {item['priority']}\nAssigned To: {item['assigned_to']}\nCreated By: {item['created_by']}\n"
+            entry_text += f"Parent Task: {item['parent_task']}\nDependencies: {item['depends_on_tasks']}\n"
+            entry_text += (
+                f"Created: {item['created_at']}\nUpdated: {item['updated_at']}\n"
+            )
+            task_entries.append(entry_text)
+        section_parts, _ = _pack_section(
+            context_budget,
+            "\n=== Live Task Information ===",
+            task_entries,
+            truncated_note="--- [Live tasks truncated due to token limit] ---",
+        )
+        context_parts.extend(section_parts)
 
         # Include vector search results
-        if vector_search_results:
-            context_parts.append("\n=== Retrieved from Indexed Knowledge ===")
-            for i, item in enumerate(vector_search_results):
-                chunk_text = item["chunk_text"]
-                source_type = item["source_type"]
-                source_ref = item["source_ref"]
-                metadata = item.get("metadata", {})
-                distance = item.get("distance", "N/A")
-
-                # Enhanced source info with metadata (matching working implementation)
-                source_info = f"Source Type: {source_type}, Reference: {source_ref}"
-
-                # Add code-specific metadata if available
-                if metadata and source_type in ["code", "code_summary"]:
-                    if metadata.get("language"):
-                        source_info += f", Language: {metadata['language']}"
-                    if metadata.get("section_type"):
-                        source_info += f", Section: {metadata['section_type']}"
-                    if metadata.get("entities"):
-                        entity_names = [e.get("name", "") for e in metadata["entities"]]
-                        if entity_names:
-                            source_info += f", Contains: {', '.join(entity_names[:3])}"
-                            if len(entity_names) > 3:
-                                source_info += f" (+{len(entity_names)-3} more)"
-
-                entry_text = f"Retrieved Chunk {i+1} (Similarity/Distance: {distance}):\n{source_info}\nContent:\n{chunk_text}\n"
-                chunk_tokens = len(entry_text.split())
-                if current_token_count + chunk_tokens < context_limit:
-                    context_parts.append(entry_text)
-                    current_token_count += chunk_tokens
-                else:
-                    context_parts.append(
-                        "--- [Indexed knowledge truncated due to token limit] ---"
-                    )
-                    break
+        section_parts, _ = _pack_section(
+            context_budget,
+            "\n=== Retrieved from Indexed Knowledge ===",
+            [
+                _format_chunk_entry(i + 1, item)
+                for i, item in enumerate(vector_search_results)
+            ],
+            truncated_note="--- [Indexed knowledge truncated due to token limit] ---",
+        )
+        context_parts.extend(section_parts)
 
         if not context_parts:
             logger.info(
@@ -666,7 +820,7 @@ Answer in the exact JSON format requested, but include thorough explanations in
             )
 
             # Use the specified model for this query
-            chat_response = openai_client.chat.completions.create(
+            chat_response = await openai_client.chat.completions.create(
                 model=model_name,
                 messages=[
                     {"role": "system", "content": system_prompt_for_llm},
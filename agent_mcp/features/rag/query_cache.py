@@ -0,0 +1,204 @@
+# Agent-MCP/agent_mcp/features/rag/query_cache.py
+"""
+In-process caches for RAG queries.
+
+QueryEmbeddingCache keeps recent query embeddings (LRU + TTL) keyed by the
+normalized query text, so a repeated question skips the embedding request.
+
+SemanticAnswerCache optionally returns a previous answer when a new query's
+embedding is within a cosine-similarity threshold of a recent one. Entries are
+scoped (agent and response format, since answers are personalized) and tagged
+with the index generation; the indexer bumps the generation whenever a cycle
+changes the index, which makes every older answer a miss.
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with pgvector
+    np = None
+
+from ...utils.metrics import record_rag_answer_cache, record_rag_query_embedding_cache
+
+_index_generation = 0
+
+
+def get_index_generation() -> int:
+    """Current index generation (changes whenever the RAG index is modified)."""
+    return _index_generation
+
+
+def bump_index_generation() -> int:
+    """Mark the RAG index as changed. Returns the new generation."""
+    global _index_generation
+    _index_generation += 1
+    return _index_generation
+
+
+def normalize_query(query_text: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as the cache key."""
+    return " ".join(query_text.lower().split())
+
+
+def _unit_vector(embedding: Sequence[float]) -> Any:
+    """Embedding scaled to length 1, so cosine similarity is a dot product."""
+    if np is not None:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+    norm = math.sqrt(sum(x * x for x in embedding))
+    return [x / norm for x in embedding] if norm else list(embedding)
+
+
+def _dot(a: Any, b: Any) -> float:
+    if np is not None:
+        return float(np.dot(a, b))
+    return sum(x * y for x, y in zip(a, b))
+
+
+class QueryEmbeddingCache:
+    """LRU/TTL cache of query embeddings keyed by normalized query text."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[List[float], float]]" = OrderedDict()
+
+    def get(self, query_text: str) -> Optional[List[float]]:
+        """Cached embedding for the query, or None (counts a hit or miss)."""
+        if self.max_entries <= 0:
+            return None
+        key = normalize_query(query_text)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            self._entries.move_to_end(key)
+            record_rag_query_embedding_cache(hit=True)
+            return entry[0]
+        if entry is not None:
+            del self._entries[key]
+        record_rag_query_embedding_cache(hit=False)
+        return None
+
+    def set(self, query_text: str, embedding: List[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        key = normalize_query(query_text)
+        self._entries[key] = (embedding, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+@dataclass
+class _AnswerEntry:
+    scope: Hashable
+    generation: int
+    unit_embedding: Any
+    answer: str
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """Recent answers, matched by cosine similarity of the query embeddings."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 600.0,
+        threshold: float = 0.97,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._entries: List[_AnswerEntry] = []
+
+    def _evict_stale(self, now: float, generation: int) -> None:
+        self._entries = [
+            e for e in self._entries if e.expires_at > now and e.generation == generation
+        ]
+
+    def get(self, embedding: Sequence[float], scope: Hashable) -> Optional[str]:
+        """Answer of the most similar cached query above the threshold, or None."""
+        self._evict_stale(time.monotonic(), get_index_generation())
+        best_answer: Optional[str] = None
+        best_score = self.threshold
+        query_vector = _unit_vector(embedding)
+        for entry in self._entries:
+            if entry.scope != scope:
+                continue
+            score = _dot(query_vector, entry.unit_embedding)
+            if score >= best_score:
+                best_score, best_answer = score, entry.answer
+        record_rag_answer_cache(hit=best_answer is not None)
+        return best_answer
+
+    def set(self, embedding: Sequence[float], scope: Hashable, answer: str) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries.append(
+            _AnswerEntry(
+                scope=scope,
+                generation=get_index_generation(),
+                unit_embedding=_unit_vector(embedding),
+                answer=answer,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+        )
+        if len(self._entries) > self.max_entries:
+            del self._entries[: len(self._entries) - self.max_entries]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+_query_embedding_cache: Optional[QueryEmbeddingCache] = None
+_semantic_answer_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Process-wide query embedding cache, sized from settings."""
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        from ...core.config import (
+            RAG_QUERY_EMBEDDING_CACHE_SIZE,
+            RAG_QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+        )
+
+        _query_embedding_cache = QueryEmbeddingCache(
+            RAG_QUERY_EMBEDDING_CACHE_SIZE, RAG_QUERY_EMBEDDING_CACHE_TTL_SECONDS
+        )
+    return _query_embedding_cache
+
+
+def get_semantic_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Process-wide semantic answer cache, or None when it is disabled."""
+    global _semantic_answer_cache
+    from ...core.config import (
+        RAG_SEMANTIC_ANSWER_CACHE,
+        RAG_SEMANTIC_ANSWER_CACHE_SIZE,
+        RAG_SEMANTIC_ANSWER_THRESHOLD,
+        RAG_SEMANTIC_ANSWER_TTL_SECONDS,
+    )
+
+    if not RAG_SEMANTIC_ANSWER_CACHE:
+        return None
+    if _semantic_answer_cache is None:
+        _semantic_answer_cache = SemanticAnswerCache(
+            RAG_SEMANTIC_ANSWER_CACHE_SIZE,
+            RAG_SEMANTIC_ANSWER_TTL_SECONDS,
+            RAG_SEMANTIC_ANSWER_THRESHOLD,
+        )
+    return _semantic_answer_cache
@@ -0,0 +1,302 @@
+# Agent-MCP/agent_mcp/features/rag/rerank.py
+"""
+Rerank stage between retrieval and context assembly.
+
+Retrieval over-fetches (k x RAG_RERANK_OVERFETCH candidates) and a reranker
+scores them in one batch and keeps the best RAG_RERANK_TOP_K, so fewer and
+better chunks reach the chat completion.
+
+MMRReranker uses maximal marginal relevance over the stored embeddings:
+relevance to the query is traded off against similarity to the chunks already
+picked, so near-duplicate chunks do not crowd out the rest. Relevance is the
+hybrid search's rrf_score when candidates carry one (so keyword-only hits
+keep their lexical rank), otherwise cosine similarity to the query. CrossEncoderReranker
+scores (query, chunk) pairs with a local CPU cross-encoder (the optional
+sentence-transformers package).
+
+Relevance scores are cached per (query hash, chunk_id) in an LRU that is
+cleared whenever the index generation changes.
+"""
+import hashlib
+import importlib.util
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with pgvector
+    np = None
+
+from ...core.config import logger
+from ...utils.metrics import record_rag_rerank
+from .query_cache import get_index_generation, normalize_query
+
+
+def query_hash(query_text: str) -> str:
+    """Stable key for a query (case- and whitespace-insensitive)."""
+    return hashlib.sha256(normalize_query(query_text).encode("utf-8")).hexdigest()
+
+
+class RerankScoreCache:
+    """LRU of reranker relevance scores keyed by (query hash, chunk_id)."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Any], float]" = OrderedDict()
+        self._generation = get_index_generation()
+        self._lock = threading.Lock()
+
+    def _check_generation(self) -> None:
+        generation = get_index_generation()
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get_many(self, key: str, chunk_ids: Sequence[Any]) -> Dict[Any, float]:
+        """Cached scores for whichever of the chunks have one."""
+        found: Dict[Any, float] = {}
+        if self.max_entries <= 0:
+            return found
+        with self._lock:
+            self._check_generation()
+            for chunk_id in chunk_ids:
+                score = self._entries.get((key, chunk_id))
+                if score is not None:
+                    self._entries.move_to_end((key, chunk_id))
+                    found[chunk_id] = score
+        return found
+
+    def set_many(self, key: str, scores: Dict[Any, float]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._check_generation()
+            for chunk_id, score in scores.items():
+                self._entries[(key, chunk_id)] = score
+                self._entries.move_to_end((key, chunk_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+def _as_vector(embedding: Any) -> Any:
+    """pgvector value (numpy array, or '[..]' text without the adapter) as float32."""
+    if isinstance(embedding, str):
+        embedding = json.loads(embedding)
+    return np.asarray(embedding, dtype=np.float32)
+
+
+def _unit_rows(matrix: Any) -> Any:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class Reranker:
+    """
+    Base reranker: batch relevance scores (through the score cache) and a
+    selection of the best k candidates.
+    """
+
+    name = "base"
+    # Whether candidates must carry their stored 'embedding'
+    needs_embeddings = False
+
+    def __init__(self, cache: Optional[RerankScoreCache] = None):
+        self.cache = cache
+
+    def _score(
+        self, query_text: str, query_embedding: Sequence[float], candidates: List[Dict[str, Any]]
+    ) -> Any:
+        """Relevance of each candidate to the query, as a 1-D array."""
+        raise NotImplementedError
+
+    def _select(self, candidates: List[Dict[str, Any]], relevance: Any, k: int) -> List[int]:
+        """Indices of the candidates to keep, best first."""
+        return [int(i) for i in np.argsort(-relevance, kind="stable")[:k]]
+
+    def _relevance(
+        self, query_text: str, query_embedding: Sequence[float], candidates: List[Dict[str, Any]]
+    ) -> Tuple[Any, int, int]:
+        """Relevance scores, computing only the ones missing from the cache."""
+        chunk_ids = [c.get("chunk_id") for c in candidates]
+        key = query_hash(query_text)
+        cached: Dict[Any, float] = {}
+        if self.cache is not None and None not in chunk_ids:
+            cached = self.cache.get_many(key, chunk_ids)
+        missing = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id not in cached]
+
+        relevance = np.empty(len(candidates), dtype=np.float32)
+        for i, chunk_id in enumerate(chunk_ids):
+            if chunk_id in cached:
+                relevance[i] = cached[chunk_id]
+        if missing:
+            scores = self._score(query_text, query_embedding, [candidates[i] for i in missing])
+            relevance[missing] = scores
+            if self.cache is not None and None not in chunk_ids:
+                self.cache.set_many(
+                    key, {chunk_ids[i]: float(score) for i, score in zip(missing, scores)}
+                )
+        return relevance, len(candidates) - len(missing), len(missing)
+
+    def rerank(
+        self,
+        query_text: str,
+        query_embedding: Sequence[float],
+        candidates: List[Dict[str, Any]],
+        k: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Best k candidates in reranked order, each with a 'rerank_score'.
+
+        Falls back to the retrieval order when the candidates cannot be
+        scored (e.g. missing embeddings). Stored embeddings are removed from
+        the returned results.
+        """
+        started = time.perf_counter()
+        order = list(range(min(k, len(candidates))))
+        relevance = None
+        hits = misses = 0
+        if self.needs_embeddings and any(c.get("embedding") is None for c in candidates):
+            logger.debug(f"RAG rerank ({self.name}): candidates without embeddings; keeping retrieval order.")
+        elif candidates:
+            try:
+                relevance, hits, misses = self._relevance(query_text, query_embedding, candidates)
+                order = self._select(candidates, relevance, k)
+            except Exception as e:
+                logger.warning(f"RAG rerank ({self.name}) failed; keeping retrieval order: {e}")
+                relevance = None
+                order = list(range(min(k, len(candidates))))
+
+        results = []
+        for i in order:
+            result = dict(candidates[i])
+            result.pop("embedding", None)
+            if relevance is not None:
+                result["rerank_score"] = float(relevance[i])
+            results.append(result)
+        record_rag_rerank(time.perf_counter() - started, hits, misses)
+        return results
+
+
+class MMRReranker(Reranker):
+    """Maximal marginal relevance over the candidates' stored embeddings."""
+
+    name = "mmr"
+    needs_embeddings = True
+
+    def __init__(self, lambda_mult: float = 0.7, cache: Optional[RerankScoreCache] = None):
+        super().__init__(cache)
+        self.lambda_mult = lambda_mult
+
+    def _score(self, query_text, query_embedding, candidates):
+        if all(c.get("rrf_score") is not None for c in candidates):
+            # Hybrid search: the fused vector + full-text rank is the relevance
+            return np.asarray([float(c["rrf_score"]) for c in candidates], dtype=np.float32)
+        matrix = _unit_rows(np.vstack([_as_vector(c["embedding"]) for c in candidates]))
+        return matrix @ _unit_rows(_as_vector(query_embedding))
+
+    def _select(self, candidates, relevance, k):
+        count = min(k, len(candidates))
+        if count == 0:
+            return []
+        matrix = _unit_rows(np.vstack([_as_vector(c["embedding"]) for c in candidates]))
+        similarity = matrix @ matrix.T
+        if all(c.get("rrf_score") is not None for c in candidates) and relevance.max() > 0:
+            # RRF scores are tiny (about 1/60); bring the best to 1 so they
+            # weigh against the cosine redundancy term
+            relevance = relevance / relevance.max()
+
+        first = int(np.argmax(relevance))
+        selected = [first]
+        available = np.ones(len(candidates), dtype=bool)
+        available[first] = False
+        # Highest similarity of each candidate to anything already selected
+        redundancy = similarity[first].copy()
+        while len(selected) < count:
+            mmr = self.lambda_mult * relevance - (1.0 - self.lambda_mult) * redundancy
+            mmr[~available] = -np.inf
+            pick = int(np.argmax(mmr))
+            selected.append(pick)
+            available[pick] = False
+            np.maximum(redundancy, similarity[pick], out=redundancy)
+        return selected
+
+
+class CrossEncoderReranker(Reranker):
+    """Local CPU cross-encoder scoring (query, chunk text) pairs."""
+
+    name = "cross_encoder"
+
+    def __init__(
+        self,
+        model_name: str,
+        cache: Optional[RerankScoreCache] = None,
+        batch_size: int = 32,
+    ):
+        super().__init__(cache)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def _get_model(self):
+        # Loaded on first use, on the rerank worker thread rather than the event loop
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def _score(self, query_text, query_embedding, candidates):
+        pairs = [
+            (query_text, c.get("chunk_text") or c.get("content") or "") for c in candidates
+        ]
+        scores = self._get_model().predict(
+            pairs, batch_size=self.batch_size, show_progress_bar=False
+        )
+        return np.asarray(scores, dtype=np.float32)
+
+
+_reranker: Optional[Reranker] = None
+_reranker_loaded = False
+
+
+def get_reranker() -> Optional[Reranker]:
+    """Configured process-wide reranker, or None when reranking is disabled."""
+    global _reranker, _reranker_loaded
+    if _reranker_loaded:
+        return _reranker
+    from ...core.config import (
+        RAG_CROSS_ENCODER_MODEL,
+        RAG_MMR_LAMBDA,
+        RAG_RERANK_CACHE_SIZE,
+        RAG_RERANKER,
+    )
+
+    _reranker_loaded = True
+    if RAG_RERANKER == "none":
+        return None
+    if np is None:
+        logger.warning("RAG rerank: numpy is not installed; reranking is disabled.")
+        return None
+    cache = RerankScoreCache(RAG_RERANK_CACHE_SIZE)
+    if RAG_RERANKER == "cross_encoder":
+        if importlib.util.find_spec("sentence_transformers") is not None:
+            _reranker = CrossEncoderReranker(RAG_CROSS_ENCODER_MODEL, cache)
+            return _reranker
+        logger.warning(
+            "RAG rerank: sentence-transformers is not installed; using the MMR reranker instead."
+        )
+    _reranker = MMRReranker(RAG_MMR_LAMBDA, cache)
+    return _reranker
@@ -0,0 +1,146 @@
+"""
+Debounced, batched re-indexing of tasks.
+
+Task tools enqueue a task after every change instead of re-indexing it on the
+spot. Repeated updates to the same task within the debounce window collapse
+into one entry holding the latest data, and the queued tasks are embedded in
+shared API batches and written in one transaction per batch, so bulk task
+operations do not turn into one embedding request and commit per update.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ...core.config import logger
+from ...utils.metrics import record_rag_task_index_flush, set_rag_task_index_queue_depth
+
+
+class TaskIndexQueue:
+    """
+    Pending task re-indexing, drained by a single background worker.
+
+    A batch is flushed once no update has arrived for debounce_seconds,
+    once the oldest pending update has waited max_delay_seconds, or as soon
+    as batch_size tasks are pending.
+    """
+
+    def __init__(
+        self,
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 10.0,
+        batch_size: int = 100,
+    ):
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max(max_delay_seconds, debounce_seconds)
+        self.batch_size = batch_size
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._in_flight = 0
+        self._first_enqueued_at: Optional[float] = None
+        self._last_enqueued_at = 0.0
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        """Tasks waiting to be indexed, including the batch being written."""
+        return len(self._pending) + self._in_flight
+
+    def _report_depth(self) -> None:
+        set_rag_task_index_queue_depth(self.depth)
+
+    def enqueue(self, task_id: str, task_data: Dict[str, Any]) -> None:
+        """Queue a task for re-indexing (replaces any pending data for it)."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self._pending[task_id] = task_data
+        self._pending.move_to_end(task_id)
+        if self._first_enqueued_at is None:
+            self._first_enqueued_at = now
+        self._last_enqueued_at = now
+        self._report_depth()
+        if self._worker is None or self._worker.done():
+            # Created per worker so the event belongs to the running loop
+            self._batch_ready = asyncio.Event()
+            self._worker = loop.create_task(self._drain())
+        if len(self._pending) >= self.batch_size:
+            self._batch_ready.set()
+
+    async def _wait_for_batch(self) -> None:
+        """Sleep until the pending updates are due (quiet period, age or size)."""
+        loop = asyncio.get_running_loop()
+        while self._pending and len(self._pending) < self.batch_size:
+            due_at = min(
+                self._last_enqueued_at + self.debounce_seconds,
+                self._first_enqueued_at + self.max_delay_seconds,
+            )
+            remaining = due_at - loop.time()
+            if remaining <= 0:
+                return
+            self._batch_ready.clear()
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def _take_batch(self) -> Dict[str, Dict[str, Any]]:
+        batch: Dict[str, Dict[str, Any]] = {}
+        while self._pending and len(batch) < self.batch_size:
+            task_id, task_data = self._pending.popitem(last=False)
+            batch[task_id] = task_data
+        # Whatever is left has been waiting since before this flush
+        self._first_enqueued_at = (
+            asyncio.get_running_loop().time() if self._pending else None
+        )
+        return batch
+
+    async def _write_batch(self, batch: Dict[str, Dict[str, Any]]) -> None:
+        from .indexing import index_tasks_batch
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self._in_flight += len(batch)
+        self._report_depth()
+        try:
+            indexed = await index_tasks_batch(list(batch.items()))
+        except Exception as e:
+            logger.error(f"Task index queue: batch of {len(batch)} tasks failed: {e}", exc_info=True)
+            indexed = False
+        finally:
+            self._in_flight -= len(batch)
+            self._report_depth()
+        record_rag_task_index_flush(len(batch), loop.time() - started, indexed)
+
+    async def _drain(self) -> None:
+        while self._pending:
+            await self._wait_for_batch()
+            await self._write_batch(self._take_batch())
+
+    async def flush(self) -> None:
+        """Index everything pending now, without waiting for the debounce window."""
+        while self._pending:
+            await self._write_batch(self._take_batch())
+        if self._worker is not None and not self._worker.done():
+            # Let a batch the worker already started finish
+            self._batch_ready.set()
+            await asyncio.wait({self._worker})
+
+
+_task_index_queue: Optional[TaskIndexQueue] = None
+
+
+def get_task_index_queue() -> TaskIndexQueue:
+    """Process-wide task index queue, configured from settings."""
+    global _task_index_queue
+    if _task_index_queue is None:
+        from ...core.config import (
+            RAG_TASK_INDEX_BATCH_SIZE,
+            RAG_TASK_INDEX_DEBOUNCE_SECONDS,
+            RAG_TASK_INDEX_MAX_DELAY_SECONDS,
+        )
+
+        _task_index_queue = TaskIndexQueue(
+            RAG_TASK_INDEX_DEBOUNCE_SECONDS,
+            RAG_TASK_INDEX_MAX_DELAY_SECONDS,
+            RAG_TASK_INDEX_BATCH_SIZE,
+        )
+    return _task_index_queue
@@ -0,0 +1,305 @@
+# Agent-MCP/agent_mcp/features/rag/tree_sitter_entities.py
+"""
+Parser-backed code entity extraction with tree-sitter (optional).
+
+When the tree-sitter bindings and a grammar for the file's language are
+installed (the 'treesitter' extra: tree-sitter plus tree-sitter-language-pack,
+or the individual tree-sitter-<lang> grammar packages), functions, classes,
+methods and type declarations come from the syntax tree, with exact end lines.
+Otherwise extract_tree_sitter_entities returns None and code_chunking falls
+back to its regexes.
+
+Parsing is incremental: the last tree of each path is kept (per process), and
+when the same file is parsed again the edit between the old and new source is
+applied to it so tree-sitter only re-parses the changed region.
+"""
+import importlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tree_sitter
+except ImportError:  # Optional dependency
+    tree_sitter = None
+
+from ...core.config import logger
+
+# Grammar names by file extension
+GRAMMAR_BY_EXTENSION = {
+    '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'typescript', '.tsx': 'tsx',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.java': 'java',
+    '.c': 'c', '.h': 'c',
+    '.cpp': 'cpp', '.hpp': 'cpp', '.cc': 'cpp', '.cxx': 'cpp', '.c++': 'cpp',
+    '.hh': 'cpp', '.hxx': 'cpp', '.h++': 'cpp',
+}
+
+_JS_NODES = {
+    'function_declaration': 'function',
+    'generator_function_declaration': 'function',
+    'class_declaration': 'class',
+    'method_definition': 'method',
+}
+_TS_NODES = {
+    **_JS_NODES,
+    'abstract_class_declaration': 'class',
+    'interface_declaration': 'interface',
+    'type_alias_declaration': 'type',
+    'enum_declaration': 'enum',
+}
+_C_NODES = {
+    'function_definition': 'function',
+    'struct_specifier': 'struct',
+}
+
+# Syntax node type -> entity type, per grammar
+ENTITY_NODE_TYPES: Dict[str, Dict[str, str]] = {
+    'javascript': _JS_NODES,
+    'typescript': _TS_NODES,
+    'tsx': _TS_NODES,
+    'go': {
+        'function_declaration': 'function',
+        'method_declaration': 'method',
+        'type_spec': 'type',
+    },
+    'rust': {
+        'function_item': 'function',
+        'struct_item': 'struct',
+        'enum_item': 'enum',
+        'trait_item': 'trait',
+        'impl_item': 'impl',
+    },
+    'java': {
+        'class_declaration': 'class',
+        'interface_declaration': 'interface',
+        'enum_declaration': 'enum',
+        'method_declaration': 'method',
+        'constructor_declaration': 'method',
+    },
+    'c': _C_NODES,
+    'cpp': {**_C_NODES, 'class_specifier': 'class'},
+}
+
+# Entities whose functions are reported as methods of them
+_CONTAINER_TYPES = {'class', 'interface', 'impl', 'trait', 'struct'}
+
+# JS/TS `const f = () => ...` and `const f = function () {}`
+_FUNCTION_VALUE_TYPES = {'arrow_function', 'function_expression', 'function', 'generator_function'}
+
+# Identifier node types that can carry a declaration's name
+_NAME_TYPES = {
+    'identifier', 'type_identifier', 'field_identifier', 'property_identifier',
+    'qualified_identifier', 'destructor_name', 'operator_name',
+}
+
+# Parsed trees kept for incremental re-parsing, per process
+MAX_CACHED_TREES = 256
+
+_parsers: Dict[str, Any] = {}
+_trees: "OrderedDict[str, Tuple[str, bytes, Any]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _load_language(name: str) -> Optional[Any]:
+    """tree_sitter.Language for a grammar, from whichever grammar package is installed."""
+    for package in ('tree_sitter_language_pack', 'tree_sitter_languages'):
+        try:
+            return importlib.import_module(package).get_language(name)
+        except Exception:
+            continue
+    module_name, function_name = {
+        'typescript': ('tree_sitter_typescript', 'language_typescript'),
+        'tsx': ('tree_sitter_typescript', 'language_tsx'),
+    }.get(name, (f'tree_sitter_{name}', 'language'))
+    try:
+        module = importlib.import_module(module_name)
+        return tree_sitter.Language(getattr(module, function_name)())
+    except Exception:
+        return None
+
+
+def _get_parser(grammar: str) -> Optional[Any]:
+    """Cached parser for a grammar, or None when it is not installed (lock held)."""
+    if grammar in _parsers:
+        return _parsers[grammar]
+    parser = None
+    language = _load_language(grammar)
+    if language is not None:
+        try:
+            parser = tree_sitter.Parser(language)
+        except TypeError:  # tree-sitter < 0.22
+            parser = tree_sitter.Parser()
+            parser.set_language(language)
+        logger.info(f"tree-sitter grammar loaded for {grammar}")
+    _parsers[grammar] = parser
+    return parser
+
+
+def tree_sitter_available(file_path: Path) -> bool:
+    """Whether entities of this file would come from tree-sitter."""
+    grammar = GRAMMAR_BY_EXTENSION.get(file_path.suffix.lower())
+    if tree_sitter is None or grammar is None:
+        return False
+    with _lock:
+        return _get_parser(grammar) is not None
+
+
+def _point(source: bytes, offset: int) -> Tuple[int, int]:
+    """(row, byte column) of a byte offset."""
+    row = source.count(b'\n', 0, offset)
+    line_start = source.rfind(b'\n', 0, offset) + 1
+    return row, offset - line_start
+
+
+def _common_prefix_length(a: bytes, b: bytes) -> int:
+    # Binary search over slice comparisons (done in C) rather than a byte loop
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def compute_edit(old: bytes, new: bytes) -> Dict[str, Any]:
+    """
+    The single contiguous edit turning old into new, as tree.edit() arguments.
+
+    The unchanged prefix and suffix are found by comparison; everything in
+    between is treated as replaced.
+    """
+    prefix = _common_prefix_length(old, new)
+    max_suffix = min(len(old), len(new)) - prefix
+    suffix = _common_prefix_length(old[::-1][:max_suffix], new[::-1][:max_suffix])
+    old_end = len(old) - suffix
+    new_end = len(new) - suffix
+    return {
+        'start_byte': prefix,
+        'old_end_byte': old_end,
+        'new_end_byte': new_end,
+        'start_point': _point(old, prefix),
+        'old_end_point': _point(old, old_end),
+        'new_end_point': _point(new, new_end),
+    }
+
+
+def _parse(grammar: str, parser: Any, key: str, source: bytes) -> Any:
+    """Parse source, reusing the previous tree of the same file when there is one."""
+    previous = _trees.get(key)
+    tree = None
+    if previous is not None and previous[0] == grammar:
+        _, old_source, old_tree = previous
+        if old_source == source:
+            tree = old_tree
+        else:
+            old_tree.edit(**compute_edit(old_source, source))
+            tree = parser.parse(source, old_tree)
+    if tree is None:
+        tree = parser.parse(source)
+    _trees[key] = (grammar, source, tree)
+    _trees.move_to_end(key)
+    while len(_trees) > MAX_CACHED_TREES:
+        _trees.popitem(last=False)
+    return tree
+
+
+def _node_text(node: Any) -> str:
+    text = node.text
+    return text.decode('utf-8', errors='replace') if isinstance(text, bytes) else str(text)
+
+
+def _declared_name(node: Any) -> Optional[str]:
+    """Name of a declaration node (following C declarators and Rust impl types)."""
+    for field in ('name', 'declarator', 'type'):
+        child = node.child_by_field_name(field)
+        while child is not None:
+            if child.type in _NAME_TYPES:
+                return _node_text(child)
+            # Pointer/function declarators nest the identifier one level down
+            nested = child.child_by_field_name('declarator') or child.child_by_field_name('name')
+            if nested is None and child.type in ('generic_type', 'scoped_type_identifier'):
+                nested = child.child_by_field_name('type') or child.child_by_field_name('name')
+            child = nested
+    return None
+
+
+def _receiver_type(node: Any) -> Optional[str]:
+    """Go method receiver type name, e.g. 'Server' for `func (s *Server) Run()`."""
+    receiver = node.child_by_field_name('receiver')
+    stack = [receiver] if receiver is not None else []
+    while stack:
+        current = stack.pop()
+        if current.type == 'type_identifier':
+            return _node_text(current)
+        stack.extend(reversed(current.children))
+    return None
+
+
+def _collect_entities(root: Any, grammar: str, component_names: bool) -> List[Dict[str, Any]]:
+    node_types = ENTITY_NODE_TYPES.get(grammar, {})
+    entities: List[Dict[str, Any]] = []
+    # (node, name of the enclosing class-like entity)
+    stack: List[Tuple[Any, Optional[str]]] = [(root, None)]
+    while stack:
+        node, parent = stack.pop()
+        entity_type = node_types.get(node.type)
+        name = None
+        if entity_type is not None:
+            name = _declared_name(node)
+        elif node.type == 'variable_declarator':
+            value = node.child_by_field_name('value')
+            if value is not None and value.type in _FUNCTION_VALUE_TYPES:
+                entity_type, name = 'function', _declared_name(node)
+
+        child_parent = parent
+        if entity_type is not None and name:
+            entity: Dict[str, Any] = {
+                'type': entity_type,
+                'name': name,
+                'start_line': node.start_point[0] + 1,
+                'end_line': node.end_point[0] + 1,
+            }
+            owner = _receiver_type(node) if node.type == 'method_declaration' and grammar == 'go' else parent
+            if entity_type == 'function' and owner:
+                entity['type'] = 'method'
+            if entity['type'] == 'method' and owner:
+                entity['parent_class'] = owner
+            elif entity_type == 'function' and component_names and name[:1].isupper():
+                entity['type'] = 'component'
+            entities.append(entity)
+            if entity_type in _CONTAINER_TYPES:
+                child_parent = name
+        stack.extend((child, child_parent) for child in reversed(node.children))
+
+    entities.sort(key=lambda e: e['start_line'])
+    return entities
+
+
+def extract_tree_sitter_entities(content: str, file_path: Path) -> Optional[List[Dict[str, Any]]]:
+    """
+    Entities of a source file from its syntax tree.
+
+    Returns None when tree-sitter or the file's grammar is not installed, or
+    parsing fails, so the caller can fall back to regex extraction.
+    """
+    grammar = GRAMMAR_BY_EXTENSION.get(file_path.suffix.lower())
+    if tree_sitter is None or grammar is None:
+        return None
+    try:
+        with _lock:
+            parser = _get_parser(grammar)
+            if parser is None:
+                return None
+            tree = _parse(grammar, parser, str(file_path), content.encode('utf-8'))
+        return _collect_entities(
+            tree.root_node, grammar, component_names=file_path.suffix.lower() in ('.jsx', '.tsx')
+        )
+    except Exception as e:
+        logger.warning(f"tree-sitter failed to parse {file_path}: {e}")
+        return None
@@ -28,8 +28,9 @@ from ..utils.tmux_utils import (
     send_command_to_session,
 )
 from ..utils.prompt_templates import build_agent_prompt
-from ..db import get_db_connection, execute_db_write, return_connection
-from ..db.actions.agent_actions_db import log_agent_action_to_db  # For DB logging
+from ..db import get_async_db_connection, execute_db_write, return_async_connection
+from ..db.actions.agent_actions_db import log_agent_action_to_db_async  # For DB logging
+from ..db.actions.task_db import attach_task_notes_async
 
 
 def get_admin_token_suffix(admin_token: str) -> str:
@@ -134,11 +135,11 @@ async def create_agent_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Double check in DB (main.py:1077-1081)
-        cursor.execute("SELECT agent_id FROM agents WHERE agent_id = %s", (agent_id,))
+        await cursor.execute("SELECT agent_id FROM agents WHERE agent_id = %s", (agent_id,))
         if cursor.fetchone():
             return [
                 mcp_types.TextContent(
@@ -149,7 +150,7 @@ async def create_agent_tool_impl(
 
         # Validate task existence and availability
         for task_id in task_ids:
-            cursor.execute(
+            await cursor.execute(
                 "SELECT task_id, assigned_to, status FROM tasks WHERE task_id = %s",
                 (task_id,),
             )
@@ -224,7 +225,7 @@ async def create_agent_tool_impl(
             ]
 
         # Insert into Database (main.py:1107-1117)
-        cursor.execute(
+        await cursor.execute(
             """
             INSERT INTO agents (token, agent_id, capabilities, created_at, status, working_directory, color, updated_at)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
@@ -242,7 +243,7 @@ async def create_agent_tool_impl(
         )
 
         # Log action to agent_actions table (main.py:1119)
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor,
             "admin",
             "created_agent",
@@ -257,7 +258,7 @@ async def create_agent_tool_impl(
         assigned_tasks = []
         for task_id in task_ids:
             # Update task assignment
-            cursor.execute(
+            await cursor.execute(
                 "UPDATE tasks SET assigned_to = %s, status = 'pending', updated_at = %s WHERE task_id = %s",
                 (agent_id, created_at_iso, task_id),
             )
@@ -277,10 +278,10 @@ async def create_agent_tool_impl(
                 g.tasks[task_id]["updated_at"] = created_at_iso
             else:
                 # If task not in cache, fetch from database and add to cache
-                cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id,))
+                await cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id,))
                 task_row = cursor.fetchone()
                 if task_row:
-                    task_data = dict(task_row)
+                    task_data = (await attach_task_notes_async(cursor, [dict(task_row)]))[0]
                     task_data["assigned_to"] = (
                         agent_id  # Ensure assignment is reflected
                     )
@@ -289,7 +290,7 @@ async def create_agent_tool_impl(
                     g.tasks[task_id] = task_data
 
             # Log task assignment action
-            log_agent_action_to_db(
+            await log_agent_action_to_db_async(
                 cursor,
                 "admin",
                 "assigned_task",
@@ -302,13 +303,13 @@ async def create_agent_tool_impl(
 
         # Update agent with current task (set to first task if multiple)
         if assigned_tasks:
-            cursor.execute(
+            await cursor.execute(
                 "UPDATE agents SET current_task = %s WHERE agent_id = %s",
                 (assigned_tasks[0], agent_id),
             )
 
         # Commit the transaction (agent creation + task assignments)
-        conn.commit()
+        await conn.commit()
 
         # Update in-memory state (main.py:1126-1133)
         g.active_agents[new_agent_token] = {
@@ -564,7 +565,7 @@ async def create_agent_tool_impl(
 
     except psycopg2.Error as e_sql:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Database error creating agent {agent_id}: {e_sql}", exc_info=True
         )
@@ -575,7 +576,7 @@ async def create_agent_tool_impl(
         ]
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Unexpected error creating agent {agent_id}: {e}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -584,7 +585,7 @@ async def create_agent_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- view_status tool ---
@@ -713,12 +714,12 @@ async def terminate_agent_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         if not found_agent_token:
             # Check DB if not found in memory (main.py:1285-1290)
-            cursor.execute(
+            await cursor.execute(
                 "SELECT token FROM agents WHERE agent_id = %s AND status != %s",
                 (agent_id_to_terminate, "terminated"),
             )
@@ -739,7 +740,7 @@ async def terminate_agent_tool_impl(
 
         # Update agent status in Database (main.py:1295-1302)
         terminated_at_iso = datetime.datetime.now().isoformat()
-        cursor.execute(
+        await cursor.execute(
             """
             UPDATE agents SET status = %s, terminated_at = %s, updated_at = %s, current_task = NULL
             WHERE agent_id = %s AND status != %s 
@@ -764,13 +765,13 @@ async def terminate_agent_tool_impl(
                 )
             ]
 
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor,
             "admin",
             "terminated_agent",
             details={"agent_id": agent_id_to_terminate},
         )
-        conn.commit()
+        await conn.commit()
 
         # Remove from active in-memory state if present (main.py:1309-1311)
         if found_agent_token and found_agent_token in g.active_agents:
@@ -831,7 +832,7 @@ async def terminate_agent_tool_impl(
 
     except psycopg2.Error as e_sql:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Database error terminating agent {agent_id_to_terminate}: {e_sql}",
             exc_info=True,
@@ -843,7 +844,7 @@ async def terminate_agent_tool_impl(
         ]
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Unexpected error terminating agent {agent_id_to_terminate}: {e}",
             exc_info=True,
@@ -855,7 +856,7 @@ async def terminate_agent_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- view_audit_log tool ---
@@ -996,7 +997,7 @@ async def get_agent_tokens_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Build dynamic query
@@ -1035,7 +1036,7 @@ async def get_agent_tokens_tool_impl(
         query_params.extend([limit, offset])
 
         # Execute query
-        cursor.execute(base_query, query_params)
+        await cursor.execute(base_query, query_params)
         rows = cursor.fetchall()
 
         # Process results
@@ -1083,7 +1084,7 @@ async def get_agent_tokens_tool_impl(
             count_query += " AND created_at <= %s"
             count_params.append(filter_created_before)
 
-        cursor.execute(count_query, count_params)
+        await cursor.execute(count_query, count_params)
         result = cursor.fetchone()
         total_count = result['count'] if isinstance(result, dict) else result[0]
 
@@ -1150,7 +1151,7 @@ async def get_agent_tokens_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- relaunch_agent tool ---
@@ -1181,11 +1182,11 @@ async def relaunch_agent_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Check if agent exists and get current status
-        cursor.execute("SELECT * FROM agents WHERE agent_id = %s", (agent_id,))
+        await cursor.execute("SELECT * FROM agents WHERE agent_id = %s", (agent_id,))
         agent_row = cursor.fetchone()
         if not agent_row:
             return [
@@ -1239,14 +1240,14 @@ async def relaunch_agent_tool_impl(
         agent_token = agent_data.get("token")
         if generate_new_token:
             agent_token = generate_token()
-            cursor.execute(
+            await cursor.execute(
                 "UPDATE agents SET token = %s WHERE agent_id = %s",
                 (agent_token, agent_id),
             )
 
         # Update agent status to active
         updated_at_iso = datetime.datetime.now().isoformat()
-        cursor.execute(
+        await cursor.execute(
             "UPDATE agents SET status = %s, updated_at = %s WHERE agent_id = %s",
             ("active", updated_at_iso, agent_id),
         )
@@ -1264,11 +1265,11 @@ async def relaunch_agent_tool_impl(
         except Exception as e_prompt:
             logger.error(f"Failed to build or send prompt for relaunch: {e_prompt}")
             # Revert status change
-            cursor.execute(
+            await cursor.execute(
                 "UPDATE agents SET status = %s WHERE agent_id = %s",
                 (current_status, agent_id),
             )
-            conn.commit()
+            await conn.commit()
             return [
                 mcp_types.TextContent(
                     type="text", text=f"Failed to send restart prompt: {e_prompt}"
@@ -1291,7 +1292,7 @@ async def relaunch_agent_tool_impl(
             }
 
         # Log the action
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor,
             "admin",
             "relaunch_agent",
@@ -1304,7 +1305,7 @@ async def relaunch_agent_tool_impl(
             },
         )
 
-        conn.commit()
+        await conn.commit()
 
         log_audit(
             "admin",
@@ -1332,7 +1333,7 @@ async def relaunch_agent_tool_impl(
 
     except psycopg2.Error as e_sql:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Database error relaunching agent {agent_id}: {e_sql}", exc_info=True
         )
@@ -1343,7 +1344,7 @@ async def relaunch_agent_tool_impl(
         ]
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Unexpected error relaunching agent {agent_id}: {e}", exc_info=True
         )
@@ -1354,7 +1355,7 @@ async def relaunch_agent_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- Register all admin tools ---
@@ -11,8 +11,8 @@ from ..core.config import logger, get_agent_dir
 from ..core import globals as g  # Not directly used here, but auth uses it
 from ..core.auth import get_agent_id, verify_token
 from ..utils.audit_utils import log_audit
-from ..db import get_db_connection, execute_db_write, return_connection
-from ..db.actions.agent_actions_db import log_agent_action_to_db
+from ..db import get_async_db_connection, execute_db_write, return_async_connection
+from ..db.actions.agent_actions_db import log_agent_action_to_db_async
 
 
 def _analyze_context_health(context_entries: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -129,14 +129,14 @@ def _generate_context_recommendations(
     return recommendations
 
 
-def _create_context_backup(cursor, backup_name: str = None) -> Dict[str, Any]:
+async def _create_context_backup(cursor, backup_name: str = None) -> Dict[str, Any]:
     """Create a backup of all project context data"""
     if not backup_name:
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_name = f"context_backup_{timestamp}"
 
     # Fetch all context data
-    cursor.execute("SELECT * FROM project_context ORDER BY context_key")
+    await cursor.execute("SELECT * FROM project_context ORDER BY context_key")
     all_entries = cursor.fetchall()
 
     backup_data = {
@@ -191,7 +191,7 @@ async def view_project_context_tool_impl(
     response_message: str = ""
 
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Build smart query based on filters
@@ -232,7 +232,7 @@ async def view_project_context_tool_impl(
 
         base_query += f" LIMIT {max_results}"
 
-        cursor.execute(base_query, query_params)
+        await cursor.execute(base_query, query_params)
         rows = cursor.fetchall()
 
         # Process results with enhanced information
@@ -298,7 +298,7 @@ async def view_project_context_tool_impl(
             # Add health analysis if requested
             if show_health_analysis:
                 # Fetch all entries for comprehensive health analysis
-                cursor.execute(
+                await cursor.execute(
                     "SELECT context_key, value, last_updated FROM project_context"
                 )
                 all_entries = [dict(row) for row in cursor.fetchall()]
@@ -415,7 +415,7 @@ async def view_project_context_tool_impl(
         response_message = f"An unexpected error occurred: {e}"
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
     return [mcp_types.TextContent(type="text", text=response_message)]
 
@@ -459,12 +459,12 @@ async def _handle_single_context_update(
     async def write_operation():
         conn = None
         try:
-            conn = get_db_connection()
+            conn = await get_async_db_connection()
             cursor = conn.cursor()
             updated_at_iso = datetime.datetime.now().isoformat()
 
             # Use INSERT ... ON CONFLICT (UPSERT)
-            cursor.execute(
+            await cursor.execute(
                 """
                 INSERT INTO project_context (context_key, value, last_updated, updated_by, description)
                 VALUES (%s, %s, CURRENT_TIMESTAMP, %s, %s)
@@ -486,13 +486,13 @@ async def _handle_single_context_update(
             )
 
             # Log to agent_actions table
-            log_agent_action_to_db(
+            await log_agent_action_to_db_async(
                 cursor,
                 requesting_agent_id,
                 "updated_context",
                 details={"context_key": context_key_to_update, "action": "set/update"},
             )
-            conn.commit()
+            await conn.commit()
 
             logger.info(
                 f"Project context for key '{context_key_to_update}' updated by '{requesting_agent_id}'."
@@ -501,7 +501,7 @@ async def _handle_single_context_update(
 
         except psycopg2.Error as e_sql:
             if conn:
-                conn.rollback()
+                await conn.rollback()
             logger.error(
                 f"Database error updating project context for key '{context_key_to_update}': {e_sql}",
                 exc_info=True,
@@ -509,7 +509,7 @@ async def _handle_single_context_update(
             raise e_sql
         except Exception as e:
             if conn:
-                conn.rollback()
+                await conn.rollback()
             logger.error(
                 f"Unexpected error updating project context for key '{context_key_to_update}': {e}",
                 exc_info=True,
@@ -517,7 +517,7 @@ async def _handle_single_context_update(
             raise e
         finally:
             if conn:
-                return_connection(conn)
+                await return_async_connection(conn)
 
     # Execute the write operation through the queue
     try:
@@ -560,7 +560,7 @@ async def _handle_bulk_context_update(
         failed_updates = []
 
         try:
-            conn = get_db_connection()
+            conn = await get_async_db_connection()
             cursor = conn.cursor()
             updated_at_iso = datetime.datetime.now().isoformat()
 
@@ -577,7 +577,7 @@ async def _handle_bulk_context_update(
                     value_json_str = json.dumps(context_value)
 
                     # Execute update
-                    cursor.execute(
+                    await cursor.execute(
                         """
                         INSERT INTO project_context (context_key, value, last_updated, updated_by, description)
                         VALUES (%s, %s, CURRENT_TIMESTAMP, %s, %s)
@@ -601,7 +601,7 @@ async def _handle_bulk_context_update(
                     results.append(f"✓ Updated '{context_key}'")
 
                     # Log individual action
-                    log_agent_action_to_db(
+                    await log_agent_action_to_db_async(
                         cursor,
                         requesting_agent_id,
                         "bulk_updated_context",
@@ -620,7 +620,7 @@ async def _handle_bulk_context_update(
                         f"✗ Failed '{update.get('context_key', 'unknown')}': {str(e_update)}"
                     )
 
-            conn.commit()
+            await conn.commit()
 
             # Build response
             response_parts = [
@@ -642,19 +642,19 @@ async def _handle_bulk_context_update(
 
         except psycopg2.Error as e_sql:
             if conn:
-                conn.rollback()
+                await conn.rollback()
             logger.error(
                 f"Database error in bulk context update: {e_sql}", exc_info=True
             )
             raise e_sql
         except Exception as e:
             if conn:
-                conn.rollback()
+                await conn.rollback()
             logger.error(f"Unexpected error in bulk context update: {e}", exc_info=True)
             raise e
         finally:
             if conn:
-                return_connection(conn)
+                await return_async_connection(conn)
 
     # Execute the write operation through the queue
     try:
@@ -777,7 +777,7 @@ async def bulk_update_project_context_tool_impl(
     failed_updates = []
 
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
         updated_at_iso = datetime.datetime.now().isoformat()
 
@@ -792,7 +792,7 @@ async def bulk_update_project_context_tool_impl(
                 value_json_str = json.dumps(context_value)
 
                 # Execute update
-                cursor.execute(
+                await cursor.execute(
                     """
                     INSERT INTO project_context (context_key, value, last_updated, updated_by, description)
                     VALUES (%s, %s, CURRENT_TIMESTAMP, %s, %s)
@@ -816,7 +816,7 @@ async def bulk_update_project_context_tool_impl(
                 results.append(f"✓ Updated '{context_key}'")
 
                 # Log individual action
-                log_agent_action_to_db(
+                await log_agent_action_to_db_async(
                     cursor,
                     requesting_agent_id,
                     "bulk_updated_context",
@@ -835,7 +835,7 @@ async def bulk_update_project_context_tool_impl(
                     f"✗ Failed '{update.get('context_key', 'unknown')}': {str(e_update)}"
                 )
 
-        conn.commit()
+        await conn.commit()
 
         # Build response
         response_parts = [
@@ -857,7 +857,7 @@ async def bulk_update_project_context_tool_impl(
 
     except psycopg2.Error as e_sql:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Database error in bulk context update: {e_sql}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -866,7 +866,7 @@ async def bulk_update_project_context_tool_impl(
         ]
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Unexpected error in bulk context update: {e}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -875,7 +875,7 @@ async def bulk_update_project_context_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- backup_project_context tool ---
@@ -911,11 +911,11 @@ async def backup_project_context_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Create backup
-        backup_data = _create_context_backup(cursor, backup_name)
+        backup_data = await _create_context_backup(cursor, backup_name)
 
         # Add health analysis if requested
         if include_health_report:
@@ -975,7 +975,7 @@ async def backup_project_context_tool_impl(
             ]
         )
 
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor,
             requesting_agent_id,
             "backup_project_context",
@@ -990,7 +990,7 @@ async def backup_project_context_tool_impl(
         return [mcp_types.TextContent(type="text", text=f"Error creating backup: {e}")]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- validate_context_consistency tool ---
@@ -1012,14 +1012,14 @@ async def validate_context_consistency_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         issues = []
         warnings = []
 
         # Get all context entries
-        cursor.execute(
+        await cursor.execute(
             "SELECT context_key, value, description, updated_by, last_updated FROM project_context ORDER BY context_key"
         )
         all_entries = [dict(row) for row in cursor.fetchall()]
@@ -1141,7 +1141,7 @@ async def validate_context_consistency_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- Register project context tools ---
@@ -1411,13 +1411,13 @@ async def delete_project_context_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Check which keys exist
         existing_keys = []
         for key in keys_to_delete:
-            cursor.execute(
+            await cursor.execute(
                 "SELECT context_key FROM project_context WHERE context_key = %s", (key,)
             )
             if cursor.fetchone():
@@ -1437,14 +1437,14 @@ async def delete_project_context_tool_impl(
 
         for key in existing_keys:
             # Get current value for logging
-            cursor.execute(
+            await cursor.execute(
                 "SELECT value, description FROM project_context WHERE context_key = %s",
                 (key,),
             )
             row = cursor.fetchone()
 
             if row:
-                cursor.execute(
+                await cursor.execute(
                     "DELETE FROM project_context WHERE context_key = %s", (key,)
                 )
                 if cursor.rowcount > 0:
@@ -1460,7 +1460,7 @@ async def delete_project_context_tool_impl(
                     )
 
         # Log the deletion action
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor=cursor,
             agent_id="admin",
             action_type="deleted_context",
@@ -1472,7 +1472,7 @@ async def delete_project_context_tool_impl(
             },
         )
 
-        conn.commit()
+        await conn.commit()
 
         # Prepare response
         response_parts = [
@@ -1503,7 +1503,7 @@ async def delete_project_context_tool_impl(
 
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Error in delete_project_context_tool_impl: {e}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -1512,7 +1512,7 @@ async def delete_project_context_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # Call registration when this module is imported
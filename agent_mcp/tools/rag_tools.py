@@ -9,7 +9,51 @@ from ..core.config import logger
 from ..core.auth import get_agent_id # Corrected
 from ..utils.audit_utils import log_audit # Corrected
 # Import the core RAG querying logic
-from ..features.rag.query import query_rag_system # Corrected
+from ..features.rag.query import query_rag_system, stream_rag_answer # Corrected
+
+try:
+    # Context of the MCP request being handled (set by the low-level server)
+    from mcp.server.lowlevel.server import request_ctx
+except ImportError:
+    request_ctx = None
+
+
+def _progress_channel():
+    """(progress token, session) if the calling client asked for progress notifications."""
+    if request_ctx is None:
+        return None
+    try:
+        ctx = request_ctx.get()
+    except LookupError:
+        return None
+    progress_token = getattr(ctx.meta, "progressToken", None) if ctx.meta else None
+    if progress_token is None:
+        return None
+    return progress_token, ctx.session
+
+
+async def _stream_answer_as_progress(
+    query_text: str, agent_id: str, format_type: str, progress_token, session
+) -> str:
+    """
+    Run the RAG query with a streamed completion, forwarding each text delta
+    as an MCP progress notification. Returns the full answer for the tool result.
+    """
+    pieces: List[str] = []
+    notify = True
+    async for delta in stream_rag_answer(query_text, agent_id=agent_id, format_type=format_type):
+        pieces.append(delta)
+        if not notify:
+            continue
+        try:
+            await session.send_progress_notification(
+                progress_token, progress=len(pieces), message=delta
+            )
+        except Exception as e:
+            # The final tool result still carries the whole answer
+            logger.debug(f"ask_project_rag: stopped sending progress notifications: {e}")
+            notify = False
+    return "".join(pieces)
 
 # --- ask_project_rag tool ---
 # Original logic for the tool part from main.py: lines 1572-1578 (ask_project_rag_tool function shell)
@@ -39,7 +83,14 @@ async def ask_project_rag_tool_impl(arguments: Dict[str, Any]) -> List[mcp_types
         # Call the core RAG system function from features/rag/query.py
         # This function (query_rag_system) handles all the complex RAG logic.
         # Pass agent_id for context-aware responses and format_type for serialization
-        answer_text = await query_rag_system(query_text, agent_id=requesting_agent_id, format_type=format_type)
+        # Clients that send a progressToken receive the answer as it is generated
+        progress_channel = _progress_channel()
+        if progress_channel:
+            answer_text = await _stream_answer_as_progress(
+                query_text, requesting_agent_id, format_type, *progress_channel
+            )
+        else:
+            answer_text = await query_rag_system(query_text, agent_id=requesting_agent_id, format_type=format_type)
         
         # The query_rag_system already handles internal errors and returns a string.
         return [mcp_types.TextContent(type="text", text=answer_text)]
@@ -55,7 +106,7 @@ async def ask_project_rag_tool_impl(arguments: Dict[str, Any]) -> List[mcp_types
 def register_rag_tools():
     register_tool(
         name="ask_project_rag", # main.py:1869 (schema name)
-        description="Ask a natural language question about the project. The system uses RAG (Retrieval Augmented Generation) to find relevant information from indexed documentation, context, and metadata to synthesize an answer.",
+        description="Ask a natural language question about the project. The system uses RAG (Retrieval Augmented Generation) to find relevant information from indexed documentation, context, and metadata to synthesize an answer. If the request carries a progressToken, the answer is also streamed as progress notifications while it is generated.",
         input_schema={ # From main.py:1870-1881
             "type": "object",
             "properties": {
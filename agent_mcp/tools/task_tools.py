@@ -1,11 +1,14 @@
 # Agent-MCP/mcp_template/mcp_server_src/tools/task_tools.py
+import base64
+import bisect
 import json
 import datetime
 import secrets  # For task_id generation
 import os  # For request_assistance (notifications path)
 import psycopg2  # For database operations
+from collections import OrderedDict
 from pathlib import Path  # For request_assistance
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 import mcp.types as mcp_types
 
@@ -13,16 +16,18 @@ from .registry import register_tool
 from ..core.config import logger, ENABLE_TASK_PLACEMENT_RAG, ALLOW_RAG_OVERRIDE, get_agent_dir
 from ..core import globals as g
 from ..core.auth import verify_token, get_agent_id
+from ..core.task_search import SEARCH_FIELDS, query_terms
 from ..utils.audit_utils import log_audit
-from ..db import get_db_connection, execute_db_write, return_connection
-from ..db.actions.agent_actions_db import log_agent_action_to_db
+from ..db import get_async_db_connection, execute_db_write, return_async_connection
+from ..db.actions.agent_actions_db import log_agent_action_to_db_async
+from ..db.actions.task_db import append_task_notes_async, set_task_dependencies_async
 from ..features.task_placement.validator import validate_task_placement
 from ..features.task_placement.suggestions import (
     format_suggestions_for_agent,
     format_override_reason,
     should_escalate_to_admin,
 )
-from ..features.rag.indexing import index_task_data
+from ..features.rag.task_index_queue import get_task_index_queue
 
 # For request_assistance, generate_id was used. Let's use secrets.token_hex for consistency.
 # from main.py:1191 (generate_id - not present, assuming secrets.token_hex was intended)
@@ -38,21 +43,164 @@ from ..utils.tmux_utils import (
     sanitize_session_name,
 )
 from ..utils.prompt_templates import build_agent_prompt
+from ..utils.tokenizer import TokenBudget, count_tokens, get_token_counter
 
 
 def estimate_tokens(text: str) -> int:
-    """Accurate token estimation using tiktoken for GPT-4"""
+    """Token count for GPT-4 via the shared (cached) tokenizer"""
+    return count_tokens(text, "gpt-4")
+
+
+# Formatted view_tasks entries with their token counts, keyed by
+# (task_id, updated_at, mode). Every task write bumps updated_at, so a
+# changed task gets a new key; stale entries age out of the LRU.
+TASK_VIEW_CACHE_SIZE = 8192
+_task_view_cache: "OrderedDict[Tuple[Any, Any, str], Tuple[str, int]]" = OrderedDict()
+
+
+def _format_task_for_view(task: Dict[str, Any], mode: str, counter) -> Tuple[str, int]:
+    """
+    A task's view_tasks entry ("summary", "detailed" or "dependencies" mode)
+    and its token count. Dependency entries depend on other tasks' state and
+    are not memoized.
+    """
+    updated_at = task.get("updated_at")
+    key = None
+    if mode != "dependencies" and updated_at is not None:
+        key = (task.get("task_id"), updated_at, mode)
+        cached = _task_view_cache.get(key)
+        if cached is not None:
+            _task_view_cache.move_to_end(key)
+            return cached
+
+    if mode == "dependencies":
+        task_text = _format_task_with_dependencies(task)
+    elif mode == "summary":
+        task_text = _format_task_summary(task)
+    else:
+        task_text = _format_task_detailed(task)
+    task_part = f"{task_text}\n"
+    entry = (task_part, counter.count(task_part))
+
+    if key is not None:
+        _task_view_cache[key] = entry
+        while len(_task_view_cache) > TASK_VIEW_CACHE_SIZE:
+            _task_view_cache.popitem(last=False)
+    return entry
+
+
+def _view_sort_value(task: Dict[str, Any], sort_by: str) -> Any:
+    """Sort value of a task for view_tasks (JSON-serializable, for cursors)."""
+    if sort_by == "priority":
+        priority_order = {"high": 3, "medium": 2, "low": 1}
+        return priority_order.get(task.get("priority", "medium"), 2)
+    if sort_by == "status":
+        status_order = {
+            "failed": 5,
+            "in_progress": 4,
+            "pending": 3,
+            "completed": 2,
+            "cancelled": 1,
+        }
+        return status_order.get(task.get("status", "pending"), 3)
+    value = task.get("updated_at" if sort_by == "updated_at" else "created_at")
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value or "")
+
+
+def _encode_view_cursor(sort_by: str, position: Tuple[Any, str]) -> str:
+    """Opaque view_tasks cursor: the sort position of the last task shown."""
+    raw = json.dumps([sort_by, position[0], position[1]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_view_cursor(cursor: str, sort_by: str) -> Optional[Tuple[Any, str]]:
+    """Sort position from a view_tasks cursor; None if invalid or for another sort order."""
     try:
-        import tiktoken
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, sort_value, task_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        return None
+    if cursor_sort_by != sort_by:
+        return None
+    # Must compare with _view_sort_value's values: ranks for priority/status,
+    # ISO timestamps (strings) otherwise
+    if sort_by in ("priority", "status"):
+        value_ok = isinstance(sort_value, int) and not isinstance(sort_value, bool)
+    else:
+        value_ok = isinstance(sort_value, str)
+    if not value_ok or not isinstance(task_id, str):
+        return None
+    return (sort_value, task_id)
+
+
+def _paginate_view_tasks(
+    tasks: List[Dict[str, Any]],
+    sort_by: str,
+    reverse: bool,
+    after: Optional[Tuple[Any, str]],
+) -> Tuple[List[Dict[str, Any]], List[Tuple[Any, str]]]:
+    """
+    Sort tasks by (sort value, task_id) and drop those up to the cursor
+    position. Returns the remaining tasks and their sort positions.
+
+    The position is found by binary search, so the page starts in the right
+    place even if the cursor's task has since changed or been deleted.
+    """
+    keyed = sorted(
+        (((_view_sort_value(task, sort_by), str(task.get("task_id"))), task) for task in tasks),
+        key=lambda pair: pair[0],
+    )
+    positions = [position for position, _ in keyed]
+    if after is not None:
+        if reverse:
+            keyed = keyed[: bisect.bisect_left(positions, after)]
+        else:
+            keyed = keyed[bisect.bisect_right(positions, after):]
+    if reverse:
+        keyed.reverse()
+    return [task for _, task in keyed], [position for position, _ in keyed]
+
+
+def _view_tasks_footer(
+    truncated: bool,
+    tasks_included: int,
+    total_tasks: int,
+    next_cursor: Optional[str],
+    max_tokens: int,
+    summary_mode: bool,
+    show_dependencies: bool,
+    show_health_analysis: bool,
+    show_blocked_tasks: bool,
+) -> List[str]:
+    """Pagination notice and usage tips appended after the listed tasks."""
+    lines = []
+    # Add smart pagination and usage tips
+    if truncated:
+        remaining_count = total_tasks - tasks_included
+        lines.append(f"--- Response truncated to stay under {max_tokens} tokens ---")
+        lines.append(
+            f"Showing {tasks_included} of {total_tasks} tasks ({remaining_count} remaining)"
+        )
+        lines.append(
+            f"Continue: view_tasks(cursor='{next_cursor}', max_tokens={max_tokens})"
+        )
+        if not summary_mode:
+            lines.append(f"Overview: view_tasks(summary_mode=true)")
+    else:
+        lines.append(f"--- All {tasks_included} matching tasks shown ---")
 
-        encoding = tiktoken.encoding_for_model("gpt-4")
-        return len(encoding.encode(text))
-    except ImportError:
-        # Fallback to rough estimation if tiktoken not available
-        return len(text) // 4
-    except Exception:
-        # Fallback for any other tiktoken errors
-        return len(text) // 4
+    # Add smart usage tips
+    lines.append("\n💡 Smart Tips:")
+    if not show_dependencies:
+        lines.append("• Add show_dependencies=true to see dependency chains")
+    if not show_health_analysis:
+        lines.append("• Add show_health_analysis=true for health metrics")
+    if not show_blocked_tasks:
+        lines.append("• Add show_blocked_tasks=true to see only blocked tasks")
+    lines.append("• Use sort_by=[priority|status|updated_at] for different sorting")
+    return lines
 
 
 def _generate_task_id() -> str:
@@ -115,7 +263,7 @@ async def _launch_testing_agent_for_completed_task(
         await _send_escape_to_agent(completed_by_agent)
 
         # 2. Get task details for context
-        cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (completed_task_id,))
+        await cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (completed_task_id,))
         task_row = cursor.fetchone()
         if not task_row:
             logger.error(f"Cannot find completed task {completed_task_id} for testing")
@@ -131,7 +279,7 @@ async def _launch_testing_agent_for_completed_task(
 
         # Check if testing agent already exists
         existing_agent = None
-        cursor.execute(
+        await cursor.execute(
             "SELECT agent_id FROM agents WHERE agent_id = %s", (testing_agent_id,)
         )
         existing_agent = cursor.fetchone()
@@ -154,7 +302,7 @@ async def _launch_testing_agent_for_completed_task(
                 del g.active_agents[testing_agent_id]
 
             # Remove from database
-            cursor.execute("DELETE FROM agents WHERE agent_id = %s", (testing_agent_id,))
+            await cursor.execute("DELETE FROM agents WHERE agent_id = %s", (testing_agent_id,))
             logger.info(f"Cleaned up existing testing agent {testing_agent_id}")
 
         # 5. Create testing agent token and database entry
@@ -172,7 +320,7 @@ async def _launch_testing_agent_for_completed_task(
             return False
 
         # Insert testing agent into database
-        cursor.execute(
+        await cursor.execute(
             """
             INSERT INTO agents (token, agent_id, capabilities, created_at, status, 
                               current_task, working_directory, color)
@@ -338,7 +486,7 @@ async def _launch_testing_agent_for_completed_task(
             )
 
             # Log the testing agent creation
-            log_agent_action_to_db(
+            await log_agent_action_to_db_async(
                 cursor,
                 "admin",
                 "create_testing_agent",
@@ -378,7 +526,7 @@ async def _update_single_task(
     """Helper function to update a single task with smart features"""
 
     # Fetch task current data
-    cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id,))
+    await cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id,))
     task_db_row = cursor.fetchone()
     if not task_db_row:
         return {"success": False, "error": f"Task '{task_id}' not found"}
@@ -401,18 +549,14 @@ async def _update_single_task(
     update_fields_sql = ["status = %s", "updated_at = CURRENT_TIMESTAMP"]
     update_params = [new_status]
 
-    # Handle notes
-    current_notes_list = json.loads(task_current_data.get("notes") or "[]")
+    # Handle notes (appended to task_notes after the update)
+    new_note = None
     if notes_content:
-        current_notes_list.append(
-            {
-                "timestamp": updated_at_iso,
-                "author": requesting_agent_id,
-                "content": notes_content,
-            }
-        )
-    update_fields_sql.append("notes = %s")
-    update_params.append(json.dumps(current_notes_list))
+        new_note = {
+            "timestamp": updated_at_iso,
+            "author": requesting_agent_id,
+            "content": notes_content,
+        }
 
     # Admin-only field updates
     if is_admin_request:
@@ -440,7 +584,6 @@ async def _update_single_task(
         allowed_field_patterns = [
             "status = %s",
             "updated_at = CURRENT_TIMESTAMP",
-            "notes = %s",
             "title = %s",
             "description = %s",
             "priority = %s",
@@ -460,13 +603,18 @@ async def _update_single_task(
         if safe_fields:
             set_clause = ", ".join(safe_fields)
             update_sql = f"UPDATE tasks SET {set_clause} WHERE task_id = %s"
-            cursor.execute(update_sql, tuple(update_params))
+            await cursor.execute(update_sql, tuple(update_params))
+    if new_note:
+        await append_task_notes_async(cursor, [(task_id, new_note)])
+    if is_admin_request and new_depends_on_tasks is not None:
+        await set_task_dependencies_async(cursor, task_id, new_depends_on_tasks)
 
     # Update in-memory cache
     if task_id in g.tasks:
         g.tasks[task_id]["status"] = new_status
         g.tasks[task_id]["updated_at"] = updated_at_iso
-        g.tasks[task_id]["notes"] = current_notes_list
+        if new_note:
+            g.tasks[task_id].add_note(new_note)
         if is_admin_request:
             if new_title is not None:
                 g.tasks[task_id]["title"] = new_title
@@ -484,23 +632,19 @@ async def _update_single_task(
         "parent_task"
     ):
         parent_task_id = task_current_data["parent_task"]
-        cursor.execute("SELECT notes FROM tasks WHERE task_id = %s", (parent_task_id,))
-        parent_row = cursor.fetchone()
-        if parent_row:
-            parent_notes_list = json.loads(parent_row["notes"] or "[]")
-            parent_notes_list.append(
-                {
-                    "timestamp": updated_at_iso,
-                    "author": "system",
-                    "content": f"Subtask '{task_id}' ({task_current_data.get('title', '')}) status changed to: {new_status}",
-                }
-            )
-            cursor.execute(
-                "UPDATE tasks SET notes = %s, updated_at = %s WHERE task_id = %s",
-                (json.dumps(parent_notes_list), updated_at_iso, parent_task_id),
-            )
+        parent_note = {
+            "timestamp": updated_at_iso,
+            "author": "system",
+            "content": f"Subtask '{task_id}' ({task_current_data.get('title', '')}) status changed to: {new_status}",
+        }
+        await cursor.execute(
+            "UPDATE tasks SET updated_at = %s WHERE task_id = %s",
+            (updated_at_iso, parent_task_id),
+        )
+        if cursor.rowcount:
+            await append_task_notes_async(cursor, [(parent_task_id, parent_note)])
             if parent_task_id in g.tasks:
-                g.tasks[parent_task_id]["notes"] = parent_notes_list
+                g.tasks[parent_task_id].add_note(parent_note)
                 g.tasks[parent_task_id]["updated_at"] = updated_at_iso
 
     return {
@@ -508,79 +652,79 @@ async def _update_single_task(
         "task_id": task_id,
         "old_status": task_current_data.get("status"),
         "new_status": new_status,
-        "child_tasks": json.loads(task_current_data.get("child_tasks") or "[]"),
+        # Subtasks are found by their parent_task
+        "child_tasks": g.tasks.children(task_id),
         "depends_on_tasks": json.loads(
             task_current_data.get("depends_on_tasks") or "[]"
         ),
     }
 
 
-def _analyze_task_dependencies(
-    task: Dict[str, Any], all_tasks: Dict[str, Dict[str, Any]]
-) -> Dict[str, Any]:
-    """Analyze task dependencies and blocking conditions"""
-    task_id = task.get("task_id")
-    status = task.get("status")
-    depends_on = task.get("depends_on_tasks", [])
+async def _advance_unblocked_dependents(
+    cursor,
+    completed_task_ids: List[str],
+    requesting_agent_id: str,
+    is_admin_request: bool,
+) -> List[Dict[str, Any]]:
+    """
+    Move pending dependents of just-completed tasks to in_progress once all
+    their dependencies are completed.
+
+    Candidates are picked in SQL from task_dependencies, so tasks created or
+    edited outside g.tasks (REST routes, DB action paths) advance too. One
+    UPDATE advances every pending dependent whose dependencies are all
+    completed, and one INSERT appends their notes, so the number of round
+    trips does not grow with the number of dependents.
+    """
+    if not completed_task_ids:
+        return []
+
+    query = """
+        UPDATE tasks AS t
+        SET status = 'in_progress', updated_at = CURRENT_TIMESTAMP
+        WHERE t.task_id IN (
+              SELECT c.task_id FROM task_dependencies c WHERE c.depends_on = ANY(%s)
+          )
+          AND t.status = 'pending'
+          AND NOT EXISTS (
+              SELECT 1 FROM task_dependencies d
+              LEFT JOIN tasks dep ON dep.task_id = d.depends_on
+              WHERE d.task_id = t.task_id AND dep.status IS DISTINCT FROM 'completed'
+          )
+    """
+    params: List[Any] = [sorted(set(completed_task_ids))]
+    if not is_admin_request:
+        # Same rule as _update_single_task: agents only update their own tasks
+        query += " AND t.assigned_to = %s"
+        params.append(requesting_agent_id)
+    await cursor.execute(query + " RETURNING t.task_id", tuple(params))
+    advanced_ids = sorted(row["task_id"] for row in cursor.fetchall())
+    if not advanced_ids:
+        return []
 
-    if isinstance(depends_on, str):
-        try:
-            depends_on = json.loads(depends_on)
-        except:
-            depends_on = []
-
-    analysis = {
-        "is_blocked": False,
-        "blocking_dependencies": [],
-        "completed_dependencies": [],
-        "missing_dependencies": [],
-        "can_start": True,
-        "blocks_tasks": [],
-        "dependency_health": "healthy",
+    updated_at_iso = datetime.datetime.now().isoformat()
+    note = {
+        "timestamp": updated_at_iso,
+        "author": requesting_agent_id,
+        "content": "Auto-advanced: all dependencies completed",
     }
-
-    # Check dependencies
-    for dep_id in depends_on:
-        if dep_id in all_tasks:
-            dep_task = all_tasks[dep_id]
-            dep_status = dep_task.get("status")
-
-            if dep_status == "completed":
-                analysis["completed_dependencies"].append(dep_id)
-            elif dep_status in ["failed", "cancelled"]:
-                analysis["blocking_dependencies"].append(dep_id)
-                analysis["is_blocked"] = True
-                analysis["can_start"] = False
-            elif dep_status in ["pending", "in_progress"]:
-                analysis["blocking_dependencies"].append(dep_id)
-                if status == "pending":
-                    analysis["can_start"] = False
-        else:
-            analysis["missing_dependencies"].append(dep_id)
-            analysis["is_blocked"] = True
-            analysis["can_start"] = False
-
-    # Find tasks that depend on this one
-    for other_id, other_task in all_tasks.items():
-        other_deps = other_task.get("depends_on_tasks", [])
-        if isinstance(other_deps, str):
-            try:
-                other_deps = json.loads(other_deps)
-            except:
-                other_deps = []
-
-        if task_id in other_deps:
-            analysis["blocks_tasks"].append(other_id)
-
-    # Determine health
-    if analysis["missing_dependencies"]:
-        analysis["dependency_health"] = "critical"
-    elif analysis["is_blocked"] and status == "in_progress":
-        analysis["dependency_health"] = "warning"
-    elif not analysis["can_start"] and status == "pending":
-        analysis["dependency_health"] = "waiting"
-
-    return analysis
+    await append_task_notes_async(cursor, [(task_id, note) for task_id in advanced_ids])
+
+    dependency_updates = []
+    for task_id in advanced_ids:
+        if task_id in g.tasks:
+            g.tasks[task_id]["status"] = "in_progress"
+            g.tasks[task_id]["updated_at"] = updated_at_iso
+            g.tasks[task_id].add_note(dict(note))
+        dependency_updates.append(
+            {
+                "success": True,
+                "task_id": task_id,
+                "old_status": "pending",
+                "new_status": "in_progress",
+            }
+        )
+    return dependency_updates
 
 
 def _calculate_task_health_metrics(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -685,7 +829,7 @@ async def _create_unassigned_tasks(
     async def write_operation():
         conn = None
         try:
-            conn = get_db_connection()
+            conn = await get_async_db_connection()
             cursor = conn.cursor()
             created_tasks = []
             created_at = datetime.datetime.now().isoformat()
@@ -718,7 +862,7 @@ async def _create_unassigned_tasks(
                         "notes": json.dumps([]),
                     }
 
-                    cursor.execute(
+                    await cursor.execute(
                         """
                         INSERT INTO tasks (task_id, title, description, assigned_to, created_by, status, priority, 
                                            created_at, updated_at, parent_task, child_tasks, depends_on_tasks, notes)
@@ -728,7 +872,7 @@ async def _create_unassigned_tasks(
                         task_data,
                     )
 
-                    log_agent_action_to_db(
+                    await log_agent_action_to_db_async(
                         cursor,
                         "admin",
                         "created_unassigned_task",
@@ -763,7 +907,7 @@ async def _create_unassigned_tasks(
                     "notes": json.dumps([]),
                 }
 
-                cursor.execute(
+                await cursor.execute(
                     """
                     INSERT INTO tasks (task_id, title, description, assigned_to, created_by, status, priority, 
                                        created_at, updated_at, parent_task, child_tasks, depends_on_tasks, notes)
@@ -773,7 +917,7 @@ async def _create_unassigned_tasks(
                     task_data,
                 )
 
-                log_agent_action_to_db(
+                await log_agent_action_to_db_async(
                     cursor,
                     "admin",
                     "created_unassigned_task",
@@ -793,17 +937,17 @@ async def _create_unassigned_tasks(
                     "Error: Provide either 'task_title' and 'task_description' for single task, or 'tasks' array for multiple tasks."
                 )
 
-            conn.commit()
+            await conn.commit()
             return created_tasks
 
         except Exception as e:
             if conn:
-                conn.rollback()
+                await conn.rollback()
             logger.error(f"Error creating unassigned tasks: {e}", exc_info=True)
             raise e
         finally:
             if conn:
-                return_connection(conn)
+                await return_async_connection(conn)
 
     # Execute the write operation through the queue
     try:
@@ -848,12 +992,12 @@ async def _assign_to_existing_tasks(
     """Mode 3: Assign agent to existing unassigned tasks"""
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Validate that all tasks exist and are unassigned
         placeholders = ",".join(["%s" for _ in task_ids])
-        cursor.execute(
+        await cursor.execute(
             f"SELECT task_id, title, assigned_to FROM tasks WHERE task_id IN ({placeholders})",
             task_ids,
         )
@@ -886,7 +1030,7 @@ async def _assign_to_existing_tasks(
             ]
 
         # Validate agent exists
-        cursor.execute(
+        await cursor.execute(
             "SELECT agent_id FROM agents WHERE agent_id = %s", (target_agent_id,)
         )
         if not cursor.fetchone():
@@ -899,13 +1043,13 @@ async def _assign_to_existing_tasks(
         # Assign all tasks to the agent
         updated_at = datetime.datetime.now().isoformat()
         for task_id in task_ids:
-            cursor.execute(
+            await cursor.execute(
                 "UPDATE tasks SET assigned_to = %s, updated_at = %s WHERE task_id = %s",
                 (target_agent_id, updated_at, task_id),
             )
 
             # Log the assignment
-            log_agent_action_to_db(
+            await log_agent_action_to_db_async(
                 cursor,
                 "admin",
                 "assigned_task",
@@ -917,17 +1061,17 @@ async def _assign_to_existing_tasks(
             )
 
         # Update agent's current task if they don't have one (use first task)
-        cursor.execute(
+        await cursor.execute(
             "SELECT current_task FROM agents WHERE agent_id = %s", (target_agent_id,)
         )
         agent_row = cursor.fetchone()
         if agent_row and agent_row["current_task"] is None:
-            cursor.execute(
+            await cursor.execute(
                 "UPDATE agents SET current_task = %s, updated_at = %s WHERE agent_id = %s",
                 (task_ids[0], updated_at, target_agent_id),
             )
 
-        conn.commit()
+        await conn.commit()
 
         # Build response
         task_titles = [task["title"] for task in found_tasks]
@@ -948,12 +1092,12 @@ async def _assign_to_existing_tasks(
 
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Error assigning existing tasks: {e}", exc_info=True)
         return [mcp_types.TextContent(type="text", text=f"Error assigning tasks: {e}")]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 async def _create_and_assign_multiple_tasks(
@@ -967,11 +1111,11 @@ async def _create_and_assign_multiple_tasks(
     """Mode 2: Create multiple tasks and assign to agent"""
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Validate agent exists
-        cursor.execute(
+        await cursor.execute(
             "SELECT agent_id FROM agents WHERE agent_id = %s", (target_agent_id,)
         )
         if not cursor.fetchone():
@@ -1010,7 +1154,7 @@ async def _create_and_assign_multiple_tasks(
             }
 
             # Insert task
-            cursor.execute(
+            await cursor.execute(
                 """
                 INSERT INTO tasks (task_id, title, description, assigned_to, created_by, status, priority, 
                                    created_at, updated_at, parent_task, child_tasks, depends_on_tasks, notes)
@@ -1021,7 +1165,7 @@ async def _create_and_assign_multiple_tasks(
             )
 
             # Log the creation
-            log_agent_action_to_db(
+            await log_agent_action_to_db_async(
                 cursor,
                 "admin",
                 "assigned_task",
@@ -1038,17 +1182,17 @@ async def _create_and_assign_multiple_tasks(
             )
 
         # Update agent's current task if they don't have one (use first task)
-        cursor.execute(
+        await cursor.execute(
             "SELECT current_task FROM agents WHERE agent_id = %s", (target_agent_id,)
         )
         agent_row = cursor.fetchone()
         if agent_row and agent_row["current_task"] is None and created_tasks:
-            cursor.execute(
+            await cursor.execute(
                 "UPDATE agents SET current_task = %s, updated_at = %s WHERE agent_id = %s",
                 (created_tasks[0]["task_id"], created_at, target_agent_id),
             )
 
-        conn.commit()
+        await conn.commit()
 
         # Build response
         response_parts = [
@@ -1070,7 +1214,7 @@ async def _create_and_assign_multiple_tasks(
 
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Error creating multiple tasks: {e}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -1079,7 +1223,7 @@ async def _create_and_assign_multiple_tasks(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- assign_task tool ---
@@ -1131,17 +1275,17 @@ async def assign_task_tool_impl(
         return await _create_unassigned_tasks(arguments)
 
     # Convert agent_token to agent_id and validate agent
-    conn = get_db_connection()
+    conn = await get_async_db_connection()
     cursor = conn.cursor()
 
     try:
         # Find agent by token
-        cursor.execute(
+        await cursor.execute(
             "SELECT agent_id FROM agents WHERE token = %s", (target_agent_token,)
         )
         agent_row = cursor.fetchone()
         if not agent_row:
-            return_connection(conn)
+            await return_async_connection(conn)
             return [
                 mcp_types.TextContent(
                     type="text",
@@ -1153,7 +1297,7 @@ async def assign_task_tool_impl(
 
         # Prevent admin agents from being assigned tasks
         if target_agent_id.lower().startswith("admin"):
-            return_connection(conn)
+            await return_async_connection(conn)
             return [
                 mcp_types.TextContent(
                     type="text",
@@ -1162,11 +1306,11 @@ async def assign_task_tool_impl(
             ]
 
     except Exception as e:
-        return_connection(conn)
+        await return_async_connection(conn)
         logger.error(f"Error validating agent token: {e}", exc_info=True)
         return [mcp_types.TextContent(type="text", text=f"Error validating agent: {e}")]
     finally:
-        return_connection(conn)
+        await return_async_connection(conn)
 
     # Determine operation mode and validate parameters (when agent_token provided)
     if task_ids:
@@ -1235,9 +1379,9 @@ async def assign_task_tool_impl(
 
     # Enforce single root task rule BEFORE any processing (Mode 1: Single task)
     if parent_task_id_arg is None:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
-        cursor.execute(
+        await cursor.execute(
             "SELECT COUNT(*) as count, GROUP_CONCAT(task_id) as root_ids FROM tasks WHERE parent_task IS NULL"
         )
         result = cursor.fetchone()
@@ -1247,7 +1391,7 @@ async def assign_task_tool_impl(
         if root_count > 0:
             if auto_suggest_parent:
                 # Use smart parent suggestion
-                parent_suggestions = _suggest_optimal_parent_task(
+                parent_suggestions = await _suggest_optimal_parent_task(
                     cursor, target_agent_id, task_description
                 )
 
@@ -1262,7 +1406,7 @@ async def assign_task_tool_impl(
                         suggestion_text += f"     Status: {suggestion['status']} | Priority: {suggestion['priority']} | {suggestion['reason']}\n"
                 else:
                     # Fallback to basic suggestions
-                    cursor.execute(
+                    await cursor.execute(
                         """
                         SELECT task_id, title, status 
                         FROM tasks 
@@ -1285,7 +1429,7 @@ async def assign_task_tool_impl(
                         suggestion_text += "  Consider assigning to a different agent with active tasks.\n"
             else:
                 # Basic suggestion fallback
-                cursor.execute(
+                await cursor.execute(
                     """
                     SELECT task_id, title, status 
                     FROM tasks 
@@ -1303,7 +1447,7 @@ async def assign_task_tool_impl(
                 for task in suggestions:
                     suggestion_text += f"  - {task['task_id']}: {task['title']} (status: {task['status']})\n"
 
-            return_connection(conn)
+            await return_async_connection(conn)
 
             return [
                 mcp_types.TextContent(
@@ -1316,11 +1460,11 @@ async def assign_task_tool_impl(
                 )
             ]
 
-        return_connection(conn)
+        await return_async_connection(conn)
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Check if agent exists (in memory or DB) - main.py:1331-1346
@@ -1333,7 +1477,7 @@ async def assign_task_tool_impl(
                     break
 
         if not agent_exists_in_memory:
-            cursor.execute(
+            await cursor.execute(
                 "SELECT token FROM agents WHERE agent_id = %s AND status != %s",
                 (target_agent_id, "terminated"),
             )
@@ -1358,7 +1502,7 @@ async def assign_task_tool_impl(
 
         # Check single root task rule
         if parent_task_id_arg is None:
-            cursor.execute(
+            await cursor.execute(
                 "SELECT COUNT(*) as count, MIN(task_id) as root_id FROM tasks WHERE parent_task IS NULL"
             )
             result = cursor.fetchone()
@@ -1381,7 +1525,7 @@ async def assign_task_tool_impl(
         workload_warnings = []
 
         if validate_agent_workload:
-            workload_analysis = _analyze_agent_workload(cursor, target_agent_id)
+            workload_analysis = await _analyze_agent_workload(cursor, target_agent_id)
 
             if not workload_analysis["can_take_new_task"]:
                 warning_msg = (
@@ -1510,11 +1654,11 @@ async def assign_task_tool_impl(
             "depends_on_tasks": json.dumps(
                 final_depends_on_tasks or []
             ),  # Use validated value
-            "notes": json.dumps(initial_notes),
+            "notes": json.dumps([]),  # Notes go to task_notes
         }
 
         # Save task to database (main.py:1370-1373)
-        cursor.execute(
+        await cursor.execute(
             """
             INSERT INTO tasks (task_id, title, description, assigned_to, created_by, status, priority, 
                                created_at, updated_at, parent_task, child_tasks, depends_on_tasks, notes)
@@ -1523,6 +1667,12 @@ async def assign_task_tool_impl(
         """,
             task_data_for_db,
         )
+        await set_task_dependencies_async(
+            cursor, new_task_id, final_depends_on_tasks or [], replace=False
+        )
+        await append_task_notes_async(
+            cursor, [(new_task_id, note) for note in initial_notes]
+        )
 
         # Update agent's current task in DB if they don't have one (main.py:1376-1387)
         should_update_agent_current_task = False
@@ -1533,7 +1683,7 @@ async def assign_task_tool_impl(
             if g.active_agents[assigned_agent_active_token].get("current_task") is None:
                 should_update_agent_current_task = True
         else:  # Agent not in active memory, check DB
-            cursor.execute(
+            await cursor.execute(
                 "SELECT current_task FROM agents WHERE agent_id = %s", (target_agent_id,)
             )
             agent_row = cursor.fetchone()
@@ -1541,19 +1691,19 @@ async def assign_task_tool_impl(
                 should_update_agent_current_task = True
 
         if should_update_agent_current_task:
-            cursor.execute(
+            await cursor.execute(
                 "UPDATE agents SET current_task = %s, updated_at = %s WHERE agent_id = %s",
                 (new_task_id, created_at_iso, target_agent_id),
             )
 
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor,
             "admin",
             "assigned_task",
             task_id=new_task_id,
             details={"agent_id": target_agent_id, "title": task_title},
         )
-        conn.commit()
+        await conn.commit()
 
         # Update agent's current task in memory if needed (main.py:1390-1391)
         if (
@@ -1570,17 +1720,15 @@ async def assign_task_tool_impl(
         task_data_for_memory["depends_on_tasks"] = (
             final_depends_on_tasks or []
         )  # Use validated value
-        task_data_for_memory["notes"] = []
+        task_data_for_memory["notes"] = initial_notes
         g.tasks[new_task_id] = task_data_for_memory
 
         # System 8: Index the new task for RAG
         # Convert database format to the format expected by indexing
         index_data = task_data_for_memory.copy()
         index_data["depends_on_tasks"] = final_depends_on_tasks or []
-        # Start indexing asynchronously (fire and forget)
-        import asyncio
-
-        asyncio.create_task(index_task_data(new_task_id, index_data))
+        # Queue for debounced, batched re-indexing
+        get_task_index_queue().enqueue(new_task_id, index_data)
 
         log_audit(
             "admin",
@@ -1650,7 +1798,7 @@ async def assign_task_tool_impl(
 
     except psycopg2.Error as e_sql:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Database error assigning task to agent {target_agent_id}: {e_sql}",
             exc_info=True,
@@ -1662,7 +1810,7 @@ async def assign_task_tool_impl(
         ]
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Unexpected error assigning task to agent {target_agent_id}: {e}",
             exc_info=True,
@@ -1674,7 +1822,7 @@ async def assign_task_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- create_self_task tool ---
@@ -1711,7 +1859,7 @@ async def create_self_task_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Hierarchy Validation - Agents can NEVER create root tasks
@@ -1721,7 +1869,7 @@ async def create_self_task_tool_impl(
             )
 
             # Find a suitable parent task for the agent
-            cursor.execute(
+            await cursor.execute(
                 """
                 SELECT task_id, title FROM tasks 
                 WHERE assigned_to = %s OR created_by = %s
@@ -1744,7 +1892,7 @@ async def create_self_task_tool_impl(
 
         # Additional check for single root rule even for admin
         if actual_parent_task_id is None:
-            cursor.execute(
+            await cursor.execute(
                 "SELECT COUNT(*) as count, MIN(task_id) as root_id FROM tasks WHERE parent_task IS NULL"
             )
             result = cursor.fetchone()
@@ -1843,7 +1991,7 @@ async def create_self_task_tool_impl(
             "notes": json.dumps([]),
         }
 
-        cursor.execute(
+        await cursor.execute(
             """
             INSERT INTO tasks (task_id, title, description, assigned_to, created_by, status, priority, 
                                created_at, updated_at, parent_task, child_tasks, depends_on_tasks, notes)
@@ -1852,6 +2000,9 @@ async def create_self_task_tool_impl(
         """,
             task_data_for_db,
         )
+        await set_task_dependencies_async(
+            cursor, new_task_id, final_depends_on_tasks or [], replace=False
+        )
 
         # Update agent's current task in DB if they don't have one (main.py:1455-1469)
         should_update_agent_current_task = False
@@ -1861,7 +2012,7 @@ async def create_self_task_tool_impl(
         elif (
             requesting_agent_id != "admin"
         ):  # If not admin and not in active_agents (e.g. loaded from DB only)
-            cursor.execute(
+            await cursor.execute(
                 "SELECT current_task FROM agents WHERE agent_id = %s",
                 (requesting_agent_id,),
             )
@@ -1871,19 +2022,19 @@ async def create_self_task_tool_impl(
         # Admin agents don't have a persistent 'current_task' in the agents table.
 
         if should_update_agent_current_task and requesting_agent_id != "admin":
-            cursor.execute(
+            await cursor.execute(
                 "UPDATE agents SET current_task = %s, updated_at = %s WHERE agent_id = %s",
                 (new_task_id, created_at_iso, requesting_agent_id),
             )
 
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor,
             requesting_agent_id,
             "created_self_task",
             task_id=new_task_id,
             details={"title": task_title},
         )
-        conn.commit()
+        await conn.commit()
 
         if should_update_agent_current_task and agent_auth_token in g.active_agents:
             g.active_agents[agent_auth_token]["current_task"] = new_task_id
@@ -1900,10 +2051,8 @@ async def create_self_task_tool_impl(
         # Convert database format to the format expected by indexing
         index_data = task_data_for_memory.copy()
         # No need to override depends_on_tasks again, it's already the validated value
-        # Start indexing asynchronously (fire and forget)
-        import asyncio
-
-        asyncio.create_task(index_task_data(new_task_id, index_data))
+        # Queue for debounced, batched re-indexing
+        get_task_index_queue().enqueue(new_task_id, index_data)
 
         log_audit(
             requesting_agent_id,
@@ -1924,7 +2073,7 @@ async def create_self_task_tool_impl(
 
     except psycopg2.Error as e_sql:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Database error creating self task for agent {requesting_agent_id}: {e_sql}",
             exc_info=True,
@@ -1936,7 +2085,7 @@ async def create_self_task_tool_impl(
         ]
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Unexpected error creating self task for agent {requesting_agent_id}: {e}",
             exc_info=True,
@@ -1948,7 +2097,7 @@ async def create_self_task_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- update_task_status tool ---
@@ -2019,7 +2168,7 @@ async def update_task_status_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Process tasks (bulk or single)
@@ -2051,7 +2200,7 @@ async def update_task_status_tool_impl(
                 log_details = {"status": new_status, "old_status": result["old_status"]}
                 if notes_content:
                     log_details["notes_added"] = True
-                log_agent_action_to_db(
+                await log_agent_action_to_db_async(
                     cursor,
                     requesting_agent_id,
                     "update_task_status",
@@ -2082,56 +2231,12 @@ async def update_task_status_tool_impl(
 
         # Phase 3: Smart dependency updates if requested
         dependency_updates = []
-        if auto_update_dependencies:
-            for result in results:
-                if result["success"] and new_status == "completed":
-                    # Find tasks that depend on this completed task
-                    cursor.execute("SELECT task_id, depends_on_tasks FROM tasks")
-                    all_tasks = cursor.fetchall()
-
-                    for task_row in all_tasks:
-                        task_deps = json.loads(task_row["depends_on_tasks"] or "[]")
-                        if result["task_id"] in task_deps:
-                            # Check if all dependencies are now completed
-                            all_deps_completed = True
-                            for dep_id in task_deps:
-                                if (
-                                    dep_id != result["task_id"]
-                                ):  # Skip the one we just completed
-                                    cursor.execute(
-                                        "SELECT status FROM tasks WHERE task_id = %s",
-                                        (dep_id,),
-                                    )
-                                    dep_row = cursor.fetchone()
-                                    if not dep_row or dep_row["status"] != "completed":
-                                        all_deps_completed = False
-                                        break
-
-                            if all_deps_completed:
-                                # Auto-update dependent task to in_progress if it's pending
-                                cursor.execute(
-                                    "SELECT status FROM tasks WHERE task_id = %s",
-                                    (task_row["task_id"],),
-                                )
-                                dependent_task = cursor.fetchone()
-                                if (
-                                    dependent_task
-                                    and dependent_task["status"] == "pending"
-                                ):
-                                    dep_result = await _update_single_task(
-                                        cursor,
-                                        task_row["task_id"],
-                                        "in_progress",
-                                        requesting_agent_id,
-                                        is_admin_request,
-                                        f"Auto-advanced: all dependencies completed",
-                                        None,
-                                        None,
-                                        None,
-                                        None,
-                                        None,
-                                    )
-                                    dependency_updates.append(dep_result)
+        if auto_update_dependencies and new_status == "completed":
+            completed_task_ids = [r["task_id"] for r in results if r["success"]]
+            if completed_task_ids:
+                dependency_updates = await _advance_unblocked_dependents(
+                    cursor, completed_task_ids, requesting_agent_id, is_admin_request
+                )
 
         # Phase 3.5: Auto-launch testing agents for completed tasks
         testing_agent_launches = []
@@ -2163,18 +2268,15 @@ async def update_task_status_tool_impl(
                     )
 
         # Commit all changes
-        conn.commit()
-
-        # Phase 4: Re-index updated tasks
-        import asyncio
+        await conn.commit()
 
+        # Phase 4: Re-index updated tasks (coalesced and batched by the queue)
+        task_index_queue = get_task_index_queue()
         for result in results + cascade_results + dependency_updates:
             if result.get("success"):
                 task_id = result["task_id"]
                 if task_id in g.tasks:
-                    asyncio.create_task(
-                        index_task_data(task_id, g.tasks[task_id].copy())
-                    )
+                    task_index_queue.enqueue(task_id, g.tasks[task_id].copy())
 
         # Build comprehensive response
         successful_updates = [r for r in results if r.get("success")]
@@ -2237,7 +2339,7 @@ async def update_task_status_tool_impl(
 
     except psycopg2.Error as e_sql:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Database error updating tasks: {e_sql}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -2246,7 +2348,7 @@ async def update_task_status_tool_impl(
         ]
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Unexpected error updating tasks: {e}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -2255,7 +2357,7 @@ async def update_task_status_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- view_tasks tool ---
@@ -2269,9 +2371,10 @@ async def view_tasks_tool_impl(
     max_tokens = arguments.get(
         "max_tokens", 25000
     )  # Maximum response tokens (default: 25k)
+    cursor = arguments.get("cursor")  # Cursor from a previous page (for pagination)
     start_after = arguments.get(
         "start_after"
-    )  # Task ID to start after (for pagination)
+    )  # Task ID to start after (older form of cursor)
     summary_mode = arguments.get(
         "summary_mode", False
     )  # If True, show only summary info
@@ -2315,92 +2418,31 @@ async def view_tasks_tool_impl(
                 )
             ]
 
-    # Advanced filtering with dependency analysis
+    # Filtering through the task graph's indexes (agent, status, priority,
+    # parent and blocked state), with dependency analysis if requested
     tasks_to_display: List[Dict[str, Any]] = []
+    for task_data in g.tasks.select(
+        status=filter_status,
+        assigned_to=target_agent_id_for_filter,
+        priority=filter_priority,
+        parent_task=filter_parent_task,
+        blocked_only=show_blocked_tasks,
+    ):
+        if show_dependencies:
+            task_data_copy = task_data.copy()
+            task_data_copy["_dependency_analysis"] = g.tasks.analyze_dependencies(task_data)
+            tasks_to_display.append(task_data_copy)
+        else:
+            tasks_to_display.append(task_data)
 
-    # Pre-analyze all tasks for dependency checking
-    all_tasks_dict = dict(g.tasks)
-
-    for task_id, task_data in g.tasks.items():
-        # Basic permission filtering
-        matches_agent = True
-        if (
-            target_agent_id_for_filter
-            and task_data.get("assigned_to") != target_agent_id_for_filter
-        ):
-            matches_agent = False
-
-        # Status filtering
-        matches_status = True
-        if filter_status and task_data.get("status") != filter_status:
-            matches_status = False
-
-        # Priority filtering
-        matches_priority = True
-        if filter_priority and task_data.get("priority") != filter_priority:
-            matches_priority = False
-
-        # Parent task filtering
-        matches_parent = True
-        if filter_parent_task and task_data.get("parent_task") != filter_parent_task:
-            matches_parent = False
-
-        # Blocked tasks filtering
-        matches_blocked = True
-        if show_blocked_tasks:
-            dependency_analysis = _analyze_task_dependencies(task_data, all_tasks_dict)
-            matches_blocked = (
-                dependency_analysis["is_blocked"]
-                or not dependency_analysis["can_start"]
-            )
-
-        if (
-            matches_agent
-            and matches_status
-            and matches_priority
-            and matches_parent
-            and matches_blocked
-        ):
-            # Add dependency analysis if requested
-            if show_dependencies:
-                task_data_copy = task_data.copy()
-                task_data_copy["_dependency_analysis"] = _analyze_task_dependencies(
-                    task_data, all_tasks_dict
-                )
-                tasks_to_display.append(task_data_copy)
-            else:
-                tasks_to_display.append(task_data)
-
-    # Smart sorting
-    def get_sort_key(task):
-        if sort_by == "priority":
-            priority_order = {"high": 3, "medium": 2, "low": 1}
-            return priority_order.get(task.get("priority", "medium"), 2)
-        elif sort_by == "status":
-            status_order = {
-                "failed": 5,
-                "in_progress": 4,
-                "pending": 3,
-                "completed": 2,
-                "cancelled": 1,
-            }
-            return status_order.get(task.get("status", "pending"), 3)
-        elif sort_by == "updated_at":
-            return task.get("updated_at", "")
-        else:  # created_at (default)
-            return task.get("created_at", "")
-
+    # Smart sorting, resuming after the cursor's sort position
     reverse_sort = sort_by in ["created_at", "updated_at", "priority", "status"]
-    tasks_to_display.sort(key=get_sort_key, reverse=reverse_sort)
-
-    # Handle pagination with start_after
-    if start_after:
-        start_index = 0
-        for i, task in enumerate(tasks_to_display):
-            if task.get("task_id") == start_after:
-                start_index = i + 1
-                break
-        tasks_to_display = tasks_to_display[start_index:]
+    resume_after = _decode_view_cursor(cursor, sort_by) if cursor else None
+    if resume_after is None and start_after and start_after in g.tasks:
+        resume_after = (_view_sort_value(g.tasks[start_after], sort_by), str(start_after))
+    tasks_to_display, task_positions = _paginate_view_tasks(
+        tasks_to_display, sort_by, reverse_sort, resume_after
+    )
 
     if not tasks_to_display:
         response_text = "No tasks found matching the criteria."
@@ -2456,67 +2498,81 @@ async def view_tasks_tool_impl(
             )
             response_parts.append("")
 
-        current_tokens = estimate_tokens("\n".join(response_parts))
-        tasks_included = 0
-        last_task_id = None
-        truncated = False
-
-        for task in tasks_to_display:
-            # Format task with dependency info if requested
-            if show_dependencies and "_dependency_analysis" in task:
-                task_text = _format_task_with_dependencies(task)
-            elif summary_mode:
-                task_text = _format_task_summary(task)
-            else:
-                task_text = _format_task_detailed(task)
+        counter = get_token_counter("gpt-4")
+        budget = TokenBudget(max_tokens, counter, separator="\n")
+        for part in response_parts:
+            budget.add(part)
+        footer_options = dict(
+            max_tokens=max_tokens,
+            summary_mode=summary_mode,
+            show_dependencies=show_dependencies,
+            show_health_analysis=show_health_analysis,
+            show_blocked_tasks=show_blocked_tasks,
+        )
+        # Room for the longest footer (the truncation notice with the largest
+        # counts and a cursor built from the longest sort value and task id)
+        def footer_tokens(cursor_position: Tuple[Any, str]) -> int:
+            return budget.separator_tokens + counter.count(
+                "\n".join(
+                    _view_tasks_footer(
+                        True,
+                        len(tasks_to_display),
+                        len(tasks_to_display),
+                        _encode_view_cursor(sort_by, cursor_position),
+                        **footer_options,
+                    )
+                )
+            )
 
-            task_tokens = estimate_tokens(task_text)
+        footer_reserve = footer_tokens(
+            (
+                max((position[0] for position in task_positions), key=lambda v: len(str(v))),
+                max((position[1] for position in task_positions), key=len),
+            )
+        )
+        mode = (
+            "dependencies" if show_dependencies else "summary" if summary_mode else "detailed"
+        )
+        header_part_count = len(response_parts)
+        # Running token total after each included task
+        used_after: List[int] = []
 
-            # Check token limit with safety buffer
-            safety_buffer = 1000
+        # One pass: per-task counts (memoized per task version) added to a running total
+        for task in tasks_to_display:
+            task_part, tokens = _format_task_for_view(task, mode, counter)
+            # Always show at least one task, even if it alone exceeds the budget
             if (
-                current_tokens + task_tokens > (max_tokens - safety_buffer)
-                and tasks_included > 0
+                budget.used + budget.cost(task_part, tokens) + footer_reserve > max_tokens
+                and used_after
             ):
-                truncated = True
                 break
+            response_parts.append(task_part)
+            budget.add(task_part, tokens)
+            used_after.append(budget.used)
+        tasks_included = len(used_after)
+        truncated = tasks_included < len(tasks_to_display)
 
-            response_parts.append(f"{task_text}\n")
-            current_tokens += task_tokens
-            tasks_included += 1
-            last_task_id = task.get("task_id")
-
-        # Add smart pagination and usage tips
+        next_cursor = None
         if truncated:
-            remaining_count = len(tasks_to_display) - tasks_included
-            response_parts.append(
-                f"--- Response truncated to stay under {max_tokens} tokens ---"
-            )
-            response_parts.append(
-                f"Showing {tasks_included} of {len(tasks_to_display)} tasks ({remaining_count} remaining)"
-            )
-            response_parts.append(
-                f"Continue: view_tasks(start_after='{last_task_id}', max_tokens={max_tokens})"
-            )
-            if not summary_mode:
-                response_parts.append(f"Overview: view_tasks(summary_mode=true)")
-        else:
-            response_parts.append(f"--- All {tasks_included} matching tasks shown ---")
-
-        # Add smart usage tips
-        response_parts.append("\n💡 Smart Tips:")
-        if not show_dependencies:
-            response_parts.append(
-                "• Add show_dependencies=true to see dependency chains"
-            )
-        if not show_health_analysis:
-            response_parts.append("• Add show_health_analysis=true for health metrics")
-        if not show_blocked_tasks:
-            response_parts.append(
-                "• Add show_blocked_tasks=true to see only blocked tasks"
+            # The reserve estimates the cursor's size; drop tasks if the real footer does not fit
+            while (
+                tasks_included > 1
+                and used_after[tasks_included - 1]
+                + footer_tokens(task_positions[tasks_included - 1])
+                > max_tokens
+            ):
+                tasks_included -= 1
+            del response_parts[header_part_count + tasks_included:]
+            next_cursor = _encode_view_cursor(sort_by, task_positions[tasks_included - 1])
+
+        response_parts.extend(
+            _view_tasks_footer(
+                truncated,
+                tasks_included,
+                len(tasks_to_display),
+                next_cursor,
+                **footer_options,
             )
-        response_parts.append(
-            "• Use sort_by=[priority|status|updated_at] for different sorting"
         )
 
         response_text = "\n".join(response_parts)
@@ -2665,11 +2721,11 @@ def _format_task_with_dependencies(task: Dict[str, Any]) -> str:
     return task_text
 
 
-def _analyze_agent_workload(cursor, agent_id: str) -> Dict[str, Any]:
+async def _analyze_agent_workload(cursor, agent_id: str) -> Dict[str, Any]:
     """Analyze agent's current workload and capacity"""
 
     # Get agent's current tasks
-    cursor.execute(
+    await cursor.execute(
         """
         SELECT task_id, title, status, priority, created_at, updated_at 
         FROM tasks 
@@ -2758,13 +2814,13 @@ def _generate_workload_recommendations(
     return recommendations
 
 
-def _suggest_optimal_parent_task(
+async def _suggest_optimal_parent_task(
     cursor, agent_id: str, task_description: str
 ) -> Dict[str, Any]:
     """Suggest optimal parent task based on context and agent workload"""
 
     # Get agent's current tasks that could be parents
-    cursor.execute(
+    await cursor.execute(
         """
         SELECT task_id, title, description, status, priority 
         FROM tasks 
@@ -2853,10 +2909,10 @@ async def request_assistance_tool_impl(
     # For robustness, let's fetch from DB, then update g.tasks.
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (parent_task_id,))
+        await cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (parent_task_id,))
         parent_task_db_row = cursor.fetchone()
         if not parent_task_db_row:
             return [
@@ -2942,7 +2998,7 @@ async def request_assistance_tool_impl(
             "child_tasks": json.dumps([]),
             "notes": json.dumps([]),
         }
-        cursor.execute(
+        await cursor.execute(
             """
             INSERT INTO tasks (task_id, title, description, status, assigned_to, priority, created_at, 
                                updated_at, parent_task, depends_on_tasks, created_by, child_tasks, notes)
@@ -2958,26 +3014,23 @@ async def request_assistance_tool_impl(
         )
         parent_child_tasks_list.append(child_task_id)
 
-        parent_notes_list = json.loads(parent_task_current_data.get("notes") or "[]")
-        parent_notes_list.append(
-            {
-                "timestamp": timestamp_iso,
-                "author": requesting_agent_id,
-                "content": f"Requested assistance: {assistance_description}. Assistance task created: {child_task_id}",
-            }
-        )
+        parent_note = {
+            "timestamp": timestamp_iso,
+            "author": requesting_agent_id,
+            "content": f"Requested assistance: {assistance_description}. Assistance task created: {child_task_id}",
+        }
 
-        cursor.execute(
-            "UPDATE tasks SET child_tasks = %s, notes = %s, updated_at = %s WHERE task_id = %s",
+        await cursor.execute(
+            "UPDATE tasks SET child_tasks = %s, updated_at = %s WHERE task_id = %s",
             (
                 json.dumps(parent_child_tasks_list),
-                json.dumps(parent_notes_list),
                 timestamp_iso,
                 parent_task_id,
             ),
         )
+        await append_task_notes_async(cursor, [(parent_task_id, parent_note)])
 
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor,
             requesting_agent_id,
             "request_assistance",
@@ -2987,13 +3040,13 @@ async def request_assistance_tool_impl(
                 "child_task_id": child_task_id,
             },
         )
-        conn.commit()
+        await conn.commit()
 
         # Update in-memory caches (g.tasks)
         # Parent task
         if parent_task_id in g.tasks:
             g.tasks[parent_task_id]["child_tasks"] = parent_child_tasks_list
-            g.tasks[parent_task_id]["notes"] = parent_notes_list
+            g.tasks[parent_task_id].add_note(parent_note)
             g.tasks[parent_task_id]["updated_at"] = timestamp_iso
         # New child task
         child_task_mem_data = child_task_db_data.copy()
@@ -3059,7 +3112,7 @@ async def request_assistance_tool_impl(
 
     except psycopg2.Error as e_sql:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Database error requesting assistance for task {parent_task_id}: {e_sql}",
             exc_info=True,
@@ -3071,7 +3124,7 @@ async def request_assistance_tool_impl(
         ]
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(
             f"Unexpected error requesting assistance for task {parent_task_id}: {e}",
             exc_info=True,
@@ -3083,7 +3136,7 @@ async def request_assistance_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- bulk_task_operations tool ---
@@ -3114,7 +3167,7 @@ async def bulk_task_operations_tool_impl(
     # Process operations in a single transaction
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         results = []
@@ -3137,7 +3190,7 @@ async def bulk_task_operations_tool_impl(
                 continue
 
             # Verify task exists and permissions
-            cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id,))
+            await cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id,))
             task_row = cursor.fetchone()
             if not task_row:
                 results.append(f"Operation {i+1}: Task '{task_id}' not found")
@@ -3183,23 +3236,10 @@ async def bulk_task_operations_tool_impl(
                     update_fields = ["status = %s", "updated_at = CURRENT_TIMESTAMP"]
                     update_params = [new_status]
 
-                    # Handle notes
-                    current_notes = json.loads(task_data.get("notes") or "[]")
-                    if notes_content:
-                        current_notes.append(
-                            {
-                                "timestamp": updated_at_iso,
-                                "author": requesting_agent_id,
-                                "content": notes_content,
-                            }
-                        )
-                    update_fields.append("notes = %s")
-                    update_params.append(json.dumps(current_notes))
-
                     update_params.append(task_id)
 
                     # Validate field assignments for security
-                    allowed_bulk_fields = ["status = %s", "updated_at = CURRENT_TIMESTAMP", "notes = %s"]
+                    allowed_bulk_fields = ["status = %s", "updated_at = CURRENT_TIMESTAMP"]
                     safe_fields = [
                         field for field in update_fields if field in allowed_bulk_fields
                     ]
@@ -3209,13 +3249,24 @@ async def bulk_task_operations_tool_impl(
                         bulk_update_sql = (
                             f"UPDATE tasks SET {set_clause} WHERE task_id = %s"
                         )
-                        cursor.execute(bulk_update_sql, tuple(update_params))
+                        await cursor.execute(bulk_update_sql, tuple(update_params))
+
+                    # Handle notes
+                    new_note = None
+                    if notes_content:
+                        new_note = {
+                            "timestamp": updated_at_iso,
+                            "author": requesting_agent_id,
+                            "content": notes_content,
+                        }
+                        await append_task_notes_async(cursor, [(task_id, new_note)])
 
                     # Update in-memory cache
                     if task_id in g.tasks:
                         g.tasks[task_id]["status"] = new_status
                         g.tasks[task_id]["updated_at"] = updated_at_iso
-                        g.tasks[task_id]["notes"] = current_notes
+                        if new_note:
+                            g.tasks[task_id].add_note(new_note)
 
                     results.append(
                         f"Operation {i+1}: Task '{task_id}' status updated to '{new_status}'"
@@ -3234,7 +3285,7 @@ async def bulk_task_operations_tool_impl(
                         )
                         continue
 
-                    cursor.execute(
+                    await cursor.execute(
                         "UPDATE tasks SET priority = %s, updated_at = %s WHERE task_id = %s",
                         (new_priority, updated_at_iso, task_id),
                     )
@@ -3256,22 +3307,20 @@ async def bulk_task_operations_tool_impl(
                         )
                         continue
 
-                    current_notes = json.loads(task_data.get("notes") or "[]")
-                    current_notes.append(
-                        {
-                            "timestamp": updated_at_iso,
-                            "author": requesting_agent_id,
-                            "content": note_content,
-                        }
-                    )
+                    new_note = {
+                        "timestamp": updated_at_iso,
+                        "author": requesting_agent_id,
+                        "content": note_content,
+                    }
 
-                    cursor.execute(
-                        "UPDATE tasks SET notes = %s, updated_at = %s WHERE task_id = %s",
-                        (json.dumps(current_notes), updated_at_iso, task_id),
+                    await cursor.execute(
+                        "UPDATE tasks SET updated_at = %s WHERE task_id = %s",
+                        (updated_at_iso, task_id),
                     )
+                    await append_task_notes_async(cursor, [(task_id, new_note)])
 
                     if task_id in g.tasks:
-                        g.tasks[task_id]["notes"] = current_notes
+                        g.tasks[task_id].add_note(new_note)
                         g.tasks[task_id]["updated_at"] = updated_at_iso
 
                     results.append(f"Operation {i+1}: Note added to task '{task_id}'")
@@ -3285,7 +3334,7 @@ async def bulk_task_operations_tool_impl(
                         )
                         continue
 
-                    cursor.execute(
+                    await cursor.execute(
                         "UPDATE tasks SET assigned_to = %s, updated_at = %s WHERE task_id = %s",
                         (new_assigned_to, updated_at_iso, task_id),
                     )
@@ -3313,7 +3362,7 @@ async def bulk_task_operations_tool_impl(
                 logger.error(f"Error in bulk operation {i+1}: {e}", exc_info=True)
 
         # Log the bulk operation
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor,
             requesting_agent_id,
             "bulk_task_operations",
@@ -3322,7 +3371,7 @@ async def bulk_task_operations_tool_impl(
                 "success_count": len([r for r in results if "Error" not in r]),
             },
         )
-        conn.commit()
+        await conn.commit()
 
         response_text = (
             f"Bulk Task Operations Results ({len(operations)} operations):\n\n"
@@ -3338,7 +3387,7 @@ async def bulk_task_operations_tool_impl(
 
     except psycopg2.Error as e_sql:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Database error in bulk task operations: {e_sql}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -3347,7 +3396,7 @@ async def bulk_task_operations_tool_impl(
         ]
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Unexpected error in bulk task operations: {e}", exc_info=True)
         return [
             mcp_types.TextContent(
@@ -3356,7 +3405,7 @@ async def bulk_task_operations_tool_impl(
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # --- search_tasks tool ---
@@ -3386,11 +3435,8 @@ async def search_tasks_tool_impl(
 
     is_admin_request = verify_token(agent_auth_token, "admin")
 
-    # Prepare search terms
-    search_terms = [
-        term.strip().lower() for term in search_query.split() if len(term.strip()) > 2
-    ]
-    if not search_terms:
+    # Prepare search terms (same tokenization as the search index)
+    if not query_terms(search_query):
         return [
             mcp_types.TextContent(
                 type="text",
@@ -3398,71 +3444,39 @@ async def search_tasks_tool_impl(
             )
         ]
 
-    # Get tasks user can see
-    candidate_tasks = []
-    for task_id, task_data in g.tasks.items():
-        # Permission check
-        if not is_admin_request and task_data.get("assigned_to") != requesting_agent_id:
-            continue
-
-        # Status filter
-        if status_filter and task_data.get("status") != status_filter:
-            continue
-
-        candidate_tasks.append(task_data)
-
-    if not candidate_tasks:
+    if not g.tasks:
         return [
             mcp_types.TextContent(
                 type="text", text="No tasks found matching the criteria."
             )
         ]
 
-    # Score tasks by relevance
-    scored_results = []
-    for task in candidate_tasks:
-        score = 0.0
-        matched_fields = []
-
-        # Search in title (highest weight)
-        title = (task.get("title") or "").lower()
-        title_matches = sum(1 for term in search_terms if term in title)
-        if title_matches > 0:
-            score += title_matches * 3.0
-            matched_fields.append(f"title ({title_matches} terms)")
-
-        # Search in description (medium weight)
-        description = (task.get("description") or "").lower()
-        desc_matches = sum(1 for term in search_terms if term in description)
-        if desc_matches > 0:
-            score += desc_matches * 2.0
-            matched_fields.append(f"description ({desc_matches} terms)")
-
-        # Search in notes (lower weight)
-        if include_notes:
-            notes = task.get("notes", [])
-            if isinstance(notes, str):
-                try:
-                    notes = json.loads(notes)
-                except:
-                    notes = []
-
-            notes_content = " ".join(
-                [note.get("content", "") for note in notes if isinstance(note, dict)]
-            ).lower()
-            notes_matches = sum(1 for term in search_terms if term in notes_content)
-            if notes_matches > 0:
-                score += notes_matches * 1.0
-                matched_fields.append(f"notes ({notes_matches} terms)")
-
-        # Exact phrase bonus
-        full_text = f"{title} {description}".lower()
-        if search_query.lower() in full_text:
-            score += 2.0
-            matched_fields.append("exact phrase")
-
-        if score > 0:
-            scored_results.append((task, score, matched_fields))
+    def can_see(task_id: str) -> bool:
+        task_data = g.tasks[task_id]
+        # Permission check
+        if not is_admin_request and task_data.get("assigned_to") != requesting_agent_id:
+            return False
+        # Status filter
+        return not status_filter or task_data.get("status") == status_filter
+
+    # Score tasks by relevance (BM25 over the inverted index, top-k by heap;
+    # ties go to the most recently updated task)
+    fields = SEARCH_FIELDS if include_notes else ("title", "description")
+    hits = g.tasks.search_index.search(
+        search_query,
+        max_results,
+        fields=fields,
+        accept=can_see,
+        tiebreak=lambda task_id: str(g.tasks[task_id].get("updated_at") or ""),
+    )
+    scored_results = [
+        (
+            g.tasks[task_id],
+            score,
+            [f"{field} ({matched[field]} terms)" for field in fields if field in matched],
+        )
+        for task_id, score, matched in hits
+    ]
 
     if not scored_results:
         return [
@@ -3471,12 +3485,6 @@ async def search_tasks_tool_impl(
             )
         ]
 
-    # Sort by relevance (score descending, then by updated_at descending)
-    scored_results.sort(key=lambda x: (x[1], x[0].get("updated_at", "")), reverse=True)
-
-    # Limit results
-    scored_results = scored_results[:max_results]
-
     # Format response with token awareness
     response_parts = [
         f"Search Results for '{search_query}' ({len(scored_results)} found):\n"
@@ -3793,9 +3801,13 @@ def register_task_tools():
                     "minimum": 1000,
                     "maximum": 25000,
                 },
+                "cursor": {
+                    "type": "string",
+                    "description": "Cursor returned by the previous page (for pagination)",
+                },
                 "start_after": {
                     "type": "string",
-                    "description": "Task ID to start after (for pagination)",
+                    "description": "Task ID to start after (for pagination; prefer cursor)",
                 },
                 "summary_mode": {
                     "type": "boolean",
@@ -4024,11 +4036,11 @@ async def delete_task_tool_impl(
 
     conn = None
     try:
-        conn = get_db_connection()
+        conn = await get_async_db_connection()
         cursor = conn.cursor()
 
         # Check if task exists
-        cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id,))
+        await cursor.execute("SELECT * FROM tasks WHERE task_id = %s", (task_id,))
         task_row = cursor.fetchone()
 
         if not task_row:
@@ -4040,9 +4052,11 @@ async def delete_task_tool_impl(
 
         task_data = dict(task_row)
 
-        # Parse relationships
-        child_tasks = json.loads(task_data.get("child_tasks", "[]"))
-        depends_on_tasks = json.loads(task_data.get("depends_on_tasks", "[]"))
+        # Subtasks are found by their parent_task
+        await cursor.execute(
+            "SELECT task_id FROM tasks WHERE parent_task = %s", (task_id,)
+        )
+        child_tasks = [row["task_id"] for row in cursor.fetchall()]
 
         # Check for child tasks
         if child_tasks and not force_delete:
@@ -4054,9 +4068,10 @@ async def delete_task_tool_impl(
             ]
 
         # Check for tasks that depend on this one
-        cursor.execute(
-            "SELECT task_id, title FROM tasks WHERE json_extract(depends_on_tasks, '$') LIKE %s",
-            (f'%"{task_id}"%',),
+        await cursor.execute(
+            "SELECT t.task_id, t.title, t.depends_on_tasks FROM task_dependencies d "
+            "JOIN tasks t ON t.task_id = d.task_id WHERE d.depends_on = %s",
+            (task_id,),
         )
         dependent_tasks = cursor.fetchall()
 
@@ -4073,11 +4088,14 @@ async def delete_task_tool_impl(
 
         # Begin cascade deletion operations
         cascade_operations = []
+        # One timestamp for the DB rows and the in-memory tasks, so cached
+        # views of the parent and dependents (keyed on updated_at) are redone
+        updated_at_iso = datetime.datetime.now().isoformat()
 
         # Update parent task to remove this child
         if task_data.get("parent_task"):
             parent_id = task_data["parent_task"]
-            cursor.execute(
+            await cursor.execute(
                 "SELECT child_tasks FROM tasks WHERE task_id = %s", (parent_id,)
             )
             parent_row = cursor.fetchone()
@@ -4086,54 +4104,44 @@ async def delete_task_tool_impl(
                 parent_children = json.loads(parent_row["child_tasks"] or "[]")
                 if task_id in parent_children:
                     parent_children.remove(task_id)
-                    cursor.execute(
+                    await cursor.execute(
                         "UPDATE tasks SET child_tasks = %s, updated_at = %s WHERE task_id = %s",
-                        (
-                            json.dumps(parent_children),
-                            datetime.datetime.now().isoformat(),
-                            parent_id,
-                        ),
+                        (json.dumps(parent_children), updated_at_iso, parent_id),
                     )
                     cascade_operations.append(
                         f"Updated parent task '{parent_id}' to remove child reference"
                     )
 
         # Handle child tasks
+        deleted_child_ids = []
         if child_tasks and force_delete:
             for child_id in child_tasks:
-                cursor.execute("DELETE FROM tasks WHERE task_id = %s", (child_id,))
+                await cursor.execute("DELETE FROM tasks WHERE task_id = %s", (child_id,))
                 if cursor.rowcount > 0:
+                    deleted_child_ids.append(child_id)
                     cascade_operations.append(f"Deleted child task '{child_id}'")
 
         # Handle dependent tasks
         if dependent_tasks and force_delete:
+            await cursor.execute(
+                "DELETE FROM task_dependencies WHERE depends_on = %s", (task_id,)
+            )
             for dep_row in dependent_tasks:
                 dep_id = dep_row["task_id"]
-                cursor.execute(
-                    "SELECT depends_on_tasks FROM tasks WHERE task_id = %s", (dep_id,)
+                dep_dependencies = json.loads(dep_row["depends_on_tasks"] or "[]")
+                if task_id in dep_dependencies:
+                    dep_dependencies.remove(task_id)
+                # Keep the legacy depends_on_tasks column in step with task_dependencies
+                await cursor.execute(
+                    "UPDATE tasks SET depends_on_tasks = %s, updated_at = %s WHERE task_id = %s",
+                    (json.dumps(dep_dependencies), updated_at_iso, dep_id),
+                )
+                cascade_operations.append(
+                    f"Updated task '{dep_id}' to remove dependency on '{task_id}'"
                 )
-                dep_task_row = cursor.fetchone()
-
-                if dep_task_row:
-                    dep_dependencies = json.loads(
-                        dep_task_row["depends_on_tasks"] or "[]"
-                    )
-                    if task_id in dep_dependencies:
-                        dep_dependencies.remove(task_id)
-                        cursor.execute(
-                            "UPDATE tasks SET depends_on_tasks = %s, updated_at = %s WHERE task_id = %s",
-                            (
-                                json.dumps(dep_dependencies),
-                                datetime.datetime.now().isoformat(),
-                                dep_id,
-                            ),
-                        )
-                        cascade_operations.append(
-                            f"Updated task '{dep_id}' to remove dependency on '{task_id}'"
-                        )
 
         # Delete the main task
-        cursor.execute("DELETE FROM tasks WHERE task_id = %s", (task_id,))
+        await cursor.execute("DELETE FROM tasks WHERE task_id = %s", (task_id,))
 
         if cursor.rowcount == 0:
             return [
@@ -4143,7 +4151,7 @@ async def delete_task_tool_impl(
             ]
 
         # Log the deletion action
-        log_agent_action_to_db(
+        await log_agent_action_to_db_async(
             cursor=cursor,
             agent_id="admin",
             action_type="deleted_task",
@@ -4155,7 +4163,26 @@ async def delete_task_tool_impl(
             },
         )
 
-        conn.commit()
+        await conn.commit()
+
+        # Drop the deleted tasks from g.tasks (and so from its indexes and the
+        # search index), and update the parent and dependents held in memory
+        for deleted_id in [task_id] + deleted_child_ids:
+            g.tasks.pop(deleted_id, None)
+        parent_id = task_data.get("parent_task")
+        if parent_id in g.tasks and task_id in g.tasks[parent_id].get("child_tasks", []):
+            g.tasks[parent_id]["child_tasks"] = [
+                child_id for child_id in g.tasks[parent_id]["child_tasks"] if child_id != task_id
+            ]
+            g.tasks[parent_id]["updated_at"] = updated_at_iso
+        if force_delete:
+            for dep_row in dependent_tasks:
+                dependent = g.tasks.get(dep_row["task_id"])
+                if dependent is not None:
+                    dependent["depends_on_tasks"] = [
+                        dep_id for dep_id in dependent.get("depends_on_tasks", []) if dep_id != task_id
+                    ]
+                    dependent["updated_at"] = updated_at_iso
 
         # Prepare response
         response_parts = [
@@ -4175,14 +4202,14 @@ async def delete_task_tool_impl(
 
     except Exception as e:
         if conn:
-            conn.rollback()
+            await conn.rollback()
         logger.error(f"Error in delete_task_tool_impl: {e}", exc_info=True)
         return [
             mcp_types.TextContent(type="text", text=f"Error deleting task: {str(e)}")
         ]
     finally:
         if conn:
-            return_connection(conn)
+            await return_async_connection(conn)
 
 
 # Call registration when this module is imported
@@ -29,6 +29,21 @@ _rag_queries_total = 0
 _rag_query_times: list[float] = []
 _rag_query_errors = 0
 _rag_results_count: list[int] = []
+_rag_index_rows_inserted_total = 0
+_rag_index_insert_rates: list[float] = []
+_rag_query_embedding_cache_hits = 0
+_rag_query_embedding_cache_misses = 0
+_rag_answer_cache_hits = 0
+_rag_answer_cache_misses = 0
+_rag_first_token_times: list[float] = []
+_rag_task_index_queue_depth = 0
+_rag_task_index_flushes_total = 0
+_rag_task_index_flush_errors = 0
+_rag_task_index_tasks_total = 0
+_rag_task_index_flush_times: list[float] = []
+_rag_rerank_times: list[float] = []
+_rag_rerank_cache_hits = 0
+_rag_rerank_cache_misses = 0
 
 # Database metrics
 _db_connection_acquire_times: list[float] = []
@@ -116,6 +131,77 @@ def record_rag_query(query_time_ms: float = None, results_count: int = None, err
                 _rag_results_count.pop(0)
 
 
+def record_rag_index_insert(rows: int, duration_seconds: float):
+    """Record a bulk write of RAG chunks/embeddings."""
+    global _rag_index_rows_inserted_total
+    with _metrics_lock:
+        _rag_index_rows_inserted_total += rows
+        if rows and duration_seconds > 0:
+            _rag_index_insert_rates.append(rows / duration_seconds)
+            if len(_rag_index_insert_rates) > 1000:
+                _rag_index_insert_rates.pop(0)
+
+
+def record_rag_query_embedding_cache(hit: bool):
+    """Record a query embedding cache lookup."""
+    global _rag_query_embedding_cache_hits, _rag_query_embedding_cache_misses
+    with _metrics_lock:
+        if hit:
+            _rag_query_embedding_cache_hits += 1
+        else:
+            _rag_query_embedding_cache_misses += 1
+
+
+def record_rag_answer_cache(hit: bool):
+    """Record a semantic answer cache lookup."""
+    global _rag_answer_cache_hits, _rag_answer_cache_misses
+    with _metrics_lock:
+        if hit:
+            _rag_answer_cache_hits += 1
+        else:
+            _rag_answer_cache_misses += 1
+
+
+def record_rag_first_token(first_token_time_ms: float):
+    """Record the time from a streamed RAG query to its first answer token."""
+    with _metrics_lock:
+        _rag_first_token_times.append(first_token_time_ms)
+        if len(_rag_first_token_times) > 1000:
+            _rag_first_token_times.pop(0)
+
+
+def set_rag_task_index_queue_depth(depth: int):
+    """Set the number of tasks waiting in the task index queue."""
+    global _rag_task_index_queue_depth
+    with _metrics_lock:
+        _rag_task_index_queue_depth = depth
+
+
+def record_rag_task_index_flush(tasks: int, duration_seconds: float, success: bool = True):
+    """Record a batch written by the task index queue."""
+    global _rag_task_index_flushes_total, _rag_task_index_flush_errors, _rag_task_index_tasks_total
+    with _metrics_lock:
+        _rag_task_index_flushes_total += 1
+        if success:
+            _rag_task_index_tasks_total += tasks
+        else:
+            _rag_task_index_flush_errors += 1
+        _rag_task_index_flush_times.append(duration_seconds * 1000)
+        if len(_rag_task_index_flush_times) > 1000:
+            _rag_task_index_flush_times.pop(0)
+
+
+def record_rag_rerank(duration_seconds: float, cache_hits: int = 0, cache_misses: int = 0):
+    """Record a rerank of retrieved chunks and its score cache lookups."""
+    global _rag_rerank_cache_hits, _rag_rerank_cache_misses
+    with _metrics_lock:
+        _rag_rerank_cache_hits += cache_hits
+        _rag_rerank_cache_misses += cache_misses
+        _rag_rerank_times.append(duration_seconds * 1000)
+        if len(_rag_rerank_times) > 1000:
+            _rag_rerank_times.pop(0)
+
+
 def record_db_connection_acquire(acquire_time_ms: float = None):
     """Record a database connection acquisition."""
     global _db_connection_acquire_times
@@ -189,6 +275,26 @@ def get_all_metrics() -> Dict[str, Any]:
                 "query_time_avg_ms": avg(_rag_query_times),
                 "query_time_p95_ms": p95(_rag_query_times),
                 "results_avg": avg(_rag_results_count) if _rag_results_count else 0.0,
+                "index_rows_inserted_total": _rag_index_rows_inserted_total,
+                "index_insert_rows_per_sec_avg": avg(_rag_index_insert_rates),
+                "index_insert_rows_per_sec_last": (
+                    _rag_index_insert_rates[-1] if _rag_index_insert_rates else 0.0
+                ),
+                "query_embedding_cache_hits": _rag_query_embedding_cache_hits,
+                "query_embedding_cache_misses": _rag_query_embedding_cache_misses,
+                "answer_cache_hits": _rag_answer_cache_hits,
+                "answer_cache_misses": _rag_answer_cache_misses,
+                "first_token_time_avg_ms": avg(_rag_first_token_times),
+                "first_token_time_p95_ms": p95(_rag_first_token_times),
+                "task_index_queue_depth": _rag_task_index_queue_depth,
+                "task_index_flushes_total": _rag_task_index_flushes_total,
+                "task_index_flush_errors": _rag_task_index_flush_errors,
+                "task_index_tasks_total": _rag_task_index_tasks_total,
+                "task_index_flush_time_avg_ms": avg(_rag_task_index_flush_times),
+                "rerank_time_avg_ms": avg(_rag_rerank_times),
+                "rerank_time_p95_ms": p95(_rag_rerank_times),
+                "rerank_cache_hits": _rag_rerank_cache_hits,
+                "rerank_cache_misses": _rag_rerank_cache_misses,
             },
             "database": {
                 "connection_acquire_time_avg_ms": avg(_db_connection_acquire_times),
@@ -268,6 +374,65 @@ def format_prometheus_metrics() -> str:
     lines.append(f"# TYPE maestro_rag_results_avg gauge")
     lines.append(f"maestro_rag_results_avg {metrics['rag']['results_avg']:.2f}")
     
+    lines.append(f"# HELP maestro_rag_index_rows_inserted_total Total number of RAG chunks written by the indexer")
+    lines.append(f"# TYPE maestro_rag_index_rows_inserted_total counter")
+    lines.append(f"maestro_rag_index_rows_inserted_total {metrics['rag']['index_rows_inserted_total']}")
+    
+    lines.append(f"# HELP maestro_rag_index_insert_rows_per_sec RAG chunk/embedding bulk insert throughput")
+    lines.append(f"# TYPE maestro_rag_index_insert_rows_per_sec gauge")
+    lines.append(f"maestro_rag_index_insert_rows_per_sec_avg {metrics['rag']['index_insert_rows_per_sec_avg']:.2f}")
+    lines.append(f"maestro_rag_index_insert_rows_per_sec_last {metrics['rag']['index_insert_rows_per_sec_last']:.2f}")
+    
+    lines.append(f"# HELP maestro_rag_query_embedding_cache_hits_total Query embeddings served from the in-process cache")
+    lines.append(f"# TYPE maestro_rag_query_embedding_cache_hits_total counter")
+    lines.append(f"maestro_rag_query_embedding_cache_hits_total {metrics['rag']['query_embedding_cache_hits']}")
+    
+    lines.append(f"# HELP maestro_rag_query_embedding_cache_misses_total Query embeddings requested from the embedding API")
+    lines.append(f"# TYPE maestro_rag_query_embedding_cache_misses_total counter")
+    lines.append(f"maestro_rag_query_embedding_cache_misses_total {metrics['rag']['query_embedding_cache_misses']}")
+    
+    lines.append(f"# HELP maestro_rag_answer_cache_hits_total RAG answers served from the semantic answer cache")
+    lines.append(f"# TYPE maestro_rag_answer_cache_hits_total counter")
+    lines.append(f"maestro_rag_answer_cache_hits_total {metrics['rag']['answer_cache_hits']}")
+    
+    lines.append(f"# HELP maestro_rag_answer_cache_misses_total RAG queries not answered from the semantic answer cache")
+    lines.append(f"# TYPE maestro_rag_answer_cache_misses_total counter")
+    lines.append(f"maestro_rag_answer_cache_misses_total {metrics['rag']['answer_cache_misses']}")
+    
+    lines.append(f"# HELP maestro_rag_first_token_time_ms Time to the first streamed RAG answer token in milliseconds")
+    lines.append(f"# TYPE maestro_rag_first_token_time_ms histogram")
+    lines.append(f"maestro_rag_first_token_time_ms_avg {metrics['rag']['first_token_time_avg_ms']:.2f}")
+    lines.append(f"maestro_rag_first_token_time_ms_p95 {metrics['rag']['first_token_time_p95_ms']:.2f}")
+    
+    lines.append(f"# HELP maestro_rag_task_index_queue_depth Tasks waiting to be re-indexed for RAG")
+    lines.append(f"# TYPE maestro_rag_task_index_queue_depth gauge")
+    lines.append(f"maestro_rag_task_index_queue_depth {metrics['rag']['task_index_queue_depth']}")
+    
+    lines.append(f"# HELP maestro_rag_task_index_flushes_total Task re-indexing batches written")
+    lines.append(f"# TYPE maestro_rag_task_index_flushes_total counter")
+    lines.append(f"maestro_rag_task_index_flushes_total {metrics['rag']['task_index_flushes_total']}")
+    
+    lines.append(f"# HELP maestro_rag_task_index_flush_errors_total Task re-indexing batches that failed")
+    lines.append(f"# TYPE maestro_rag_task_index_flush_errors_total counter")
+    lines.append(f"maestro_rag_task_index_flush_errors_total {metrics['rag']['task_index_flush_errors']}")
+    
+    lines.append(f"# HELP maestro_rag_task_index_tasks_total Tasks re-indexed through the task index queue")
+    lines.append(f"# TYPE maestro_rag_task_index_tasks_total counter")
+    lines.append(f"maestro_rag_task_index_tasks_total {metrics['rag']['task_index_tasks_total']}")
+    
+    lines.append(f"# HELP maestro_rag_rerank_time_ms Time spent reranking retrieved chunks in milliseconds")
+    lines.append(f"# TYPE maestro_rag_rerank_time_ms histogram")
+    lines.append(f"maestro_rag_rerank_time_ms_avg {metrics['rag']['rerank_time_avg_ms']:.2f}")
+    lines.append(f"maestro_rag_rerank_time_ms_p95 {metrics['rag']['rerank_time_p95_ms']:.2f}")
+    
+    lines.append(f"# HELP maestro_rag_rerank_cache_hits_total Rerank scores served from the score cache")
+    lines.append(f"# TYPE maestro_rag_rerank_cache_hits_total counter")
+    lines.append(f"maestro_rag_rerank_cache_hits_total {metrics['rag']['rerank_cache_hits']}")
+    
+    lines.append(f"# HELP maestro_rag_rerank_cache_misses_total Rerank scores computed by the reranker")
+    lines.append(f"# TYPE maestro_rag_rerank_cache_misses_total counter")
+    lines.append(f"maestro_rag_rerank_cache_misses_total {metrics['rag']['rerank_cache_misses']}")
+    
     # Database metrics
     lines.append(f"# HELP maestro_db_connection_acquire_time_ms Database connection acquisition time in milliseconds")
     lines.append(f"# TYPE maestro_db_connection_acquire_time_ms histogram")
@@ -292,6 +457,12 @@ def reset_metrics():
     global _task_created_total, _task_completed_total, _task_failed_total
     global _task_assignment_times, _task_completion_times, _task_latency_by_status
     global _rag_queries_total, _rag_query_times, _rag_query_errors, _rag_results_count
+    global _rag_index_rows_inserted_total, _rag_index_insert_rates
+    global _rag_query_embedding_cache_hits, _rag_query_embedding_cache_misses
+    global _rag_answer_cache_hits, _rag_answer_cache_misses, _rag_first_token_times
+    global _rag_task_index_queue_depth, _rag_task_index_flushes_total, _rag_task_index_flush_errors
+    global _rag_task_index_tasks_total, _rag_task_index_flush_times
+    global _rag_rerank_times, _rag_rerank_cache_hits, _rag_rerank_cache_misses
     global _db_connection_acquire_times, _db_query_times, _db_pool_errors
     
     with _metrics_lock:
@@ -311,6 +482,21 @@ def reset_metrics():
         _rag_query_times.clear()
         _rag_query_errors = 0
         _rag_results_count.clear()
+        _rag_index_rows_inserted_total = 0
+        _rag_index_insert_rates.clear()
+        _rag_query_embedding_cache_hits = 0
+        _rag_query_embedding_cache_misses = 0
+        _rag_answer_cache_hits = 0
+        _rag_answer_cache_misses = 0
+        _rag_first_token_times.clear()
+        _rag_task_index_queue_depth = 0
+        _rag_task_index_flushes_total = 0
+        _rag_task_index_flush_errors = 0
+        _rag_task_index_tasks_total = 0
+        _rag_task_index_flush_times.clear()
+        _rag_rerank_times.clear()
+        _rag_rerank_cache_hits = 0
+        _rag_rerank_cache_misses = 0
         
         _db_connection_acquire_times.clear()
         _db_query_times.clear()
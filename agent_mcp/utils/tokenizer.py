@@ -0,0 +1,186 @@
+"""
+Shared token counting.
+
+Encodings are loaded once per process (tiktoken may download the BPE file on
+first use), token counts of recently seen strings are memoized, and batches of
+uncached strings are encoded in one call. Without tiktoken, or if the encoding
+cannot be loaded, counts fall back to the len(text) // 4 estimate.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from ..core.config import logger
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Memoized strings per counter; chunk texts and formatted tasks repeat often
+COUNT_CACHE_SIZE = 4096
+
+# Strings shorter than this are cheap to encode and not worth caching
+MIN_CACHED_LENGTH = 32
+
+
+def _heuristic_count(text: str) -> int:
+    return len(text) // 4
+
+
+class TokenCounter:
+    """Token counter for one encoding, with an LRU cache of counts."""
+
+    def __init__(self, encoding=None, cache_size: int = COUNT_CACHE_SIZE):
+        self._encoding = encoding
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    @property
+    def exact(self) -> bool:
+        """False when counts are the chars/4 estimate."""
+        return self._encoding is not None
+
+    def _encode_count(self, text: str) -> int:
+        if self._encoding is None:
+            return _heuristic_count(text)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def _remember(self, text: str, count: int) -> None:
+        if len(text) < MIN_CACHED_LENGTH or self._cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[text] = count
+            self._cache.move_to_end(text)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _cached(self, text: str) -> Optional[int]:
+        with self._lock:
+            count = self._cache.get(text)
+            if count is not None:
+                self._cache.move_to_end(text)
+            return count
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text."""
+        if not text:
+            return 0
+        cached = self._cached(text)
+        if cached is not None:
+            return cached
+        count = self._encode_count(text)
+        self._remember(text, count)
+        return count
+
+    def count_batch(self, texts: Iterable[str]) -> List[int]:
+        """Token counts for many strings; uncached ones are encoded together."""
+        texts = list(texts)
+        counts: List[Optional[int]] = [self._cached(t) if t else 0 for t in texts]
+        missing: Dict[str, List[int]] = {}
+        for i, count in enumerate(counts):
+            if count is None:
+                missing.setdefault(texts[i], []).append(i)
+        if missing:
+            unique_texts = list(missing)
+            if self._encoding is None:
+                new_counts = [_heuristic_count(t) for t in unique_texts]
+            else:
+                new_counts = [
+                    len(tokens)
+                    for tokens in self._encoding.encode_batch(
+                        unique_texts, disallowed_special=()
+                    )
+                ]
+            for text, count in zip(unique_texts, new_counts):
+                self._remember(text, count)
+                for i in missing[text]:
+                    counts[i] = count
+        return counts  # type: ignore[return-value]
+
+
+class TokenBudget:
+    """
+    Running total of parts joined with a separator, packed up to a token limit.
+
+    The separator is counted between parts, so the total matches the joined
+    text (tiktoken splits at newlines, so pieces on either side of one encode
+    independently).
+    """
+
+    def __init__(self, limit: int, counter: TokenCounter, separator: str = "\n\n"):
+        self.limit = limit
+        self.counter = counter
+        self.used = 0
+        self.parts = 0
+        self.separator_tokens = counter.count(separator)
+
+    @property
+    def remaining(self) -> int:
+        return self.limit - self.used
+
+    def cost(self, text: str, tokens: Optional[int] = None) -> int:
+        """Tokens that adding text would use (pass tokens if already counted)."""
+        if tokens is None:
+            tokens = self.counter.count(text)
+        return tokens + (self.separator_tokens if self.parts else 0)
+
+    def fits(self, text: str, tokens: Optional[int] = None) -> bool:
+        return self.used + self.cost(text, tokens) <= self.limit
+
+    def add(self, text: str, tokens: Optional[int] = None) -> None:
+        """Account for a part unconditionally (e.g. a section header)."""
+        self.used += self.cost(text, tokens)
+        self.parts += 1
+
+    def try_add(self, text: str, tokens: Optional[int] = None) -> bool:
+        """Account for a part if it fits; returns whether it was added."""
+        cost = self.cost(text, tokens)
+        if self.used + cost > self.limit:
+            return False
+        self.used += cost
+        self.parts += 1
+        return True
+
+
+_counters: Dict[str, TokenCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def _encoding_name_for_model(model: Optional[str]) -> str:
+    if tiktoken is None or not model:
+        return DEFAULT_ENCODING
+    try:
+        return tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        return DEFAULT_ENCODING
+
+
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """Shared TokenCounter for a model's encoding (loaded once per process)."""
+    encoding_name = _encoding_name_for_model(model)
+    counter = _counters.get(encoding_name)
+    if counter is not None:
+        return counter
+    with _counters_lock:
+        counter = _counters.get(encoding_name)
+        if counter is None:
+            encoding = None
+            if tiktoken is not None:
+                try:
+                    encoding = tiktoken.get_encoding(encoding_name)
+                except Exception as e:
+                    logger.warning(
+                        f"Could not load tokenizer '{encoding_name}', estimating tokens as chars/4: {e}"
+                    )
+            counter = TokenCounter(encoding)
+            _counters[encoding_name] = counter
+    return counter
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Token count of text for the given model (default encoding if omitted)."""
+    return get_token_counter(model).count(text)
@@ -0,0 +1,68 @@
+"""
+Benchmark tests for the RAG chunking stage (cold index).
+"""
+import asyncio
+
+import pytest
+
+from agent_mcp.features.rag.chunk_pipeline import iter_chunked_sources, shutdown_chunk_pool
+from agent_mcp.features.rag.manifest import hash_content
+
+MODULE_TEMPLATE = '''
+import os
+
+
+class Service{n}:
+    """Service number {n}."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def run(self, items):
+        total = 0
+        for item in items:
+            if item % 2:
+                total += item * {n}
+        return total
+
+
+def helper_{n}(value):
+    return [value * i for i in range(100)]
+'''
+
+
+def _cold_index_sources(file_count=200):
+    sources = []
+    for n in range(file_count):
+        # ~20 classes per file so ast parsing dominates
+        content = "\n".join(MODULE_TEMPLATE.format(n=n * 20 + k) for k in range(20))
+        sources.append(("code", f"src/module_{n}.py", content, hash_content(content)))
+    return sources
+
+
+async def _chunk_all(sources, project_dir, workers):
+    chunk_count = 0
+    async for _, chunks in iter_chunked_sources(sources, project_dir, True, workers=workers):
+        chunk_count += len(chunks)
+    return chunk_count
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_cold_index_chunking(benchmark, tmp_path, monkeypatch, workers):
+    """Benchmark chunking + entity extraction of a cold index across worker counts."""
+    # Cold: no entity cache, here or in the (spawned) pool workers
+    monkeypatch.setenv("AGENT_MCP_RAG_ENTITY_CACHE_SIZE", "0")
+    monkeypatch.setattr("agent_mcp.core.config.RAG_ENTITY_CACHE_SIZE", 0)
+    sources = _cold_index_sources()
+    # Warm the pool so process start-up is not part of the measurement
+    asyncio.run(_chunk_all(sources[:workers * 8], tmp_path, workers))
+    try:
+        chunk_count = benchmark.pedantic(
+            lambda: asyncio.run(_chunk_all(sources, tmp_path, workers)),
+            rounds=3,
+            iterations=1,
+        )
+    finally:
+        shutdown_chunk_pool()
+    assert chunk_count > len(sources)
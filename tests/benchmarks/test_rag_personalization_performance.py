@@ -0,0 +1,49 @@
+"""
+Benchmark tests for RAG intent classification and role scoring.
+"""
+import pytest
+
+from agent_mcp.features.rag.context import AgentQueryContext
+from agent_mcp.features.rag.intent_classifier import get_intent_classifier
+from agent_mcp.features.rag.personalizer import get_response_personalizer
+
+QUERIES = [
+    "how do I implement pagination for the task list",
+    "why is the dashboard failing with a traceback",
+    "explain the architecture of the rag pipeline",
+    "is the token check secure against csrf",
+    "what should we do next to break down the migration",
+    "where are agent colors assigned",
+]
+
+CONTENT = (
+    "The component renders a summary of task progress for the browser client. "
+    "Each function in the api module validates auth before the method runs, "
+    "and the overall design follows the structure described in the overview. "
+)
+
+
+def _results(count=50):
+    return [
+        {"content": CONTENT * (1 + n % 4), "title": f"src/module_{n}.py", "source_type": "code"}
+        for n in range(count)
+    ]
+
+
+@pytest.mark.benchmark
+def test_intent_classification(benchmark):
+    """Benchmark classifying a mix of queries."""
+    classifier = get_intent_classifier()
+    intents = benchmark(lambda: [classifier.classify(query) for query in QUERIES])
+    assert intents[:5] == ["implementation", "debugging", "architecture", "security", "planning"]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("role", ["frontend", "security", "worker"])
+def test_role_scoring(benchmark, role):
+    """Benchmark personalizing 50 retrieved chunks for an agent role."""
+    personalizer = get_response_personalizer()
+    context = AgentQueryContext(agent_id="bench", agent_role=role)
+    results = _results()
+    personalized = benchmark(lambda: personalizer.personalize_response(results, context))
+    assert all(result["_role_score"] > 0 for result in personalized)
@@ -0,0 +1,75 @@
+"""
+Tests for the async database access layer.
+"""
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agent_mcp.db import async_connection
+from agent_mcp.db.async_connection import async_db_connection, run_db
+
+
+def _make_fake_connection(calls):
+    """Build a fake psycopg2 connection that records the thread of each call."""
+    cursor = MagicMock()
+    cursor.execute.side_effect = lambda *a, **kw: calls.append(("execute", threading.get_ident()))
+    cursor.fetchall.return_value = [{"task_id": "task_1"}]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    conn.commit.side_effect = lambda: calls.append(("commit", threading.get_ident()))
+    return conn
+
+
+class TestAsyncDbConnection:
+    """Test the async connection facade."""
+
+    @pytest.mark.asyncio
+    async def test_io_runs_off_event_loop_thread(self):
+        calls = []
+        fake_conn = _make_fake_connection(calls)
+        loop_thread = threading.get_ident()
+
+        with patch.object(async_connection, "_get_connection_with_retry", return_value=fake_conn), \
+             patch.object(async_connection, "return_connection") as mock_return:
+            async with async_db_connection() as conn:
+                cursor = conn.cursor()
+                await cursor.execute("SELECT * FROM tasks WHERE task_id = %s", ("task_1",))
+                rows = cursor.fetchall()
+                await conn.commit()
+
+        assert rows == [{"task_id": "task_1"}]
+        assert [name for name, _ in calls] == ["execute", "commit"]
+        assert all(thread_id != loop_thread for _, thread_id in calls)
+        mock_return.assert_called_once_with(fake_conn)
+
+    @pytest.mark.asyncio
+    async def test_connection_discarded_on_error(self):
+        calls = []
+        fake_conn = _make_fake_connection(calls)
+        pool = MagicMock()
+        async_connection._connection_pools[id(fake_conn)] = pool
+
+        with patch.object(async_connection, "_get_connection_with_retry", return_value=fake_conn), \
+             patch.object(async_connection, "return_connection") as mock_return:
+            with pytest.raises(ValueError):
+                async with async_db_connection():
+                    raise ValueError("boom")
+
+        fake_conn.rollback.assert_called_once()
+        fake_conn.close.assert_called_once()
+        pool.putconn.assert_called_once_with(fake_conn, close=True)
+        mock_return.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_run_db_overlaps_blocking_calls(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def blocking_call():
+            # Both calls must be in flight at once for the barrier to release
+            barrier.wait()
+            return True
+
+        results = await asyncio.gather(run_db(blocking_call), run_db(blocking_call))
+        assert results == [True, True]
@@ -0,0 +1,58 @@
+"""
+Tests for the shared async OpenAI client.
+"""
+import asyncio
+
+import pytest
+from pydantic import SecretStr
+
+from agent_mcp.core.settings import get_settings
+from agent_mcp.external import openai_service
+
+
+@pytest.fixture
+def api_key(monkeypatch):
+    monkeypatch.setattr(
+        get_settings(), "openai_api_key", SecretStr("sk-test-key-0123456789abcdef")
+    )
+    monkeypatch.setattr(openai_service, "_async_openai_client", None)
+    monkeypatch.setattr(openai_service, "_async_openai_client_loop", None)
+
+
+class TestSharedAsyncClient:
+    """Test reuse and pooling of the shared AsyncOpenAI client."""
+
+    @pytest.mark.asyncio
+    async def test_client_is_reused(self, api_key):
+        first = openai_service.get_async_openai_client()
+        second = openai_service.get_async_openai_client()
+
+        assert first is not None
+        assert first is second
+        await openai_service.close_async_openai_client()
+
+    @pytest.mark.asyncio
+    async def test_client_uses_tuned_connection_pool(self, api_key):
+        settings = get_settings()
+        client = openai_service.get_async_openai_client()
+
+        pool = client._client._transport._pool
+        assert pool._max_connections == settings.openai_http_max_connections
+        assert pool._max_keepalive_connections == settings.openai_http_max_keepalive_connections
+        await openai_service.close_async_openai_client()
+
+    def test_new_event_loop_gets_new_client(self, api_key):
+        async def fetch():
+            return openai_service.get_async_openai_client()
+
+        first = asyncio.run(fetch())
+        second = asyncio.run(fetch())
+
+        assert first is not second
+
+    def test_no_client_without_api_key(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "openai_api_key", None)
+        monkeypatch.setattr(openai_service, "OPENAI_API_KEY_ENV", None)
+        monkeypatch.setattr(openai_service, "_async_openai_client", None)
+
+        assert openai_service.get_async_openai_client() is None
@@ -0,0 +1,95 @@
+"""
+Tests for connection pool checkout/return behaviour and pool statistics.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agent_mcp.db import postgres_connection as pc
+
+
+class _FakeConnection:
+    """Minimal psycopg2 connection stand-in that records executed SQL."""
+
+    def __init__(self, statements):
+        self.closed = 0
+        self.cursor_factory = None
+        self._statements = statements
+
+    def cursor(self):
+        cur = MagicMock()
+        cur.__enter__ = lambda c: c
+        cur.__exit__ = lambda c, *exc: None
+        cur.execute.side_effect = lambda sql, *a: self._statements.append(sql.strip())
+        return cur
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    statements = []
+    conn = _FakeConnection(statements)
+    pool = MagicMock()
+    pool.getconn.return_value = conn
+    pool.minconn, pool.maxconn, pool.closed = 1, 10, False
+
+    monkeypatch.setattr(pc, "_get_pg_pool", lambda: pool)
+    monkeypatch.setattr(pc, "_register_vector", None)
+    monkeypatch.setattr(pc, "_vector_extension_ready", False)
+    monkeypatch.setattr(pc, "_connection_state", {})
+    monkeypatch.setattr(pc, "_connection_pools", {})
+    monkeypatch.setattr(pc, "_pool_stats", {k: 0 if isinstance(v, int) else 0.0 for k, v in pc._pool_stats.items()})
+    return pool, conn, statements
+
+
+class TestLazyPool:
+    """Connections are initialized once and validated lazily."""
+
+    def test_initializes_once_and_skips_health_checks(self, fake_pool):
+        pool, conn, statements = fake_pool
+
+        for _ in range(3):
+            with pc.db_connection() as checked_out:
+                assert checked_out is conn
+
+        assert statements == ["CREATE EXTENSION IF NOT EXISTS vector;"]
+        assert pool.putconn.call_count == 3
+
+        stats = pc.get_pool_stats()
+        assert stats["checkouts"] == 3
+        assert stats["in_use"] == 0
+        assert stats["peak_in_use"] == 1
+        assert stats["connections_initialized"] == 1
+        assert stats["validations"] == 0
+
+    def test_validates_after_idle_threshold(self, fake_pool):
+        _, _, statements = fake_pool
+        settings = pc.get_settings()
+
+        with patch.object(settings, "db_pool_idle_validation_seconds", 0.0):
+            with pc.db_connection():
+                pass
+            with pc.db_connection():
+                pass
+
+        assert statements.count("SELECT 1") == 1
+        assert pc.get_pool_stats()["validations"] == 1
+
+    def test_error_discards_connection(self, fake_pool):
+        pool, conn, _ = fake_pool
+
+        with pytest.raises(RuntimeError):
+            with pc.db_connection():
+                raise RuntimeError("query failed")
+
+        pool.putconn.assert_called_with(conn, close=True)
+        assert id(conn) not in pc._connection_state
+        assert pc.get_pool_stats()["in_use"] == 0
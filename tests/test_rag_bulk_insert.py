@@ -0,0 +1,126 @@
+"""
+Tests for the bulk RAG chunk/embedding write stage.
+"""
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from agent_mcp.features.rag import bulk_insert, indexing
+from agent_mcp.features.rag.bulk_insert import (
+    format_vector_literal,
+    insert_chunks_with_embeddings,
+)
+from agent_mcp.features.rag.manifest import ManifestEntry
+from agent_mcp.utils.metrics import get_all_metrics, record_rag_index_insert, reset_metrics
+
+
+class TestInsertChunksWithEmbeddings:
+    """Test the execute_values + COPY write path."""
+
+    def test_returns_ids_and_copies_embeddings(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [{"chunk_id": 11}, {"chunk_id": 12}]
+        copied = {}
+        cursor.copy_expert.side_effect = lambda sql, buf: copied.update(
+            sql=sql, data=buf.read()
+        )
+        rows = [
+            ("markdown", "README.md", "intro", 0, None),
+            ("code", "a.py", "def f(): pass", 1, '{"source_type": "code"}'),
+        ]
+
+        with patch.object(bulk_insert, "execute_values") as mock_values:
+            result = insert_chunks_with_embeddings(
+                cursor, rows, [[0.5, 1.0], np.array([0.25, -2.0])], "model\tx"
+            )
+
+        assert result.chunk_ids == [11, 12]
+        assert result.rows == 2
+        assert "nextval" in cursor.execute.call_args.args[0]
+        assert cursor.execute.call_args.args[1] == (2,)
+        sql = mock_values.call_args.args[1]
+        assert "RETURNING" not in sql
+        # Each row carries its preallocated id
+        assert mock_values.call_args.args[2] == [(11, *rows[0]), (12, *rows[1])]
+        assert copied["sql"].startswith("COPY rag_embeddings")
+        assert copied["data"] == (
+            "11\t[0.5,1.0]\tmodel\\tx\n" "12\t[0.25,-2.0]\tmodel\\tx\n"
+        )
+
+    def test_empty_input_issues_no_statements(self):
+        cursor = MagicMock()
+        with patch.object(bulk_insert, "execute_values") as mock_values:
+            result = insert_chunks_with_embeddings(cursor, [], [], "m")
+
+        assert result.rows == 0
+        assert result.rows_per_second == 0.0
+        mock_values.assert_not_called()
+        cursor.execute.assert_not_called()
+        cursor.copy_expert.assert_not_called()
+
+    def test_length_mismatch_raises(self):
+        with pytest.raises(ValueError):
+            insert_chunks_with_embeddings(
+                MagicMock(), [("task", "t1", "x", 0, None)], [], "m"
+            )
+
+    def test_format_vector_literal(self):
+        assert format_vector_literal(np.array([1, 2], dtype=np.float32)) == "[1.0,2.0]"
+
+
+class TestWriteIndexedSource:
+    """Test the per-source write transaction of the indexing cycle."""
+
+    def test_replaces_chunks_and_records_hash_and_manifest(self):
+        cursor = MagicMock()
+        source = indexing._SourceWrite("markdown", "a.md", content_hash="h1")
+        source.chunk_rows.append(("markdown", "a.md", "intro", 0, None))
+        source.vectors.append([0.5])
+        entry = ManifestEntry("a.md", "markdown", 1.0, 5, "h1")
+        with patch.object(indexing, "insert_chunks_with_embeddings") as insert, patch.object(
+            indexing, "upsert_manifest_entries"
+        ) as upsert:
+            indexing._write_indexed_source(cursor, source, entry)
+
+        statements = [" ".join(c.args[0].split()[:3]) for c in cursor.execute.call_args_list]
+        assert statements == [
+            "DELETE FROM rag_embeddings",
+            "DELETE FROM rag_chunks",
+            "INSERT INTO rag_meta",
+        ]
+        assert cursor.execute.call_args.args[1] == ("hash_markdown_a.md", "h1")
+        insert.assert_called_once_with(
+            cursor, source.chunk_rows, source.vectors, indexing.EMBEDDING_MODEL
+        )
+        upsert.assert_called_once_with(cursor, [entry])
+
+    def test_streamed_source_only_records_hash(self):
+        cursor = MagicMock()
+        source = indexing._SourceWrite("code", "big.py", content_hash="h2", streamed=True)
+        with patch.object(indexing, "insert_chunks_with_embeddings") as insert:
+            result = indexing._write_indexed_source(cursor, source, None)
+
+        assert result.rows == 0
+        insert.assert_not_called()
+        cursor.execute.assert_called_once()
+        assert cursor.execute.call_args.args[1] == ("hash_code_big.py", "h2")
+
+
+class TestIndexInsertMetrics:
+    """Test rows/sec reporting."""
+
+    def setup_method(self):
+        reset_metrics()
+
+    def teardown_method(self):
+        reset_metrics()
+
+    def test_records_rows_and_rate(self):
+        record_rag_index_insert(1000, 2.0)
+        record_rag_index_insert(0, 0.0)
+
+        rag = get_all_metrics()["rag"]
+        assert rag["index_rows_inserted_total"] == 1000
+        assert rag["index_insert_rows_per_sec_avg"] == 500.0
+        assert rag["index_insert_rows_per_sec_last"] == 500.0
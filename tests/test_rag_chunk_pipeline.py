@@ -0,0 +1,166 @@
+"""
+Tests for the RAG chunking pipeline stage.
+"""
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from agent_mcp.features.rag import chunk_pipeline
+from agent_mcp.features.rag.chunk_pipeline import (
+    MIN_SOURCES_FOR_PROCESS_POOL,
+    ChunkingFailed,
+    StreamedChunks,
+    chunk_source,
+    iter_chunk_batches,
+    iter_chunked_sources,
+    shutdown_chunk_pool,
+)
+from agent_mcp.features.rag.manifest import hash_content
+
+PYTHON_SOURCE = '''
+class Greeter:
+    def greet(self, name):
+        return f"Hello {name}"
+
+
+def main():
+    print(Greeter().greet("world"))
+'''
+
+
+def _sources(count):
+    return [
+        ("code", f"pkg/module_{i}.py", PYTHON_SOURCE, hash_content(PYTHON_SOURCE)) for i in range(count)
+    ] + [("markdown", "README.md", "# Title\n\nSome documentation text.", "hash_md")]
+
+
+class TestChunkSource:
+    """Test the per-source chunking function."""
+
+    def test_code_source_starts_with_summary(self, tmp_path):
+        chunks = chunk_source("code", "pkg/module.py", PYTHON_SOURCE, str(tmp_path), True)
+
+        assert chunks[0][0].startswith("File: pkg/module.py")
+        assert chunks[0][1]["source_type"] == "code_summary"
+        assert len(chunks) > 1
+
+    def test_simple_mode_uses_plain_chunks(self, tmp_path):
+        chunks = chunk_source("code", "pkg/module.py", PYTHON_SOURCE, str(tmp_path), False)
+
+        assert all(metadata == {"source_type": "code"} for _, metadata in chunks)
+
+
+class TestIterChunkedSources:
+    """Test inline and process-pool chunking."""
+
+    @pytest.mark.asyncio
+    async def test_inline_mode_yields_every_source(self, tmp_path):
+        sources = _sources(3)
+
+        results = [item async for item in iter_chunked_sources(sources, tmp_path, True, workers=1)]
+
+        assert [source for source, _ in results] == sources
+        assert all(chunks for _, chunks in results)
+
+    @pytest.mark.asyncio
+    async def test_failing_source_is_flagged_not_empty(self, tmp_path, monkeypatch):
+        def explode(*args, **kwargs):
+            raise ValueError("bad file")
+
+        monkeypatch.setattr(chunk_pipeline, "chunk_source", explode)
+
+        results = [
+            item async for item in iter_chunked_sources(_sources(1), tmp_path, True, workers=1)
+        ]
+
+        assert len(results) == 2
+        assert all(isinstance(chunks, ChunkingFailed) for _, chunks in results)
+        assert "bad file" in results[0][1].error
+
+    @pytest.mark.asyncio
+    async def test_broken_pool_flags_every_pending_source(self, tmp_path, monkeypatch):
+        class BrokenPool:
+            def submit(self, *args):
+                future = Future()
+                future.set_exception(BrokenProcessPool("worker died"))
+                return future
+
+        monkeypatch.setattr(chunk_pipeline, "_get_chunk_pool", lambda workers: BrokenPool())
+        sources = _sources(MIN_SOURCES_FOR_PROCESS_POOL)
+
+        results = [
+            item async for item in iter_chunked_sources(sources, tmp_path, True, workers=2)
+        ]
+
+        assert len(results) == len(sources)
+        assert all(isinstance(chunks, ChunkingFailed) for _, chunks in results)
+
+    @pytest.mark.asyncio
+    async def test_process_pool_matches_inline(self, tmp_path):
+        sources = _sources(MIN_SOURCES_FOR_PROCESS_POOL)
+        try:
+            pooled = {
+                source[1]: chunks
+                async for source, chunks in iter_chunked_sources(sources, tmp_path, True, workers=2)
+            }
+        finally:
+            shutdown_chunk_pool()
+        inline = {
+            source[1]: chunks
+            async for source, chunks in iter_chunked_sources(sources, tmp_path, True, workers=1)
+        }
+
+        assert pooled == inline
+
+
+class TestStreamedSources:
+    """Test chunking sources without content straight from disk."""
+
+    def test_markdown_streams_from_disk(self, tmp_path):
+        text = "# Title\n\n" + "Some documentation text. " * 400
+        (tmp_path / "README.md").write_text(text, encoding="utf-8")
+
+        streamed = StreamedChunks("markdown", tmp_path / "README.md", True)
+        assert streamed.content_hash is None
+        chunks = list(streamed)
+        loaded = chunk_source("markdown", "README.md", text, str(tmp_path), True)
+
+        assert chunks == loaded
+        # Hashed while it was chunked
+        assert streamed.content_hash == hash_content(text)
+
+    def test_code_streams_line_chunks_without_summary(self, tmp_path):
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "module.py").write_text(PYTHON_SOURCE * 50, encoding="utf-8")
+
+        chunks = list(StreamedChunks("code", tmp_path / "pkg" / "module.py", True))
+
+        assert chunks and all(metadata["streamed"] for _, metadata in chunks)
+        assert chunks[0][1]["language"] == "python"
+        assert "".join(text for text, _ in chunks).count("class Greeter") == 50
+
+    @pytest.mark.asyncio
+    async def test_sources_without_content_are_yielded_lazily(self, tmp_path):
+        (tmp_path / "big.md").write_text("Some documentation text.\n" * 2000, encoding="utf-8")
+        sources = _sources(1) + [("markdown", "big.md", None, None)]
+
+        results = {
+            source[1]: chunks
+            async for source, chunks in iter_chunked_sources(sources, tmp_path, True, workers=1)
+        }
+
+        streamed = results["big.md"]
+        assert isinstance(streamed, StreamedChunks)
+        assert streamed.reader.chars_read == 0  # Nothing read until the indexer pulls
+        batches = [batch async for batch in iter_chunk_batches(streamed, 2)]
+        assert all(len(batch) <= 2 for batch in batches)
+        assert streamed.content_hash == hash_content("Some documentation text.\n" * 2000)
+
+    @pytest.mark.asyncio
+    async def test_chunk_lists_are_batched(self):
+        chunks = [(f"chunk {i}", {}) for i in range(5)]
+
+        batches = [batch async for batch in iter_chunk_batches(chunks, 2)]
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
@@ -0,0 +1,182 @@
+"""
+Tests for code entity extraction: tree-sitter backend, regex fallback,
+per-content-hash cache and incremental re-parsing.
+"""
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agent_mcp.features.rag import code_chunking, tree_sitter_entities
+from agent_mcp.features.rag.code_chunking import (
+    chunk_code_aware,
+    clear_entity_cache,
+    extract_code_entities,
+)
+from agent_mcp.features.rag.tree_sitter_entities import (
+    _collect_entities,
+    compute_edit,
+    extract_tree_sitter_entities,
+)
+
+TS_SOURCE = "export function load(path: string) {\n  return path;\n}\n"
+
+
+class FakeNode:
+    """Minimal stand-in for a tree_sitter.Node."""
+
+    def __init__(self, node_type, start=0, end=0, text="", children=(), **fields):
+        self.type = node_type
+        self.start_point = (start, 0)
+        self.end_point = (end, 0)
+        self.text = text.encode()
+        self.children = list(children) + [f for f in fields.values() if f not in children]
+        self._fields = fields
+
+    def child_by_field_name(self, name):
+        return self._fields.get(name)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_entity_cache()
+    yield
+    clear_entity_cache()
+
+
+class TestEntityCache:
+    """Test that unchanged content is not parsed again."""
+
+    def test_same_content_parses_once(self):
+        with patch.object(
+            code_chunking, "_parse_code_entities", wraps=code_chunking._parse_code_entities
+        ) as parse:
+            first = extract_code_entities(TS_SOURCE, Path("a.ts"))
+            second = extract_code_entities(TS_SOURCE, Path("b.ts"), content_hash=None)
+        parse.assert_called_once()
+        assert first == second and first[0]["name"] == "load"
+        # Callers get their own copies
+        second[0]["name"] = "changed"
+        assert extract_code_entities(TS_SOURCE, Path("a.ts"))[0]["name"] == "load"
+
+    def test_given_hash_is_the_key(self):
+        with patch.object(code_chunking, "_parse_code_entities", return_value=[]) as parse:
+            extract_code_entities(TS_SOURCE, Path("a.ts"), content_hash="abc")
+            extract_code_entities("other", Path("a.ts"), content_hash="abc")
+            extract_code_entities(TS_SOURCE, Path("a.go"), content_hash="abc")
+        assert parse.call_count == 2
+
+    def test_cache_disabled(self):
+        with patch("agent_mcp.core.config.RAG_ENTITY_CACHE_SIZE", 0), patch.object(
+            code_chunking, "_parse_code_entities", return_value=[]
+        ) as parse:
+            extract_code_entities(TS_SOURCE, Path("a.ts"))
+            extract_code_entities(TS_SOURCE, Path("a.ts"))
+        assert parse.call_count == 2
+
+
+class TestParserSelection:
+    """Test tree-sitter use and the regex fallback."""
+
+    def test_falls_back_to_regex_without_tree_sitter(self):
+        with patch.object(tree_sitter_entities, "tree_sitter", None):
+            assert extract_tree_sitter_entities(TS_SOURCE, Path("a.ts")) is None
+            entities = extract_code_entities(TS_SOURCE, Path("a.ts"))
+        assert entities == [{"type": "function", "name": "load", "start_line": 1, "end_line": 1}]
+
+    def test_uses_tree_sitter_entities_when_available(self):
+        parsed = [{"type": "function", "name": "load", "start_line": 1, "end_line": 3}]
+        with patch.object(code_chunking, "extract_tree_sitter_entities", return_value=parsed):
+            assert extract_code_entities(TS_SOURCE, Path("a.ts")) == parsed
+
+    def test_python_keeps_ast(self):
+        with patch.object(code_chunking, "extract_tree_sitter_entities") as ts:
+            entities = extract_code_entities("def f():\n    pass\n", Path("m.py"))
+        ts.assert_not_called()
+        assert entities[0]["name"] == "f" and entities[0]["end_line"] == 2
+
+
+class TestSyntaxTreeEntities:
+    """Test mapping syntax nodes to entities."""
+
+    def test_typescript_class_methods_and_components(self):
+        method = FakeNode("method_definition", 1, 3, name=FakeNode("property_identifier", text="render"))
+        cls = FakeNode(
+            "class_declaration", 0, 4,
+            name=FakeNode("type_identifier", text="View"), body=FakeNode("class_body", 0, 4, children=[method]),
+        )
+        arrow = FakeNode(
+            "variable_declarator", 6, 8,
+            name=FakeNode("identifier", text="Button"), value=FakeNode("arrow_function", 6, 8),
+        )
+        root = FakeNode("program", 0, 9, children=[cls, FakeNode("lexical_declaration", 6, 8, children=[arrow])])
+
+        entities = _collect_entities(root, "tsx", component_names=True)
+        assert entities == [
+            {"type": "class", "name": "View", "start_line": 1, "end_line": 5},
+            {"type": "method", "name": "render", "start_line": 2, "end_line": 4, "parent_class": "View"},
+            {"type": "component", "name": "Button", "start_line": 7, "end_line": 9},
+        ]
+
+    def test_go_method_receiver_and_rust_impl(self):
+        receiver = FakeNode("parameter_list", children=[
+            FakeNode("parameter_declaration", children=[FakeNode("pointer_type", children=[
+                FakeNode("type_identifier", text="Server")
+            ])])
+        ])
+        go_method = FakeNode("method_declaration", 2, 5, name=FakeNode("field_identifier", text="Run"), receiver=receiver)
+        entities = _collect_entities(FakeNode("source_file", children=[go_method]), "go", False)
+        assert entities[0]["parent_class"] == "Server" and entities[0]["end_line"] == 6
+
+        fn = FakeNode("function_item", 1, 2, name=FakeNode("identifier", text="new"))
+        impl = FakeNode("impl_item", 0, 3, type=FakeNode("type_identifier", text="Config"),
+                        body=FakeNode("declaration_list", children=[fn]))
+        entities = _collect_entities(FakeNode("source_file", children=[impl]), "rust", False)
+        assert [(e["type"], e["name"], e.get("parent_class")) for e in entities] == [
+            ("impl", "Config", None), ("method", "new", "Config")
+        ]
+
+
+class TestIncrementalParse:
+    """Test that edited files re-use their previous tree."""
+
+    def test_compute_edit(self):
+        edit = compute_edit(b"a\nbc\nd", b"a\nbXYc\nd")
+        assert edit["start_byte"] == 3 and edit["old_end_byte"] == 3 and edit["new_end_byte"] == 5
+        assert edit["start_point"] == (1, 1) and edit["new_end_point"] == (1, 3)
+
+    def test_edit_applied_to_previous_tree(self):
+        parser = MagicMock()
+        first_tree = MagicMock(root_node=FakeNode("program"))
+        parser.parse.side_effect = [first_tree, MagicMock(root_node=FakeNode("program"))]
+        with patch.object(tree_sitter_entities, "tree_sitter", SimpleNamespace()), patch.dict(
+            tree_sitter_entities._parsers, {"typescript": parser}
+        ), patch.dict(tree_sitter_entities._trees, clear=True):
+            extract_tree_sitter_entities("let a = 1;", Path("x.ts"))
+            extract_tree_sitter_entities("let a = 1;", Path("x.ts"))
+            extract_tree_sitter_entities("let ab = 1;", Path("x.ts"))
+
+        assert parser.parse.call_count == 2
+        first_tree.edit.assert_called_once_with(**compute_edit(b"let a = 1;", b"let ab = 1;"))
+        assert parser.parse.call_args.args == (b"let ab = 1;", first_tree)
+
+
+class TestEntityBoundaries:
+    """Test chunk splits at parsed entity starts."""
+
+    def test_generic_chunks_split_at_entities(self):
+        body = "\n".join(f"    let x{i} = {i};" for i in range(20))
+        source = f"fn a() {{\n{body}\n}}\nfn b() {{\n{body}\n}}\n"
+        entities = [
+            {"type": "function", "name": "a", "start_line": 1, "end_line": 22},
+            {"type": "function", "name": "b", "start_line": 23, "end_line": 44},
+        ]
+        chunks = chunk_code_aware(source, Path("lib.rs"), target_size=1500, min_size=100, entities=entities)
+        assert [c[1]["line_range"][0] for c in chunks] == [1, 23]
+        assert [c[1]["entities"][0]["name"] for c in chunks] == ["a", "b"]
+        assert chunks[1][0].startswith("fn b()")
+
+    def test_without_entities_metadata_unchanged(self):
+        chunks = chunk_code_aware("fn a() {}\n", Path("lib.rs"))
+        assert "entities" not in chunks[0][1]
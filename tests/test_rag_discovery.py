@@ -0,0 +1,70 @@
+"""
+Tests for single-pass RAG source discovery.
+"""
+import os
+from unittest.mock import patch
+
+import pytest
+
+from agent_mcp.features.rag import discovery
+from agent_mcp.features.rag.discovery import GitignoreRules, walk_indexable_files
+
+
+@pytest.fixture
+def project_tree(tmp_path):
+    files = {
+        "README.md": "# Project",
+        "src/app.py": "print('hi')\n",
+        "src/lib/util.ts": "export {}\n",
+        "src/generated/out.py": "x = 1\n",
+        "logs/debug.md": "log",
+        "notes.txt": "not indexed",
+        "node_modules/pkg/index.js": "module.exports = {}\n",
+        ".hidden/secret.md": "hidden",
+    }
+    for rel_path, content in files.items():
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    (tmp_path / ".gitignore").write_text("logs/\n", encoding="utf-8")
+    (tmp_path / "src" / ".gitignore").write_text("generated/\n", encoding="utf-8")
+    return tmp_path
+
+
+class TestWalkIndexableFiles:
+    """Test the scandir-based walker."""
+
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    def test_classifies_and_prunes(self, project_tree, max_workers):
+        candidates = walk_indexable_files(
+            project_tree, True, True, max_workers=max_workers
+        )
+
+        assert {rel: source_type for rel, (_, source_type) in candidates.items()} == {
+            "README.md": "markdown",
+            "src/app.py": "code",
+            "src/lib/util.ts": "code",
+        }
+        assert candidates["src/app.py"][0] == project_tree / "src" / "app.py"
+
+    def test_ignored_directories_are_never_listed(self, project_tree):
+        scanned = []
+        real_scandir = os.scandir
+
+        def tracking_scandir(path):
+            scanned.append(os.path.relpath(path, project_tree))
+            return real_scandir(path)
+
+        with patch.object(discovery.os, "scandir", side_effect=tracking_scandir):
+            walk_indexable_files(project_tree, True, True)
+
+        assert not any(p.startswith(("node_modules", ".hidden", "logs")) for p in scanned)
+        assert os.path.join("src", "generated") not in scanned
+
+    def test_gitignore_can_be_disabled(self, project_tree):
+        candidates = walk_indexable_files(
+            project_tree, True, False, gitignore=GitignoreRules(project_tree, enabled=False)
+        )
+
+        assert "logs/debug.md" in candidates
+        assert "src/app.py" not in candidates
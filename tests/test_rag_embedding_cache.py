@@ -0,0 +1,77 @@
+"""
+Tests for the content-addressed embedding cache.
+"""
+import hashlib
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from agent_mcp.features.rag import embedding_cache
+from agent_mcp.features.rag.bulk_insert import format_vector_literal
+from agent_mcp.features.rag.embedding_cache import (
+    embedding_cache_key,
+    lookup_cached_embeddings,
+    prune_embedding_cache,
+)
+
+
+class TestEmbeddingCacheKey:
+    """Test cache key derivation."""
+
+    def test_key_matches_sql_expression_format(self):
+        expected = hashlib.sha256("text-embedding-3-large|1536|def main(): pass".encode()).hexdigest()
+
+        assert embedding_cache_key("def main(): pass", "text-embedding-3-large", 1536) == expected
+
+    def test_key_depends_on_model_and_dimension(self):
+        keys = {
+            embedding_cache_key("chunk", "model-a", 1536),
+            embedding_cache_key("chunk", "model-b", 1536),
+            embedding_cache_key("chunk", "model-a", 3072),
+        }
+
+        assert len(keys) == 3
+
+
+class TestLookupCachedEmbeddings:
+    """Test cache lookups against a fake cursor."""
+
+    def test_returns_lists_and_deduplicates_keys(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [
+            {"cache_key": "k1", "embedding": np.array([0.5, 0.25])},
+        ]
+
+        found = lookup_cached_embeddings(cursor, ["k1", "k2", "k1"])
+
+        assert found == {"k1": [0.5, 0.25]}
+        (params,) = cursor.execute.call_args.args[1]
+        assert params == ["k1", "k2"]
+
+    def test_text_vectors_are_parsed(self):
+        # Without the pgvector adapter the driver returns the text form
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [
+            {"cache_key": "k1", "embedding": "[0.5,-0.25,1e-05]"},
+            {"cache_key": "k2", "embedding": "[]"},
+        ]
+
+        found = lookup_cached_embeddings(cursor, ["k1", "k2"])
+
+        assert found == {"k1": [0.5, -0.25, 1e-05], "k2": []}
+        assert format_vector_literal(found["k1"]) == "[0.5,-0.25,1e-05]"
+
+    def test_large_lookups_are_batched(self, monkeypatch):
+        monkeypatch.setattr(embedding_cache, "LOOKUP_BATCH_SIZE", 2)
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+
+        lookup_cached_embeddings(cursor, ["a", "b", "c", "d", "e"])
+
+        assert cursor.execute.call_count == 3
+
+    def test_prune_disabled_with_zero_ttl(self):
+        cursor = MagicMock()
+
+        assert prune_embedding_cache(cursor, 0) == 0
+        cursor.execute.assert_not_called()
@@ -0,0 +1,100 @@
+"""
+Tests for hybrid (full-text + vector) RAG retrieval.
+"""
+from unittest.mock import MagicMock
+
+from psycopg2 import errors as pg_errors
+
+from agent_mcp.features.rag.hybrid_search import (
+    HYBRID_SEARCH_SQL,
+    VECTOR_SEARCH_SQL,
+    build_text_query,
+    hybrid_search,
+    keyword_task_search,
+)
+
+
+class TestBuildTextQuery:
+    """Test websearch_to_tsquery input construction."""
+
+    def test_or_joins_distinct_keywords(self):
+        assert build_text_query("How does the Indexer index? indexer!") == (
+            "how or does or the or indexer or index"
+        )
+
+    def test_strips_search_operators(self):
+        assert build_text_query('-secret "quoted" or:x') == "secret or quoted"
+
+    def test_short_words_only(self):
+        assert build_text_query("a is to") is None
+
+
+class TestHybridSearch:
+    """Test the single-statement RRF retriever."""
+
+    def test_one_round_trip_with_parsed_metadata(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [
+            {
+                "chunk_id": 7,
+                "chunk_text": "def index(): ...",
+                "source_type": "code",
+                "source_ref": "indexing.py",
+                "metadata": '{"language": "python"}',
+                "distance": 0.8,
+                "rrf_score": 0.03,
+            }
+        ]
+
+        results = hybrid_search(cursor, "index code", [0.1, 0.2], k=5, candidates=3, rrf_k=60)
+
+        cursor.execute.assert_called_once()
+        sql, params = cursor.execute.call_args.args
+        # ef_search/probes are set in the same round trip as the search
+        assert sql.startswith("SET LOCAL hnsw.ef_search")
+        assert sql.endswith(HYBRID_SEARCH_SQL)
+        assert params == {
+            "text_query": "index or code",
+            "embedding": [0.1, 0.2],
+            "candidates": 5,  # never fewer candidates than results
+            "rrf_k": 60,
+            "k": 5,
+        }
+        assert results[0]["metadata"] == {"language": "python"}
+
+    def test_query_without_keywords_uses_vector_search(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+
+        hybrid_search(cursor, "?!", [0.1], k=3)
+
+        assert cursor.execute.call_args.args[0].endswith(VECTOR_SEARCH_SQL)
+
+    def test_missing_tsvector_column_falls_back(self):
+        cursor = MagicMock()
+        cursor.execute.side_effect = [pg_errors.UndefinedColumn("chunk_tsv"), None]
+        cursor.fetchall.return_value = []
+
+        hybrid_search(cursor, "index code", [0.1], k=3)
+
+        cursor.connection.rollback.assert_called_once()
+        assert cursor.execute.call_args.args[0].endswith(VECTOR_SEARCH_SQL)
+
+
+class TestKeywordTaskSearch:
+    """Test the indexed keyword task lookup."""
+
+    def test_uses_full_text_match(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [{"task_id": "t1"}]
+
+        assert keyword_task_search(cursor, "fix indexer", limit=5) == [{"task_id": "t1"}]
+        sql, params = cursor.execute.call_args.args
+        assert "websearch_to_tsquery" in sql
+        assert "LIKE" not in sql
+        assert params == ("fix or indexer", 5)
+
+    def test_no_keywords_skips_query(self):
+        cursor = MagicMock()
+        assert keyword_task_search(cursor, "to do") == []
+        cursor.execute.assert_not_called()
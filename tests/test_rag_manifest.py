@@ -0,0 +1,151 @@
+"""
+Tests for the incremental RAG file manifest.
+"""
+import os
+from unittest.mock import patch
+
+from agent_mcp.features.rag.file_watcher import RagFileWatcher
+from agent_mcp.features.rag.indexing import _candidates_from_paths, _collect_indexable_files
+from agent_mcp.features.rag.manifest import (
+    ManifestEntry,
+    detect_file_changes,
+    drop_oversize_candidates,
+    find_deleted_entries,
+    hash_content,
+)
+
+
+def _entry_for(path, rel_path, source_type="markdown"):
+    stat_result = path.stat()
+    return ManifestEntry(
+        path=rel_path,
+        source_type=source_type,
+        mtime=stat_result.st_mtime,
+        size=stat_result.st_size,
+        content_hash=hash_content(path.read_text(encoding="utf-8")),
+    )
+
+
+class TestManifestChangeDetection:
+    """Test stat-first change detection."""
+
+    def test_unchanged_file_is_not_read(self, tmp_path):
+        doc = tmp_path / "README.md"
+        doc.write_text("# Title\n", encoding="utf-8")
+        manifest = {"README.md": _entry_for(doc, "README.md")}
+
+        with patch("pathlib.Path.read_text") as mock_read:
+            changed, touched = detect_file_changes(
+                {"README.md": (doc, "markdown")}, manifest
+            )
+
+        mock_read.assert_not_called()
+        assert changed == [] and touched == []
+
+    def test_modified_file_is_reported_with_new_hash(self, tmp_path):
+        doc = tmp_path / "README.md"
+        doc.write_text("# Title\n", encoding="utf-8")
+        manifest = {"README.md": _entry_for(doc, "README.md")}
+        doc.write_text("# Title\n\nMore text.\n", encoding="utf-8")
+
+        changed, touched = detect_file_changes({"README.md": (doc, "markdown")}, manifest)
+
+        assert touched == []
+        assert [c.path for c in changed] == ["README.md"]
+        assert changed[0].entry.content_hash == hash_content("# Title\n\nMore text.\n")
+
+    def test_touched_file_only_refreshes_stat(self, tmp_path):
+        doc = tmp_path / "README.md"
+        doc.write_text("# Title\n", encoding="utf-8")
+        manifest = {"README.md": _entry_for(doc, "README.md")}
+        stat_result = doc.stat()
+        os.utime(doc, (stat_result.st_atime, stat_result.st_mtime + 10))
+
+        changed, touched = detect_file_changes({"README.md": (doc, "markdown")}, manifest)
+
+        assert changed == []
+        assert len(touched) == 1
+        assert touched[0].mtime == stat_result.st_mtime + 10
+
+    def test_legacy_rag_meta_hash_avoids_reindex(self, tmp_path):
+        doc = tmp_path / "notes.md"
+        doc.write_text("indexed before the manifest existed", encoding="utf-8")
+        legacy = {"hash_markdown_notes.md": hash_content(doc.read_text(encoding="utf-8"))}
+
+        changed, touched = detect_file_changes({"notes.md": (doc, "markdown")}, {}, legacy)
+
+        assert changed == []
+        assert [t.path for t in touched] == ["notes.md"]
+
+    def test_deleted_entries(self, tmp_path):
+        doc = tmp_path / "kept.md"
+        doc.write_text("kept", encoding="utf-8")
+        manifest = {
+            "kept.md": _entry_for(doc, "kept.md"),
+            "gone.md": ManifestEntry("gone.md", "markdown", 0.0, 4, "x"),
+        }
+
+        deleted = find_deleted_entries(["kept.md"], manifest)
+
+        assert [e.path for e in deleted] == ["gone.md"]
+
+
+class TestIndexableFileDiscovery:
+    """Test full and watcher-driven candidate discovery."""
+
+    def test_full_scan_skips_ignored_dirs(self, tmp_path):
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "docs" / "guide.md").write_text("guide", encoding="utf-8")
+        (tmp_path / "node_modules").mkdir()
+        (tmp_path / "node_modules" / "pkg.md").write_text("pkg", encoding="utf-8")
+        (tmp_path / "app.py").write_text("print('hi')\n", encoding="utf-8")
+
+        candidates = _collect_indexable_files(tmp_path, True, True)
+
+        assert candidates["docs/guide.md"][1] == "markdown"
+        assert candidates["app.py"][1] == "code"
+        assert "node_modules/pkg.md" not in candidates
+
+    def test_watched_paths_split_existing_and_missing(self, tmp_path):
+        existing = tmp_path / "guide.md"
+        existing.write_text("guide", encoding="utf-8")
+        watcher = RagFileWatcher(tmp_path)
+        watcher.mark_dirty(existing)
+        watcher.mark_dirty(tmp_path / "removed.md")
+        watcher.mark_dirty(tmp_path / ".git" / "HEAD.md")
+
+        candidates, missing = _candidates_from_paths(watcher.drain(), tmp_path, True, False)
+
+        assert list(candidates) == ["guide.md"]
+        assert missing == ["removed.md"]
+        assert watcher.pending_count() == 0
+
+
+class TestLargeFiles:
+    """Test streamed hashing and the oversize skip policy."""
+
+    def test_large_file_is_not_read(self, tmp_path):
+        doc = tmp_path / "big.md"
+        doc.write_text("line\n" * 1000, encoding="utf-8")
+
+        with patch("builtins.open") as mock_open, patch("pathlib.Path.read_text") as mock_read:
+            changed, _ = detect_file_changes({"big.md": (doc, "markdown")}, {}, stream_threshold=1024)
+
+        mock_read.assert_not_called()
+        mock_open.assert_not_called()
+        # Hashed later, while the indexer streams it through the chunkers
+        assert changed[0].content is None
+        assert changed[0].entry.content_hash is None
+
+    def test_oversize_files_are_dropped(self, tmp_path):
+        small = tmp_path / "small.md"
+        small.write_text("ok", encoding="utf-8")
+        big = tmp_path / "big.md"
+        big.write_text("x" * 100, encoding="utf-8")
+
+        kept, skipped = drop_oversize_candidates(
+            {"small.md": (small, "markdown"), "big.md": (big, "markdown")}, max_bytes=50
+        )
+
+        assert list(kept) == ["small.md"]
+        assert skipped == ["big.md"]
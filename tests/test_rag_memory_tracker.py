@@ -3,6 +3,9 @@ Tests for RAG memory tracker.
 """
 import pytest
 from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from agent_mcp.features.rag import memory_tracker, query
 from agent_mcp.features.rag.memory_tracker import RAGMemoryTracker, get_memory_tracker
 
 
@@ -75,3 +78,96 @@ class TestRAGMemoryTracker:
         tracker.record_access(None, "vector_search", "doc1")
         tracker.record_access("", "vector_search", "doc1")
 
+
+
+class TestBoundedMemoryTracker:
+    """Test LRU caps, ordered expiry and write-behind persistence."""
+
+    def test_per_agent_cap_evicts_least_recently_used(self):
+        tracker = RAGMemoryTracker(max_docs_per_agent=2)
+        tracker.record_access("agent1", "vector_search", "a")
+        tracker.record_access("agent1", "vector_search", "b")
+        tracker.record_access("agent1", "vector_search", "a")  # Refreshes "a"
+        tracker.record_access("agent1", "vector_search", "c")
+        assert tracker.get_accessed_docs("agent1") == {"vector_search:a", "vector_search:c"}
+
+    def test_agent_cap(self):
+        tracker = RAGMemoryTracker(max_agents=2)
+        for agent_id in ("agent1", "agent2", "agent3"):
+            tracker.record_access(agent_id, "vector_search", "doc1")
+        assert not tracker.has_accessed("agent1", "vector_search", "doc1")
+        assert tracker.has_accessed("agent3", "vector_search", "doc1")
+
+    def test_expiry_stops_at_first_fresh_entry(self):
+        tracker = RAGMemoryTracker(ttl=timedelta(hours=1))
+        tracker.record_access("agent1", "vector_search", "old")
+        tracker.record_access("agent1", "vector_search", "new")
+        agent_cache = tracker._cache["agent1"]
+        agent_cache["vector_search:old"] = datetime.now() - timedelta(hours=2)
+        assert tracker.get_accessed_docs("agent1") == {"vector_search:new"}
+        assert list(agent_cache) == ["vector_search:new"]
+
+    def test_flush_writes_pending_accesses(self):
+        tracker = RAGMemoryTracker(persist=True)
+        tracker.record_access("agent1", "vector_search", "doc1")
+        tracker.record_access("agent1", "vector_search", "doc1")
+        conn = MagicMock()
+        with patch.object(memory_tracker, "db_connection") as db_connection, patch.object(
+            memory_tracker, "execute_values"
+        ) as execute_values:
+            db_connection.return_value.__enter__.return_value = conn
+            assert tracker.flush() == 1
+        rows = execute_values.call_args.args[2]
+        assert [(agent, key) for agent, key, _ in rows] == [("agent1", "vector_search:doc1")]
+        assert rows[0][2].tzinfo is not None
+        conn.commit.assert_called_once()
+        assert tracker.flush() == 0  # Nothing pending any more
+
+    def test_failed_flush_keeps_pending(self):
+        tracker = RAGMemoryTracker(persist=True)
+        tracker.record_access("agent1", "vector_search", "doc1")
+        with patch.object(memory_tracker, "db_connection", side_effect=RuntimeError("db down")):
+            assert tracker.flush() == 0
+        assert ("agent1", "vector_search:doc1") in tracker._pending
+
+    def test_load_merges_persisted_history(self):
+        tracker = RAGMemoryTracker(persist=True, max_docs_per_agent=2)
+        tracker.record_access("agent1", "vector_search", "local")
+        persisted_at = (datetime.now() - timedelta(minutes=5)).astimezone()
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [
+            {"doc_key": "vector_search:remote", "accessed_at": persisted_at},
+            {"doc_key": "vector_search:older", "accessed_at": persisted_at - timedelta(minutes=1)},
+        ]
+        with patch.object(memory_tracker, "db_connection") as db_connection:
+            db_connection.return_value.__enter__.return_value.cursor.return_value = cursor
+            assert tracker._load_agent("agent1") == 2
+
+        # Capped to the two most recent, oldest first
+        assert list(tracker._cache["agent1"]) == ["vector_search:remote", "vector_search:local"]
+        assert tracker.has_accessed("agent1", "vector_search", "remote")
+
+
+class TestQueryRefreshesHistory:
+    """Test that RAG queries read persisted history back before using the tracker."""
+
+    @pytest.mark.asyncio
+    async def test_prepare_prompt_loads_agent_history(self):
+        tracker = RAGMemoryTracker(persist=True)
+        answer_cache = MagicMock()
+        answer_cache.get.return_value = "cached answer"
+        with patch.object(memory_tracker, "_memory_tracker", tracker), patch.object(
+            tracker, "_load_agent", return_value=1
+        ) as load_agent, patch.object(
+            query, "get_semantic_answer_cache", return_value=answer_cache
+        ), patch.object(
+            query, "_embed_query", AsyncMock(return_value=[0.1])
+        ), patch(
+            "agent_mcp.features.rag.context.get_agent_context", return_value=None
+        ):
+            prompt = await query._prepare_rag_prompt(
+                MagicMock(), "where is the config?", "agent1", None, "json"
+            )
+
+        assert prompt.answer == "cached answer"
+        load_agent.assert_called_once_with("agent1")
@@ -203,3 +203,45 @@ class TestRoleBasedFiltering:
         assert isinstance(filtered, list)
         assert len(filtered) >= 0  # Can be empty or filtered
 
+
+
+class TestCompiledMatchers:
+    """Test the precompiled intent and role keyword matchers."""
+
+    @pytest.mark.parametrize("query,intent", [
+        ("how do I implement a login page", "implementation"),
+        ("why does this build fail with an error", "debugging"),
+        ("fix the auth bug", "security"),
+        ("how does the system work", "architecture"),
+        ("what should we do next", "planning"),
+        ("tell me about the weather", "general"),
+    ])
+    def test_intent_precedence(self, query: str, intent: str):
+        """The most specific intent wins wherever it appears in the query."""
+        from agent_mcp.features.rag.intent_classifier import get_intent_classifier
+
+        assert get_intent_classifier().classify(query) == intent
+
+    def test_classifier_is_shared(self):
+        """The classifier is built once and reused."""
+        from agent_mcp.features.rag.intent_classifier import get_intent_classifier
+
+        assert get_intent_classifier() is get_intent_classifier()
+
+    def test_keyword_matcher_counts_overlapping_keywords(self):
+        """Keywords nested in or prefixing other keywords are all counted."""
+        from agent_mcp.features.rag.personalizer import _KeywordMatcher
+
+        matcher = _KeywordMatcher(['auth', 'authentication', 'ui', 'build'])
+        assert matcher.matches("rebuild authentication") == {'auth', 'authentication', 'ui', 'build'}
+        assert matcher.count("nothing here") == 0
+
+    @given(results=lists(rag_result_strategy(), min_size=1, max_size=10))
+    @settings(max_examples=30)
+    def test_role_scores_match_substring_counts(self, results: List[Dict[str, Any]]):
+        """Role scores equal the number of role keywords contained in each result."""
+        personalizer = ResponsePersonalizer()
+        keywords = ResponsePersonalizer.ROLE_KEYWORDS['worker']
+        for result in personalizer._filter_by_role(results, 'worker'):
+            content = (result['content'] + ' ' + result['title']).lower()
+            assert result['_role_score'] == sum(keyword in content for keyword in keywords)
@@ -0,0 +1,114 @@
+"""
+Tests for the RAG query embedding cache and semantic answer cache.
+"""
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from agent_mcp.features.rag import query, query_cache
+from agent_mcp.features.rag.query_cache import (
+    QueryEmbeddingCache,
+    SemanticAnswerCache,
+    bump_index_generation,
+)
+from agent_mcp.utils.metrics import get_all_metrics, reset_metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+class TestQueryEmbeddingCache:
+    """Test the LRU/TTL query embedding cache."""
+
+    def test_normalized_text_hits(self):
+        cache = QueryEmbeddingCache(max_entries=4)
+        cache.set("How does  Indexing work?", [1.0, 0.0])
+
+        assert cache.get("how does indexing work?") == [1.0, 0.0]
+        assert cache.get("something else") is None
+        rag = get_all_metrics()["rag"]
+        assert rag["query_embedding_cache_hits"] == 1
+        assert rag["query_embedding_cache_misses"] == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.set("a", [1.0])
+        cache.set("b", [2.0])
+        cache.get("a")
+        cache.set("c", [3.0])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == [1.0]
+        assert cache.get("c") == [3.0]
+
+    def test_expired_entries_miss(self):
+        cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=10)
+        with patch.object(query_cache.time, "monotonic", return_value=100.0):
+            cache.set("a", [1.0])
+        with patch.object(query_cache.time, "monotonic", return_value=111.0):
+            assert cache.get("a") is None
+        assert cache.size() == 0
+
+
+class TestSemanticAnswerCache:
+    """Test cosine-threshold answer reuse."""
+
+    def test_similar_query_same_scope_hits(self):
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.set([1.0, 0.0], ("agent-1", "json"), "cached answer")
+
+        assert cache.get([0.99, 0.05], ("agent-1", "json")) == "cached answer"
+        assert cache.get([0.99, 0.05], ("agent-2", "json")) is None
+        assert cache.get([0.0, 1.0], ("agent-1", "json")) is None
+        rag = get_all_metrics()["rag"]
+        assert rag["answer_cache_hits"] == 1
+        assert rag["answer_cache_misses"] == 2
+
+    def test_index_change_invalidates(self):
+        cache = SemanticAnswerCache(threshold=0.95)
+        cache.set([1.0, 0.0], None, "stale")
+        bump_index_generation()
+
+        assert cache.get([1.0, 0.0], None) is None
+        assert cache.size() == 0
+
+
+class TestQueryRagSystemCaching:
+    """Test the caches wired into query_rag_system."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_question_skips_embedding_and_chat(self):
+        client = MagicMock()
+        client.embeddings.create = AsyncMock(
+            return_value=SimpleNamespace(data=[SimpleNamespace(embedding=[0.3, 0.4])])
+        )
+        client.chat.completions.create = AsyncMock(
+            return_value=SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="answer"))]
+            )
+        )
+        live_context = [{"context_key": "k", "value": "v", "description": "d", "last_updated": "now"}]
+
+        with patch.object(query, "get_async_openai_client", return_value=client), patch.object(
+            query, "_with_cursor", side_effect=lambda func, *args: live_context
+            if func is query._fetch_recent_live_context
+            else [] if func is not query._rag_embeddings_table_exists else False
+        ), patch.object(
+            query, "get_query_embedding_cache", return_value=QueryEmbeddingCache()
+        ), patch.object(
+            query, "get_semantic_answer_cache", return_value=SemanticAnswerCache()
+        ):
+            first = await query.query_rag_system("What is the indexer?")
+            second = await query.query_rag_system("what is  the indexer?")
+
+        assert first == second == "answer"
+        assert client.embeddings.create.await_count == 1
+        assert client.chat.completions.create.await_count == 1
+        rag = get_all_metrics()["rag"]
+        assert rag["query_embedding_cache_hits"] == 1
+        assert rag["answer_cache_hits"] == 1
@@ -0,0 +1,87 @@
+"""
+Tests that RAG query retrieval overlaps its database and embedding round trips.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from agent_mcp.features.rag import query
+from agent_mcp.features.rag.query_cache import get_query_embedding_cache
+
+DELAY = 0.2
+
+
+@pytest.fixture(autouse=True)
+def empty_query_embedding_cache():
+    get_query_embedding_cache().clear()
+    yield
+    get_query_embedding_cache().clear()
+
+
+def _slow_with_cursor(func, *args):
+    """Stand-in for query._with_cursor: every DB round trip takes DELAY."""
+    time.sleep(DELAY)
+    if func is query._rag_embeddings_table_exists:
+        return True
+    if func is query._search_vectors:
+        return [{"chunk_text": "indexed", "source_type": "markdown", "source_ref": "README.md"}]
+    if func in (query._fetch_recent_live_context, query._fetch_all_live_context):
+        return [{"context_key": "k", "value": "v", "description": "d", "last_updated": "now"}]
+    return []
+
+
+def _fake_openai_client():
+    async def create_embedding(**kwargs):
+        await asyncio.sleep(DELAY)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[0.1, 0.2])])
+
+    client = MagicMock()
+    client.embeddings.create = create_embedding
+    client.chat.completions.create = AsyncMock(
+        return_value=SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="answer"))]
+        )
+    )
+    return client
+
+
+class TestQueryConcurrency:
+    """Test that live SQL, embedding and vector search run concurrently."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("with_model", [False, True])
+    async def test_latency_is_max_not_sum(self, with_model):
+        client = _fake_openai_client()
+        with patch.object(query, "_with_cursor", side_effect=_slow_with_cursor), patch.object(
+            query, "get_async_openai_client", return_value=client
+        ):
+            start = time.perf_counter()
+            if with_model:
+                answer = await query.query_rag_system_with_model("explain the indexer", "m")
+            else:
+                answer = await query.query_rag_system("explain the indexer")
+            elapsed = time.perf_counter() - start
+
+        assert answer == "answer"
+        # Sequential: 3 queries + table check + embedding + search = 6 * DELAY.
+        # Concurrent critical path: max(embedding, table check) + search = 2 * DELAY.
+        assert elapsed < 4 * DELAY
+        user_message = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert "indexed" in user_message
+
+    @pytest.mark.asyncio
+    async def test_embedding_error_keeps_live_results(self):
+        client = _fake_openai_client()
+        client.embeddings.create = AsyncMock(side_effect=RuntimeError("boom"))
+        with patch.object(query, "_with_cursor", side_effect=_slow_with_cursor), patch.object(
+            query, "get_async_openai_client", return_value=client
+        ):
+            answer = await query.query_rag_system("explain the indexer")
+
+        assert answer == "answer"
+        user_message = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert "Key: k" in user_message
+        assert "indexed" not in user_message
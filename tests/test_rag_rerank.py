@@ -0,0 +1,166 @@
+"""
+Tests for the RAG rerank stage (MMR over stored embeddings, score cache).
+"""
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from agent_mcp.features.rag import query, rerank
+from agent_mcp.features.rag.query_cache import bump_index_generation
+from agent_mcp.features.rag.rerank import (
+    CrossEncoderReranker,
+    MMRReranker,
+    RerankScoreCache,
+    query_hash,
+)
+from agent_mcp.utils.metrics import get_all_metrics, reset_metrics
+
+
+def _candidate(chunk_id, embedding):
+    return {"chunk_id": chunk_id, "chunk_text": f"chunk {chunk_id}", "embedding": np.array(embedding)}
+
+
+@pytest.fixture
+def candidates():
+    # Two near-duplicates closest to the query and one distinct, slightly less relevant chunk
+    return [
+        _candidate(1, [1.0, 0.0, 0.0]),
+        _candidate(2, [0.99, 0.01, 0.0]),
+        _candidate(3, [0.7, 0.0, 0.7]),
+    ]
+
+
+class TestMMRReranker:
+    """Test relevance/diversity selection."""
+
+    def test_pure_relevance_keeps_similarity_order(self, candidates):
+        results = MMRReranker(lambda_mult=1.0).rerank("q", [1.0, 0.0, 0.0], candidates, k=2)
+        assert [r["chunk_id"] for r in results] == [1, 2]
+
+    def test_diversity_skips_near_duplicates(self, candidates):
+        results = MMRReranker(lambda_mult=0.3).rerank("q", [1.0, 0.0, 0.0], candidates, k=2)
+        assert [r["chunk_id"] for r in results] == [1, 3]
+        assert all("embedding" not in r for r in results)
+        assert results[0]["rerank_score"] == pytest.approx(1.0)
+
+    def test_text_embeddings_are_parsed(self):
+        candidates = [{"chunk_id": 1, "embedding": "[0.0, 1.0]"}, {"chunk_id": 2, "embedding": "[1.0, 0.0]"}]
+        results = MMRReranker().rerank("q", [1.0, 0.0], candidates, k=1)
+        assert results[0]["chunk_id"] == 2
+
+    def test_hybrid_rrf_score_is_the_relevance(self, candidates):
+        # Chunk 3 is far from the query vector but ranked first by full-text search
+        for candidate, rrf_score in zip(candidates, [0.016, 0.015, 0.032]):
+            candidate["rrf_score"] = rrf_score
+        results = MMRReranker(lambda_mult=1.0).rerank("q", [1.0, 0.0, 0.0], candidates, k=2)
+        assert [r["chunk_id"] for r in results] == [3, 1]
+        assert results[0]["rerank_score"] == pytest.approx(0.032)
+        # Diversity still applies on top of the fused rank
+        results = MMRReranker(lambda_mult=0.6).rerank("q", [1.0, 0.0, 0.0], candidates, k=3)
+        assert [r["chunk_id"] for r in results][:2] == [3, 1]
+
+    def test_missing_embeddings_keep_retrieval_order(self):
+        candidates = [{"chunk_id": 1}, {"chunk_id": 2}, {"chunk_id": 3}]
+        results = MMRReranker().rerank("q", [1.0], candidates, k=2)
+        assert [r["chunk_id"] for r in results] == [1, 2]
+
+
+class TestRerankScoreCache:
+    """Test (query hash, chunk_id) score caching."""
+
+    def test_repeated_query_reuses_scores(self, candidates):
+        reset_metrics()
+        reranker = MMRReranker(cache=RerankScoreCache(100))
+        with patch.object(reranker, "_score", wraps=reranker._score) as score:
+            reranker.rerank("Where is X?", [1.0, 0.0, 0.0], candidates, k=2)
+            reranker.rerank("where is  x?", [1.0, 0.0, 0.0], candidates, k=2)
+        score.assert_called_once()
+        rag_metrics = get_all_metrics()["rag"]
+        assert rag_metrics["rerank_cache_hits"] == 3
+        assert rag_metrics["rerank_cache_misses"] == 3
+
+    def test_index_change_clears_scores(self):
+        cache = RerankScoreCache(100)
+        cache.set_many(query_hash("q"), {1: 0.5})
+        assert cache.get_many(query_hash("q"), [1]) == {1: 0.5}
+        bump_index_generation()
+        assert cache.get_many(query_hash("q"), [1]) == {}
+
+    def test_lru_bound(self):
+        cache = RerankScoreCache(2)
+        cache.set_many("q", {1: 0.1, 2: 0.2, 3: 0.3})
+        assert cache.size() == 2
+        assert cache.get_many("q", [1, 2, 3]) == {2: 0.2, 3: 0.3}
+
+
+class TestCrossEncoderReranker:
+    """Test batch scoring through a (fake) cross-encoder model."""
+
+    def test_scores_pairs_in_one_batch(self):
+        model = MagicMock()
+        model.predict.return_value = [0.1, 0.9]
+        reranker = CrossEncoderReranker("model")
+        reranker._model = model
+        results = reranker.rerank(
+            "q", [0.0], [{"chunk_id": 1, "chunk_text": "a"}, {"chunk_id": 2, "chunk_text": "b"}], k=2
+        )
+        assert [r["chunk_id"] for r in results] == [2, 1]
+        model.predict.assert_called_once()
+        assert model.predict.call_args.args[0] == [("q", "a"), ("q", "b")]
+
+
+class TestRerankInQuery:
+    """Test over-fetching and embedding lookup in the retrieval path."""
+
+    def test_search_attaches_stored_embeddings(self):
+        cursor = MagicMock()
+        with patch.object(query, "load_current_index"), patch.object(
+            query, "hybrid_search", return_value=[{"chunk_id": 1}, {"chunk_id": 2}]
+        ), patch.object(query, "fetch_chunk_embeddings", return_value={1: [0.5]}) as fetch:
+            results = query._search_vectors(cursor, "q", [0.1], 6, with_embeddings=True)
+        fetch.assert_called_once_with(cursor, [1, 2])
+        assert results == [{"chunk_id": 1, "embedding": [0.5]}, {"chunk_id": 2, "embedding": None}]
+
+    @pytest.mark.asyncio
+    async def test_vector_search_overfetches_and_trims(self):
+        run_with_cursor = MagicMock()
+
+        async def fake_run_with_cursor(func, *args):
+            run_with_cursor(func, *args)
+            if func is query._rag_embeddings_table_exists:
+                return True
+            return [_candidate(i, [1.0, float(i)]) for i in range(args[2])]
+
+        with patch.object(query, "is_vss_loadable", return_value=True), patch.object(
+            query, "_run_with_cursor", fake_run_with_cursor
+        ), patch.object(query, "get_reranker", return_value=MMRReranker()), patch(
+            "agent_mcp.core.config.RAG_RERANK_OVERFETCH", 3
+        ), patch(
+            "agent_mcp.core.config.RAG_RERANK_TOP_K", 4
+        ):
+            results = await query._vector_search(None, "q", k_results=5, query_embedding=[1.0, 0.0])
+
+        search_args = run_with_cursor.call_args_list[-1].args
+        assert search_args[0] is query._search_vectors
+        assert search_args[3] == 15 and search_args[4] is True
+        assert len(results) == 4
+
+
+class TestGetReranker:
+    """Test reranker configuration."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_reranker(self):
+        with patch.object(rerank, "_reranker", None), patch.object(rerank, "_reranker_loaded", False):
+            yield
+
+    def test_disabled(self):
+        with patch("agent_mcp.core.config.RAG_RERANKER", "none"):
+            assert rerank.get_reranker() is None
+
+    def test_cross_encoder_without_package_falls_back_to_mmr(self):
+        with patch("agent_mcp.core.config.RAG_RERANKER", "cross_encoder"), patch.object(
+            rerank.importlib.util, "find_spec", return_value=None
+        ):
+            assert isinstance(rerank.get_reranker(), MMRReranker)
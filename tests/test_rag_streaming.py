@@ -0,0 +1,161 @@
+"""
+Tests for streamed RAG answers (generator, HTTP SSE route and MCP progress).
+"""
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+from agent_mcp.app.routes import rag as rag_routes
+from agent_mcp.features.rag import query
+from agent_mcp.features.rag.query import _RagPrompt, stream_rag_answer
+from agent_mcp.tools import rag_tools
+
+
+class _FakeStream:
+    """Async iterator of chat completion chunks with a close() like openai.AsyncStream."""
+
+    def __init__(self, deltas, error=None):
+        self._chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=d))])
+            for d in deltas
+        ]
+        self._error = error
+        self.close = AsyncMock()
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            yield chunk
+        if self._error:
+            raise self._error
+
+
+def _client(stream):
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=stream)
+    return client
+
+
+async def _collect(generator):
+    return [piece async for piece in generator]
+
+
+async def _fake_stream_answer(query_text, agent_id=None, format_type="json"):
+    for piece in ("Hel", "lo"):
+        yield piece
+
+
+class TestStreamRagAnswer:
+    """Test the streaming query generator."""
+
+    @pytest.mark.asyncio
+    async def test_yields_deltas_and_caches_full_answer(self):
+        stream = _FakeStream(["Hel", None, "lo"])
+        answer_cache = MagicMock()
+        prompt = _RagPrompt(
+            messages=[{"role": "user", "content": "q"}],
+            answer_cache=answer_cache,
+            answer_cache_scope=("agent", "json"),
+            query_embedding=[0.1],
+        )
+        with patch.object(query, "get_async_openai_client", return_value=_client(stream)), patch.object(
+            query, "_prepare_rag_prompt", AsyncMock(return_value=prompt)
+        ), patch.object(query, "record_rag_first_token") as record_first_token:
+            pieces = await _collect(stream_rag_answer("q", agent_id="agent"))
+
+        assert pieces == ["Hel", "lo"]
+        answer_cache.set.assert_called_once_with([0.1], ("agent", "json"), "Hello")
+        record_first_token.assert_called_once()
+        stream.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_prepared_answer_is_yielded_whole(self):
+        client = _client(_FakeStream([]))
+        with patch.object(query, "get_async_openai_client", return_value=client), patch.object(
+            query, "_prepare_rag_prompt", AsyncMock(return_value=_RagPrompt(answer="cached"))
+        ):
+            assert await _collect(stream_rag_answer("q")) == ["cached"]
+        client.chat.completions.create.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_error_mid_stream_is_reported(self):
+        stream = _FakeStream(["partial"], error=RuntimeError("boom"))
+        with patch.object(query, "get_async_openai_client", return_value=_client(stream)), patch.object(
+            query, "_prepare_rag_prompt", AsyncMock(return_value=_RagPrompt(messages=[]))
+        ):
+            pieces = await _collect(stream_rag_answer("q"))
+        assert pieces[0] == "partial"
+        assert "boom" in pieces[1]
+        stream.close.assert_awaited_once()
+
+
+class TestRagQueryRoute:
+    """Test /api/rag/query."""
+
+    def _client(self):
+        return TestClient(Starlette(routes=rag_routes.routes))
+
+    def test_streams_server_sent_events(self):
+        with patch.object(rag_routes, "get_agent_id", return_value="agent"), patch.object(
+            rag_routes, "log_audit"
+        ), patch.object(rag_routes, "stream_rag_answer", _fake_stream_answer):
+            response = self._client().post(
+                "/api/rag/query", json={"token": "t", "query": "q", "stream": True}
+            )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text == (
+            'data: {"delta": "Hel"}\n\n'
+            'data: {"delta": "lo"}\n\n'
+            "event: done\ndata: {}\n\n"
+        )
+
+    def test_json_answer_without_stream(self):
+        with patch.object(rag_routes, "get_agent_id", return_value="agent"), patch.object(
+            rag_routes, "log_audit"
+        ), patch.object(rag_routes, "query_rag_system", AsyncMock(return_value="Hello")):
+            response = self._client().post("/api/rag/query", json={"token": "t", "query": "q"})
+        assert response.json() == {"answer": "Hello"}
+
+    def test_requires_agent_token(self):
+        with patch.object(rag_routes, "get_agent_id", return_value=None):
+            response = self._client().post("/api/rag/query", json={"query": "q"})
+        assert response.status_code == 401
+
+
+class TestAskProjectRagProgress:
+    """Test streaming through MCP progress notifications."""
+
+    @pytest.mark.asyncio
+    async def test_progress_notifications_carry_deltas(self):
+        session = MagicMock()
+        session.send_progress_notification = AsyncMock()
+        ctx = SimpleNamespace(meta=SimpleNamespace(progressToken="p1"), session=session)
+        request_ctx = MagicMock()
+        request_ctx.get.return_value = ctx
+        with patch.object(rag_tools, "request_ctx", request_ctx), patch.object(
+            rag_tools, "get_agent_id", return_value="agent"
+        ), patch.object(rag_tools, "log_audit"), patch.object(
+            rag_tools, "stream_rag_answer", _fake_stream_answer
+        ):
+            result = await rag_tools.ask_project_rag_tool_impl({"token": "t", "query": "q"})
+
+        assert result[0].text == "Hello"
+        assert [c.kwargs["message"] for c in session.send_progress_notification.call_args_list] == [
+            "Hel",
+            "lo",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_without_progress_token_uses_full_answer(self):
+        request_ctx = MagicMock()
+        request_ctx.get.side_effect = LookupError
+        with patch.object(rag_tools, "request_ctx", request_ctx), patch.object(
+            rag_tools, "get_agent_id", return_value="agent"
+        ), patch.object(rag_tools, "log_audit"), patch.object(
+            rag_tools, "query_rag_system", AsyncMock(return_value="full")
+        ):
+            result = await rag_tools.ask_project_rag_tool_impl({"token": "t", "query": "q"})
+        assert result[0].text == "full"
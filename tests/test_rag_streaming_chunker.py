@@ -0,0 +1,76 @@
+"""
+Tests for the streaming chunkers and block-wise file hashing.
+"""
+import pytest
+
+from agent_mcp.features.rag.chunking import (
+    iter_lines,
+    iter_markdown_chunks,
+    iter_simple_chunks,
+    markdown_aware_chunker,
+    simple_chunker,
+)
+from agent_mcp.features.rag.code_chunking import _chunk_generic_code, iter_generic_code_chunks
+from agent_mcp.features.rag.file_stream import HashingTextReader, hash_file
+from agent_mcp.features.rag.manifest import hash_content
+
+MARKDOWN = "\n".join(
+    f"# Section {n}\n\n" + "Some paragraph text for the section. " * 12 + "\n" for n in range(20)
+)
+CODE = "\n".join(f"func f{n}() {{\n    return {n}\n}}\n" for n in range(300))
+
+
+def _pieces(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestStreamingChunkers:
+    """The generator chunkers match the whole-string chunkers."""
+
+    @pytest.mark.parametrize("piece_size", [1, 7, 500, 10_000])
+    def test_simple_chunks_match(self, piece_size):
+        assert list(iter_simple_chunks(_pieces(MARKDOWN, piece_size), 300, 40)) == simple_chunker(
+            MARKDOWN, 300, 40
+        )
+
+    @pytest.mark.parametrize("piece_size", [3, 64, 4096])
+    def test_lines_match_split(self, piece_size):
+        assert list(iter_lines(_pieces(MARKDOWN, piece_size))) == MARKDOWN.split("\n")
+
+    def test_long_lines_are_broken(self):
+        lines = list(iter_lines(_pieces("x" * 25 + "\nshort", 4), max_line_length=10))
+        assert lines == ["x" * 10, "x" * 10, "x" * 5, "short"]
+
+    def test_markdown_chunks_match(self):
+        assert list(iter_markdown_chunks(iter_lines(_pieces(MARKDOWN, 100)))) == markdown_aware_chunker(
+            MARKDOWN
+        )
+
+    def test_generic_code_chunks_match(self):
+        streamed = list(iter_generic_code_chunks(iter_lines(_pieces(CODE, 100)), language="go"))
+        assert streamed == _chunk_generic_code(CODE, 1500, 3000, 300, "go")
+
+    def test_chunks_are_produced_lazily(self):
+        def endless():
+            while True:
+                yield "# Heading\n\n" + "word " * 100 + "\n"
+
+        chunks = iter_markdown_chunks(iter_lines(endless()))
+        assert next(chunks).startswith("# Heading")
+
+
+class TestHashingTextReader:
+    """Block-wise reads hash exactly like hash_content of the whole text."""
+
+    def test_hash_matches_read_text(self, tmp_path):
+        path = tmp_path / "doc.md"
+        path.write_bytes("línea uno\r\nline two\n".encode("utf-8") * 1000)
+        assert hash_file(path) == hash_content(path.read_text(encoding="utf-8"))
+
+    def test_truncation(self, tmp_path):
+        path = tmp_path / "big.log"
+        path.write_text("a" * 100, encoding="utf-8")
+        reader = HashingTextReader(path, block_size=16, max_chars=40)
+        assert "".join(reader) == "a" * 40
+        assert reader.truncated
+        assert reader.hexdigest() == hash_content("a" * 40)
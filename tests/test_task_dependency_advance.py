@@ -0,0 +1,130 @@
+"""
+Tests for auto-advancing dependents when tasks complete.
+"""
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from agent_mcp.core.task_graph import TaskGraph
+from agent_mcp.tools import task_tools
+
+
+class FakeTaskTable:
+    """Cursor over in-memory tasks, task_dependencies and task_notes tables."""
+
+    def __init__(self, rows):
+        self.rows = {row["task_id"]: dict(row) for row in rows}
+        self.dependencies = {
+            (row["task_id"], dep_id) for row in rows for dep_id in json.loads(row["depends_on_tasks"])
+        }
+        self.notes = []
+        self._result = []
+        self.execute = AsyncMock(side_effect=self._execute)
+
+    def _ready(self, task_id):
+        deps = [dep_id for tid, dep_id in self.dependencies if tid == task_id]
+        return bool(deps) and all(
+            self.rows.get(dep_id, {}).get("status") == "completed" for dep_id in deps
+        )
+
+    async def _execute(self, query, params=None):
+        if query.lstrip().startswith("UPDATE tasks"):
+            completed, agent = params[0], (params[1] if len(params) > 1 else None)
+            candidates = sorted({tid for tid, dep_id in self.dependencies if dep_id in completed})
+            advanced = [
+                task_id for task_id in candidates
+                if self.rows[task_id]["status"] == "pending"
+                and (agent is None or self.rows[task_id]["assigned_to"] == agent)
+                and self._ready(task_id)
+            ]
+            for task_id in advanced:
+                self.rows[task_id]["status"] = "in_progress"
+            self._result = [{"task_id": task_id} for task_id in advanced]
+        else:  # INSERT INTO task_notes
+            self.notes.extend(zip(*params))
+            self._result = []
+
+    def fetchall(self):
+        return self._result
+
+
+def _row(task_id, status="pending", depends_on=(), assigned_to="agent1"):
+    return {
+        "task_id": task_id,
+        "status": status,
+        "assigned_to": assigned_to,
+        "depends_on_tasks": json.dumps(list(depends_on)),
+    }
+
+
+def _setup(rows):
+    return FakeTaskTable(rows), TaskGraph({row["task_id"]: row for row in rows})
+
+
+class TestAdvanceUnblockedDependents:
+    """Test set-based dependency resolution."""
+
+    @pytest.mark.asyncio
+    async def test_hub_task_advances_all_dependents_in_one_update(self):
+        rows = [_row("hub", "completed")] + [_row(f"t{i}", depends_on=["hub"]) for i in range(500)]
+        cursor, graph = _setup(rows)
+        with patch.object(task_tools.g, "tasks", graph):
+            updates = await task_tools._advance_unblocked_dependents(cursor, ["hub"], "admin", True)
+
+        assert len(updates) == 500 and all(u["success"] for u in updates)
+        # One joined UPDATE, one notes INSERT
+        assert cursor.execute.await_count == 2
+        assert "task_dependencies" in cursor.execute.await_args_list[0].args[0]
+        assert graph.select(status="in_progress")[0]["notes"][0]["content"] == (
+            "Auto-advanced: all dependencies completed"
+        )
+        assert len(cursor.notes) == 500 and cursor.notes[0][2] == "admin"
+
+    @pytest.mark.asyncio
+    async def test_waits_for_every_dependency(self):
+        rows = [
+            _row("a", "completed"),
+            _row("b", "in_progress"),
+            _row("c", depends_on=["a", "b"]),
+            _row("d", depends_on=["a"]),
+            _row("e", "in_progress", depends_on=["a"]),
+        ]
+        cursor, graph = _setup(rows)
+        with patch.object(task_tools.g, "tasks", graph):
+            updates = await task_tools._advance_unblocked_dependents(cursor, ["a"], "admin", True)
+
+        assert [u["task_id"] for u in updates] == ["d"]
+        assert graph["c"]["status"] == "pending" and graph["d"]["status"] == "in_progress"
+
+    @pytest.mark.asyncio
+    async def test_agents_only_advance_their_own_tasks(self):
+        rows = [
+            _row("a", "completed"),
+            _row("mine", depends_on=["a"], assigned_to="agent1"),
+            _row("theirs", depends_on=["a"], assigned_to="agent2"),
+        ]
+        cursor, graph = _setup(rows)
+        with patch.object(task_tools.g, "tasks", graph):
+            updates = await task_tools._advance_unblocked_dependents(cursor, ["a"], "agent1", False)
+        assert [u["task_id"] for u in updates] == ["mine"]
+
+    @pytest.mark.asyncio
+    async def test_dependents_missing_from_memory_still_advance(self):
+        # e.g. created through a REST route that does not touch g.tasks
+        rows = [_row("a", "completed"), _row("b", depends_on=["a"])]
+        cursor = FakeTaskTable(rows)
+        with patch.object(task_tools.g, "tasks", TaskGraph({"a": rows[0]})):
+            updates = await task_tools._advance_unblocked_dependents(cursor, ["a"], "admin", True)
+
+        assert [u["task_id"] for u in updates] == ["b"]
+        assert cursor.rows["b"]["status"] == "in_progress"
+
+    @pytest.mark.asyncio
+    async def test_no_dependents_no_notes(self):
+        cursor, graph = _setup([_row("a", "completed")])
+        with patch.object(task_tools.g, "tasks", graph):
+            assert await task_tools._advance_unblocked_dependents(cursor, ["a"], "admin", True) == []
+            assert await task_tools._advance_unblocked_dependents(cursor, [], "admin", True) == []
+        # Only the UPDATE for ["a"]; nothing advanced, so no notes INSERT
+        assert cursor.execute.await_count == 1
@@ -0,0 +1,108 @@
+"""
+Tests for the indexed in-memory task store (g.tasks).
+"""
+import copy
+import json
+
+import pytest
+
+from agent_mcp.core.task_graph import TaskGraph, TaskRecord
+
+
+def _task(task_id, status="pending", depends_on=(), **fields):
+    return {"task_id": task_id, "status": status, "depends_on_tasks": list(depends_on), **fields}
+
+
+@pytest.fixture
+def graph():
+    return TaskGraph(
+        {
+            "a": _task("a", "completed", assigned_to="agent1", priority="high"),
+            "b": _task("b", "in_progress", assigned_to="agent1"),
+            "c": _task("c", depends_on=["a", "b"], assigned_to="agent2", parent_task="a"),
+            "d": _task("d", depends_on=["a"], parent_task="a"),
+        }
+    )
+
+
+class TestTaskRecord:
+    """Test record normalization."""
+
+    def test_json_list_fields_are_decoded(self):
+        graph = TaskGraph()
+        graph["t"] = {"task_id": "t", "depends_on_tasks": '["x"]', "notes": "", "child_tasks": "not json"}
+        assert graph["t"]["depends_on_tasks"] == ["x"]
+        assert graph["t"]["notes"] == [] and graph["t"]["child_tasks"] == []
+        graph["t"]["notes"] = json.dumps([{"content": "n"}])
+        assert graph["t"]["notes"] == [{"content": "n"}]
+
+    def test_copies_are_detached_plain_data(self, graph):
+        plain = graph["a"].copy()
+        assert type(plain) is dict
+        clone = copy.deepcopy(graph["a"])
+        assert isinstance(clone, TaskRecord)
+        clone["status"] = "failed"
+        assert graph.select(status="failed") == []
+        assert json.loads(json.dumps(graph["c"]))["depends_on_tasks"] == ["a", "b"]
+
+
+class TestIndexes:
+    """Test incremental maintenance of the secondary indexes."""
+
+    def test_select_by_fields(self, graph):
+        assert [t["task_id"] for t in graph.select(assigned_to="agent1")] == ["a", "b"]
+        assert [t["task_id"] for t in graph.select(status="pending", parent_task="a")] == ["c", "d"]
+        assert [t["task_id"] for t in graph.select(priority="high", status="completed")] == ["a"]
+        assert len(graph.select()) == 4
+
+    def test_field_writes_update_indexes(self, graph):
+        graph["b"]["assigned_to"] = "agent2"
+        graph["d"].update(priority="low", parent_task=None)
+        assert [t["task_id"] for t in graph.select(assigned_to="agent2")] == ["b", "c"]
+        assert graph.children("a") == ["c"]
+        assert [t["task_id"] for t in graph.select(priority="low")] == ["d"]
+
+    def test_replace_and_delete(self, graph):
+        old = graph["c"]
+        graph["c"] = _task("c", "completed")
+        old["status"] = "failed"  # Stale reference no longer touches the graph
+        assert graph.select(status="failed") == []
+        assert graph.dependents("a") == ["d"]
+        del graph["d"]
+        assert graph.dependents("a") == [] and graph.children("a") == []
+        graph.clear()
+        assert len(graph) == 0 and graph.blocked() == []
+
+
+class TestDependencies:
+    """Test reverse adjacency and blocked-task tracking."""
+
+    def test_dependents_and_analysis(self, graph):
+        assert graph.dependents("a") == ["c", "d"]
+        analysis = graph.analyze_dependencies(graph["c"])
+        assert analysis["completed_dependencies"] == ["a"]
+        assert analysis["blocking_dependencies"] == ["b"]
+        assert analysis["can_start"] is False and analysis["dependency_health"] == "waiting"
+        assert graph.analyze_dependencies(graph["a"])["blocks_tasks"] == ["c", "d"]
+
+    def test_blocked_set_follows_dependency_status(self, graph):
+        assert graph.blocked() == ["c"]
+        graph["b"]["status"] = "completed"
+        assert graph.blocked() == []
+        graph["a"]["status"] = "failed"
+        assert graph.blocked() == ["c", "d"]
+        assert graph.select(blocked_only=True, assigned_to="agent2")[0]["task_id"] == "c"
+
+    def test_missing_dependency_blocks_until_created(self, graph):
+        graph["e"] = _task("e", depends_on=["later"])
+        assert graph.is_blocked("e")
+        assert graph.analyze_dependencies(graph["e"])["dependency_health"] == "critical"
+        graph["later"] = _task("later", "completed")
+        assert not graph.is_blocked("e")
+        del graph["later"]
+        assert graph.is_blocked("e")
+
+    def test_dependency_list_changes(self, graph):
+        graph["d"]["depends_on_tasks"] = ["b"]
+        assert graph.dependents("a") == ["c"] and graph.dependents("b") == ["c", "d"]
+        assert graph.is_blocked("d")
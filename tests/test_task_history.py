@@ -2,7 +2,7 @@
 Tests for task history tracking.
 """
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 from starlette.requests import Request
 from agent_mcp.app.routes.tasks import get_task_history_api_route
 
@@ -18,17 +18,15 @@ class TestTaskHistory:
         request.method = "GET"
         request.path_params = {"task_id": "test-task-123"}
         
-        with patch('agent_mcp.app.routes.tasks.db_connection') as mock_db:
+        with patch('agent_mcp.app.routes.tasks.async_db_connection') as mock_db:
             mock_conn = MagicMock()
             mock_cursor = MagicMock()
-            # Set up cursor as a context manager
-            mock_cursor.__enter__ = Mock(return_value=mock_cursor)
-            mock_cursor.__exit__ = Mock(return_value=None)
+            mock_cursor.execute = AsyncMock(return_value=None)
             mock_conn.cursor.return_value = mock_cursor
             
-            # Set up connection as a context manager
-            mock_db.return_value.__enter__ = Mock(return_value=mock_conn)
-            mock_db.return_value.__exit__ = Mock(return_value=None)
+            # Set up connection as an async context manager
+            mock_db.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_db.return_value.__aexit__ = AsyncMock(return_value=None)
             
             # Mock database response - cursor.fetchall() returns list of dict-like objects
             mock_cursor.fetchall.return_value = [
@@ -0,0 +1,160 @@
+"""
+Tests for debounced, batched task re-indexing.
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from agent_mcp.features.rag import indexing
+from agent_mcp.features.rag.bulk_insert import BulkInsertResult
+from agent_mcp.features.rag.task_index_queue import TaskIndexQueue
+from agent_mcp.utils.metrics import get_all_metrics, reset_metrics
+
+
+@pytest.fixture
+def index_tasks_batch():
+    mock = AsyncMock(return_value=True)
+    with patch.object(indexing, "index_tasks_batch", mock):
+        yield mock
+
+
+class TestTaskIndexQueue:
+    """Test coalescing, batching and queue depth."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_updates_coalesce(self, index_tasks_batch):
+        queue = TaskIndexQueue(debounce_seconds=0.05, max_delay_seconds=1.0)
+        for status in ("pending", "in_progress", "completed"):
+            queue.enqueue("t1", {"task_id": "t1", "status": status})
+        queue.enqueue("t2", {"task_id": "t2", "status": "pending"})
+        await asyncio.sleep(0.2)
+
+        index_tasks_batch.assert_awaited_once_with(
+            [
+                ("t1", {"task_id": "t1", "status": "completed"}),
+                ("t2", {"task_id": "t2", "status": "pending"}),
+            ]
+        )
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_written_without_waiting(self, index_tasks_batch):
+        queue = TaskIndexQueue(debounce_seconds=30, max_delay_seconds=30, batch_size=2)
+        queue.enqueue("t1", {})
+        queue.enqueue("t2", {})
+        await asyncio.sleep(0.05)
+        index_tasks_batch.assert_awaited_once_with([("t1", {}), ("t2", {})])
+        assert queue.depth == 0
+
+    @pytest.mark.asyncio
+    async def test_max_delay_bounds_continuous_updates(self, index_tasks_batch):
+        queue = TaskIndexQueue(debounce_seconds=0.05, max_delay_seconds=0.1)
+        for _ in range(10):
+            queue.enqueue("t1", {})
+            await asyncio.sleep(0.03)
+        assert index_tasks_batch.await_count >= 1
+        await queue.flush()
+
+    @pytest.mark.asyncio
+    async def test_flush_and_depth_metric(self, index_tasks_batch):
+        reset_metrics()
+        queue = TaskIndexQueue(debounce_seconds=30, max_delay_seconds=30)
+        for task_id in ("t1", "t2", "t3"):
+            queue.enqueue(task_id, {})
+        assert queue.depth == 3
+        assert get_all_metrics()["rag"]["task_index_queue_depth"] == 3
+
+        await queue.flush()
+
+        index_tasks_batch.assert_awaited_once()
+        assert queue.depth == 0
+        rag_metrics = get_all_metrics()["rag"]
+        assert rag_metrics["task_index_queue_depth"] == 0
+        assert rag_metrics["task_index_tasks_total"] == 3
+        assert rag_metrics["task_index_flushes_total"] == 1
+
+
+class TestIndexTasksBatch:
+    """Test the batch writer and its short transactions."""
+
+    @pytest.mark.asyncio
+    async def test_one_embedding_request_and_commit_for_many_tasks(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        client = MagicMock()
+        client.embeddings.create = AsyncMock(
+            side_effect=lambda input, **kwargs: SimpleNamespace(
+                data=[SimpleNamespace(embedding=[0.0]) for _ in input]
+            )
+        )
+        insert = MagicMock(return_value=BulkInsertResult(chunk_ids=[1, 2], duration_seconds=0.01))
+        with patch.object(indexing, "is_vss_loadable", return_value=True), patch.object(
+            indexing, "get_db_connection", return_value=conn
+        ), patch.object(indexing, "return_connection"), patch.object(
+            indexing, "get_async_openai_client", return_value=client
+        ), patch.object(
+            indexing, "insert_chunks_with_embeddings", insert
+        ), patch.object(
+            indexing, "bump_index_generation"
+        ), patch(
+            "agent_mcp.core.config.RAG_EMBEDDING_CACHE", False
+        ):
+            ok = await indexing.index_tasks_batch(
+                [
+                    ("t1", {"task_id": "t1", "title": "old"}),
+                    ("t2", {"task_id": "t2", "title": "two"}),
+                    ("t1", {"task_id": "t1", "title": "new"}),
+                ]
+            )
+
+        assert ok
+        client.embeddings.create.assert_awaited_once()
+        assert len(client.embeddings.create.call_args.kwargs["input"]) == 2
+        delete_params = [c.args[1] for c in cursor.execute.call_args_list]
+        assert delete_params == [("task", ["t2", "t1"]), ("task", ["t2", "t1"])]
+        rows = insert.call_args.args[1]
+        assert [row[1] for row in rows] == ["t2", "t1"]
+        assert "Title: new" in rows[1][2]
+        conn.commit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_no_transaction_open_while_embedding(self):
+        conn = MagicMock()
+        return_connection = MagicMock()
+        seen_at_embed = {}
+
+        async def create(input, **kwargs):
+            # The cache lookup has committed and given its connection back
+            seen_at_embed.update(
+                commits=conn.commit.call_count, returned=return_connection.call_count
+            )
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[0.0]) for _ in input])
+
+        client = MagicMock()
+        client.embeddings.create = AsyncMock(side_effect=create)
+        insert = MagicMock(return_value=BulkInsertResult(chunk_ids=[1], duration_seconds=0.01))
+        with patch.object(indexing, "is_vss_loadable", return_value=True), patch.object(
+            indexing, "get_db_connection", return_value=conn
+        ), patch.object(indexing, "return_connection", return_connection), patch.object(
+            indexing, "get_async_openai_client", return_value=client
+        ), patch.object(
+            indexing, "insert_chunks_with_embeddings", insert
+        ), patch.object(
+            indexing, "cache_source_embeddings"
+        ) as cache_source, patch.object(
+            indexing, "lookup_cached_embeddings", return_value={}
+        ), patch.object(
+            indexing, "bump_index_generation"
+        ), patch(
+            "agent_mcp.core.config.RAG_EMBEDDING_CACHE", True
+        ):
+            ok = await indexing.index_tasks_batch([("t1", {"task_id": "t1"})])
+
+        assert ok
+        cache_source.assert_called_once()
+        assert seen_at_embed == {"commits": 1, "returned": 1}
+        # Delete and insert ran afterwards, in a second transaction
+        assert conn.commit.call_count == 2
+        assert return_connection.call_count == 2
+        insert.assert_called_once()
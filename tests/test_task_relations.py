@@ -0,0 +1,161 @@
+"""
+Tests for the normalized task relations (task_dependencies, task_notes)
+and the migration that fills them from the legacy JSON columns.
+"""
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import psycopg2
+import psycopg2.errors
+import pytest
+
+from agent_mcp.core.task_graph import TaskGraph
+from agent_mcp.db.actions import task_db
+from agent_mcp.db.migrations.normalize_task_relations import (
+    backfill_task_relations,
+    ensure_task_relation_tables,
+)
+from agent_mcp.tools import task_tools
+
+
+class RecordingCursor:
+    """Sync cursor returning canned rows for queries starting with a given prefix."""
+
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.queries = []
+        self.rowcount = 0
+        self._rows = []
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        self.queries.append((query, params))
+        self._rows = next(
+            (rows for prefix, rows in self.results.items() if query.startswith(prefix)), []
+        )
+        self.rowcount = len(params[0]) if query.startswith(("INSERT", "UPDATE")) and params else 0
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+    def writes(self, prefix):
+        return [params for query, params in self.queries if query.startswith(prefix)]
+
+
+class TestMigration:
+    """Test copying the JSON columns into the relation tables."""
+
+    def test_backfill_copies_dependencies_notes_and_parents(self):
+        notes = [{"timestamp": "t1", "author": "a", "content": "first"}, {"content": "second"}]
+        cursor = RecordingCursor(
+            {
+                "SELECT task_id, depends_on_tasks": [
+                    {"task_id": "c", "depends_on_tasks": json.dumps(["a", "b"])},
+                    {"task_id": "bad", "depends_on_tasks": "not json"},
+                ],
+                "SELECT t.task_id, t.notes": [{"task_id": "c", "notes": json.dumps(notes)}],
+                "SELECT task_id, child_tasks": [{"task_id": "p", "child_tasks": json.dumps(["c"])}],
+            }
+        )
+        counts = backfill_task_relations(cursor)
+
+        assert cursor.writes("INSERT INTO task_dependencies") == [(["c", "c"], ["a", "b"])]
+        assert cursor.writes("INSERT INTO task_notes") == [
+            (["c", "c"], ["t1", None], ["a", None], ["first", "second"])
+        ]
+        assert cursor.writes("UPDATE tasks") == [(["c"], ["p"])]
+        assert counts == {"dependencies": 2, "notes": 2, "parents": 1}
+
+    def test_backfill_is_a_no_op_on_empty_columns(self):
+        cursor = RecordingCursor()
+        assert backfill_task_relations(cursor) == {"dependencies": 0, "notes": 0, "parents": 0}
+        assert all(query.startswith("SELECT") for query, _ in cursor.queries)
+
+    def test_ensure_reports_missing_tables(self):
+        cursor = RecordingCursor({"SELECT to_regclass": [{"missing": True}]})
+        assert ensure_task_relation_tables(cursor) is True
+        assert any("CREATE TABLE IF NOT EXISTS task_notes" in query for query, _ in cursor.queries)
+
+
+class TestRelationHelpers:
+    """Test the task_db helpers for notes and dependencies."""
+
+    def test_append_notes_is_one_statement(self):
+        cursor = RecordingCursor()
+        task_db.append_task_notes(
+            cursor, [("t1", {"timestamp": "x", "author": "me", "content": "hi"}), ("t2", {"content": "yo"})]
+        )
+        assert cursor.writes("INSERT INTO task_notes") == [
+            (["t1", "t2"], ["x", None], ["me", None], ["hi", "yo"])
+        ]
+        # The legacy notes column is left alone by default
+        assert len(cursor.queries) == 1
+        task_db.append_task_notes(cursor, [])
+        assert len(cursor.queries) == 1
+
+    def test_legacy_mirror_cannot_fail_the_append(self):
+        class BadLegacyNotesCursor(RecordingCursor):
+            def execute(self, query, params=None):
+                super().execute(query, params)
+                if query.split()[:2] == ["UPDATE", "tasks"]:
+                    raise psycopg2.errors.InvalidTextRepresentation("invalid input syntax for type json")
+
+        cursor = BadLegacyNotesCursor()
+        with patch.object(task_db, "TASK_NOTES_LEGACY_MIRROR", True):
+            task_db.append_task_notes(cursor, [("t1", {"content": "hi"})])
+
+        assert [query.split()[0] for query, _ in cursor.queries] == [
+            "INSERT", "SAVEPOINT", "UPDATE", "ROLLBACK", "RELEASE"
+        ]
+        assert cursor.queries[3][0] == "ROLLBACK TO SAVEPOINT legacy_notes"
+
+    def test_set_dependencies(self):
+        cursor = RecordingCursor()
+        task_db.set_task_dependencies(cursor, "t", ["a", "b"])
+        task_db.set_task_dependencies(cursor, "n", [], replace=False)
+        assert [query.split()[0] for query, _ in cursor.queries] == ["DELETE", "INSERT"]
+        assert cursor.queries[1][1] == ("t", ["a", "b"])
+
+    def test_attach_notes_groups_rows_by_task(self):
+        cursor = RecordingCursor(
+            {
+                "SELECT task_id, timestamp": [
+                    {"task_id": "a", "timestamp": "1", "author": "x", "content": "one"},
+                    {"task_id": "a", "timestamp": "2", "author": "y", "content": "two"},
+                ]
+            }
+        )
+        tasks = task_db.attach_task_notes(cursor, [{"task_id": "a", "notes": "[]"}, {"task_id": "b"}])
+        assert [note["content"] for note in tasks[0]["notes"]] == ["one", "two"]
+        assert tasks[1]["notes"] == []
+        assert cursor.queries[0][1] == (["a", "b"],)
+
+
+class TestNoteAppends:
+    """Test that status updates append notes instead of rewriting them."""
+
+    @pytest.mark.asyncio
+    async def test_update_appends_note_row(self):
+        cursor = MagicMock()
+        cursor.execute = AsyncMock()
+        cursor.fetchone.return_value = {
+            "task_id": "t",
+            "status": "pending",
+            "assigned_to": "agent1",
+            "parent_task": None,
+        }
+        graph = TaskGraph({"t": {"task_id": "t", "status": "pending", "notes": [{"content": "old"}]}})
+        with patch.object(task_tools.g, "tasks", graph):
+            result = await task_tools._update_single_task(
+                cursor, "t", "in_progress", "agent1", False, notes_content="started"
+            )
+
+        assert result["success"]
+        queries = [call.args[0] for call in cursor.execute.await_args_list]
+        update_sql = next(q for q in queries if q.startswith("UPDATE tasks"))
+        assert "notes" not in update_sql
+        assert any("INSERT INTO task_notes" in q for q in queries)
+        assert [note["content"] for note in graph["t"]["notes"]] == ["old", "started"]
@@ -0,0 +1,211 @@
+"""
+Tests for the task search index (BM25, prefix matching, incremental
+updates) and the search_tasks tool on top of it.
+"""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from agent_mcp.core.task_graph import TaskGraph
+from agent_mcp.core.task_search import TaskSearchIndex, query_terms, tokenize
+from agent_mcp.tools import task_tools
+
+
+def _task(task_id, title="", description="", notes=None, **fields):
+    return {
+        "task_id": task_id,
+        "title": title,
+        "description": description,
+        "notes": notes or [],
+        "status": "pending",
+        "assigned_to": "agent1",
+        "updated_at": "2026-01-01T00:00:00",
+        **fields,
+    }
+
+
+def _ids(hits):
+    return [task_id for task_id, _, _ in hits]
+
+
+class TestTokenize:
+    """Test term extraction shared by indexing and queries."""
+
+    def test_short_terms_and_case(self):
+        assert tokenize("Fix the DB login-page on UI") == ["fix", "the", "login", "page"]
+        assert query_terms("login LOGIN page") == ["login", "page"]
+
+
+class TestTaskSearchIndex:
+    """Test ranking and index maintenance."""
+
+    def test_title_outranks_description_and_notes(self):
+        index = TaskSearchIndex()
+        index.add("n", _task("n", "Other", notes=[{"content": "deploy pipeline"}]))
+        index.add("d", _task("d", "Other", "deploy pipeline"))
+        index.add("t", _task("t", "Deploy pipeline"))
+        hits = index.search("deploy", 10)
+        assert _ids(hits) == ["t", "d", "n"]
+        assert hits[0][2] == {"title": 1}
+
+    def test_rare_terms_weigh_more(self):
+        index = TaskSearchIndex()
+        for i in range(10):
+            index.add(f"c{i}", _task(f"c{i}", "common work"))
+        index.add("r", _task("r", "common rare"))
+        index.add("x", _task("x", "common work again"))
+        assert _ids(index.search("common rare", 1)) == ["r"]
+
+    def test_prefix_match_scores_below_exact(self):
+        index = TaskSearchIndex()
+        index.add("exact", _task("exact", "auth"))
+        index.add("prefix", _task("prefix", "authentication"))
+        assert _ids(index.search("auth", 10)) == ["exact", "prefix"]
+        assert index.search("authx", 10) == []
+
+    def test_top_k_accept_and_tiebreak(self):
+        index = TaskSearchIndex()
+        for i in range(20):
+            index.add(f"t{i:02d}", _task(f"t{i:02d}", "same title"))
+        hits = index.search("same", 3, accept=lambda task_id: task_id != "t19")
+        assert _ids(hits) == ["t18", "t17", "t16"]
+        hits = index.search("same", 2, tiebreak=lambda task_id: -int(task_id[1:]))
+        assert _ids(hits) == ["t00", "t01"]
+
+    def test_vocabulary_follows_writes(self):
+        index = TaskSearchIndex()
+        index.add("a", _task("a", "zeta alpha", "alpha"))
+        index.add("b", _task("b", "beta"))
+        assert index._vocabulary == ["alpha", "beta", "zeta"]
+        index.update_field("a", "title", "gamma")
+        # alpha is still in a's description
+        assert index._vocabulary == ["alpha", "beta", "gamma"]
+        index.remove("a")
+        assert index._vocabulary == ["beta"]
+        assert _ids(index.search("bet", 5)) == ["b"]
+        index.clear()
+        assert index._vocabulary == []
+
+    def test_fields_restrict_search(self):
+        index = TaskSearchIndex()
+        index.add("a", _task("a", "Alpha", notes=[{"content": "hidden"}]))
+        assert _ids(index.search("hidden", 5)) == ["a"]
+        assert index.search("hidden", 5, fields=("title", "description")) == []
+
+
+class TestGraphMaintainsIndex:
+    """Test that TaskGraph writes keep the index current."""
+
+    def test_field_writes_update_index(self):
+        graph = TaskGraph({"a": _task("a", "Old title")})
+        graph["a"]["title"] = "New heading"
+        assert graph.search_index.search("old", 5) == []
+        assert _ids(graph.search_index.search("heading", 5)) == ["a"]
+        graph["a"].update(description="Mentions billing")
+        assert _ids(graph.search_index.search("billing", 5)) == ["a"]
+
+    def test_add_note_indexes_only_the_new_note(self):
+        graph = TaskGraph({"a": _task("a", "Task", notes=[{"content": "first"}])})
+        graph["a"].add_note({"content": "second remark"})
+        assert [note["content"] for note in graph["a"]["notes"]] == ["first", "second remark"]
+        assert _ids(graph.search_index.search("first", 5)) == ["a"]
+        assert _ids(graph.search_index.search("remark", 5)) == ["a"]
+
+    def test_replace_delete_and_clear(self):
+        graph = TaskGraph({"a": _task("a", "Payments"), "b": _task("b", "Payments too")})
+        graph["a"] = _task("a", "Invoices")
+        assert _ids(graph.search_index.search("payments", 5)) == ["b"]
+        del graph["b"]
+        assert graph.search_index.search("payments", 5) == []
+        assert len(graph.search_index) == 1
+        graph.clear()
+        assert graph.search_index.search("invoices", 5) == []
+
+
+async def _search(graph, agent_id="admin", **arguments):
+    with patch.object(task_tools.g, "tasks", graph), patch.object(
+        task_tools, "get_agent_id", return_value=agent_id
+    ), patch.object(
+        task_tools, "verify_token", return_value=agent_id == "admin"
+    ), patch.object(task_tools, "log_audit"):
+        result = await task_tools.search_tasks_tool_impl({"token": "t", **arguments})
+    return result[0].text
+
+
+class TestSearchTasksTool:
+    """Test the search_tasks tool over the index."""
+
+    @pytest.mark.asyncio
+    async def test_results_ranked_and_filtered(self):
+        graph = TaskGraph(
+            {
+                "a": _task("a", "Database migration", "Move tables"),
+                "b": _task("b", "Docs", "Describe the database", status="completed"),
+                "c": _task("c", "Database cleanup", assigned_to="agent2"),
+            }
+        )
+        text = await _search(graph, search_query="database")
+        assert text.index("(ID: a)") < text.index("(ID: b)")
+        assert "Matched: title (1 terms)" in text
+
+        text = await _search(graph, search_query="database", status_filter="completed")
+        assert "(ID: b)" in text and "(ID: a)" not in text
+
+        text = await _search(graph, agent_id="agent2", search_query="database")
+        assert "(ID: c)" in text and "(ID: a)" not in text
+
+    @pytest.mark.asyncio
+    async def test_short_terms_and_no_hits(self):
+        graph = TaskGraph({"a": _task("a", "Database")})
+        assert "longer than 2 characters" in await _search(graph, search_query="db ui")
+        assert "No tasks found containing" in await _search(graph, search_query="network")
+
+
+class TestDeleteTask:
+    """Test that deleting a task drops it from g.tasks and the search index."""
+
+    @pytest.mark.asyncio
+    async def test_deleted_tasks_leave_the_graph(self):
+        graph = TaskGraph(
+            {
+                "p": _task("p", "Parent task"),
+                "a": _task("a", "Billing export", parent_task="p"),
+                "c": _task("c", "Billing child", parent_task="a"),
+                "d": _task("d", "Uses export", depends_on_tasks=["a"]),
+            }
+        )
+        graph["p"]["child_tasks"] = ["a"]
+        cursor = MagicMock()
+        cursor.execute = AsyncMock()
+        cursor.rowcount = 1
+        cursor.fetchone.side_effect = [
+            {"task_id": "a", "title": "Billing export", "parent_task": "p"},  # the task
+            {"child_tasks": '["a"]'},  # its parent
+        ]
+        cursor.fetchall.side_effect = [
+            [{"task_id": "c"}],  # children
+            [{"task_id": "d", "title": "Uses export", "depends_on_tasks": '["a"]'}],  # dependents
+        ]
+        conn = MagicMock(
+            cursor=MagicMock(return_value=cursor), commit=AsyncMock(), rollback=AsyncMock()
+        )
+
+        with patch.object(task_tools.g, "tasks", graph), patch.object(
+            task_tools, "verify_token", return_value=True
+        ), patch.object(
+            task_tools, "get_async_db_connection", AsyncMock(return_value=conn)
+        ), patch.object(task_tools, "return_async_connection", AsyncMock()), patch.object(
+            task_tools, "log_agent_action_to_db_async", AsyncMock()
+        ):
+            result = await task_tools.delete_task_tool_impl(
+                {"token": "t", "task_id": "a", "force_delete": True}
+            )
+
+        assert "deleted successfully" in result[0].text
+        assert "a" not in graph and "c" not in graph
+        assert graph.search_index.search("billing", 5) == []
+        assert graph["p"]["child_tasks"] == [] and graph.children("p") == []
+        assert graph["d"]["depends_on_tasks"] == [] and not graph.is_blocked("d")
+        # Bumped like the DB rows, so cached detailed views are not reused
+        assert graph["p"]["updated_at"] != "2026-01-01T00:00:00"
+        assert graph["d"]["updated_at"] == graph["p"]["updated_at"]
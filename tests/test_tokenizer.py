@@ -0,0 +1,111 @@
+"""
+Tests for the shared tokenizer and token budgets.
+"""
+from unittest.mock import MagicMock, patch
+
+from agent_mcp.features.rag.query import _pack_section
+from agent_mcp.utils import tokenizer
+from agent_mcp.utils.tokenizer import TokenBudget, TokenCounter, get_token_counter
+
+
+class _WordEncoding:
+    """Stand-in encoding: one token per whitespace-separated word or newline."""
+
+    def __init__(self):
+        self.encode_calls = 0
+        self.batch_calls = 0
+
+    def _tokens(self, text):
+        return text.replace("\n", " \n ").split(" ")
+
+    def encode(self, text, disallowed_special=()):
+        self.encode_calls += 1
+        return [t for t in self._tokens(text) if t]
+
+    def encode_batch(self, texts, disallowed_special=()):
+        self.batch_calls += 1
+        return [[t for t in self._tokens(text) if t] for text in texts]
+
+
+LONG_TEXT = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+
+
+class TestTokenCounter:
+    """Test memoized and batched counting."""
+
+    def test_counts_are_memoized(self):
+        encoding = _WordEncoding()
+        counter = TokenCounter(encoding)
+        assert counter.count(LONG_TEXT) == 10
+        assert counter.count(LONG_TEXT) == 10
+        assert encoding.encode_calls == 1
+        assert counter.count("") == 0
+
+    def test_batch_encodes_only_misses_once(self):
+        encoding = _WordEncoding()
+        counter = TokenCounter(encoding)
+        counter.count(LONG_TEXT)
+        other = LONG_TEXT + " lambda mu"
+        assert counter.count_batch([LONG_TEXT, other, "", other]) == [10, 12, 0, 12]
+        assert encoding.batch_calls == 1
+        assert counter.count(other) == 12
+        assert encoding.encode_calls == 1
+
+    def test_cache_is_bounded(self):
+        counter = TokenCounter(_WordEncoding(), cache_size=2)
+        for suffix in ("one", "two", "three"):
+            counter.count(f"{LONG_TEXT} {suffix}")
+        assert len(counter._cache) == 2
+
+    def test_heuristic_without_encoding(self):
+        counter = TokenCounter(None)
+        assert not counter.exact
+        assert counter.count("x" * 40) == 10
+        assert counter.count_batch(["x" * 8, "x" * 40]) == [2, 10]
+
+    def test_encoding_loaded_once_and_failure_falls_back(self):
+        fake_tiktoken = MagicMock()
+        fake_tiktoken.encoding_name_for_model.return_value = "test_base"
+        fake_tiktoken.get_encoding.side_effect = OSError("no network")
+        with patch.object(tokenizer, "tiktoken", fake_tiktoken), patch.object(
+            tokenizer, "_counters", {}
+        ):
+            first = get_token_counter("gpt-4")
+            second = get_token_counter("gpt-4")
+        assert first is second
+        assert not first.exact
+        fake_tiktoken.get_encoding.assert_called_once_with("test_base")
+
+
+class TestTokenBudget:
+    """Test packing against a limit."""
+
+    def test_separators_are_counted(self):
+        budget = TokenBudget(5, TokenCounter(_WordEncoding()), separator="\n")
+        assert budget.try_add("a b")
+        assert budget.used == 2
+        # 2 tokens plus the separator would make 5
+        assert budget.try_add("c d")
+        assert budget.used == 5
+        assert not budget.try_add("e")
+        assert budget.remaining == 0
+
+
+class TestPackSection:
+    """Test RAG context sections packed to the token budget."""
+
+    def test_reserves_room_for_closing_lines(self):
+        budget = TokenBudget(12, TokenCounter(_WordEncoding()), separator="\n")
+        parts, included = _pack_section(
+            budget, "Header", ["one two", "three four", "five six"], footer="End", truncated_note="Cut"
+        )
+        assert parts == ["Header", "one two", "three four", "Cut", "End"]
+        assert included == 2
+        assert budget.used == 11
+        joined = "\n".join(parts)
+        assert len(_WordEncoding().encode(joined)) == budget.used
+
+    def test_section_omitted_when_nothing_fits(self):
+        budget = TokenBudget(3, TokenCounter(_WordEncoding()), separator="\n")
+        assert _pack_section(budget, "Header", ["one two three"], footer="End") == ([], 0)
+        assert budget.used == 0
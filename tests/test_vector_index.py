@@ -0,0 +1,131 @@
+"""
+Tests for the rag_embeddings vector index manager.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agent_mcp.db import vector_index
+from agent_mcp.db.vector_index import (
+    VectorIndexSpec,
+    ivfflat_lists_for_rows,
+    maintain_vector_index,
+    needs_rebuild,
+    parse_index_definition,
+    search_settings_sql,
+)
+
+
+def _settings(**overrides):
+    values = {
+        "rag_vector_index_type": "hnsw",
+        "rag_hnsw_m": 16,
+        "rag_hnsw_ef_construction": 64,
+        "rag_vector_search_mode": "balanced",
+    }
+    values.update(overrides)
+    return MagicMock(**values)
+
+
+class TestIndexSpecs:
+    """Test sizing, parsing and rebuild decisions."""
+
+    @pytest.mark.parametrize(
+        "rows,lists", [(0, 1), (50_000, 50), (1_000_000, 1000), (4_000_000, 2000)]
+    )
+    def test_ivfflat_lists_for_rows(self, rows, lists):
+        assert ivfflat_lists_for_rows(rows) == lists
+
+    def test_parse_index_definition(self):
+        assert parse_index_definition(
+            "CREATE INDEX idx_rag_embeddings_vector ON public.rag_embeddings "
+            "USING hnsw (embedding vector_cosine_ops) WITH (m='24', ef_construction='128')"
+        ) == VectorIndexSpec("hnsw", m=24, ef_construction=128)
+        assert parse_index_definition(
+            "CREATE INDEX idx_rag_embeddings_vector ON public.rag_embeddings "
+            "USING ivfflat (embedding vector_cosine_ops) WITH (lists='100')"
+        ) == VectorIndexSpec("ivfflat", lists=100)
+        assert parse_index_definition("CREATE INDEX x ON t USING btree (a)") is None
+
+    def test_needs_rebuild(self):
+        hnsw = VectorIndexSpec("hnsw", m=16, ef_construction=64)
+        assert needs_rebuild(None, hnsw)
+        assert needs_rebuild(VectorIndexSpec("ivfflat", lists=100), hnsw)
+        assert not needs_rebuild(hnsw, hnsw)
+        assert needs_rebuild(VectorIndexSpec("hnsw", m=32, ef_construction=64), hnsw)
+        assert not needs_rebuild(
+            VectorIndexSpec("ivfflat", lists=100), VectorIndexSpec("ivfflat", lists=150)
+        )
+        assert needs_rebuild(
+            VectorIndexSpec("ivfflat", lists=100), VectorIndexSpec("ivfflat", lists=400)
+        )
+
+
+class TestSearchSettings:
+    """Test per-query ef_search/probes."""
+
+    def test_modes_and_k_floor(self):
+        with patch.object(vector_index, "get_settings", return_value=_settings()), patch.object(
+            vector_index, "_current_index", VectorIndexSpec("ivfflat", lists=400)
+        ):
+            assert search_settings_sql(13) == (
+                "SET LOCAL hnsw.ef_search = 100; SET LOCAL ivfflat.probes = 20;\n"
+            )
+            assert "hnsw.ef_search = 500;" in search_settings_sql(500)
+        with patch.object(
+            vector_index, "get_settings", return_value=_settings(rag_vector_search_mode="fast")
+        ), patch.object(vector_index, "_current_index", None):
+            assert search_settings_sql(13) == (
+                "SET LOCAL hnsw.ef_search = 40; SET LOCAL ivfflat.probes = 5;\n"
+            )
+
+
+class TestMaintainVectorIndex:
+    """Test the concurrent rebuild."""
+
+    def _conn(self, indexdef, row_count):
+        conn = MagicMock()
+        conn.autocommit = False
+        cursor = conn.cursor.return_value
+        cursor.fetchone.side_effect = [
+            {"indexdef": indexdef} if indexdef else None,
+            {"estimate": row_count},
+        ]
+        return conn, cursor
+
+    def test_replaces_outdated_index_concurrently(self):
+        conn, cursor = self._conn(
+            "CREATE INDEX idx_rag_embeddings_vector ON public.rag_embeddings "
+            "USING ivfflat (embedding vector_cosine_ops) WITH (lists='100')",
+            200_000,
+        )
+        with patch.object(vector_index, "get_settings", return_value=_settings()):
+            assert maintain_vector_index(conn) is True
+
+        statements = [c.args[0] for c in cursor.execute.call_args_list[2:]]
+        assert statements == [
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_rag_embeddings_vector_new",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_rag_embeddings_vector_new "
+            "ON rag_embeddings USING hnsw (embedding vector_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64)",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_rag_embeddings_vector",
+            "ALTER INDEX idx_rag_embeddings_vector_new RENAME TO idx_rag_embeddings_vector",
+        ]
+        assert conn.autocommit is False  # Restored after the build
+
+    def test_matching_index_is_left_alone(self):
+        conn, cursor = self._conn(
+            "CREATE INDEX idx_rag_embeddings_vector ON public.rag_embeddings "
+            "USING hnsw (embedding vector_cosine_ops) WITH (m='16', ef_construction='64')",
+            200_000,
+        )
+        with patch.object(vector_index, "get_settings", return_value=_settings()):
+            assert maintain_vector_index(conn) is False
+        assert cursor.execute.call_count == 2
+
+    def test_ivfflat_waits_for_data(self):
+        conn, cursor = self._conn(None, 0)
+        with patch.object(
+            vector_index, "get_settings", return_value=_settings(rag_vector_index_type="ivfflat")
+        ):
+            assert maintain_vector_index(conn) is False
@@ -0,0 +1,131 @@
+"""
+Tests for view_tasks pagination: stable cursors, per-task memoized
+formatting and the token budget.
+"""
+import re
+from unittest.mock import patch
+
+import pytest
+
+from agent_mcp.core.task_graph import TaskGraph
+from agent_mcp.tools import task_tools
+from agent_mcp.utils.tokenizer import count_tokens
+
+
+def _graph(count):
+    return TaskGraph(
+        {
+            f"task_{i:04d}": {
+                "task_id": f"task_{i:04d}",
+                "title": f"Task {i}",
+                "description": "Work item " * 20,
+                "status": "pending",
+                "priority": "medium",
+                "assigned_to": "agent1",
+                "created_at": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}",
+                "updated_at": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}",
+                "notes": [],
+            }
+            for i in range(count)
+        }
+    )
+
+
+async def _view(graph, **arguments):
+    with patch.object(task_tools.g, "tasks", graph), patch.object(
+        task_tools, "get_agent_id", return_value="admin"
+    ), patch.object(task_tools, "verify_token", return_value=True), patch.object(
+        task_tools, "log_audit"
+    ):
+        result = await task_tools.view_tasks_tool_impl({"token": "t", **arguments})
+    return result[0].text
+
+
+def _page_ids(text):
+    return re.findall(r"^ID: (task_\d+)", text, re.MULTILINE)
+
+
+def _next_cursor(text):
+    match = re.search(r"cursor='([^']+)'", text)
+    return match.group(1) if match else None
+
+
+@pytest.fixture(autouse=True)
+def fresh_view_cache():
+    task_tools._task_view_cache.clear()
+    yield
+    task_tools._task_view_cache.clear()
+
+
+class TestCursorPagination:
+    """Test that cursors walk every task exactly once."""
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_all_tasks_within_budget(self):
+        graph = _graph(120)
+        seen, cursor = [], None
+        while True:
+            arguments = {"max_tokens": 1500, "summary_mode": True}
+            if cursor:
+                arguments["cursor"] = cursor
+            text = await _view(graph, **arguments)
+            assert count_tokens(text, "gpt-4") <= 1500
+            seen.extend(_page_ids(text))
+            cursor = _next_cursor(text)
+            if cursor is None:
+                break
+        # Newest first, no gaps or repeats
+        assert seen == sorted(graph, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_cursor_survives_deleting_its_task(self):
+        graph = _graph(40)
+        text = await _view(graph, max_tokens=1000, summary_mode=True)
+        last_id = _page_ids(text)[-1]
+        del graph[last_id]
+        next_page = await _view(graph, max_tokens=1000, summary_mode=True, cursor=_next_cursor(text))
+        assert _page_ids(next_page)[0] == f"task_{int(last_id[5:]) - 1:04d}"
+
+    @pytest.mark.asyncio
+    async def test_start_after_and_bad_cursor(self):
+        graph = _graph(10)
+        text = await _view(graph, summary_mode=True, start_after="task_0005")
+        assert _page_ids(text) == ["task_0004", "task_0003", "task_0002", "task_0001", "task_0000"]
+        # A cursor for another sort order is ignored
+        cursor = task_tools._encode_view_cursor("priority", (2, "task_0005"))
+        assert len(_page_ids(await _view(graph, summary_mode=True, cursor=cursor))) == 10
+
+    @pytest.mark.asyncio
+    async def test_cursor_with_wrong_value_type_is_ignored(self):
+        graph = _graph(10)
+        for sort_by, position in [
+            ("priority", (None, "x")),
+            ("priority", ("high", "x")),
+            ("status", (True, "x")),
+            ("created_at", (5, "x")),
+            ("created_at", ("2026-01-01", None)),
+        ]:
+            cursor = task_tools._encode_view_cursor(sort_by, position)
+            assert task_tools._decode_view_cursor(cursor, sort_by) is None
+            text = await _view(graph, summary_mode=True, sort_by=sort_by, cursor=cursor)
+            assert len(_page_ids(text)) == 10
+        cursor = task_tools._encode_view_cursor("priority", (2, "task_0005"))
+        assert task_tools._decode_view_cursor(cursor, "priority") == (2, "task_0005")
+
+
+class TestFormattingMemo:
+    """Test that formatted entries are reused until the task changes."""
+
+    @pytest.mark.asyncio
+    async def test_entries_formatted_once_per_version(self):
+        graph = _graph(5)
+        with patch.object(
+            task_tools, "_format_task_summary", wraps=task_tools._format_task_summary
+        ) as fmt:
+            await _view(graph, summary_mode=True)
+            await _view(graph, summary_mode=True)
+            assert fmt.call_count == 5
+            graph["task_0002"].update(status="completed", updated_at="2026-02-01T00:00:00")
+            text = await _view(graph, summary_mode=True)
+            assert fmt.call_count == 6
+        assert "Status: completed" in text